@@ -0,0 +1,40 @@
+"""add cloudflare zone index
+
+Revision ID: 026_add_cloudflare_zone_index
+Revises: 025_add_skip_flags
+Create Date: 2026-10-16
+
+Persistent cross-account zone index (domain name -> zone_id, owning account,
+status, nameservers) so zone lookups survive restarts without re-querying
+every Cloudflare account per domain.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '026_add_cloudflare_zone_index'
+down_revision: Union[str, None] = '025_add_skip_flags'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS cloudflare_zones (
+            zone_id VARCHAR(64) PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            account_email VARCHAR(255) NOT NULL,
+            status VARCHAR(50) NOT NULL,
+            nameservers JSONB NOT NULL DEFAULT '[]'::jsonb,
+            last_seen_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    """)
+    op.execute("CREATE INDEX IF NOT EXISTS ix_cloudflare_zones_name ON cloudflare_zones (name)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_cloudflare_zones_account_email ON cloudflare_zones (account_email)")
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS cloudflare_zones")
@@ -0,0 +1,29 @@
+"""add NS propagation check schedule to domains
+
+Revision ID: 027_add_ns_check_schedule
+Revises: 026_add_cloudflare_zone_index
+Create Date: 2026-10-16
+
+Per-domain next-check time and attempt count for the pipeline's step 3
+propagation scheduler, so backoff state survives restarts.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '027_add_ns_check_schedule'
+down_revision: Union[str, None] = '026_add_cloudflare_zone_index'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE domains ADD COLUMN IF NOT EXISTS ns_next_check_at TIMESTAMPTZ")
+    op.execute("ALTER TABLE domains ADD COLUMN IF NOT EXISTS ns_check_attempts INTEGER NOT NULL DEFAULT 0")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE domains DROP COLUMN IF EXISTS ns_check_attempts")
+    op.execute("ALTER TABLE domains DROP COLUMN IF EXISTS ns_next_check_at")
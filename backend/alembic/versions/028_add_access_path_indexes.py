@@ -0,0 +1,66 @@
+"""add composite and partial indexes for batch/tenant/status access paths
+
+Revision ID: 028_add_access_path_indexes
+Revises: 027_add_ns_check_schedule
+Create Date: 2026-10-16
+
+The wizard, pipeline, upload and stats queries filter domains, tenants and
+mailboxes by batch_id / tenant_id plus a status or progress flag, but only
+pipeline_logs.batch_id was indexed. These indexes keep those lookups at
+index-scan cost as mailboxes grow into the hundreds of thousands; the
+partial ones cover only the rows still waiting for work.
+
+Built CONCURRENTLY (outside the migration transaction) so the tables stay
+writable while the indexes are created.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '028_add_access_path_indexes'
+down_revision: Union[str, None] = '027_add_ns_check_schedule'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = [
+    # domains
+    ("ix_domains_batch_id_status", "domains (batch_id, status)"),
+    ("ix_domains_tenant_id", "domains (tenant_id)"),
+    ("ix_domains_status", "domains (status)"),
+    ("ix_domains_batch_ns_pending",
+     "domains (batch_id, ns_next_check_at) WHERE ns_propagated_at IS NULL AND cloudflare_zone_id IS NOT NULL"),
+    # tenants
+    ("ix_tenants_batch_id_status", "tenants (batch_id, status)"),
+    ("ix_tenants_batch_id_step6_complete", "tenants (batch_id, step6_complete)"),
+    ("ix_tenants_domain_id", "tenants (domain_id)"),
+    ("ix_tenants_status", "tenants (status)"),
+    ("ix_tenants_batch_step6_pending", "tenants (batch_id) WHERE step6_complete IS NOT TRUE"),
+    # mailboxes
+    ("ix_mailboxes_batch_id_status", "mailboxes (batch_id, status)"),
+    ("ix_mailboxes_batch_id_email", "mailboxes (batch_id, email)"),
+    ("ix_mailboxes_tenant_id_email", "mailboxes (tenant_id, email)"),
+    ("ix_mailboxes_status", "mailboxes (status)"),
+    ("ix_mailboxes_pending_upload",
+     "mailboxes (batch_id, email) WHERE setup_complete AND NOT uploaded_to_sequencer"),
+    ("ix_mailboxes_instantly_pending", "mailboxes (batch_id) WHERE NOT instantly_uploaded"),
+    ("ix_mailboxes_smartlead_pending", "mailboxes (batch_id) WHERE NOT smartlead_uploaded"),
+    # pipeline_logs
+    ("ix_pipeline_logs_batch_id_created_at", "pipeline_logs (batch_id, created_at)"),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, definition in INDEXES:
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {definition}")
+        for table in ("domains", "tenants", "mailboxes", "pipeline_logs"):
+            op.execute(f"ANALYZE {table}")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, _ in reversed(INDEXES):
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
@@ -0,0 +1,168 @@
+"""add batch counters
+
+Revision ID: 029_add_batch_counters
+Revises: 028_add_access_path_indexes
+Create Date: 2026-10-16
+
+One row per batch with its per-stage domain/tenant/mailbox counts, so status
+polling reads one row instead of recounting the batch. Statement-level AFTER
+triggers on domains, tenants and mailboxes apply the net change of each
+statement (from its transition tables) in the same transaction: one upsert per
+touched batch per statement, and none when no counter moved.
+
+Locking: every statement that moves a counter upserts its batch's single
+batch_counters row, which row-locks it until the writing transaction commits.
+Concurrent writers to the same batch's domains/tenants/mailboxes therefore
+serialize on that row (the second waits for the first to commit); writers in
+different batches do not contend. Keep transactions that write many rows of a
+busy batch short, and write batches in a consistent order when one transaction
+touches several, so two of them cannot deadlock on each other's rows.
+
+The predicates mirror app.services.batch_counters; rebuild with
+`python -m scripts.rebuild_batch_counters` if they ever drift.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '029_add_batch_counters'
+down_revision: Union[str, None] = '028_add_access_path_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _in(*values: str) -> str:
+    return "r.status::text IN (" + ", ".join(f"'{v}'" for v in values) + ")"
+
+
+DOMAIN_ZONE_STAGE = (
+    "zone_created", "ns_updating", "ns_propagating", "ns_propagated", "dns_configuring",
+    "tenant_linked", "pending_m365", "m365_verified", "pending_dkim", "active",
+)
+TENANT_DKIM_STAGE = ("dkim_enabled", "mailboxes_creating", "mailboxes_configuring", "configuring", "active")
+
+# table -> counter column -> predicate over the changed row `r`
+COUNTERS = {
+    "domains": {
+        "domains_total": "TRUE",
+        "domains_zone_created": "r.cloudflare_zone_id IS NOT NULL",
+        "domains_ns_propagated": "r.status::text = 'ns_propagated'",
+        "domains_redirect_configured": "r.redirect_configured IS TRUE",
+        "domains_zone_stage": _in(*DOMAIN_ZONE_STAGE),
+        "domains_ns_stage": _in(*DOMAIN_ZONE_STAGE[3:]),
+    },
+    "tenants": {
+        "tenants_total": "TRUE",
+        "tenants_linked": "r.domain_id IS NOT NULL",
+        "tenants_domain_verified": "r.status::text = 'domain_verified'",
+        "tenants_dkim_enabled": "r.status::text = 'dkim_enabled'",
+        "tenants_verified_stage": _in("domain_verified", "dns_configuring", "dkim_configuring", *TENANT_DKIM_STAGE),
+        "tenants_dkim_stage": _in(*TENANT_DKIM_STAGE),
+        "tenants_step5_complete": "r.step5_complete IS TRUE",
+        "tenants_step6_complete": "r.step6_complete IS TRUE",
+        "tenants_step7_complete": "r.step7_complete IS TRUE",
+        "tenants_step7_failed": (
+            "r.step6_complete IS TRUE AND r.step7_complete IS NOT TRUE AND r.step7_error IS NOT NULL"
+        ),
+    },
+    "mailboxes": {
+        "mailboxes_total": "TRUE",
+        "mailboxes_pending": "r.status::text = 'pending'",
+        "mailboxes_ready": "r.status::text = 'ready'",
+        "mailboxes_ready_stage": _in("ready", "warming", "configured"),
+    },
+}
+
+# op -> (transition tables the trigger declares, rows contributing +1 / -1)
+OPS = {
+    "insert": ("REFERENCING NEW TABLE AS new_rows", ["SELECT 1 AS _sign, n.* FROM new_rows n"]),
+    "update": (
+        "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows",
+        ["SELECT 1 AS _sign, n.* FROM new_rows n", "SELECT -1 AS _sign, o.* FROM old_rows o"],
+    ),
+    "delete": ("REFERENCING OLD TABLE AS old_rows", ["SELECT -1 AS _sign, o.* FROM old_rows o"]),
+}
+
+
+def _trigger_function_sql(table: str, op_name: str) -> str:
+    counters = COUNTERS[table]
+    columns = ", ".join(counters)
+    deltas = ",\n                ".join(
+        f"sum(CASE WHEN {predicate} THEN r._sign ELSE 0 END) AS {name}"
+        for name, predicate in counters.items()
+    )
+    moved = " OR ".join(f"d.{name} <> 0" for name in counters)
+    apply = ", ".join(f"{name} = c.{name} + EXCLUDED.{name}" for name in counters)
+    rows = " UNION ALL ".join(OPS[op_name][1])
+    return f"""
+        CREATE OR REPLACE FUNCTION batch_counters_{table}_{op_name}() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO batch_counters AS c (batch_id, {columns})
+            SELECT d.batch_id, {columns} FROM (
+                SELECT r.batch_id,
+                {deltas}
+                FROM ({rows}) r
+                WHERE r.batch_id IN (SELECT id FROM setup_batches)
+                GROUP BY r.batch_id
+            ) d
+            WHERE {moved}
+            ON CONFLICT (batch_id) DO UPDATE SET {apply}, updated_at = now();
+            RETURN NULL;
+        END
+        $$
+    """
+
+
+def _backfill_sql(table: str) -> str:
+    counters = COUNTERS[table]
+    aggregates = ", ".join(
+        f"count(*) FILTER (WHERE {predicate}) AS {name}" for name, predicate in counters.items()
+    )
+    assignments = ", ".join(f"{name} = a.{name}" for name in counters)
+    return f"""
+        UPDATE batch_counters c SET {assignments}
+        FROM (SELECT r.batch_id, {aggregates} FROM {table} r WHERE r.batch_id IS NOT NULL GROUP BY r.batch_id) a
+        WHERE c.batch_id = a.batch_id
+    """
+
+
+def upgrade() -> None:
+    columns = ",\n            ".join(
+        f"{name} INTEGER NOT NULL DEFAULT 0" for counters in COUNTERS.values() for name in counters
+    )
+    op.execute(f"""
+        CREATE TABLE IF NOT EXISTS batch_counters (
+            batch_id UUID PRIMARY KEY REFERENCES setup_batches(id) ON DELETE CASCADE,
+            {columns},
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    """)
+
+    # Triggers first: they lock the tables against writes until this migration
+    # commits, so the backfill below can't miss a concurrent change
+    for table in COUNTERS:
+        for op_name, (referencing, _) in OPS.items():
+            op.execute(_trigger_function_sql(table, op_name))
+            op.execute(f"DROP TRIGGER IF EXISTS {table}_batch_counters_{op_name} ON {table}")
+            op.execute(f"""
+                CREATE TRIGGER {table}_batch_counters_{op_name}
+                AFTER {op_name.upper()} ON {table}
+                {referencing}
+                FOR EACH STATEMENT EXECUTE FUNCTION batch_counters_{table}_{op_name}()
+            """)
+
+    op.execute("DELETE FROM batch_counters")
+    op.execute("INSERT INTO batch_counters (batch_id) SELECT id FROM setup_batches")
+    for table in COUNTERS:
+        op.execute(_backfill_sql(table))
+
+
+def downgrade() -> None:
+    for table in COUNTERS:
+        for op_name in OPS:
+            op.execute(f"DROP TRIGGER IF EXISTS {table}_batch_counters_{op_name} ON {table}")
+            op.execute(f"DROP FUNCTION IF EXISTS batch_counters_{table}_{op_name}()")
+    op.execute("DROP TABLE IF EXISTS batch_counters")
@@ -0,0 +1,36 @@
+"""add keyset index for the upload mailbox list
+
+Revision ID: 030_add_upload_keyset_index
+Revises: 029_add_batch_counters
+Create Date: 2026-10-16
+
+GET /upload/mailboxes pages with a (email, id) cursor. Across all batches the
+default "pending upload" view is ordered by email with no batch_id to lead
+with, so it gets its own partial index: the seek to the next page then reads
+only pending rows instead of walking the email index past uploaded ones.
+
+Built CONCURRENTLY, as in 028.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '030_add_upload_keyset_index'
+down_revision: Union[str, None] = '029_add_batch_counters'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_mailboxes_pending_upload_email_id "
+            "ON mailboxes (email, id) WHERE setup_complete AND NOT uploaded_to_sequencer"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_mailboxes_pending_upload_email_id")
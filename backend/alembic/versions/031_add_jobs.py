@@ -0,0 +1,61 @@
+"""add jobs table
+
+Revision ID: 031_add_jobs
+Revises: 030_add_upload_keyset_index
+Create Date: 2026-10-16
+
+Durable queue for background work (app.services.job_queue). Runners claim
+rows with SELECT ... FOR UPDATE SKIP LOCKED under a lease they renew by
+heartbeat; a job whose lease lapses is claimed again and resumes from its
+checkpoint. Two partial indexes: claim order over active jobs only, and at
+most one active job per (kind, key).
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '031_add_jobs'
+down_revision: Union[str, None] = '030_add_upload_keyset_index'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS jobs (
+            id UUID PRIMARY KEY,
+            kind VARCHAR(50) NOT NULL,
+            key VARCHAR(255),
+            payload JSONB NOT NULL DEFAULT '{}'::jsonb,
+            status VARCHAR(20) NOT NULL DEFAULT 'queued',
+            priority INTEGER NOT NULL DEFAULT 0,
+            run_after TIMESTAMPTZ NOT NULL DEFAULT now(),
+            attempts INTEGER NOT NULL DEFAULT 0,
+            max_attempts INTEGER NOT NULL DEFAULT 3,
+            lease_owner VARCHAR(255),
+            lease_expires_at TIMESTAMPTZ,
+            heartbeat_at TIMESTAMPTZ,
+            cancel_requested BOOLEAN NOT NULL DEFAULT FALSE,
+            checkpoint JSONB,
+            progress JSONB,
+            started_at TIMESTAMPTZ,
+            finished_at TIMESTAMPTZ,
+            last_error TEXT,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    """)
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_jobs_claim ON jobs (priority, created_at) "
+        "WHERE status IN ('queued', 'running')"
+    )
+    op.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_jobs_active_kind_key ON jobs (kind, key) "
+        "WHERE status IN ('queued', 'running') AND key IS NOT NULL"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS jobs")
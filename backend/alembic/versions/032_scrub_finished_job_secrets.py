@@ -0,0 +1,42 @@
+"""blank credentials kept in the payloads of finished jobs
+
+Revision ID: 032_scrub_finished_job_secrets
+Revises: 031_add_jobs
+Create Date: 2026-10-16
+
+Auto-run and sequencer upload jobs carry passwords / API keys in their
+payload. New jobs list those keys in payload._secret_keys and the queue blanks
+them when the job ends; this clears the ones finished before that existed.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '032_scrub_finished_job_secrets'
+down_revision: Union[str, None] = '031_add_jobs'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SECRET_KEYS = {
+    "auto_run": ["new_password"],
+    "instantly_upload": ["instantly_email", "instantly_password", "instantly_api_key"],
+    "smartlead_upload": ["api_key", "oauth_url"],
+}
+
+
+def upgrade() -> None:
+    for kind, keys in SECRET_KEYS.items():
+        blanked = ", ".join(f"'{key}', 'null'::jsonb" for key in keys)
+        op.execute(f"""
+            UPDATE jobs
+            SET payload = payload || jsonb_build_object({blanked})
+            WHERE kind = '{kind}' AND status NOT IN ('queued', 'running')
+        """)
+
+
+def downgrade() -> None:
+    # The values are gone; nothing to restore
+    pass
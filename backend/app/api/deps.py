@@ -4,8 +4,8 @@ from collections.abc import AsyncGenerator
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import SessionLocal
-from app.services.cloudflare import CloudflareService
+from app.db.session import ReadSessionLocal, SessionLocal
+from app.services.cloudflare import CloudflareService, get_shared_cloudflare_service
 
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
@@ -20,8 +20,17 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             await session.close()
 
 
+async def get_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Async generator that yields a read-only session from the read pool.
+    For GET endpoints that never write (status, stats, lists).
+    """
+    async with ReadSessionLocal() as session:
+        yield session
+
+
 def get_cloudflare_service() -> CloudflareService:
     """
-    Returns a CloudflareService instance.
+    Returns the shared primary-account CloudflareService (reuses its pooled client).
     """
-    return CloudflareService()
\ No newline at end of file
+    return get_shared_cloudflare_service()
\ No newline at end of file
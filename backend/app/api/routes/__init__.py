@@ -11,6 +11,7 @@ from app.api.routes.domain_lookup import router as domain_lookup_router
 from app.api.routes.pipeline import router as pipeline_router
 from app.api.routes.step8_endpoints import router as step8_endpoints_router
 from app.api.routes.domain_checker import router as domain_checker_router
+from app.api.routes.internal import router as internal_router
 
 __all__ = [
     "domains_router",
@@ -26,4 +27,5 @@ __all__ = [
     "pipeline_router",
     "step8_endpoints_router",
     "domain_checker_router",
+    "internal_router",
 ]
@@ -12,21 +12,23 @@ from __future__ import annotations
 
 import csv
 import io
-import uuid
 import logging
 from datetime import datetime
 from typing import Optional
 from uuid import UUID
 
-from fastapi import APIRouter, BackgroundTasks, Depends, File, Form, UploadFile, HTTPException
+from fastapi import APIRouter, Depends, File, Form, UploadFile, HTTPException
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_db
+from app.api.deps import get_db, get_read_db
 from app.db.session import SessionLocal
+from app.models.job import JobStatus
 from app.models.tenant import Tenant
+from app.services import job_queue
+from app.services.job_queue import JobContext, job_handler
 from app.services.selenium.domain_checker import (
     check_tenants_parallel,
     TenantCheckResult,
@@ -36,8 +38,11 @@ from app.services.selenium.domain_checker import (
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/v1/domain-checker", tags=["domain-checker"])
 
-# In-memory job storage (same pattern as existing step4_jobs, step8_jobs in wizard.py)
+# In-memory progress of the checks running in this process (same pattern as
+# step4_jobs, step8_jobs in wizard.py); the checks are "domain_check" jobs in
+# the durable job queue, keyed by the queue's job id
 checker_jobs: dict[str, dict] = {}
+CHECKER_JOB = "domain_check"
 
 
 class CheckerJobStatus(BaseModel):
@@ -54,13 +59,57 @@ class CheckerJobStatus(BaseModel):
 # === ENDPOINTS ===
 
 
+def _new_checker_job(total: int) -> dict:
+    return {
+        "status": "running",
+        "total": total,
+        "processed": 0,
+        "results": [],
+        "started_at": datetime.utcnow().isoformat(),
+        "completed_at": None,
+    }
+
+
+async def _start_checker_job(db: AsyncSession, tenants: list[dict], headless: bool, max_workers: int) -> str:
+    """Queue a domain check and commit; returns its job id."""
+    job = await job_queue.enqueue(
+        db,
+        CHECKER_JOB,
+        {"tenants": tenants, "headless": headless, "max_workers": max_workers},
+    )
+    await db.commit()
+    job_id = str(job.id)
+    checker_jobs[job_id] = _new_checker_job(len(tenants))
+    job_queue.wake_runner()
+    return job_id
+
+
+async def _load_checker_job(job_id: str, db: AsyncSession) -> Optional[dict]:
+    """Progress of a check: in memory if it runs here, else as last saved to the job queue."""
+    job = checker_jobs.get(job_id)
+    if job is not None:
+        return job
+
+    queued = await job_queue.get_job(db, job_id)
+    if not queued or queued.kind != CHECKER_JOB:
+        return None
+    job = dict(queued.progress or {}) or {
+        **_new_checker_job(len(queued.payload.get("tenants", []))),
+        "started_at": queued.created_at.isoformat(),
+    }
+    if queued.status in (JobStatus.FAILED.value, JobStatus.CANCELLED.value) and job["status"] == "running":
+        job["status"] = "error"
+        job["completed_at"] = (queued.finished_at or queued.updated_at).isoformat()
+    return job
+
+
 @router.post("/check-csv")
 async def check_from_csv(
-    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     totp_secret: Optional[str] = Form(None),  # Shared TOTP if all tenants use the same
     headless: bool = Form(True),
     max_workers: int = Form(3),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Upload a CSV of tenants and check which domains are set up.
@@ -108,19 +157,8 @@ async def check_from_csv(
     # Clamp max_workers to safe range
     max_workers = max(1, min(max_workers, 10))
 
-    # Create job
-    job_id = str(uuid.uuid4())
-    checker_jobs[job_id] = {
-        "status": "running",
-        "total": len(tenants),
-        "processed": 0,
-        "results": [],
-        "started_at": datetime.utcnow().isoformat(),
-        "completed_at": None,
-    }
-
-    # Run in background
-    background_tasks.add_task(_run_checker_job, job_id, tenants, headless, max_workers)
+    # Create job (runs in the background)
+    job_id = await _start_checker_job(db, tenants, headless, max_workers)
 
     return {"job_id": job_id, "total_tenants": len(tenants)}
 
@@ -128,7 +166,6 @@ async def check_from_csv(
 @router.post("/check-batch/{batch_id}")
 async def check_from_batch(
     batch_id: UUID,
-    background_tasks: BackgroundTasks,
     headless: bool = Form(True),
     max_workers: int = Form(3),
     db: AsyncSession = Depends(get_db),
@@ -153,28 +190,18 @@ async def check_from_batch(
             "totp_secret": t.totp_secret,
         })
 
-    job_id = str(uuid.uuid4())
-    checker_jobs[job_id] = {
-        "status": "running",
-        "total": len(tenants),
-        "processed": 0,
-        "results": [],
-        "started_at": datetime.utcnow().isoformat(),
-        "completed_at": None,
-    }
-
     # Clamp max_workers to safe range
     max_workers = max(1, min(max_workers, 10))
 
-    background_tasks.add_task(_run_checker_job, job_id, tenants, headless, max_workers)
+    job_id = await _start_checker_job(db, tenants, headless, max_workers)
 
     return {"job_id": job_id, "total_tenants": len(tenants)}
 
 
 @router.get("/jobs/{job_id}", response_model=CheckerJobStatus)
-async def get_job_status(job_id: str):
+async def get_job_status(job_id: str, db: AsyncSession = Depends(get_read_db)):
     """Poll job progress."""
-    job = checker_jobs.get(job_id)
+    job = await _load_checker_job(job_id, db)
     if not job:
         raise HTTPException(404, f"Job {job_id} not found")
 
@@ -213,9 +240,9 @@ async def get_job_status(job_id: str):
 
 
 @router.get("/jobs/{job_id}/csv")
-async def download_results_csv(job_id: str):
+async def download_results_csv(job_id: str, db: AsyncSession = Depends(get_read_db)):
     """Download results as CSV."""
-    job = checker_jobs.get(job_id)
+    job = await _load_checker_job(job_id, db)
     if not job:
         raise HTTPException(404, f"Job {job_id} not found")
     if job["status"] != "complete":
@@ -290,24 +317,46 @@ async def _enrich_totp_from_db(tenants: list[dict]) -> None:
         logger.warning(f"Could not look up TOTP secrets from DB: {e}")
 
 
-async def _run_checker_job(job_id: str, tenants: list[dict], headless: bool, max_workers: int = 3):
+@job_handler(CHECKER_JOB)
+async def _run_checker_queue_job(ctx: JobContext):
+    """Job queue entry point: check the tenants not already checked by an earlier attempt."""
+    job_id = str(ctx.id)
+    tenants = ctx.payload["tenants"]
+    job = checker_jobs.setdefault(job_id, _new_checker_job(len(tenants)))
+    ctx.progress = job
+
+    done = ctx.done_items()
+    if done:
+        logger.info(f"[Job {job_id[:8]}] Resuming: {len(done)}/{len(tenants)} tenants already checked")
+        job["results"] = list(done.values())
+        job["processed"] = len(done)
+    remaining = [t for t in tenants if not ctx.is_done(t["admin_email"])]
+    await _run_checker_job(job_id, remaining, ctx.payload["headless"], ctx.payload["max_workers"], ctx)
+
+
+async def _run_checker_job(job_id: str, tenants: list[dict], headless: bool, max_workers: int = 3,
+                           ctx: Optional[JobContext] = None):
     """
     Process tenants with chunked parallel processing.
     Uses max_workers for concurrency (user-selected, default: 3).
+    Each finished tenant is recorded in the job's checkpoint (ctx), so a
+    resumed job skips it.
     """
     job = checker_jobs[job_id]
     total = job["total"]
+    already_done = job["processed"]
 
     # Enrich missing TOTP secrets from database (for CSV uploads)
     await _enrich_totp_from_db(tenants)
 
     def on_progress(processed, total, latest_result):
         """Update job state as each tenant completes."""
-        job["processed"] = processed
+        job["processed"] = already_done + processed
         if latest_result:
-            job["results"].append(
-                latest_result.to_dict() if hasattr(latest_result, 'to_dict') else latest_result
-            )
+            result = latest_result.to_dict() if hasattr(latest_result, 'to_dict') else latest_result
+            job["results"].append(result)
+            if ctx:
+                ctx.mark_done(result["admin_email"], result)
 
     try:
         logger.info(f"[Job {job_id[:8]}] Starting parallel check: {total} tenants, {max_workers} workers")
@@ -320,8 +369,9 @@ async def _run_checker_job(job_id: str, tenants: list[dict], headless: bool, max
         )
 
         # Ensure all results are in job (callback may have missed some on exceptions)
-        job["results"] = [r.to_dict() if hasattr(r, 'to_dict') else r for r in results]
-        job["processed"] = len(results)
+        results = [r.to_dict() if hasattr(r, 'to_dict') else r for r in results]
+        job["results"] = job["results"][:already_done] + results
+        job["processed"] = already_done + len(results)
         job["status"] = "complete"
         job["completed_at"] = datetime.utcnow().isoformat()
 
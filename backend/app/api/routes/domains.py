@@ -13,7 +13,7 @@ from fastapi import APIRouter, Body, Depends, File, HTTPException, Query, Upload
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_cloudflare_service, get_db
+from app.api.deps import get_cloudflare_service, get_db, get_read_db
 from app.models.domain import Domain, DomainStatus
 from app.schemas.domain import (
     BulkImportResult,
@@ -25,7 +25,8 @@ from app.schemas.domain import (
     DomainUpdate,
     NameserverGroup,
 )
-from app.services.cloudflare import CloudflareError, CloudflareService
+from app.services.cloudflare import CloudflareError, CloudflareService, cloudflare_service
+from app.services.dns_plan import dkim_records, m365_email_records, verification_txt
 
 router = APIRouter(prefix="/api/v1/domains", tags=["domains"])
 
@@ -84,7 +85,7 @@ async def list_domains(
     skip: int = Query(default=0, ge=0),
     limit: int = Query(default=100, ge=1, le=500),
     status: DomainStatus | None = Query(default=None),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ) -> list[Domain]:
     """List all domains with optional status filter."""
     query = select(Domain)
@@ -548,7 +549,7 @@ async def create_domain(
 @router.get("/{domain_id}", response_model=DomainRead)
 async def get_domain(
     domain_id: UUID,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ) -> Domain:
     """Get a single domain by ID."""
     return await get_domain_or_404(domain_id, db)
@@ -728,7 +729,8 @@ async def bulk_create_zones(
        - phase1_cname_added = True
        - phase1_dmarc_added = True
        - status = "zone_created"
-    4. Rate limit: wait 0.25s between domains (Cloudflare limit)
+    4. Domains run concurrently (cloudflare_bulk_max_workers), paced by the
+       per-account Cloudflare rate limiter
     
     After processing all domains, GROUP results by nameserver.
     
@@ -792,7 +794,7 @@ async def bulk_create_zones(
     domain_names = list(domain_map.keys())
     
     # Step 2: Call Cloudflare service for bulk zone creation
-    # This handles rate limiting (0.25s between calls) and Phase 1 DNS
+    # Runs domains concurrently under the account rate limiter; results keep input order
     cf_results = await cf_service.bulk_create_zones(domain_names)
     
     # Step 3: Process results and update database
@@ -874,6 +876,49 @@ async def bulk_create_zones(
     )
 
 
+@router.post("/dns-reconcile")
+async def reconcile_domain_dns(
+    domain_ids: List[UUID] = Body(...),
+    dry_run: bool = Body(default=True),
+    db: AsyncSession = Depends(get_db),
+) -> dict[str, Any]:
+    """
+    Plan (and optionally apply) the M365 DNS record set for many domains in one pass.
+    
+    Desired records per domain: MX, SPF, autodiscover, plus DKIM CNAMEs and the
+    verification TXT when they are known. Each zone is diffed against its current
+    records and changed with a single batch write.
+    
+    dry_run=True (the default) only returns the plans.
+    """
+    if cloudflare_service is None:
+        raise HTTPException(status_code=503, detail="Cloudflare is not configured")
+
+    result = await db.execute(select(Domain).where(Domain.id.in_(domain_ids)))
+    domains = [d for d in result.scalars().all() if d.cloudflare_zone_id]
+
+    zones = []
+    for domain in domains:
+        records = m365_email_records(domain.name)
+        if domain.dkim_selector1_cname and domain.dkim_selector2_cname:
+            records += dkim_records(domain.dkim_selector1_cname, domain.dkim_selector2_cname)
+        if domain.verification_txt_value:
+            records.append(verification_txt(domain.verification_txt_value))
+        zones.append({"zone_id": domain.cloudflare_zone_id, "domain": domain.name, "records": records})
+
+    outcomes = await cloudflare_service.reconcile_zones(zones, dry_run=dry_run)
+    return {
+        "dry_run": dry_run,
+        "total": len(outcomes),
+        "changes": sum(
+            len(o["plan"]["creates"]) + len(o["plan"]["patches"]) + len(o["plan"]["deletes"])
+            for o in outcomes if o.get("plan")
+        ),
+        "failed": sum(1 for o in outcomes if o.get("error")),
+        "zones": outcomes,
+    }
+
+
 @router.post("/check-propagation")
 async def check_ns_propagation(
     domain_ids: Optional[List[UUID]] = Body(default=None),
@@ -887,7 +932,7 @@ async def check_ns_propagation(
     
     For EACH domain:
     1. Get expected nameservers from cloudflare_nameservers (JSONB array)
-    2. Do DNS lookup using cloudflare_service.check_ns_propagation()
+    2. Do DNS lookup using cloudflare_service.bulk_check_ns_propagation()
     3. If propagated:
        - Update status = "ns_propagated"
        - Set ns_propagated_at = now
@@ -933,51 +978,40 @@ async def check_ns_propagation(
             "pending_domains": [],
         }
     
-    # Step 2: Check propagation for each domain
+    # Step 2: Check propagation for all domains at once (concurrent DNS lookups,
+    # zone statuses from one paged zone listing)
     propagated_domains: List[str] = []
-    pending_domains: List[str] = []
-    
-    for i, domain in enumerate(domains):
-        # Skip domains without nameservers assigned
-        if not domain.cloudflare_nameservers:
+    pending_domains: List[str] = [d.name for d in domains if not d.cloudflare_nameservers]
+    to_check = [d for d in domains if d.cloudflare_nameservers]
+
+    checker = cloudflare_service or cf_service
+    checks = await checker.bulk_check_ns_propagation([
+        {"domain": d.name, "expected_ns": d.cloudflare_nameservers, "zone_id": d.cloudflare_zone_id}
+        for d in to_check
+    ])
+
+    for domain, check in zip(to_check, checks):
+        if not check["propagated"]:
             pending_domains.append(domain.name)
             continue
-        
-        # Check if NS have propagated via DNS lookup
-        is_propagated = await cf_service.check_ns_propagation(
-            domain.name, 
-            domain.cloudflare_nameservers
-        )
-        
-        if is_propagated:
-            # Also verify Cloudflare zone status if we have a zone_id
-            zone_active = False
-            if domain.cloudflare_zone_id:
-                try:
-                    zone_status = await cf_service.get_zone_status(domain.cloudflare_zone_id)
-                    zone_active = zone_status == "active"
-                    domain.cloudflare_zone_status = zone_status
-                except CloudflareError:
-                    # If we can't check zone status, just rely on DNS check
-                    zone_active = True  # Assume active if DNS propagated
-            else:
-                zone_active = True  # No zone to check
-            
-            if zone_active:
-                # Update domain status
-                domain.status = DomainStatus.NS_PROPAGATED
-                domain.ns_propagated_at = datetime.now(timezone.utc)
-                domain.nameservers_updated = True
-                propagated_domains.append(domain.name)
-            else:
-                # DNS propagated but zone not active yet
-                pending_domains.append(domain.name)
+
+        # Also verify Cloudflare zone status if we have a zone_id
+        if domain.cloudflare_zone_id and check["zone_status"]:
+            domain.cloudflare_zone_status = check["zone_status"]
+            zone_active = check["zone_status"] == "active"
+        else:
+            # No zone, or its status couldn't be listed - rely on the DNS check
+            zone_active = True
+
+        if zone_active:
+            # Update domain status
+            domain.status = DomainStatus.NS_PROPAGATED
+            domain.ns_propagated_at = datetime.now(timezone.utc)
+            domain.nameservers_updated = True
+            propagated_domains.append(domain.name)
         else:
+            # DNS propagated but zone not active yet
             pending_domains.append(domain.name)
-        
-        # Rate limit DNS queries - wait 0.1s between domains
-        if i < len(domains) - 1:
-            await asyncio.sleep(0.1)
     
     # Commit all database changes
     await db.commit()
@@ -0,0 +1,42 @@
+"""Internal operational endpoints (not part of the public API docs)."""
+
+import secrets
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+
+from app.core.config import get_settings
+from app.db import pool_metrics
+from app.services.selenium.browser_slots import browser_slots
+
+router = APIRouter(prefix="/internal", tags=["internal"], include_in_schema=False)
+
+
+def require_internal_token(x_internal_token: str | None = Header(default=None)) -> None:
+    """Check X-Internal-Token when INTERNAL_METRICS_TOKEN is configured."""
+    expected = get_settings().internal_metrics_token
+    if expected and not secrets.compare_digest(x_internal_token or "", expected):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+
+@router.get("/metrics/pools", dependencies=[Depends(require_internal_token)])
+async def get_pool_metrics() -> dict:
+    """
+    Connection pool telemetry for every engine (main, read, background, sync).
+
+    Per engine: connections in use / peak, pool size and overflow, checkout
+    wait, hold and connect-time histograms (seconds), timeouts and
+    invalidations; plus transient-error retry counts by caller.
+    """
+    return pool_metrics.snapshot()
+
+
+@router.get("/metrics/browsers", dependencies=[Depends(require_internal_token)])
+async def get_browser_metrics() -> dict:
+    """
+    Browser slot telemetry for this process.
+
+    Active slots and queue depth overall and per subsystem, slot wait-time
+    histograms (seconds), quotas, timeouts and slots taken over the limit,
+    plus the free-memory reading admission is based on.
+    """
+    return browser_slots.snapshot()
@@ -1,7 +1,5 @@
 from __future__ import annotations
 
-import asyncio
-from io import StringIO
 from typing import List, Optional
 from uuid import UUID
 
@@ -11,16 +9,22 @@ from pydantic import BaseModel
 from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_db
+from app.api.deps import get_db, get_read_db
 from app.models.domain import Domain
 from app.models.mailbox import Mailbox, MailboxStatus, WarmupStage
 from app.models.tenant import Tenant, TenantStatus
 from app.schemas.mailbox import MailboxCreate, MailboxRead, MailboxUpdate
+from app.services import job_queue
+from app.services.csv_export import csv_response, email_domain, stream_csv
+from app.services.job_queue import JobContext, job_handler
 from app.services.email_generator import generate_email_addresses
 
 router = APIRouter(prefix="/api/v1/mailboxes", tags=["mailboxes"])
 
 MAILBOX_PASSWORD = "#Sendemails1"
+# One password reset at a time; it runs as a job in the durable job queue
+PASSWORD_RESET_JOB = "password_reset"
+PASSWORD_RESET_KEY = "all"
 _reset_passwords_progress = {
     "status": "idle",
     "total": 0,
@@ -56,10 +60,20 @@ def _reset_progress_snapshot() -> dict:
     return dict(_reset_passwords_progress)
 
 
-async def _run_reset_passwords_job(tenant_id: UUID | None = None) -> None:
+@job_handler(PASSWORD_RESET_JOB)
+async def _reset_passwords_queue_job(ctx: JobContext) -> None:
+    tenant_id = ctx.payload.get("tenant_id")
+    ctx.progress = _reset_passwords_progress
+    await _run_reset_passwords_job(UUID(tenant_id) if tenant_id else None, ctx)
+
+
+async def _run_reset_passwords_job(tenant_id: UUID | None = None, ctx: JobContext | None = None) -> None:
+    """Reset mailbox passwords tenant by tenant; tenants finished by an earlier attempt of ctx are skipped."""
     from app.db.session import async_session_factory
     from app.services.selenium.user_ops import UserOpsSelenium
     from app.services.selenium.admin_portal import _login_with_mfa
+    from app.services.selenium.browser import launch_chrome
+    from app.services.selenium.browser_slots import BrowserSlot, browser_slots
     from selenium import webdriver
     from selenium.webdriver.chrome.options import Options
 
@@ -74,7 +88,7 @@ async def _run_reset_passwords_job(tenant_id: UUID | None = None) -> None:
         }
     )
 
-    def build_driver() -> webdriver.Chrome:
+    def build_driver(slot: BrowserSlot) -> webdriver.Chrome:
         options = Options()
         options.add_argument("--no-sandbox")
         options.add_argument("--disable-dev-shm-usage")
@@ -82,7 +96,7 @@ async def _run_reset_passwords_job(tenant_id: UUID | None = None) -> None:
         options.add_argument("--window-size=1920,1080")
         options.add_argument("--disable-blink-features=AutomationControlled")
         options.add_argument("--headless=new")
-        return webdriver.Chrome(options=options)
+        return launch_chrome(options, slot=slot)
 
     try:
         async with async_session_factory() as session:
@@ -106,9 +120,16 @@ async def _run_reset_passwords_job(tenant_id: UUID | None = None) -> None:
             all_mailboxes = list(mailbox_result.scalars().all())
             _reset_passwords_progress["total"] = len(all_mailboxes)
 
+        if ctx:
+            for done in ctx.done_items().values():
+                _reset_passwords_progress["completed"] += done["completed"]
+                _reset_passwords_progress["failed"] += done["failed"]
+
         for tenant in tenants:
+            if ctx and ctx.is_done(tenant.id):
+                continue
             _reset_passwords_progress["current_tenant"] = tenant.custom_domain
-            driver = build_driver()
+            driver = build_driver(await browser_slots.acquire_async("password_reset"))
             user_ops = UserOpsSelenium(driver, tenant.custom_domain)
 
             try:
@@ -142,6 +163,11 @@ async def _run_reset_passwords_job(tenant_id: UUID | None = None) -> None:
                 _reset_passwords_progress["completed"] += reset_count
                 if reset_count < expected_count:
                     _reset_passwords_progress["failed"] += expected_count - reset_count
+                if ctx:
+                    ctx.mark_done(tenant.id, {
+                        "completed": reset_count,
+                        "failed": max(expected_count - reset_count, 0),
+                    })
 
                 if error_list:
                     _reset_passwords_progress["errors"].extend(
@@ -195,7 +221,7 @@ async def list_mailboxes(
     limit: int = Query(default=100, ge=1, le=500),
     tenant_id: UUID | None = Query(default=None),
     status: MailboxStatus | None = Query(default=None),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ) -> list[Mailbox]:
     """List all mailboxes with optional filters."""
     query = select(Mailbox)
@@ -211,18 +237,31 @@ async def list_mailboxes(
 @router.post("/reset-all-passwords")
 async def reset_all_passwords(
     tenant_id: UUID | None = Query(default=None),
+    db: AsyncSession = Depends(get_db),
 ) -> dict:
     """Trigger a background job to reset mailbox passwords to #Sendemails1."""
-    if _reset_passwords_progress["status"] == "running":
+    if await job_queue.get_active(db, PASSWORD_RESET_JOB, PASSWORD_RESET_KEY):
         raise HTTPException(status_code=409, detail="Password reset already running")
 
-    asyncio.create_task(_run_reset_passwords_job(tenant_id))
+    await job_queue.enqueue(
+        db,
+        PASSWORD_RESET_JOB,
+        {"tenant_id": str(tenant_id) if tenant_id else None},
+        key=PASSWORD_RESET_KEY,
+    )
+    await db.commit()
+    job_queue.wake_runner()
     return {"status": "started", "message": "Password reset job running in background"}
 
 
 @router.get("/reset-passwords-status", response_model=ResetPasswordsStatus)
-async def reset_passwords_status() -> dict:
+async def reset_passwords_status(db: AsyncSession = Depends(get_read_db)) -> dict:
     """Get current password reset job status."""
+    if _reset_passwords_progress["status"] != "running":
+        # Queued, or running in another process: report what it last saved
+        job = await job_queue.get_active(db, PASSWORD_RESET_JOB, PASSWORD_RESET_KEY)
+        if job:
+            return {**_reset_progress_snapshot(), "status": "running", **(job.progress or {})}
     return _reset_progress_snapshot()
 
 
@@ -560,7 +599,7 @@ async def bulk_configure_mailboxes(
 async def export_credentials(
     tenant_id: Optional[UUID] = None,
     format: str = "csv",
-    db: AsyncSession = Depends(get_db),
+    gzip: bool = False,
 ):
     """
     Export mailbox credentials as CSV download.
@@ -571,65 +610,52 @@ async def export_credentials(
     Jack Zuvelek,j.zuvelek@example.com,Abc123!@#
     
     If tenant_id provided, export only that tenant's mailboxes.
-    Otherwise export all ready mailboxes.
+    Otherwise export all ready mailboxes. Streamed sorted by domain, then email;
+    gzip=true downloads a .csv.gz.
     """
-    # Query mailboxes
-    query = select(Mailbox).where(Mailbox.status == MailboxStatus.READY)
+    query = (
+        select(Mailbox.display_name, Mailbox.email, Mailbox.password)
+        .where(Mailbox.status == MailboxStatus.READY)
+        .order_by(email_domain(Mailbox.email), Mailbox.email)
+    )
     if tenant_id:
         query = query.where(Mailbox.tenant_id == tenant_id)
-    
-    result = await db.execute(query)
-    mailboxes = list(result.scalars().all())
-    mailboxes.sort(key=lambda mb: (mb.email.split('@')[1] if '@' in mb.email else '', mb.email))
-    
-    # Generate CSV
-    output = StringIO()
-    output.write("DisplayName,EmailAddress,Password\n")
-    for mb in mailboxes:
-        output.write(f"{mb.display_name},{mb.email},{mb.password or '#Sendemails1'}\n")
-    
-    output.seek(0)
-    return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv",
-        headers={"Content-Disposition": "attachment; filename=mailbox_credentials.csv"}
+
+    rows = stream_csv(
+        query,
+        ["DisplayName", "EmailAddress", "Password"],
+        lambda mb: [mb.display_name, mb.email, mb.password or "#Sendemails1"],
+        compress=gzip,
     )
+    return csv_response(rows, "mailbox_credentials.csv", compress=gzip)
 
 
 @router.get("/export")
 async def export_mailbox_credentials(
     tenant_id: UUID | None = Query(default=None),
-    db: AsyncSession = Depends(get_db),
+    gzip: bool = Query(default=False),
 ) -> StreamingResponse:
     """
     Export mailbox credentials as CSV (legacy endpoint).
-    Returns email,password columns.
+    Returns email,password columns, streamed sorted by domain, then email.
     """
-    query = select(Mailbox)
+    query = select(Mailbox.email, Mailbox.password).order_by(email_domain(Mailbox.email), Mailbox.email)
     if tenant_id:
         query = query.where(Mailbox.tenant_id == tenant_id)
-    result = await db.execute(query)
-    mailboxes = list(result.scalars().all())
-    mailboxes.sort(key=lambda mb: (mb.email.split('@')[1] if '@' in mb.email else '', mb.email))
-
-    # Build CSV
-    output = StringIO()
-    output.write("email,password\n")
-    for mailbox in mailboxes:
-        output.write(f"{mailbox.email},{mailbox.password or '#Sendemails1'}\n")
-
-    output.seek(0)
-    return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv",
-        headers={"Content-Disposition": "attachment; filename=mailbox_credentials.csv"},
+
+    rows = stream_csv(
+        query,
+        ["email", "password"],
+        lambda mb: [mb.email, mb.password or "#Sendemails1"],
+        compress=gzip,
     )
+    return csv_response(rows, "mailbox_credentials.csv", compress=gzip)
 
 
 @router.get("/{mailbox_id}", response_model=MailboxRead)
 async def get_mailbox(
     mailbox_id: UUID,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ) -> Mailbox:
     """Get a single mailbox by ID."""
     return await get_mailbox_or_404(mailbox_id, db)
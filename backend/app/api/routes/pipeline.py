@@ -6,17 +6,19 @@ import logging
 import os
 import random
 import time
-from datetime import datetime
-from typing import List, Optional
+from collections import deque
+from contextlib import aclosing
+from datetime import datetime, timezone
+from typing import List, Optional, Union
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException
 from pydantic import BaseModel
-from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, update
 
-from app.db.session import get_db_session as get_db, SessionLocal
+from app.core.config import get_settings
+from app.db.session import get_db_session as get_db, get_read_db_session as get_read_db, SessionLocal
 from app.models.batch import SetupBatch, BatchStatus
 from app.models.domain import Domain, DomainStatus
 from app.models.tenant import Tenant, TenantStatus
@@ -29,18 +31,26 @@ from app.services.validation_service import (
     cross_validate,
 )
 from app.services.tenant_import import tenant_import_service
+from app.services.pipeline_log_sink import pipeline_log_sink
+from app.services.csv_export import csv_response, email_domain, stream_csv
 from app.services.cloudflare import cloudflare_service
+from app.services import job_queue, pipeline_stream, propagation_scheduler
+from app.services.job_queue import JobContext, job_handler
+from app.services.pipeline_stream import Stage
 from app.services.selenium.admin_portal import enable_org_smtp_auth
+from app.services.selenium import browser_slots
 from app.services.selenium.browser import kill_all_browsers
 
 router = APIRouter(prefix="/api/v1/pipeline", tags=["pipeline"])
 logger = logging.getLogger(__name__)
 
-# In-memory pipeline job tracking
+# In-memory pipeline job tracking (live status of the runs in this process;
+# the runs themselves are "pipeline" jobs in the durable job queue)
 pipeline_jobs = {}
+PIPELINE_JOB = "pipeline"
 
 MAX_PIPELINE_RETRIES = 4   # Max retries per tenant per step
-STEP5_MAX_WORKERS = 2      # Max parallel browsers for first login (Railway memory limit)
+ACTIVITY_LOG_SIZE = 50     # Recent activity entries kept per in-memory job
 
 def _fmt_err(exc: Exception) -> str:
     """Format exception for logging — never returns empty string."""
@@ -119,7 +129,6 @@ async def create_and_start(
     domains_per_tenant: int = Form(1),
     sequencer_api_key: str = Form(""),
     profile_photo: UploadFile = File(None),
-    background_tasks: BackgroundTasks = BackgroundTasks(),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -313,11 +322,11 @@ async def create_and_start(
         "total_tenants": validation["summary"]["credentials_matched"],
         "steps": {str(i): {"status": "pending", "completed": 0, "failed": 0, "total": 0} for i in range(1, 11)},
         "errors": [],
-        "activity_log": [],
+        "activity_log": deque(maxlen=ACTIVITY_LOG_SIZE),
     }
 
     # Start pipeline in background
-    background_tasks.add_task(run_pipeline, batch_id)
+    await _enqueue_pipeline(db, batch_id)
 
     return {
         "success": True,
@@ -340,13 +349,18 @@ async def create_and_start(
 
 
 @router.get("/{batch_id}/status")
-async def get_pipeline_status(batch_id: UUID, db: AsyncSession = Depends(get_db)):
+async def get_pipeline_status(batch_id: UUID, db: AsyncSession = Depends(get_read_db)):
     """Get real-time pipeline status for the progress dashboard."""
     job_id = str(batch_id)
 
     if job_id in pipeline_jobs:
         return pipeline_jobs[job_id]
 
+    # Running in another process (worker): its last heartbeat's progress
+    job = await job_queue.get_active(db, PIPELINE_JOB, job_id)
+    if job and job.progress:
+        return job.progress
+
     # Fallback: read from database
     batch = await db.get(SetupBatch, batch_id)
     if not batch:
@@ -367,7 +381,6 @@ async def get_pipeline_status(batch_id: UUID, db: AsyncSession = Depends(get_db)
 @router.post("/{batch_id}/confirm-nameservers")
 async def confirm_nameservers(
     batch_id: UUID,
-    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
 ):
     """User confirms they've updated nameservers at Porkbun. Resumes pipeline."""
@@ -376,26 +389,27 @@ async def confirm_nameservers(
         raise HTTPException(404, "Batch not found")
 
     batch.ns_confirmed_at = datetime.utcnow()
+    # Nameservers just changed: check every pending domain soon, with a fresh backoff
+    await propagation_scheduler.reset_schedule(db, batch_id)
     await db.commit()
 
     job_id = str(batch_id)
 
-    # Check if background task is still alive
-    task_alive = (job_id in pipeline_jobs and
-                  pipeline_jobs[job_id].get("status") == "running")
+    # Check if the pipeline job is still queued/running (in any process)
+    task_alive = await job_queue.get_active(db, PIPELINE_JOB, job_id) is not None
 
     if task_alive:
-        # Task is alive and polling — just set the flag
-        pipeline_jobs[job_id]["ns_confirmed"] = True
-        pipeline_jobs[job_id]["message"] = "Nameservers confirmed — checking propagation..."
-        logger.info(f"NS confirmed for {batch_id} — pipeline task is alive, will pick up flag")
+        # Job is alive and polling — it picks up ns_confirmed_at; set the in-memory flag too if it runs here
+        if job_id in pipeline_jobs:
+            pipeline_jobs[job_id]["ns_confirmed"] = True
+            pipeline_jobs[job_id]["message"] = "Nameservers confirmed — checking propagation..."
+        logger.info(f"NS confirmed for {batch_id} — pipeline job is alive, will pick up flag")
     else:
-        # Task is DEAD — re-launch pipeline from Step 3 (NS propagation)
-        logger.warning(f"NS confirmed for {batch_id} but pipeline task is DEAD — re-launching from Step 3")
+        # Job is DONE/DEAD — re-launch pipeline from Step 3 (NS propagation)
+        logger.warning(f"NS confirmed for {batch_id} but no pipeline job is running — re-launching from Step 3")
         pipeline_jobs.pop(job_id, None)  # Clear stale state
         batch.pipeline_status = "running"
-        await db.commit()
-        background_tasks.add_task(run_pipeline, batch_id, 3)  # Skip Steps 1-2
+        await _enqueue_pipeline(db, batch_id, 3)  # Skip Steps 1-2
 
     return {"success": True, "message": "Nameservers confirmed. Pipeline resuming."}
 
@@ -609,7 +623,7 @@ async def skip_domains(
 async def get_failed_domains(
     batch_id: UUID,
     step: int = 6,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """
     Get all domains that are stuck/failed at a given step.
@@ -706,7 +720,6 @@ async def get_failed_domains(
 async def retry_failed(
     batch_id: UUID,
     step: int = None,
-    background_tasks: BackgroundTasks = BackgroundTasks(),
     db: AsyncSession = Depends(get_db),
 ):
     """Retry failed items from a specific step or current step."""
@@ -714,11 +727,9 @@ async def retry_failed(
     if not batch:
         raise HTTPException(404, "Batch not found")
 
-    # === GUARD: Reject if pipeline is already running ===
-    if batch.pipeline_status == "running":
-        job_id = str(batch_id)
-        if job_id in pipeline_jobs and pipeline_jobs[job_id].get("status") == "running":
-            raise HTTPException(409, "Pipeline is already running. Pause first before retrying.")
+    # === GUARD: Reject if pipeline is already running (or a paused run is still winding down) ===
+    if await job_queue.get_active(db, PIPELINE_JOB, str(batch_id)):
+        raise HTTPException(409, "Pipeline is already running. Pause first before retrying.")
 
     # Reset retry counts for the target step(s) using bulk update
     from sqlalchemy import update as sql_update
@@ -766,12 +777,11 @@ async def retry_failed(
     start_step = step or batch.pipeline_step or 1
 
     batch.pipeline_status = "running"
-    await db.commit()
 
     job_id = str(batch_id)
     pipeline_jobs.pop(job_id, None)  # Clear stale state
 
-    background_tasks.add_task(run_pipeline, batch_id, start_step)
+    await _enqueue_pipeline(db, batch_id, start_step)
 
     return {
         "success": True,
@@ -791,7 +801,11 @@ async def pause_pipeline(batch_id: UUID, db: AsyncSession = Depends(get_db)):
     if batch:
         batch.pipeline_status = "paused"
         batch.pipeline_paused_at = datetime.utcnow()
-        await db.commit()
+    # The job may run in another process: it sees the request on its next heartbeat
+    job = await job_queue.get_active(db, PIPELINE_JOB, job_id)
+    if job:
+        await job_queue.request_cancel(db, job)
+    await db.commit()
 
     return {"success": True}
 
@@ -799,7 +813,6 @@ async def pause_pipeline(batch_id: UUID, db: AsyncSession = Depends(get_db)):
 @router.post("/{batch_id}/resume")
 async def resume_pipeline(
     batch_id: UUID,
-    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
 ):
     """Resume a paused/crashed pipeline from where it left off."""
@@ -809,12 +822,14 @@ async def resume_pipeline(
 
     # === GUARD: Reject if pipeline is already running ===
     job_id = str(batch_id)
+    if await job_queue.get_active(db, PIPELINE_JOB, job_id):
+        logger.warning(f"Resume rejected for batch {batch_id} — pipeline job still active")
+        if batch.pipeline_paused_at:
+            raise HTTPException(409, "Pipeline is still pausing (finishing its current item). Try again shortly.")
+        raise HTTPException(409, "Pipeline is already running. Pause first before resuming.")
     if batch.pipeline_status == "running":
-        if job_id in pipeline_jobs and pipeline_jobs[job_id].get("status") == "running":
-            logger.warning(f"Resume rejected for batch {batch_id} — pipeline already running")
-            raise HTTPException(409, "Pipeline is already running. Pause first before resuming.")
-        # DB says running but in-memory doesn't — stale DB state from crash, allow resume
-        logger.warning(f"DB says running but no in-memory job for batch {batch_id} — allowing resume")
+        # DB says running but no job holds it — stale DB state from crash, allow resume
+        logger.warning(f"DB says running but no pipeline job for batch {batch_id} — allowing resume")
 
     # Determine which step to resume from
     resume_step = batch.pipeline_step or 1
@@ -825,13 +840,12 @@ async def resume_pipeline(
 
     batch.pipeline_status = "running"
     batch.pipeline_paused_at = None
-    await db.commit()
 
     job_id = str(batch_id)
     pipeline_jobs.pop(job_id, None)  # Clear stale in-memory state
 
     logger.info(f"Resuming pipeline for batch {batch_id} from step {resume_step}")
-    background_tasks.add_task(run_pipeline, batch_id, resume_step)
+    await _enqueue_pipeline(db, batch_id, resume_step)
 
     return {
         "success": True,
@@ -908,8 +922,13 @@ async def reset_batch_progress(batch_id: UUID, db: AsyncSession = Depends(get_db
     }
 
 
+def _as_utc(value: datetime) -> datetime:
+    """Naive timestamps (as read back from some drivers) are UTC."""
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
 @router.get("/{batch_id}/activity-log")
-async def get_activity_log(batch_id: UUID, limit: int = 50, db: AsyncSession = Depends(get_db)):
+async def get_activity_log(batch_id: UUID, limit: int = 50, db: AsyncSession = Depends(get_read_db)):
     """Get recent activity log entries."""
     result = await db.execute(
         select(PipelineLog)
@@ -917,19 +936,35 @@ async def get_activity_log(batch_id: UUID, limit: int = 50, db: AsyncSession = D
         .order_by(PipelineLog.created_at.desc())
         .limit(limit)
     )
-    logs = result.scalars().all()
+    rows = {
+        log.id: {
+            "step": log.step,
+            "step_name": log.step_name,
+            "item_type": log.item_type,
+            "item_name": log.item_name,
+            "status": log.status,
+            "message": log.message,
+            "error": log.error_detail,
+            "created_at": log.created_at,
+        }
+        for log in result.scalars()
+    }
+    # Entries this process has queued but not written yet (no flush from a read)
+    for row in pipeline_log_sink.queued(batch_id):
+        rows.setdefault(row["id"], {**row, "error": row["error_detail"]})
 
+    logs = sorted(rows.values(), key=lambda log: _as_utc(log["created_at"]), reverse=True)[:limit]
     return {
         "logs": [
             {
-                "step": log.step,
-                "step_name": log.step_name,
-                "item_type": log.item_type,
-                "item_name": log.item_name,
-                "status": log.status,
-                "message": log.message,
-                "error": log.error_detail,
-                "timestamp": log.created_at.isoformat(),
+                "step": log["step"],
+                "step_name": log["step_name"],
+                "item_type": log["item_type"],
+                "item_name": log["item_name"],
+                "status": log["status"],
+                "message": log["message"],
+                "error": log["error"],
+                "timestamp": log["created_at"].isoformat(),
             }
             for log in logs
         ]
@@ -937,37 +972,21 @@ async def get_activity_log(batch_id: UUID, limit: int = 50, db: AsyncSession = D
 
 
 @router.get("/{batch_id}/credentials-export")
-async def export_credentials(batch_id: UUID, db: AsyncSession = Depends(get_db)):
-    """Export all mailbox credentials as CSV."""
-    import io
-    import csv
-
-    result = await db.execute(
-        select(Mailbox).where(Mailbox.batch_id == batch_id)
+async def export_credentials(batch_id: UUID, gzip: bool = False):
+    """Export all mailbox credentials as CSV, streamed sorted by domain, then email."""
+    query = (
+        select(Mailbox.display_name, Mailbox.email, Mailbox.password, Tenant.custom_domain, Tenant.name)
+        .join(Tenant, Tenant.id == Mailbox.tenant_id, isouter=True)
+        .where(Mailbox.batch_id == batch_id)
+        .order_by(email_domain(Mailbox.email), Mailbox.email)
     )
-    mailboxes = result.scalars().all()
-
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(["DisplayName", "EmailAddress", "Password", "Domain", "TenantName"])
-
-    for mb in mailboxes:
-        # Get tenant for domain info
-        tenant = await db.get(Tenant, mb.tenant_id)
-        writer.writerow([
-            mb.display_name,
-            mb.email,
-            mb.password,
-            tenant.custom_domain if tenant else "",
-            tenant.name if tenant else "",
-        ])
-
-    output.seek(0)
-    return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv",
-        headers={"Content-Disposition": f"attachment; filename=credentials_batch_{batch_id}.csv"}
+    rows = stream_csv(
+        query,
+        ["DisplayName", "EmailAddress", "Password", "Domain", "TenantName"],
+        lambda mb: [mb.display_name, mb.email, mb.password, mb.custom_domain or "", mb.name or ""],
+        compress=gzip,
     )
+    return csv_response(rows, f"credentials_batch_{batch_id}.csv", compress=gzip)
 
 
 async def _update_pipeline(batch_id: UUID, step: int, status: str, message: str):
@@ -1000,14 +1019,639 @@ async def _check_paused_or_stopped(batch_id: UUID) -> bool:
     return False
 
 
-async def run_pipeline(batch_id: UUID, start_from_step: int = 1):
+async def _ns_propagation_round(batch_id: UUID, domains: list, activation_requested: set) -> list:
+    """
+    One step 3 round over the domains whose next check is due.
+
+    A domain counts as propagated once Cloudflare reports its zone active. For
+    zones still pending, the parent (TLD) servers are asked for the delegation;
+    where it already points at Cloudflare, an activation check is requested so
+    the zone goes active now instead of on Cloudflare's own schedule. Every
+    domain that isn't propagated yet gets its next check scheduled with backoff.
+
+    Returns:
+        The domains that propagated in this round
+    """
+    # One paged zone listing per account instead of a GET per zone
+    try:
+        zone_statuses = await cloudflare_service.zone_statuses()
+    except Exception as e:
+        logger.warning(f"Propagation check failed: {e}")
+        zone_statuses = {}
+
+    propagated = []
+    pending = []
+    for domain in domains:
+        if zone_statuses.get(domain.cloudflare_zone_id) == "active":
+            domain.status = DomainStatus.NS_PROPAGATED
+            domain.ns_propagated_at = datetime.utcnow()
+            domain.nameservers_updated = True
+            propagation_scheduler.mark_checked_propagated(domain)
+            propagated.append(domain)
+            await log_activity(batch_id, 3, STEP_NAMES[3], "domain", str(domain.id), domain.name, "completed", "NS propagated")
+        else:
+            pending.append(domain)
+
+    to_check = [d for d in pending if d.cloudflare_nameservers and d.cloudflare_zone_id not in activation_requested]
+    delegated = set()
+    if to_check:
+        checks = await cloudflare_service.bulk_check_ns_propagation([
+            {"domain": d.name, "expected_ns": d.cloudflare_nameservers} for d in to_check
+        ])
+        for domain, check in zip(to_check, checks):
+            if check["propagated"]:
+                delegated.add(domain.id)
+                activation_requested.add(domain.cloudflare_zone_id)
+                logger.info(f"Step 3: {domain.name} delegated to Cloudflare per {check['agreeing_servers'] or 'resolver'}, requesting activation check")
+                await cloudflare_service.request_activation_check(domain.cloudflare_zone_id)
+
+    for domain in pending:
+        if domain.id in delegated:
+            # Registry already points at Cloudflare: look again as soon as the activation check may have run
+            domain.ns_check_attempts = 0
+        propagation_scheduler.schedule_next_check(domain)
+
+    return propagated
+
+
+async def _configure_domain_dns(batch_id: UUID, domain: Domain) -> bool:
+    """Step 4 for one domain: ensure MX/SPF/autodiscover records, then the redirect. Returns True if DNS is done."""
+    dns_ok = False
+    try:
+        zone_id = domain.cloudflare_zone_id
+        if not zone_id:
+            return False
+
+        dns_result = await cloudflare_service.ensure_email_dns_records(zone_id, domain.name)
+
+        all_ok = all(r["success"] for r in dns_result.values())
+        if all_ok:
+            domain.dns_records_created = True
+            dns_ok = True
+            await log_activity(batch_id, 4, STEP_NAMES[4], "domain", str(domain.id), domain.name, "completed", "DNS records ensured")
+        else:
+            errors = [f"{k}: {v['error']}" for k, v in dns_result.items() if v.get("error")]
+            domain.error_message = "; ".join(errors)
+            await log_activity(batch_id, 4, STEP_NAMES[4], "domain", str(domain.id), domain.name, "failed", domain.error_message)
+
+        if domain.redirect_url and not getattr(domain, 'redirect_configured', False):
+            try:
+                await cloudflare_service.create_redirect_rule(zone_id, domain.name, domain.redirect_url)
+                domain.redirect_configured = True
+            except Exception as re:
+                logger.warning(f"Redirect failed for {domain.name}: {re}")
+
+    except Exception as e:
+        domain.error_message = str(e)
+        await log_activity(batch_id, 4, STEP_NAMES[4], "domain", str(domain.id), domain.name, "failed", str(e))
+
+    return dns_ok
+
+
+async def _wait_for_ns_propagation(batch_id: UUID) -> bool:
+    """
+    Step 3: check domains on their own schedules until (nearly) all have propagated.
+
+    Each domain moves on to Step 4 (DNS records) as soon as it propagates.
+    Schedules live on the domain rows, so a restarted pipeline carries on
+    where it stopped.
+
+    Returns:
+        False if the pipeline was paused/stopped meanwhile
+    """
+    job_id = str(batch_id)
+    total_zones = 0
+    total_propagated = 0
+    NS_PROPAGATION_TIMEOUT = 3600 * 4  # 4 hours max
+    ns_start_time = time.time()
+    activation_requested: set[str] = set()
+
+    while True:
+        if await _check_paused_or_stopped(batch_id):
+            return False
+
+        if time.time() - ns_start_time > NS_PROPAGATION_TIMEOUT:
+            logger.error(f"Step 3: NS propagation timed out after 4 hours")
+            await log_activity(batch_id, 3, STEP_NAMES[3], status="warning",
+                message=f"Timed out — {total_propagated}/{total_zones} propagated. Proceeding anyway.")
+            break
+
+        async with SessionLocal() as db:
+            domains = await propagation_scheduler.due_domains(db, batch_id)
+            if domains:
+                propagated = await _ns_propagation_round(batch_id, domains, activation_requested)
+                await db.commit()
+
+                # Don't hold propagated domains back for the rest of the batch
+                for domain in propagated:
+                    if not domain.dns_records_created:
+                        await _configure_domain_dns(batch_id, domain)
+                        await db.commit()
+
+            next_check_in = await propagation_scheduler.seconds_until_next_check(db, batch_id)
+
+            total_zones = await db.scalar(
+                select(func.count(Domain.id)).where(Domain.batch_id == batch_id, Domain.cloudflare_zone_id != None)
+            ) or 0
+            total_propagated = await db.scalar(
+                select(func.count(Domain.id)).where(Domain.batch_id == batch_id, Domain.ns_propagated_at != None)
+            ) or 0
+
+            batch = await db.get(SetupBatch, batch_id)
+            if batch:
+                batch.ns_propagated_count = total_propagated
+                await db.commit()
+
+        if job_id in pipeline_jobs:
+            pipeline_jobs[job_id]["steps"]["3"]["completed"] = total_propagated
+            pipeline_jobs[job_id]["steps"]["3"]["total"] = total_zones
+            pipeline_jobs[job_id]["message"] = f"NS propagation: {total_propagated}/{total_zones}"
+
+        if next_check_in is None:
+            break  # All propagated
+
+        if total_zones and total_propagated and total_propagated >= total_zones * 0.95:
+            logger.info(f"Step 3: {total_propagated}/{total_zones} propagated (≥95%), proceeding")
+            break
+
+        # Sleep until the next domain is due; wake at least every 30s to notice pause/stop
+        await asyncio.sleep(min(max(next_check_in, 1.0), 30.0))
+
+    if job_id in pipeline_jobs:
+        pipeline_jobs[job_id]["steps"]["3"]["status"] = "completed"
+    await log_activity(batch_id, 3, STEP_NAMES[3], status="completed", message=f"{total_propagated}/{total_zones} propagated")
+    return True
+
+
+async def _configure_pending_dns(batch_id: UUID):
+    """Step 4 for every zoned domain of the batch still without DNS records (Step 3 already did the rest)."""
+    job_id = str(batch_id)
+    await log_activity(batch_id, 4, STEP_NAMES[4], status="started")
+    if job_id in pipeline_jobs:
+        pipeline_jobs[job_id]["steps"]["4"]["status"] = "running"
+
+    async with SessionLocal() as db:
+        # Only process domains that need DNS (skip already-configured re-used domains)
+        domains = (await db.execute(
+            select(Domain).where(
+                Domain.batch_id == batch_id,
+                Domain.cloudflare_zone_id.isnot(None),
+                Domain.dns_records_created.is_not(True),
+            )
+        )).scalars().all()
+
+        dns_done = 0
+        for domain in domains:
+            if await _check_paused_or_stopped(batch_id):
+                return
+
+            if await _configure_domain_dns(batch_id, domain):
+                dns_done += 1
+
+            await db.commit()
+
+        total_dns_done = await db.scalar(
+            select(func.count(Domain.id)).where(
+                Domain.batch_id == batch_id,
+                Domain.dns_records_created == True,
+            )
+        ) or 0
+
+        batch = await db.get(SetupBatch, batch_id)
+        if batch:
+            batch.dns_completed = total_dns_done
+            await db.commit()
+
+    if job_id in pipeline_jobs:
+        pipeline_jobs[job_id]["steps"]["4"]["status"] = "completed"
+        pipeline_jobs[job_id]["steps"]["4"]["completed"] = total_dns_done
+
+    logger.info(f"Step 4: {dns_done} new DNS configured, {total_dns_done} total ready")
+
+
+async def _domain_feed(batch_id: UUID, wait_for_ns: bool, configure_dns: bool) -> bool:
+    """
+    Steps 3-4, run alongside the per-tenant Steps 5-8: every domain gets its
+    DNS records as soon as it propagates, which is what its Step 6 waits for.
+
+    Returns:
+        False if the pipeline was paused/stopped meanwhile
+    """
+    job_id = str(batch_id)
+    if wait_for_ns:
+        try:
+            await log_activity(batch_id, 3, STEP_NAMES[3], status="started")
+            if not await _wait_for_ns_propagation(batch_id):
+                return False
+        except Exception as step_error:
+            logger.error(f"Step 3 CRASHED (continuing to next step): {_fmt_err(step_error)}")
+            import traceback
+            logger.error(traceback.format_exc())
+            await log_activity(batch_id, 3, STEP_NAMES[3], status="error", message=_fmt_err(step_error))
+            if job_id in pipeline_jobs:
+                pipeline_jobs[job_id]["steps"]["3"]["status"] = "error"
+                pipeline_jobs[job_id]["errors"].append({"step": 3, "error": _fmt_err(step_error)})
+
+    if configure_dns:
+        try:
+            await _configure_pending_dns(batch_id)
+        except Exception as step_error:
+            logger.error(f"Step 4 CRASHED (continuing to next step): {_fmt_err(step_error)}")
+            import traceback
+            logger.error(traceback.format_exc())
+            await log_activity(batch_id, 4, STEP_NAMES[4], status="error", message=_fmt_err(step_error))
+            if job_id in pipeline_jobs:
+                pipeline_jobs[job_id]["steps"]["4"]["status"] = "error"
+                pipeline_jobs[job_id]["errors"].append({"step": 4, "error": _fmt_err(step_error)})
+
+    return not await _check_paused_or_stopped(batch_id)
+
+
+async def _first_login_stage(batch_id: UUID, stage: Stage, new_password: str) -> Union[bool, str]:
+    """Step 5 for one tenant. Returns True if the first login succeeded, else the error."""
+    from app.services.tenant_automation import process_tenants_parallel
+
+    async with SessionLocal() as db:
+        t = await db.get(Tenant, stage.tenant_id)
+        if not t:
+            return False
+        tenant_data = {
+            "tenant_id": str(t.id),
+            "admin_email": t.admin_email,
+            "initial_password": t.initial_password or t.admin_password,
+        }
+
+    results = await process_tenants_parallel([tenant_data], new_password, max_workers=1)
+    r = results[0] if results else {"success": False, "error": "No result"}
+
+    async with SessionLocal() as db:
+        t = await db.get(Tenant, stage.tenant_id)
+        if not t:
+            return False
+        if r.get("success"):
+            if r.get("password_changed"):
+                t.admin_password = r.get("new_password", new_password)
+                t.password_changed = True
+                logger.info(f"[Step 5] Password was CHANGED for {t.admin_email}")
+            else:
+                t.password_changed = False
+                logger.info(f"[Step 5] Password was NOT changed for {t.admin_email}, keeping original")
+            t.first_login_completed = True
+            t.first_login_at = datetime.utcnow()
+            t.setup_error = None
+            if r.get("totp_secret") and not t.totp_secret:
+                t.totp_secret = r["totp_secret"]
+            await log_activity(batch_id, 5, STEP_NAMES[5], "tenant", str(t.id), stage.name, "completed")
+        else:
+            t.step4_retry_count = (t.step4_retry_count or 0) + 1
+            t.setup_error = r.get("error", "Unknown")
+            if t.step4_retry_count > MAX_PIPELINE_RETRIES:
+                t.first_login_completed = True
+                t.setup_error = f"SKIPPED after {MAX_PIPELINE_RETRIES} retries: {r.get('error')}"
+                await log_activity(batch_id, 5, STEP_NAMES[5], "tenant", str(t.id), stage.name, "skipped", t.setup_error)
+            else:
+                await log_activity(batch_id, 5, STEP_NAMES[5], "tenant", str(t.id), stage.name, "failed", r.get("error"))
+        await db.commit()
+    return True if r.get("success") else r.get("error") or False
+
+
+async def _m365_setup_stage(batch_id: UUID, stage: Stage) -> Union[bool, str]:
+    """Step 6 for one domain. Returns True if the domain is verified with DKIM, else the error."""
+    from app.services.m365_setup import run_step5_for_domain
+
+    result = await run_step5_for_domain(stage.domain_id)
+
+    async with SessionLocal() as db:
+        d = await db.get(Domain, stage.domain_id)
+        if not d:
+            return False
+        if result.get("success"):
+            await log_activity(batch_id, 6, STEP_NAMES[6], "domain", str(d.id), d.name, "completed")
+        elif not d.domain_verified_in_m365:
+            d.step5_retry_count = (d.step5_retry_count or 0) + 1
+            if d.step5_retry_count > MAX_PIPELINE_RETRIES:
+                # Use skip flag instead of lying about verification status
+                d.step5_skipped = True
+                d.error_message = f"SKIPPED M365 setup after {MAX_PIPELINE_RETRIES} retries"
+                await log_activity(batch_id, 6, STEP_NAMES[6], "domain", str(d.id), d.name, "skipped", d.error_message)
+            else:
+                await log_activity(batch_id, 6, STEP_NAMES[6], "domain", str(d.id), d.name, "failed", result.get("error"))
+        await db.commit()
+    return True if result.get("success") else result.get("error") or False
+
+
+async def _mailbox_stage(batch_id: UUID, stage: Stage, attempt: int) -> Union[bool, str]:
+    """Step 7 for one domain; its last attempt skips the domain. Returns True if its mailboxes are done, else the error."""
+    from app.services.azure_step6 import run_step6_for_tenant
+
+    async with SessionLocal() as db:
+        d = await db.get(Domain, stage.domain_id)
+        domain_index = d.domain_index_in_tenant if d else 0
+
+    try:
+        result = await run_step6_for_tenant(stage.tenant_id, domain_id=stage.domain_id, domain_index=domain_index)
+    except Exception as e:
+        result = {"success": False, "error": _fmt_err(e)}
+    if result.get("success"):
+        await log_activity(batch_id, 7, STEP_NAMES[7], "domain", str(stage.domain_id), stage.name, "completed")
+        return True
+    if attempt <= MAX_PIPELINE_RETRIES:
+        await log_activity(batch_id, 7, STEP_NAMES[7], "domain", str(stage.domain_id), stage.name, "failed", result.get("error"))
+        return result.get("error") or False
+
+    async with SessionLocal() as db:
+        d = await db.get(Domain, stage.domain_id)
+        if d and not d.step6_complete:
+            # Use skip flag instead of lying about completion
+            d.step6_skipped = True
+            d.error_message = f"SKIPPED mailbox creation after {MAX_PIPELINE_RETRIES} retries"
+            await log_activity(batch_id, 7, STEP_NAMES[7], "domain", str(d.id), d.name, "skipped", d.error_message)
+            await db.flush()
+            # Also mark the parent tenant as complete if all its domains are done/skipped
+            remaining = await db.scalar(
+                select(func.count(Domain.id)).where(
+                    Domain.tenant_id == d.tenant_id,
+                    Domain.step6_complete.is_not(True),
+                    Domain.step6_skipped.is_not(True),
+                )
+            ) or 0
+            if remaining == 0:
+                t = await db.get(Tenant, d.tenant_id)
+                if t and not t.step6_complete:
+                    t.step6_complete = True
+                    t.step6_error = f"SKIPPED after {MAX_PIPELINE_RETRIES} retries"
+            await db.commit()
+    return result.get("error") or False
+
+
+async def _smtp_auth_stage(batch_id: UUID, stage: Stage) -> Union[bool, str]:
+    """Step 8 for one tenant. Returns True if SMTP auth is enabled, else the error."""
+    async with SessionLocal() as db:
+        t = await db.get(Tenant, stage.tenant_id)
+        if not t:
+            return False
+        creds = {
+            "admin_email": t.admin_email,
+            "admin_password": t.admin_password,
+            "totp_secret": t.totp_secret,
+            "domain": stage.name,
+        }
+
+    try:
+        result = await enable_org_smtp_auth(**creds)
+    except Exception as e:
+        result = {"success": False, "error": str(e)}
+
+    async with SessionLocal() as db:
+        tenant = await db.get(Tenant, stage.tenant_id)
+        if not tenant:
+            return False
+        if result.get("success"):
+            tenant.step7_complete = True
+            tenant.step7_smtp_auth_enabled = True
+            await log_activity(batch_id, 8, STEP_NAMES[8], "tenant", str(tenant.id), stage.name, "completed")
+        else:
+            tenant.step7_retry_count = (tenant.step7_retry_count or 0) + 1
+            tenant.step7_error = result.get("error")
+            if tenant.step7_retry_count > MAX_PIPELINE_RETRIES:
+                tenant.step7_complete = True
+                tenant.step7_error = f"SKIPPED after {MAX_PIPELINE_RETRIES} retries: {result.get('error')}"
+                await log_activity(batch_id, 8, STEP_NAMES[8], "tenant", str(tenant.id),
+                    stage.name, "skipped", tenant.step7_error)
+            else:
+                await log_activity(batch_id, 8, STEP_NAMES[8], "tenant", str(tenant.id),
+                    stage.name, "failed", result.get("error"))
+        await db.commit()
+    return True if result.get("success") else result.get("error") or False
+
+
+async def _stream_steps(
+    batch_id: UUID, start_from_step: int, wait_for_ns: bool, job: Optional[JobContext] = None,
+) -> bool:
+    """
+    Steps 3-8 without batch-wide barriers.
+
+    Steps 3-4 run as one feed task (_domain_feed) while every tenant goes
+    through Steps 5-8 on its own (app.services.pipeline_stream): a tenant
+    starts M365 setup as soon as its first login and its domain's DNS are
+    done, whatever the rest of the batch is doing. Each step has its own
+    concurrency limit; step progress and the batch counters are derived from
+    the tenant/domain rows on every round.
+
+    With a job, every item's progress markers are kept in job.checkpoint
+    ["items"]: a resumed job skips the finished items (as per their rows)
+    and re-drives the ones that were in flight first, with their attempts.
+
+    Returns:
+        False if the pipeline was paused/stopped meanwhile
+    """
+    job_id = str(batch_id)
+    settings = get_settings()
+    first_step = max(start_from_step, pipeline_stream.FIRST_LOGIN)
+    for step in range(4 if start_from_step > 4 else 5, first_step):
+        logger.info(f"Skipping Step {step} (starting from step {start_from_step})")
+        if job_id in pipeline_jobs:
+            pipeline_jobs[job_id]["steps"][str(step)]["status"] = "completed"
+
+    async with SessionLocal() as db:
+        batch = await db.get(SetupBatch, batch_id)
+        new_password = batch.new_admin_password if batch else "#Sendemails1"
+
+    if wait_for_ns:
+        await _update_pipeline(batch_id, 3, "running", "Checking nameserver propagation...")
+    else:
+        await _update_pipeline(batch_id, first_step, "running", f"Running Steps {first_step}-8 per tenant...")
+    feed = asyncio.create_task(_domain_feed(batch_id, wait_for_ns, start_from_step <= 4))
+
+    async def run_stage(stage: Stage, attempt: int) -> Union[bool, str]:
+        if stage.step == pipeline_stream.FIRST_LOGIN:
+            return await _first_login_stage(batch_id, stage, new_password)
+        if stage.step == pipeline_stream.M365_SETUP:
+            return await _m365_setup_stage(batch_id, stage)
+        if stage.step == pipeline_stream.MAILBOXES:
+            return await _mailbox_stage(batch_id, stage, attempt)
+        return await _smtp_auth_stage(batch_id, stage)
+
+    stream = pipeline_stream.ItemStream(
+        run_stage,
+        limits={
+            pipeline_stream.FIRST_LOGIN: settings.pipeline_first_login_concurrency,
+            pipeline_stream.M365_SETUP: settings.pipeline_m365_concurrency or settings.max_parallel_browsers,
+            pipeline_stream.MAILBOXES: settings.pipeline_mailbox_concurrency or settings.max_parallel_browsers,
+            pipeline_stream.SMTP_AUTH: settings.pipeline_smtp_concurrency,
+        },
+        retry_seconds=settings.pipeline_stage_retry_seconds,
+        max_attempts=MAX_PIPELINE_RETRIES + 1,
+    )
+    if job and job.checkpoint.get("items"):
+        stream.restore(job.checkpoint["items"])
+        logger.info(
+            f"Resuming Steps {first_step}-8 for batch {batch_id}: {len(job.checkpoint['items'])} items "
+            f"with saved progress, {len(stream.interrupted)} were in flight"
+        )
+    progress = {"counters": None, "counts": None, "step": None}  # Last written / derived
+
+    async def find_stages():
+        async with SessionLocal() as db:
+            tenants = (await db.execute(select(Tenant).where(Tenant.batch_id == batch_id))).scalars().all()
+            domains = (await db.execute(
+                select(Domain).join(Tenant, Domain.tenant_id == Tenant.id).where(Tenant.batch_id == batch_id)
+            )).scalars().all()
+
+            domains_by_tenant = {}
+            for d in domains:
+                domains_by_tenant.setdefault(d.tenant_id, []).append(d)
+
+            ready, waiting = [], 0
+            for t in tenants:
+                state, stage = pipeline_stream.next_stage(
+                    t, domains_by_tenant.get(t.id, []), first_step, dns_settled=feed.done(),
+                    max_retries=MAX_PIPELINE_RETRIES, given_up=stream.given_up,
+                )
+                if state == pipeline_stream.READY:
+                    ready.append(stage)
+                elif state == pipeline_stream.WAITING:
+                    waiting += 1
+
+            counts = pipeline_stream.step_counts(tenants, domains, MAX_PIPELINE_RETRIES)
+            latest = {
+                "first_login_completed_count": counts[5]["completed"],
+                "m365_completed": counts[6]["completed"],
+                "mailboxes_completed_count": counts[7]["completed"],
+                "smtp_completed": counts[8]["completed"],
+            }
+            if latest != progress["counters"]:
+                await db.execute(update(SetupBatch).where(SetupBatch.id == batch_id).values(**latest))
+                await db.commit()
+                progress["counters"] = latest
+            progress["counts"] = counts
+
+        if job:
+            items = stream.checkpoint()
+            if items != job.checkpoint.get("items"):
+                job.checkpoint["items"] = items
+                await job.save()
+
+        busy = {stage.step for stage in ready} | {stage.step for stage, _ in stream.running.values()}
+        if waiting:
+            busy.add(pipeline_stream.M365_SETUP)
+        if job_id in pipeline_jobs:
+            live = pipeline_jobs[job_id]
+            for step in range(first_step, 9):
+                done = counts[step]["completed"] + counts[step]["failed"]
+                live["steps"][str(step)].update(
+                    counts[step],
+                    status="running" if step in busy else "completed" if done >= counts[step]["total"] else "pending",
+                )
+            live["items"] = dict(stream.snapshot(), waiting_for_dns=waiting)
+            if feed.done():
+                live["message"] = " · ".join(
+                    f"{STEP_NAMES[step]} {counts[step]['completed']}/{counts[step]['total']}"
+                    for step in range(first_step, 9)
+                )
+        # Resume (and the dashboard) go by the lowest step an item is still on
+        if (feed.done() and busy and min(busy) != progress["step"]
+                and not await _check_paused_or_stopped(batch_id)):
+            progress["step"] = min(busy)
+            message = pipeline_jobs[job_id]["message"] if job_id in pipeline_jobs else ""
+            await _update_pipeline(batch_id, min(busy), "running", message)
+        return ready, waiting
+
+    try:
+        if not await stream.run(find_stages, lambda: _check_paused_or_stopped(batch_id)):
+            await feed
+            return False
+        if not await feed:
+            return False
+    except Exception as step_error:
+        # Not "continuing to next step": Steps 5-8 are unfinished, so run_pipeline
+        # fails the job and the job queue resumes it from its checkpoint
+        logger.error(f"Steps 5-8 CRASHED: {_fmt_err(step_error)}")
+        await log_activity(batch_id, first_step, STEP_NAMES[first_step], status="error", message=_fmt_err(step_error))
+        if job_id in pipeline_jobs:
+            for step in range(first_step, 9):
+                pipeline_jobs[job_id]["steps"][str(step)]["status"] = "error"
+            pipeline_jobs[job_id]["errors"].append({"step": first_step, "error": _fmt_err(step_error)})
+        raise
+    finally:
+        if not feed.done():
+            feed.cancel()
+
+    await find_stages()  # Final counts
+    if job_id in pipeline_jobs:
+        for step in range(first_step, 9):
+            pipeline_jobs[job_id]["steps"][str(step)]["status"] = "completed"
+    counts = progress["counts"]
+    for step in range(first_step, 9):
+        logger.info(
+            f"Step {step} complete: {counts[step]['completed']}/{counts[step]['total']} done, "
+            f"{counts[step]['failed']} skipped"
+        )
+
+    # Chrome left behind by a crashed driver; only once no stage holds a browser
+    if browser_slots.snapshot()["active"] == 0:
+        kill_all_browsers()
+    return True
+
+
+async def _enqueue_pipeline(db: AsyncSession, batch_id: UUID, start_from_step: int = 1):
+    """Queue a run_pipeline job for the batch (the active one is kept if there is one) and commit."""
+    job = await job_queue.enqueue(
+        db,
+        PIPELINE_JOB,
+        {"batch_id": str(batch_id), "start_from_step": start_from_step},
+        key=str(batch_id),
+    )
+    await db.commit()
+    job_queue.wake_runner()
+    return job
+
+
+@job_handler(PIPELINE_JOB)
+async def _run_pipeline_job(ctx: JobContext):
+    """Job queue entry point for run_pipeline."""
+    batch_id = UUID(ctx.payload["batch_id"])
+    start_from_step = ctx.payload.get("start_from_step", 1)
+    job_id = str(batch_id)
+
+    if ctx.resumed:
+        # The previous run died (restart, lost lease): carry on from the step it reached.
+        # Every step only picks up items not finished yet, so re-entering one is safe;
+        # Steps 5-8 also re-drive the items that were in flight from ctx.checkpoint.
+        async with SessionLocal() as db:
+            batch = await db.get(SetupBatch, batch_id)
+        if not batch:
+            return
+        if batch.pipeline_paused_at or batch.pipeline_status in ("completed", "stopped"):
+            logger.info(f"Not resuming pipeline for batch {batch_id} (status {batch.pipeline_status})")
+            return
+        start_from_step = max(start_from_step, batch.pipeline_step or 1)
+        if job_id in pipeline_jobs and pipeline_jobs[job_id].get("status") == "running":
+            pipeline_jobs.pop(job_id)  # Left behind by the run that lost the lease
+        logger.info(f"Resuming pipeline for batch {batch_id} from step {start_from_step} (attempt {ctx.attempt})")
+
+    def _paused_elsewhere():
+        # Pause requested through an API process that does not run this job
+        if job_id in pipeline_jobs and pipeline_jobs[job_id].get("status") == "running":
+            pipeline_jobs[job_id]["status"] = "paused"
+            pipeline_jobs[job_id]["message"] = "Pipeline paused by user"
+
+    ctx.progress = lambda: pipeline_jobs.get(job_id)
+    ctx.on_cancel = _paused_elsewhere
+    await run_pipeline(batch_id, start_from_step, ctx)
+
+
+async def run_pipeline(batch_id: UUID, start_from_step: int = 1, job: Optional[JobContext] = None):
     """
     MAIN PIPELINE ORCHESTRATOR.
 
     Runs Steps 1-10 sequentially, pausing only at Step 2 (NS update).
     Each step calls existing service functions.
     Errors on individual items don't block the pipeline — they're logged and the item is skipped.
-    Supports resuming from any step via start_from_step parameter.
+    Supports resuming from any step via start_from_step parameter, and
+    (given the pipeline job) from each item's saved progress in Steps 5-8.
+    A crash outside the per-item handling fails the pipeline job, so the job
+    queue runs it again (and it resumes) while it has attempts left.
     """
     job_id = str(batch_id)
 
@@ -1037,7 +1681,7 @@ async def run_pipeline(batch_id: UUID, start_from_step: int = 1):
                 "total_tenants": batch.total_tenants or 0,
                 "steps": {str(i): {"status": "pending", "completed": 0, "failed": 0, "total": 0} for i in range(1, 11)},
                 "errors": [],
-                "activity_log": [],
+                "activity_log": deque(maxlen=ACTIVITY_LOG_SIZE),
             }
 
     pipeline_jobs[job_id]["status"] = "running"
@@ -1077,31 +1721,26 @@ async def run_pipeline(batch_id: UUID, start_from_step: int = 1):
                 zones_failed = 0
                 ns_groups = {}
 
-                for domain in domains:
-                    if await _check_paused_or_stopped(batch_id):
-                        await _update_pipeline(batch_id, 1, "paused", "Paused by user")
-                        return
-
-                    try:
-                        zone_result = await cloudflare_service.create_zone(domain.name)
-                        if zone_result.get("zone_id"):
+                # Zones are found (via the cross-account zone index) or created concurrently,
+                # bounded by cloudflare_bulk_max_workers; results stream back as each domain
+                # finishes so progress is saved per domain.
+                domain_by_name = {d.name: d for d in domains}
+                async with aclosing(
+                    cloudflare_service.iter_bulk_create_zones(list(domain_by_name))
+                ) as zone_results:
+                    async for zone_result in zone_results:
+                        domain = domain_by_name[zone_result["domain"]]
+
+                        if zone_result["success"] and zone_result.get("zone_id"):
                             domain.cloudflare_zone_id = zone_result["zone_id"]
                             domain.cloudflare_nameservers = zone_result.get("nameservers", [])
                             domain.status = DomainStatus.CF_ZONE_ACTIVE
                             zones_created += 1
 
                             # Phase 1 DNS: CNAME proxy + DMARC (before NS propagation)
-                            try:
-                                await cloudflare_service.create_phase1_dns(zone_result["zone_id"], domain.name)
+                            if zone_result.get("phase1_dns") is not None:
                                 domain.phase1_cname_added = True
                                 domain.phase1_dmarc_added = True
-                            except Exception as dns_e:
-                                if "already exists" in str(dns_e).lower():
-                                    logger.info(f"Phase 1 DNS already exists for {domain.name} — skipping")
-                                    domain.phase1_cname_added = True
-                                    domain.phase1_dmarc_added = True
-                                else:
-                                    logger.warning(f"Phase 1 DNS failed for {domain.name}: {dns_e}")
 
                             # Track NS groups
                             ns_key = ",".join(sorted(domain.cloudflare_nameservers or []))
@@ -1112,15 +1751,14 @@ async def run_pipeline(batch_id: UUID, start_from_step: int = 1):
                             await log_activity(batch_id, 1, STEP_NAMES[1], "domain", str(domain.id), domain.name, "completed", "Zone created")
                         else:
                             zones_failed += 1
-                            domain.error_message = zone_result.get("error", "Zone creation failed")
+                            domain.error_message = zone_result.get("error") or "Zone creation failed"
                             await log_activity(batch_id, 1, STEP_NAMES[1], "domain", str(domain.id), domain.name, "failed", domain.error_message)
 
-                    except Exception as e:
-                        zones_failed += 1
-                        domain.error_message = str(e)
-                        await log_activity(batch_id, 1, STEP_NAMES[1], "domain", str(domain.id), domain.name, "failed", str(e))
+                        await db.commit()
 
-                    await db.commit()
+                        if await _check_paused_or_stopped(batch_id):
+                            await _update_pipeline(batch_id, 1, "paused", "Paused by user")
+                            return
 
                 # Update batch counters — count ALL domains with zones (including re-used)
                 total_with_zones = await db.scalar(
@@ -1185,6 +1823,7 @@ async def run_pipeline(batch_id: UUID, start_from_step: int = 1):
         # ================================================================
         # STEP 2-3: NS Update + Propagation (auto-skip if already done)
         # ================================================================
+        wait_for_ns = False
         if start_from_step <= 2:
           try:
             # Check if NS already confirmed (re-used domains)
@@ -1254,79 +1893,8 @@ async def run_pipeline(batch_id: UUID, start_from_step: int = 1):
                 if job_id in pipeline_jobs:
                     pipeline_jobs[job_id]["steps"]["2"]["status"] = "completed"
 
-                # ================================================================
-                # STEP 3: Verify NS Propagation
-                # ================================================================
-                await _update_pipeline(batch_id, 3, "running", "Checking nameserver propagation...")
-                await log_activity(batch_id, 3, STEP_NAMES[3], status="started")
-
-                total_zones = 0
-                total_propagated = 0
-                NS_PROPAGATION_TIMEOUT = 3600 * 4  # 4 hours max
-                ns_start_time = time.time()
-
-                while True:
-                    if await _check_paused_or_stopped(batch_id):
-                        return
-
-                    if time.time() - ns_start_time > NS_PROPAGATION_TIMEOUT:
-                        logger.error(f"Step 3: NS propagation timed out after 4 hours")
-                        await log_activity(batch_id, 3, STEP_NAMES[3], status="warning",
-                            message=f"Timed out — {total_propagated}/{total_zones} propagated. Proceeding anyway.")
-                        break
-
-                    async with SessionLocal() as db:
-                        # Find domains with zones that haven't propagated yet
-                        domains = (await db.execute(
-                            select(Domain).where(
-                                Domain.batch_id == batch_id,
-                                Domain.cloudflare_zone_id != None,
-                                Domain.ns_propagated_at == None,
-                            )
-                        )).scalars().all()
-
-                        if not domains:
-                            break  # All propagated
-
-                        for domain in domains:
-                            try:
-                                zone_status = await cloudflare_service.get_zone_status(domain.cloudflare_zone_id)
-                                if zone_status == "active":
-                                    domain.status = DomainStatus.NS_PROPAGATED
-                                    domain.ns_propagated_at = datetime.utcnow()
-                                    domain.nameservers_updated = True
-                                    await log_activity(batch_id, 3, STEP_NAMES[3], "domain", str(domain.id), domain.name, "completed", "NS propagated")
-                            except Exception as e:
-                                logger.warning(f"Propagation check failed for {domain.name}: {e}")
-
-                        await db.commit()
-
-                        total_zones = await db.scalar(
-                            select(func.count(Domain.id)).where(Domain.batch_id == batch_id, Domain.cloudflare_zone_id != None)
-                        ) or 0
-                        total_propagated = await db.scalar(
-                            select(func.count(Domain.id)).where(Domain.batch_id == batch_id, Domain.ns_propagated_at != None)
-                        ) or 0
-
-                        batch = await db.get(SetupBatch, batch_id)
-                        if batch:
-                            batch.ns_propagated_count = total_propagated
-                            await db.commit()
-
-                    if job_id in pipeline_jobs:
-                        pipeline_jobs[job_id]["steps"]["3"]["completed"] = total_propagated
-                        pipeline_jobs[job_id]["steps"]["3"]["total"] = total_zones
-                        pipeline_jobs[job_id]["message"] = f"NS propagation: {total_propagated}/{total_zones}"
-
-                    if total_zones and total_propagated and total_propagated >= total_zones * 0.95:
-                        logger.info(f"Step 3: {total_propagated}/{total_zones} propagated (≥95%), proceeding")
-                        break
-
-                    await asyncio.sleep(30)
-
-                if job_id in pipeline_jobs:
-                    pipeline_jobs[job_id]["steps"]["3"]["status"] = "completed"
-                await log_activity(batch_id, 3, STEP_NAMES[3], status="completed", message=f"{total_propagated}/{total_zones} propagated")
+                # Step 3 runs alongside the per-tenant steps, see _stream_steps
+                wait_for_ns = True
 
           except Exception as step_error:
             logger.error(f"Step 2-3 CRASHED (continuing to next step): {_fmt_err(step_error)}")
@@ -1343,86 +1911,7 @@ async def run_pipeline(batch_id: UUID, start_from_step: int = 1):
             logger.info(f"Skipping Step 2 (starting from step {start_from_step})")
             if job_id in pipeline_jobs:
                 pipeline_jobs[job_id]["steps"]["2"]["status"] = "completed"
-          
-            try:
-                await _update_pipeline(batch_id, 3, "running", "Checking nameserver propagation...")
-                await log_activity(batch_id, 3, STEP_NAMES[3], status="started")
-
-                total_zones = 0
-                total_propagated = 0
-                NS_PROPAGATION_TIMEOUT = 3600 * 4
-                ns_start_time = time.time()
-
-                while True:
-                    if await _check_paused_or_stopped(batch_id):
-                        return
-
-                    if time.time() - ns_start_time > NS_PROPAGATION_TIMEOUT:
-                        logger.error(f"Step 3: NS propagation timed out after 4 hours")
-                        await log_activity(batch_id, 3, STEP_NAMES[3], status="warning",
-                            message=f"Timed out — {total_propagated}/{total_zones} propagated. Proceeding anyway.")
-                        break
-
-                    async with SessionLocal() as db:
-                        domains = (await db.execute(
-                            select(Domain).where(
-                                Domain.batch_id == batch_id,
-                                Domain.cloudflare_zone_id != None,
-                                Domain.ns_propagated_at == None,
-                            )
-                        )).scalars().all()
-
-                        if not domains:
-                            break
-
-                        for domain in domains:
-                            try:
-                                zone_status = await cloudflare_service.get_zone_status(domain.cloudflare_zone_id)
-                                if zone_status == "active":
-                                    domain.status = DomainStatus.NS_PROPAGATED
-                                    domain.ns_propagated_at = datetime.utcnow()
-                                    domain.nameservers_updated = True
-                                    await log_activity(batch_id, 3, STEP_NAMES[3], "domain", str(domain.id), domain.name, "completed", "NS propagated")
-                            except Exception as e:
-                                logger.warning(f"Propagation check failed for {domain.name}: {e}")
-
-                        await db.commit()
-
-                        total_zones = await db.scalar(
-                            select(func.count(Domain.id)).where(Domain.batch_id == batch_id, Domain.cloudflare_zone_id != None)
-                        ) or 0
-                        total_propagated = await db.scalar(
-                            select(func.count(Domain.id)).where(Domain.batch_id == batch_id, Domain.ns_propagated_at != None)
-                        ) or 0
-
-                        batch = await db.get(SetupBatch, batch_id)
-                        if batch:
-                            batch.ns_propagated_count = total_propagated
-                            await db.commit()
-
-                    if job_id in pipeline_jobs:
-                        pipeline_jobs[job_id]["steps"]["3"]["completed"] = total_propagated
-                        pipeline_jobs[job_id]["steps"]["3"]["total"] = total_zones
-                        pipeline_jobs[job_id]["message"] = f"NS propagation: {total_propagated}/{total_zones}"
-
-                    if total_zones and total_propagated and total_propagated >= total_zones * 0.95:
-                        logger.info(f"Step 3: {total_propagated}/{total_zones} propagated (≥95%), proceeding")
-                        break
-
-                    await asyncio.sleep(30)
-
-                if job_id in pipeline_jobs:
-                    pipeline_jobs[job_id]["steps"]["3"]["status"] = "completed"
-                await log_activity(batch_id, 3, STEP_NAMES[3], status="completed", message=f"{total_propagated}/{total_zones} propagated")
-
-            except Exception as step_error:
-                logger.error(f"Step 3 CRASHED (continuing to next step): {_fmt_err(step_error)}")
-                import traceback
-                logger.error(traceback.format_exc())
-                await log_activity(batch_id, 3, STEP_NAMES[3], status="error", message=_fmt_err(step_error))
-                if job_id in pipeline_jobs:
-                    pipeline_jobs[job_id]["steps"]["3"]["status"] = "error"
-                    pipeline_jobs[job_id]["errors"].append({"step": 3, "error": _fmt_err(step_error)})
+            wait_for_ns = True
         else:
             logger.info(f"Skipping Steps 2-3 (starting from step {start_from_step})")
             if job_id in pipeline_jobs:
@@ -1430,589 +1919,17 @@ async def run_pipeline(batch_id: UUID, start_from_step: int = 1):
                 pipeline_jobs[job_id]["steps"]["3"]["status"] = "completed"
 
         # ================================================================
-        # STEP 4: Create DNS Records + Redirects
-        # ================================================================
-        if start_from_step <= 4:
-          try:
-            await _update_pipeline(batch_id, 4, "running", "Creating DNS records and redirects...")
-            await log_activity(batch_id, 4, STEP_NAMES[4], status="started")
-
-            async with SessionLocal() as db:
-                # Only process domains that need DNS (skip already-configured re-used domains)
-                domains = (await db.execute(
-                    select(Domain).where(
-                        Domain.batch_id == batch_id,
-                        Domain.cloudflare_zone_id.isnot(None),
-                        Domain.dns_records_created.is_not(True),
-                    )
-                )).scalars().all()
-
-                dns_done = 0
-                for domain in domains:
-                    if await _check_paused_or_stopped(batch_id):
-                        return
-
-                    try:
-                        zone_id = domain.cloudflare_zone_id
-                        if not zone_id:
-                            continue
-
-                        dns_result = await cloudflare_service.ensure_email_dns_records(zone_id, domain.name)
-
-                        all_ok = all(r["success"] for r in dns_result.values())
-                        if all_ok:
-                            domain.dns_records_created = True
-                            dns_done += 1
-                            await log_activity(batch_id, 4, STEP_NAMES[4], "domain", str(domain.id), domain.name, "completed", "DNS records ensured")
-                        else:
-                            errors = [f"{k}: {v['error']}" for k, v in dns_result.items() if v.get("error")]
-                            domain.error_message = "; ".join(errors)
-                            await log_activity(batch_id, 4, STEP_NAMES[4], "domain", str(domain.id), domain.name, "failed", domain.error_message)
-
-                        if domain.redirect_url and not getattr(domain, 'redirect_configured', False):
-                            try:
-                                await cloudflare_service.create_redirect_rule(zone_id, domain.name, domain.redirect_url)
-                                domain.redirect_configured = True
-                            except Exception as re:
-                                logger.warning(f"Redirect failed for {domain.name}: {re}")
-
-                    except Exception as e:
-                        domain.error_message = str(e)
-                        await log_activity(batch_id, 4, STEP_NAMES[4], "domain", str(domain.id), domain.name, "failed", str(e))
-
-                    await db.commit()
-
-                total_dns_done = await db.scalar(
-                    select(func.count(Domain.id)).where(
-                        Domain.batch_id == batch_id,
-                        Domain.dns_records_created == True,
-                    )
-                ) or 0
-
-                batch = await db.get(SetupBatch, batch_id)
-                if batch:
-                    batch.dns_completed = total_dns_done
-                    await db.commit()
-
-            if job_id in pipeline_jobs:
-                pipeline_jobs[job_id]["steps"]["4"]["status"] = "completed"
-                pipeline_jobs[job_id]["steps"]["4"]["completed"] = total_dns_done
-
-            logger.info(f"Step 4: {dns_done} new DNS configured, {total_dns_done} total ready")
-
-          except Exception as step_error:
-            logger.error(f"Step 4 CRASHED (continuing to next step): {_fmt_err(step_error)}")
-            import traceback
-            logger.error(traceback.format_exc())
-            await log_activity(batch_id, 4, STEP_NAMES[4], status="error", message=_fmt_err(step_error))
-            if job_id in pipeline_jobs:
-                pipeline_jobs[job_id]["steps"]["4"]["status"] = "error"
-                pipeline_jobs[job_id]["errors"].append({"step": 4, "error": _fmt_err(step_error)})
-        else:
-            logger.info(f"Skipping Step 4 (starting from step {start_from_step})")
-            if job_id in pipeline_jobs:
-                pipeline_jobs[job_id]["steps"]["4"]["status"] = "completed"
-
-        # ================================================================
-        # STEP 5: First Login Automation (BATCHED WITH CLEANUP)
-        # ================================================================
-        if start_from_step <= 5:
-          try:
-            await _update_pipeline(batch_id, 5, "running", "Running first login automation...")
-            await log_activity(batch_id, 5, STEP_NAMES[5], status="started")
-
-            async with SessionLocal() as db:
-                batch = await db.get(SetupBatch, batch_id)
-                new_password = batch.new_admin_password if batch else "#Sendemails1"
-
-            from app.services.tenant_automation import process_tenants_parallel
-
-            CHUNK_SIZE = 20  # Process 20 tenants at a time, then full cleanup
-
-            for attempt in range(MAX_PIPELINE_RETRIES + 1):
-                if await _check_paused_or_stopped(batch_id):
-                    return
-
-                # Get all tenants still needing first login
-                async with SessionLocal() as db:
-                    tenants = (await db.execute(
-                        select(Tenant).where(
-                            Tenant.batch_id == batch_id,
-                            Tenant.first_login_completed.is_not(True),
-                            (Tenant.step4_retry_count <= MAX_PIPELINE_RETRIES) | Tenant.step4_retry_count.is_(None),
-                        )
-                    )).scalars().all()
-
-                    if not tenants:
-                        logger.info(f"Step 5: All tenants completed first login")
-                        break
-
-                    remaining = len(tenants)
-                    logger.info(f"Step 5: Attempt {attempt + 1}/{MAX_PIPELINE_RETRIES + 1} — {remaining} tenants remaining")
-                    await _update_pipeline(batch_id, 5, "running",
-                        f"First login attempt {attempt + 1} — {remaining} tenants remaining...")
-
-                    all_tenant_data = [
-                        {
-                            "tenant_id": str(t.id),
-                            "admin_email": t.admin_email,
-                            "initial_password": t.initial_password or t.admin_password,
-                        }
-                        for t in tenants
-                    ]
-
-                # Process in chunks with cleanup between each
-                for chunk_idx in range(0, len(all_tenant_data), CHUNK_SIZE):
-                    if await _check_paused_or_stopped(batch_id):
-                        return
-
-                    chunk = all_tenant_data[chunk_idx:chunk_idx + CHUNK_SIZE]
-                    chunk_num = (chunk_idx // CHUNK_SIZE) + 1
-                    total_chunks = (len(all_tenant_data) + CHUNK_SIZE - 1) // CHUNK_SIZE
-
-                    logger.info(f"Step 5: Processing chunk {chunk_num}/{total_chunks} ({len(chunk)} tenants)")
-                    await _update_pipeline(batch_id, 5, "running",
-                        f"First login — chunk {chunk_num}/{total_chunks} ({len(chunk)} tenants)...")
-
-                    try:
-                        results = await process_tenants_parallel(chunk, new_password, max_workers=STEP5_MAX_WORKERS)
-
-                        # Save results immediately after each chunk
-                        async with SessionLocal() as db:
-                            for r in results:
-                                try:
-                                    t = await db.get(Tenant, UUID(r["tenant_id"]))
-                                    if not t:
-                                        continue
-                                    if r.get("success"):
-                                        if r.get("password_changed"):
-                                            t.admin_password = r.get("new_password", new_password)
-                                            t.password_changed = True
-                                            logger.info(f"[Step 5] Password was CHANGED for {t.admin_email}")
-                                        else:
-                                            t.password_changed = False
-                                            logger.info(f"[Step 5] Password was NOT changed for {t.admin_email}, keeping original")
-                                        t.first_login_completed = True
-                                        t.first_login_at = datetime.utcnow()
-                                        t.setup_error = None
-                                        if r.get("totp_secret") and not t.totp_secret:
-                                            t.totp_secret = r["totp_secret"]
-                                        await log_activity(batch_id, 5, STEP_NAMES[5], "tenant", str(t.id),
-                                            t.custom_domain or t.name, "completed")
-                                    else:
-                                        t.step4_retry_count = (t.step4_retry_count or 0) + 1
-                                        t.setup_error = r.get("error", "Unknown")
-                                        if t.step4_retry_count > MAX_PIPELINE_RETRIES:
-                                            t.first_login_completed = True
-                                            t.setup_error = f"SKIPPED after {MAX_PIPELINE_RETRIES} retries: {r.get('error')}"
-                                            await log_activity(batch_id, 5, STEP_NAMES[5], "tenant", str(t.id),
-                                                t.custom_domain or t.name, "skipped", t.setup_error)
-                                        else:
-                                            await log_activity(batch_id, 5, STEP_NAMES[5], "tenant", str(t.id),
-                                                t.custom_domain or t.name, "failed", r.get("error"))
-                                    await db.commit()
-                                except Exception as e:
-                                    logger.error(f"Failed to save Step 5 result for {r.get('tenant_id')}: {e}")
-
-                    except Exception as e:
-                        logger.error(f"Step 5 chunk {chunk_num} crashed: {e}")
-                        import traceback
-                        logger.error(traceback.format_exc())
-
-                    # === CRITICAL: Kill ALL Chrome between chunks ===
-                    logger.info(f"Step 5: Cleaning up browsers after chunk {chunk_num}/{total_chunks}...")
-                    kill_all_browsers()
-                    await asyncio.sleep(5)
-
-                # After all chunks, cleanup + wait before potential retry
-                kill_all_browsers()
-                if attempt < MAX_PIPELINE_RETRIES:
-                    await asyncio.sleep(10)
-
-            # Final count
-            async with SessionLocal() as db:
-                login_ok = await db.scalar(
-                    select(func.count(Tenant.id)).where(
-                        Tenant.batch_id == batch_id, Tenant.first_login_completed == True
-                    )
-                ) or 0
-                batch = await db.get(SetupBatch, batch_id)
-                if batch:
-                    batch.first_login_completed_count = login_ok
-                    await db.commit()
-
-            if job_id in pipeline_jobs:
-                pipeline_jobs[job_id]["steps"]["5"]["completed"] = login_ok
-                pipeline_jobs[job_id]["steps"]["5"]["status"] = "completed"
-            logger.info(f"Step 5 complete: {login_ok} tenants logged in successfully")
-
-            # === FINAL CLEANUP before Step 6 ===
-            logger.info("Step 5 done — full browser cleanup before Step 6...")
-            kill_all_browsers()
-            await asyncio.sleep(10)
-
-          except Exception as step_error:
-            logger.error(f"Step 5 CRASHED: {_fmt_err(step_error)}")
-            import traceback
-            logger.error(traceback.format_exc())
-            await log_activity(batch_id, 5, STEP_NAMES[5], status="error", message=_fmt_err(step_error))
-            if job_id in pipeline_jobs:
-                pipeline_jobs[job_id]["steps"]["5"]["status"] = "error"
-                pipeline_jobs[job_id]["errors"].append({"step": 5, "error": _fmt_err(step_error)})
-            kill_all_browsers()
-        else:
-            logger.info(f"Skipping Step 5 (starting from step {start_from_step})")
-            if job_id in pipeline_jobs:
-                pipeline_jobs[job_id]["steps"]["5"]["status"] = "completed"
-
-        # ================================================================
-        # STEP 6: M365 Domain Setup + DKIM (WITH AUTO-RETRY)
-        # ================================================================
-        if start_from_step <= 6:
-          try:
-            kill_all_browsers()
-            await asyncio.sleep(3)
-            await _update_pipeline(batch_id, 6, "running", "Adding domains to M365 and configuring DKIM...")
-            await log_activity(batch_id, 6, STEP_NAMES[6], status="started")
-
-            from app.services.m365_setup import run_step5_for_batch as run_m365_setup
-
-            for attempt in range(MAX_PIPELINE_RETRIES + 1):
-                if await _check_paused_or_stopped(batch_id):
-                    return
-
-                # Count domains still needing M365 setup
-                async with SessionLocal() as db:
-                    pending_m365 = await db.scalar(
-                        select(func.count(Domain.id)).where(
-                            Domain.batch_id == batch_id,
-                            Domain.tenant_id.isnot(None),
-                            Domain.domain_verified_in_m365.is_not(True),
-                            Domain.step5_skipped.is_not(True),
-                            (Domain.step5_retry_count <= MAX_PIPELINE_RETRIES) | Domain.step5_retry_count.is_(None),
-                        )
-                    ) or 0
-
-                if pending_m365 == 0:
-                    logger.info("Step 6: All domains have M365 setup configured")
-                    break
-
-                logger.info(f"Step 6: Attempt {attempt + 1}/{MAX_PIPELINE_RETRIES + 1} — {pending_m365} domains remaining")
-                await _update_pipeline(batch_id, 6, "running",
-                    f"M365 setup attempt {attempt + 1} — {pending_m365} domains remaining...")
-
-                try:
-                    m365_result = await run_m365_setup(batch_id)
-                    logger.info(f"Step 6 attempt {attempt + 1} result: {m365_result.get('processed', 0)} processed, {m365_result.get('failed', 0)} failed")
-                except Exception as e:
-                    logger.error(f"Step 6 attempt {attempt + 1} failed: {e}")
-
-                # Increment retry counts on failed domains and skip if exceeded
-                async with SessionLocal() as db:
-                    failed_domains = (await db.execute(
-                        select(Domain).where(
-                            Domain.batch_id == batch_id,
-                            Domain.tenant_id.isnot(None),
-                            Domain.domain_verified_in_m365.is_not(True),
-                            Domain.step5_skipped.is_not(True),
-                        )
-                    )).scalars().all()
-                    for d in failed_domains:
-                        d.step5_retry_count = (d.step5_retry_count or 0) + 1
-                        if d.step5_retry_count > MAX_PIPELINE_RETRIES:
-                            # Use skip flag instead of lying about verification status
-                            d.step5_skipped = True
-                            d.error_message = f"SKIPPED M365 setup after {MAX_PIPELINE_RETRIES} retries"
-                            await log_activity(batch_id, 6, STEP_NAMES[6], "domain", str(d.id),
-                                d.name, "skipped", d.error_message)
-                    await db.commit()
-
-                if attempt < MAX_PIPELINE_RETRIES:
-                    logger.info(f"Step 6: Cleaning up browsers before retry attempt {attempt + 2}...")
-                    kill_all_browsers()
-                    await asyncio.sleep(15)  # Extra time for memory recovery
-
-            # Step 6 is complete when ALL domains are verified+dkim OR skipped
-            async with SessionLocal() as db:
-                m365_ok = await db.scalar(
-                    select(func.count(Domain.id)).where(
-                        Domain.batch_id == batch_id,
-                        Domain.tenant_id.isnot(None),
-                        Domain.domain_verified_in_m365 == True,
-                        Domain.dkim_enabled == True,
-                    )
-                ) or 0
-                m365_skipped = await db.scalar(
-                    select(func.count(Domain.id)).where(
-                        Domain.batch_id == batch_id,
-                        Domain.tenant_id.isnot(None),
-                        Domain.step5_skipped == True,
-                    )
-                ) or 0
-                batch = await db.get(SetupBatch, batch_id)
-                if batch:
-                    batch.m365_completed = m365_ok
-                    await db.commit()
-
-            if job_id in pipeline_jobs:
-                pipeline_jobs[job_id]["steps"]["6"]["completed"] = m365_ok
-                pipeline_jobs[job_id]["steps"]["6"]["status"] = "completed"
-            logger.info(f"Step 6 complete: {m365_ok} domains M365 configured, {m365_skipped} skipped")
-
-            # === Clean up all Chrome processes before Step 7 ===
-            logger.info("Cleaning up browser processes between Step 6 and Step 7...")
-            kill_all_browsers()
-            await asyncio.sleep(5)
-
-          except Exception as step_error:
-            logger.error(f"Step 6 CRASHED (continuing to next step): {_fmt_err(step_error)}")
-            import traceback
-            logger.error(traceback.format_exc())
-            await log_activity(batch_id, 6, STEP_NAMES[6], status="error", message=_fmt_err(step_error))
-            if job_id in pipeline_jobs:
-                pipeline_jobs[job_id]["steps"]["6"]["status"] = "error"
-                pipeline_jobs[job_id]["errors"].append({"step": 6, "error": _fmt_err(step_error)})
-        else:
-            logger.info(f"Skipping Step 6 (starting from step {start_from_step})")
-            if job_id in pipeline_jobs:
-                pipeline_jobs[job_id]["steps"]["6"]["status"] = "completed"
-
-        # ================================================================
-        # STEP 7: Create Mailboxes + Delegate (WITH AUTO-RETRY, DOMAIN-BASED)
-        # ================================================================
-        if start_from_step <= 7:
-          try:
-            kill_all_browsers()
-            await asyncio.sleep(3)
-            await _update_pipeline(batch_id, 7, "running", "Creating mailboxes and delegation...")
-            await log_activity(batch_id, 7, STEP_NAMES[7], status="started")
-
-            async with SessionLocal() as db:
-                batch = await db.get(SetupBatch, batch_id)
-                display_name = f"{batch.persona_first_name or ''} {batch.persona_last_name or ''}".strip() if batch else ""
-
-            from app.services.azure_step6 import run_step6_for_batch as run_mailbox_creation
-
-            for attempt in range(MAX_PIPELINE_RETRIES + 1):
-                if await _check_paused_or_stopped(batch_id):
-                    return
-
-                # Count DOMAINS still needing mailbox creation (domain-based iteration)
-                async with SessionLocal() as db:
-                    pending_mb = await db.scalar(
-                        select(func.count(Domain.id)).where(
-                            Domain.batch_id == batch_id,
-                            Domain.tenant_id.isnot(None),
-                            Domain.domain_verified_in_m365 == True,
-                            Domain.dkim_enabled == True,
-                            Domain.step6_complete.is_not(True),
-                            Domain.step6_skipped.is_not(True),
-                        )
-                    ) or 0
-
-                if pending_mb == 0:
-                    logger.info("Step 7: All domains have mailboxes created")
-                    break
-
-                logger.info(f"Step 7: Attempt {attempt + 1}/{MAX_PIPELINE_RETRIES + 1} — {pending_mb} domains remaining")
-                await _update_pipeline(batch_id, 7, "running",
-                    f"Mailbox creation attempt {attempt + 1} — {pending_mb} domains remaining...")
-
-                try:
-                    await run_mailbox_creation(batch_id, display_name)
-                except Exception as e:
-                    logger.error(f"Step 7 attempt {attempt + 1} failed: {e}")
-
-                # On final attempt, skip any remaining failed domains
-                if attempt >= MAX_PIPELINE_RETRIES:
-                    async with SessionLocal() as db:
-                        failed_domains = (await db.execute(
-                            select(Domain).where(
-                                Domain.batch_id == batch_id,
-                                Domain.tenant_id.isnot(None),
-                                Domain.domain_verified_in_m365 == True,
-                                Domain.dkim_enabled == True,
-                                Domain.step6_complete.is_not(True),
-                                Domain.step6_skipped.is_not(True),
-                            )
-                        )).scalars().all()
-                        for d in failed_domains:
-                            # Use skip flag instead of lying about completion
-                            d.step6_skipped = True
-                            d.error_message = f"SKIPPED mailbox creation after {MAX_PIPELINE_RETRIES} retries"
-                            await log_activity(batch_id, 7, STEP_NAMES[7], "domain", str(d.id),
-                                d.name, "skipped", d.error_message)
-                            # Also mark the parent tenant as complete if all its domains are done/skipped
-                            if d.tenant_id:
-                                remaining = await db.scalar(
-                                    select(func.count(Domain.id)).where(
-                                        Domain.tenant_id == d.tenant_id,
-                                        Domain.step6_complete.is_not(True),
-                                        Domain.step6_skipped.is_not(True),
-                                    )
-                                ) or 0
-                                if remaining == 0:
-                                    t = await db.get(Tenant, d.tenant_id)
-                                    if t and not t.step6_complete:
-                                        t.step6_complete = True
-                                        t.step6_error = f"SKIPPED after {MAX_PIPELINE_RETRIES} retries"
-                        await db.commit()
-
-                if attempt < MAX_PIPELINE_RETRIES:
-                    kill_all_browsers()
-                    await asyncio.sleep(15)
-
-            # Count completed domains for progress tracking
-            async with SessionLocal() as db:
-                mb_complete = await db.scalar(
-                    select(func.count(Domain.id)).where(
-                        Domain.batch_id == batch_id,
-                        Domain.tenant_id.isnot(None),
-                        Domain.step6_complete == True,
-                    )
-                ) or 0
-                batch = await db.get(SetupBatch, batch_id)
-                if batch:
-                    batch.mailboxes_completed_count = mb_complete
-                    await db.commit()
-
-            if job_id in pipeline_jobs:
-                pipeline_jobs[job_id]["steps"]["7"]["completed"] = mb_complete
-                pipeline_jobs[job_id]["steps"]["7"]["status"] = "completed"
-            logger.info(f"Step 7 complete: {mb_complete} domains mailboxes created")
-
-            # === Clean up all Chrome processes before Step 8 ===
-            logger.info("Cleaning up browser processes between Step 7 and Step 8...")
-            kill_all_browsers()
-            await asyncio.sleep(5)
-
-          except Exception as step_error:
-            logger.error(f"Step 7 CRASHED (continuing to next step): {_fmt_err(step_error)}")
-            import traceback
-            logger.error(traceback.format_exc())
-            await log_activity(batch_id, 7, STEP_NAMES[7], status="error", message=_fmt_err(step_error))
-            if job_id in pipeline_jobs:
-                pipeline_jobs[job_id]["steps"]["7"]["status"] = "error"
-                pipeline_jobs[job_id]["errors"].append({"step": 7, "error": _fmt_err(step_error)})
-        else:
-            logger.info(f"Skipping Step 7 (starting from step {start_from_step})")
-            if job_id in pipeline_jobs:
-                pipeline_jobs[job_id]["steps"]["7"]["status"] = "completed"
-
-        # ================================================================
-        # STEP 8: Enable SMTP Auth (WITH AUTO-RETRY)
+        # STEPS 3-8: NS Propagation + DNS, then per tenant: First Login ->
+        # M365 Setup + DKIM -> Mailboxes -> SMTP Auth (no batch-wide barriers)
         # ================================================================
         if start_from_step <= 8:
-          try:
-            kill_all_browsers()
-            await asyncio.sleep(3)
-            await _update_pipeline(batch_id, 8, "running", "Enabling SMTP authentication...")
-            await log_activity(batch_id, 8, STEP_NAMES[8], status="started")
-
-            for attempt in range(MAX_PIPELINE_RETRIES + 1):
-                if await _check_paused_or_stopped(batch_id):
-                    return
-
-                tenant_list = []
-                async with SessionLocal() as db:
-                    tenants = (await db.execute(
-                        select(Tenant).where(
-                            Tenant.batch_id == batch_id,
-                            Tenant.step6_complete == True,
-                            Tenant.step7_smtp_auth_enabled.is_not(True),
-                            (Tenant.step7_retry_count <= MAX_PIPELINE_RETRIES) | Tenant.step7_retry_count.is_(None),
-                        )
-                    )).scalars().all()
-
-                    if not tenants:
-                        logger.info("Step 8: All tenants have SMTP auth enabled")
-                        break
-
-                    for t in tenants:
-                        tenant_list.append({
-                            "id": t.id,
-                            "admin_email": t.admin_email,
-                            "admin_password": t.admin_password,
-                            "totp_secret": t.totp_secret,
-                            "domain": t.custom_domain or t.name,
-                        })
-
-                remaining = len(tenant_list)
-                logger.info(f"Step 8: Attempt {attempt + 1}/{MAX_PIPELINE_RETRIES + 1} — {remaining} tenants remaining")
-                await _update_pipeline(batch_id, 8, "running",
-                    f"SMTP auth attempt {attempt + 1} — {remaining} tenants remaining...")
-
-                for td in tenant_list:
-                    if await _check_paused_or_stopped(batch_id):
-                        return
-
-                    try:
-                        result = await enable_org_smtp_auth(
-                            admin_email=td["admin_email"],
-                            admin_password=td["admin_password"],
-                            totp_secret=td["totp_secret"],
-                            domain=td["domain"],
-                        )
-                    except Exception as e:
-                        result = {"success": False, "error": str(e)}
-
-                    async with SessionLocal() as db:
-                        tenant = await db.get(Tenant, td["id"])
-                        if not tenant:
-                            continue
-                        if result.get("success"):
-                            tenant.step7_complete = True
-                            tenant.step7_smtp_auth_enabled = True
-                            await log_activity(batch_id, 8, STEP_NAMES[8], "tenant", str(tenant.id),
-                                td["domain"], "completed")
-                        else:
-                            tenant.step7_retry_count = (tenant.step7_retry_count or 0) + 1
-                            tenant.step7_error = result.get("error")
-                            if tenant.step7_retry_count > MAX_PIPELINE_RETRIES:
-                                tenant.step7_complete = True
-                                tenant.step7_error = f"SKIPPED after {MAX_PIPELINE_RETRIES} retries: {result.get('error')}"
-                                await log_activity(batch_id, 8, STEP_NAMES[8], "tenant", str(tenant.id),
-                                    td["domain"], "skipped", tenant.step7_error)
-                            else:
-                                await log_activity(batch_id, 8, STEP_NAMES[8], "tenant", str(tenant.id),
-                                    td["domain"], "failed", result.get("error"))
-                        await db.commit()
-
-                if attempt < MAX_PIPELINE_RETRIES:
-                    kill_all_browsers()
-                    await asyncio.sleep(15)
-
-            async with SessionLocal() as db:
-                smtp_ok = await db.scalar(
-                    select(func.count(Tenant.id)).where(
-                        Tenant.batch_id == batch_id, Tenant.step7_complete == True
-                    )
-                ) or 0
-                batch = await db.get(SetupBatch, batch_id)
-                if batch:
-                    batch.smtp_completed = smtp_ok
-                    await db.commit()
-
-            if job_id in pipeline_jobs:
-                pipeline_jobs[job_id]["steps"]["8"]["completed"] = smtp_ok
-                pipeline_jobs[job_id]["steps"]["8"]["status"] = "completed"
-            logger.info(f"Step 8 complete: {smtp_ok} tenants SMTP auth enabled")
-
-            kill_all_browsers()
-            await asyncio.sleep(5)
-
-          except Exception as step_error:
-            logger.error(f"Step 8 CRASHED (continuing to next step): {_fmt_err(step_error)}")
-            import traceback
-            logger.error(traceback.format_exc())
-            await log_activity(batch_id, 8, STEP_NAMES[8], status="error", message=_fmt_err(step_error))
-            if job_id in pipeline_jobs:
-                pipeline_jobs[job_id]["steps"]["8"]["status"] = "error"
-                pipeline_jobs[job_id]["errors"].append({"step": 8, "error": _fmt_err(step_error)})
+            if not await _stream_steps(batch_id, start_from_step, wait_for_ns, job):
+                return
         else:
-            logger.info(f"Skipping Step 8 (starting from step {start_from_step})")
+            logger.info(f"Skipping Steps 4-8 (starting from step {start_from_step})")
             if job_id in pipeline_jobs:
-                pipeline_jobs[job_id]["steps"]["8"]["status"] = "completed"
+                for step in range(4, 9):
+                    pipeline_jobs[job_id]["steps"][str(step)]["status"] = "completed"
 
         # ================================================================
         # STEP 9: Export Credentials (auto-generated)
@@ -2089,7 +2006,11 @@ async def run_pipeline(batch_id: UUID, start_from_step: int = 1):
         import traceback
         logger.error(traceback.format_exc())
 
-        await _update_pipeline(batch_id, 0, "error", f"Pipeline error: {_fmt_err(e)}")
+        # A job that has attempts left is run again and resumes from the step it
+        # was on (batch.pipeline_step) and its checkpoint, so keep the step
+        retrying = job is not None and job.attempt < job.max_attempts
+        if not retrying:
+            await _update_pipeline(batch_id, 0, "error", f"Pipeline error: {_fmt_err(e)}")
 
         if job_id in pipeline_jobs:
             pipeline_jobs[job_id]["status"] = "error"
@@ -2100,6 +2021,8 @@ async def run_pipeline(batch_id: UUID, start_from_step: int = 1):
             if batch:
                 batch.pipeline_status = "error"
                 await db.commit()
+        if job is not None:
+            raise
 
 
 # Helper to log pipeline activity
@@ -2114,29 +2037,23 @@ async def log_activity(
     message=None,
     error=None,
 ):
-    """Write to both PipelineLog table and in-memory job."""
-    try:
-        async with SessionLocal() as db:
-            log = PipelineLog(
-                batch_id=batch_id,
-                step=step,
-                step_name=step_name,
-                item_type=item_type,
-                item_id=item_id,
-                item_name=item_name,
-                status=status,
-                message=message,
-                error_detail=error,
-            )
-            db.add(log)
-            await db.commit()
-    except Exception as e:
-        logger.error(f"Failed to write pipeline log: {e}")
+    """Queue a PipelineLog row (written in bulk by pipeline_log_sink) and update the in-memory job."""
+    pipeline_log_sink.emit(
+        batch_id=batch_id,
+        step=step,
+        step_name=step_name,
+        item_type=item_type,
+        item_id=item_id,
+        item_name=item_name,
+        status=status,
+        message=message,
+        error_detail=error,
+    )
 
-    # Also update in-memory
+    # Also update in-memory (newest first, bounded)
     job_id = str(batch_id)
     if job_id in pipeline_jobs:
-        pipeline_jobs[job_id]["activity_log"].insert(0, {
+        pipeline_jobs[job_id]["activity_log"].appendleft({
             "step": step,
             "step_name": step_name,
             "item_name": item_name,
@@ -2144,12 +2061,18 @@ async def log_activity(
             "message": message,
             "timestamp": datetime.utcnow().isoformat(),
         })
-        # Keep only last 50 entries in memory
-        pipeline_jobs[job_id]["activity_log"] = pipeline_jobs[job_id]["activity_log"][:50]
 
 
 async def resume_interrupted_pipelines():
-    """Resume pipelines that were running when the container restarted."""
+    """
+    Resume pipelines that were running when the container restarted.
+
+    Their pipeline jobs are still in the queue: the job runner claims each one
+    again once the dead process's lease expires, and it resumes from the step
+    it was on, item by item (see _stream_steps). This only covers batches left
+    "running" with no job at all (e.g. started before the job queue existed)
+    by queueing one; that run goes by the tenant/domain rows alone.
+    """
     try:
         async with SessionLocal() as db:
             running_batches = (await db.execute(
@@ -2159,11 +2082,17 @@ async def resume_interrupted_pipelines():
             )).scalars().all()
 
             for batch in running_batches:
-                logger.warning(f"Found interrupted pipeline for batch {batch.id} (was on step {batch.pipeline_step})")
-                # Don't auto-resume — mark as paused so user can manually resume
-                batch.pipeline_status = "paused"
-                batch.pipeline_step_name = f"Interrupted at: {batch.pipeline_step_name or 'Unknown'}"
-                await db.commit()
-                logger.info(f"Marked batch {batch.id} as paused — user can resume from dashboard")
+                job = await job_queue.get_active(db, PIPELINE_JOB, str(batch.id))
+                if job:
+                    logger.info(f"Interrupted pipeline for batch {batch.id} (step {batch.pipeline_step}) will resume as job {job.id}")
+                    continue
+                logger.warning(f"Found interrupted pipeline for batch {batch.id} with no job (was on step {batch.pipeline_step}) — queueing resume")
+                await job_queue.enqueue(
+                    db,
+                    PIPELINE_JOB,
+                    {"batch_id": str(batch.id), "start_from_step": batch.pipeline_step or 1},
+                    key=str(batch.id),
+                )
+            await db.commit()
     except Exception as e:
         logger.error(f"Failed to check for interrupted pipelines: {e}")
@@ -13,7 +13,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from app.api.deps import get_db
+from app.api.deps import get_db, get_read_db
 from app.models.domain import Domain, DomainStatus
 from app.models.tenant import Tenant, TenantStatus
 from app.schemas.tenant import TenantCreate, TenantRead, TenantUpdate
@@ -50,7 +50,7 @@ async def list_tenants(
     status: TenantStatus | None = Query(default=None),
     provider: str | None = Query(default=None),
     batch_id: UUID | None = Query(default=None),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ) -> list[Tenant]:
     """List all tenants with optional filters."""
     query = select(Tenant)
@@ -104,7 +104,7 @@ async def create_tenant(
 @router.get("/{tenant_id}", response_model=TenantRead)
 async def get_tenant(
     tenant_id: UUID,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Get a single tenant by ID, including all linked domains."""
     tenant = await get_tenant_or_404(tenant_id, db)
@@ -4,24 +4,23 @@ Upload Management Routes — Cross-batch mailbox upload tracking.
 Provides a dedicated API for managing sequencer uploads across ALL batches.
 This replaces the batch-level upload toggle with mailbox-level granularity.
 """
-import csv
-import io
+import base64
+import json
 from datetime import datetime
 from typing import List, Optional
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from sqlalchemy import and_, func, select, case, distinct
+from sqlalchemy import and_, func, select, case, distinct, true, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
-from app.db.session import get_db_session as get_db
+from app.db.session import get_db_session as get_db, get_read_db_session as get_read_db
 from app.models.mailbox import Mailbox, MailboxStatus
 from app.models.tenant import Tenant
 from app.models.domain import Domain
 from app.models.batch import SetupBatch
+from app.services.csv_export import csv_response, email_domain, stream_csv
 
 import logging
 
@@ -87,6 +86,7 @@ class MailboxUploadList(BaseModel):
     total: int
     page: int
     per_page: int
+    next_cursor: str | None = None  # Pass as ?cursor= for the next page; None on the last page
     # Summary counts for the current filter
     filter_ready: int
     filter_uploaded: int
@@ -118,7 +118,7 @@ class BulkUnmarkRequest(BaseModel):
 # ============================================================================
 
 @router.get("/dashboard", response_model=UploadDashboardStats)
-async def get_upload_dashboard(db: AsyncSession = Depends(get_db)):
+async def get_upload_dashboard(db: AsyncSession = Depends(get_read_db)):
     """
     Get cross-batch upload dashboard statistics.
 
@@ -174,7 +174,7 @@ async def get_upload_dashboard(db: AsyncSession = Depends(get_db)):
 @router.get("/batches", response_model=list[BatchUploadSummary])
 async def get_batch_upload_summaries(
     only_with_pending: bool = Query(False, description="Only show batches that have pending uploads"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """
     Get upload summary for each batch.
@@ -227,63 +227,73 @@ async def get_batch_upload_summaries(
 # MAILBOX LIST — Filterable, paginated, cross-batch
 # ============================================================================
 
+def _encode_cursor(email: str, mailbox_id: UUID) -> str:
+    """Opaque keyset cursor for the row a page ended on."""
+    raw = json.dumps([email, str(mailbox_id)]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[str, UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        email, mailbox_id = json.loads(raw)
+        return email, UUID(mailbox_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
 @router.get("/mailboxes", response_model=MailboxUploadList)
 async def list_mailboxes_for_upload(
     page: int = Query(1, ge=1),
     per_page: int = Query(50, ge=10, le=500),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page (takes precedence over page)"),
     batch_id: Optional[UUID] = Query(None, description="Filter by batch"),
     tenant_id: Optional[UUID] = Query(None, description="Filter by tenant"),
     upload_status: Optional[str] = Query(None, description="Filter: 'pending', 'uploaded', 'errored', 'not_ready', 'all'"),
     search: Optional[str] = Query(None, description="Search by email"),
     sequencer_name: Optional[str] = Query(None, description="Filter by sequencer name"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """
     List mailboxes for upload management with filtering and pagination.
 
     Default filter: only shows 'pending' mailboxes (ready but not uploaded).
-    """
-    # Base filters
-    base_filter = []
 
+    Pages are ordered by (email, id). Pass the returned next_cursor to get the
+    following page: it seeks straight to that key, so deep pages cost the same
+    as the first one. Without a cursor, `page` falls back to OFFSET.
+    """
+    # Filters the summary counts are computed over
+    count_base = []
     if batch_id:
-        base_filter.append(Mailbox.batch_id == batch_id)
+        count_base.append(Mailbox.batch_id == batch_id)
     if tenant_id:
-        base_filter.append(Mailbox.tenant_id == tenant_id)
+        count_base.append(Mailbox.tenant_id == tenant_id)
     if search:
-        base_filter.append(Mailbox.email.ilike(f"%{search}%"))
+        count_base.append(Mailbox.email.ilike(f"%{search}%"))
+
+    # Plus sequencer and upload status for the listed rows
+    list_filter = []
     if sequencer_name:
-        base_filter.append(Mailbox.sequencer_name == sequencer_name)
+        list_filter.append(Mailbox.sequencer_name == sequencer_name)
 
     # Upload status filter
     if upload_status == "pending" or upload_status is None:
-        base_filter.append(Mailbox.setup_complete == True)
-        base_filter.append(Mailbox.uploaded_to_sequencer == False)
+        list_filter.append(Mailbox.setup_complete == True)
+        list_filter.append(Mailbox.uploaded_to_sequencer == False)
     elif upload_status == "uploaded":
-        base_filter.append(Mailbox.uploaded_to_sequencer == True)
+        list_filter.append(Mailbox.uploaded_to_sequencer == True)
     elif upload_status == "errored":
-        base_filter.append(Mailbox.upload_error.isnot(None))
+        list_filter.append(Mailbox.upload_error.isnot(None))
     elif upload_status == "not_ready":
-        base_filter.append(Mailbox.setup_complete == False)
+        list_filter.append(Mailbox.setup_complete == False)
     # "all" = no additional filter
 
-    # Count total matching
-    if base_filter:
-        count_query = select(func.count(Mailbox.id)).where(and_(*base_filter))
-    else:
-        count_query = select(func.count(Mailbox.id))
-    total = (await db.execute(count_query)).scalar() or 0
-
-    # Get summary counts for the base filters (minus upload_status)
-    count_base = []
-    if batch_id:
-        count_base.append(Mailbox.batch_id == batch_id)
-    if tenant_id:
-        count_base.append(Mailbox.tenant_id == tenant_id)
-    if search:
-        count_base.append(Mailbox.email.ilike(f"%{search}%"))
+    base_filter = count_base + list_filter
 
+    # Total and summary counts in one aggregate
     summary_select = select(
+        func.count(case((and_(true(), *list_filter), 1))).label("total"),
         func.count(case((Mailbox.setup_complete == True, 1))).label("ready"),
         func.count(case((Mailbox.uploaded_to_sequencer == True, 1))).label("uploaded"),
         func.count(case((
@@ -293,47 +303,44 @@ async def list_mailboxes_for_upload(
     )
     if count_base:
         summary_select = summary_select.where(and_(*count_base))
+    summary_row = (await db.execute(summary_select)).one()
 
-    summary_result = await db.execute(summary_select)
-    summary_row = summary_result.one()
-
-    # Fetch mailboxes with tenant info
-    offset = (page - 1) * per_page
-    query = select(Mailbox).options(selectinload(Mailbox.tenant))
+    # Fetch the page with tenant and batch names joined in
+    query = (
+        select(
+            Mailbox,
+            Tenant.name.label("tenant_name"),
+            Tenant.onmicrosoft_domain.label("tenant_domain"),
+            SetupBatch.name.label("batch_name"),
+        )
+        .join(Tenant, Tenant.id == Mailbox.tenant_id, isouter=True)
+        .join(SetupBatch, SetupBatch.id == Mailbox.batch_id, isouter=True)
+    )
     if base_filter:
         query = query.where(and_(*base_filter))
-    query = query.order_by(Mailbox.email).offset(offset).limit(per_page)
-
-    result = await db.execute(query)
-    mailboxes = result.scalars().all()
+    if cursor:
+        after_email, after_id = _decode_cursor(cursor)
+        query = query.where(tuple_(Mailbox.email, Mailbox.id) > tuple_(after_email, after_id))
+    elif page > 1:
+        query = query.offset((page - 1) * per_page)
+    # One extra row tells whether there is a next page
+    query = query.order_by(Mailbox.email, Mailbox.id).limit(per_page + 1)
+
+    rows = (await db.execute(query)).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
 
-    # Build response items with tenant/batch info
     items = []
-    batch_cache: dict[UUID, str | None] = {}
-
-    for mb in mailboxes:
-        # Get batch name (cached)
-        batch_name = None
-        if mb.batch_id:
-            if mb.batch_id not in batch_cache:
-                batch = await db.get(SetupBatch, mb.batch_id)
-                batch_cache[mb.batch_id] = batch.name if batch else None
-            batch_name = batch_cache[mb.batch_id]
-
+    for mb, tenant_name, tenant_domain, batch_name in rows:
         # Get domain from email
         domain_name = mb.email.split("@")[1] if "@" in mb.email else None
 
-        # Get tenant name
-        tenant_name = None
-        if mb.tenant:
-            tenant_name = mb.tenant.name or mb.tenant.onmicrosoft_domain
-
         items.append(MailboxUploadItem(
             id=mb.id,
             email=mb.email,
             display_name=mb.display_name,
             tenant_id=mb.tenant_id,
-            tenant_name=tenant_name,
+            tenant_name=tenant_name or tenant_domain,
             domain_name=domain_name,
             batch_id=mb.batch_id,
             batch_name=batch_name,
@@ -345,11 +352,13 @@ async def list_mailboxes_for_upload(
             upload_error=mb.upload_error,
         ))
 
+    last = rows[-1][0] if rows else None
     return MailboxUploadList(
         items=items,
-        total=total,
+        total=summary_row.total,
         page=page,
         per_page=per_page,
+        next_cursor=_encode_cursor(last.email, last.id) if has_more else None,
         filter_ready=summary_row.ready,
         filter_uploaded=summary_row.uploaded,
         filter_pending=summary_row.pending,
@@ -502,17 +511,64 @@ async def bulk_unmark_uploaded(
 # EXPORT PENDING CSV — Only un-uploaded, ready mailboxes
 # ============================================================================
 
+def _first_last(display_name: str) -> tuple[str, str]:
+    parts = display_name.split(" ", 1)
+    first = parts[0] if parts else display_name
+    last = parts[1] if len(parts) > 1 else ""
+    return first, last
+
+
+# sequencer_format -> (header, row builder) for the pending export
+PENDING_EXPORT_FORMATS = {
+    "instantly": (
+        ["first_name", "last_name", "email", "password", "smtp_host", "smtp_port", "smtp_username", "imap_host", "imap_port", "imap_username", "warmup_enabled", "warmup_limit"],
+        lambda mb: [
+            *_first_last(mb.display_name), mb.email, mb.password or "",
+            "smtp.office365.com", "587", mb.email,
+            "outlook.office365.com", "993", mb.email,
+            "true", "2",
+        ],
+    ),
+    "plusvibe": (
+        ["email", "password", "first_name", "last_name", "smtp_host", "smtp_port", "imap_host", "imap_port"],
+        lambda mb: [
+            mb.email, mb.password or "", *_first_last(mb.display_name),
+            "smtp.office365.com", "587",
+            "outlook.office365.com", "993",
+        ],
+    ),
+    "smartlead": (
+        ["from_email", "from_name", "smtp_host", "smtp_port", "smtp_username", "smtp_password", "imap_host", "imap_port", "imap_username", "imap_password", "warmup_enabled"],
+        lambda mb: [
+            mb.email, mb.display_name,
+            "smtp.office365.com", "587", mb.email, mb.password or "",
+            "outlook.office365.com", "993", mb.email, mb.password or "",
+            "true",
+        ],
+    ),
+    "generic": (
+        ["email", "password", "display_name", "first_name", "last_name", "imap_host", "imap_port", "smtp_host", "smtp_port"],
+        lambda mb: [
+            mb.email, mb.password or "", mb.display_name, *_first_last(mb.display_name),
+            "outlook.office365.com", "993",
+            "smtp.office365.com", "587",
+        ],
+    ),
+}
+
+
 @router.get("/export-pending")
 async def export_pending_csv(
     batch_id: Optional[UUID] = Query(None, description="Filter by batch"),
     sequencer_format: str = Query("instantly", description="Format: 'instantly', 'plusvibe', 'smartlead', 'generic'"),
-    db: AsyncSession = Depends(get_db),
+    gzip: bool = Query(False, description="Download as .csv.gz"),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """
     Export only PENDING (ready but not uploaded) mailboxes as CSV.
 
     This is the smart export — only gives you mailboxes you haven't uploaded yet.
-    Format adapts to the target sequencer.
+    Format adapts to the target sequencer. Rows are streamed sorted by domain, then email.
     """
     filters = [
         Mailbox.setup_complete == True,
@@ -521,69 +577,16 @@ async def export_pending_csv(
     if batch_id:
         filters.append(Mailbox.batch_id == batch_id)
 
-    result = await db.execute(
-        select(Mailbox)
-        .options(selectinload(Mailbox.tenant))
-        .where(and_(*filters))
-    )
-    mailboxes = list(result.scalars().all())
-    mailboxes.sort(key=lambda mb: (mb.email.split('@')[1] if '@' in mb.email else '', mb.email))
-
-    if not mailboxes:
+    has_pending = (await db.execute(select(Mailbox.id).where(and_(*filters)).limit(1))).first()
+    if not has_pending:
         raise HTTPException(status_code=404, detail="No pending mailboxes found")
 
-    # Build CSV based on format
-    output = io.StringIO()
-
-    if sequencer_format == "instantly":
-        writer = csv.writer(output)
-        writer.writerow(["first_name", "last_name", "email", "password", "smtp_host", "smtp_port", "smtp_username", "imap_host", "imap_port", "imap_username", "warmup_enabled", "warmup_limit"])
-        for mb in mailboxes:
-            parts = mb.display_name.split(" ", 1)
-            first = parts[0] if parts else mb.display_name
-            last = parts[1] if len(parts) > 1 else ""
-            writer.writerow([
-                first, last, mb.email, mb.password or "",
-                "smtp.office365.com", "587", mb.email,
-                "outlook.office365.com", "993", mb.email,
-                "true", "2",
-            ])
-    elif sequencer_format == "plusvibe":
-        writer = csv.writer(output)
-        writer.writerow(["email", "password", "first_name", "last_name", "smtp_host", "smtp_port", "imap_host", "imap_port"])
-        for mb in mailboxes:
-            parts = mb.display_name.split(" ", 1)
-            first = parts[0] if parts else mb.display_name
-            last = parts[1] if len(parts) > 1 else ""
-            writer.writerow([
-                mb.email, mb.password or "", first, last,
-                "smtp.office365.com", "587",
-                "outlook.office365.com", "993",
-            ])
-    elif sequencer_format == "smartlead":
-        writer = csv.writer(output)
-        writer.writerow(["from_email", "from_name", "smtp_host", "smtp_port", "smtp_username", "smtp_password", "imap_host", "imap_port", "imap_username", "imap_password", "warmup_enabled"])
-        for mb in mailboxes:
-            writer.writerow([
-                mb.email, mb.display_name,
-                "smtp.office365.com", "587", mb.email, mb.password or "",
-                "outlook.office365.com", "993", mb.email, mb.password or "",
-                "true",
-            ])
-    else:  # generic
-        writer = csv.writer(output)
-        writer.writerow(["email", "password", "display_name", "first_name", "last_name", "imap_host", "imap_port", "smtp_host", "smtp_port"])
-        for mb in mailboxes:
-            parts = mb.display_name.split(" ", 1)
-            first = parts[0] if parts else mb.display_name
-            last = parts[1] if len(parts) > 1 else ""
-            writer.writerow([
-                mb.email, mb.password or "", mb.display_name, first, last,
-                "outlook.office365.com", "993",
-                "smtp.office365.com", "587",
-            ])
-
-    output.seek(0)
+    header, to_row = PENDING_EXPORT_FORMATS.get(sequencer_format, PENDING_EXPORT_FORMATS["generic"])
+    stmt = (
+        select(Mailbox.email, Mailbox.display_name, Mailbox.password)
+        .where(and_(*filters))
+        .order_by(email_domain(Mailbox.email), Mailbox.email)
+    )
 
     batch_label = ""
     if batch_id:
@@ -591,12 +594,7 @@ async def export_pending_csv(
         batch_label = f"_{batch.name}" if batch else ""
 
     filename = f"pending_upload{batch_label}_{sequencer_format}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.csv"
-
-    return StreamingResponse(
-        io.BytesIO(output.getvalue().encode("utf-8")),
-        media_type="text/csv",
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
-    )
+    return csv_response(stream_csv(stmt, header, to_row, compress=gzip), filename, compress=gzip)
 
 
 # ============================================================================
@@ -606,59 +604,42 @@ async def export_pending_csv(
 @router.get("/export-all")
 async def export_all_csv(
     batch_id: Optional[UUID] = Query(None),
-    db: AsyncSession = Depends(get_db),
+    gzip: bool = Query(False, description="Download as .csv.gz"),
 ):
     """
     Export ALL mailboxes with their upload status. Useful for auditing.
     """
-    filters = []
+    stmt = (
+        select(
+            Mailbox.email, Mailbox.display_name, Mailbox.password,
+            func.coalesce(Tenant.name, Tenant.onmicrosoft_domain).label("tenant_name"),
+            SetupBatch.name.label("batch_name"),
+            Mailbox.setup_complete, Mailbox.uploaded_to_sequencer, Mailbox.uploaded_at,
+            Mailbox.sequencer_name, Mailbox.upload_error, Mailbox.status,
+        )
+        .join(Tenant, Tenant.id == Mailbox.tenant_id, isouter=True)
+        .join(SetupBatch, SetupBatch.id == Mailbox.batch_id, isouter=True)
+        .order_by(Mailbox.email)
+    )
     if batch_id:
-        filters.append(Mailbox.batch_id == batch_id)
-
-    query = select(Mailbox).options(selectinload(Mailbox.tenant)).order_by(Mailbox.email)
-    if filters:
-        query = query.where(and_(*filters))
+        stmt = stmt.where(Mailbox.batch_id == batch_id)
 
-    result = await db.execute(query)
-    mailboxes = result.scalars().all()
-
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow([
+    header = [
         "email", "display_name", "password", "tenant", "domain", "batch",
         "setup_complete", "uploaded_to_sequencer", "uploaded_at", "sequencer_name",
         "upload_error", "status",
-    ])
+    ]
 
-    batch_cache: dict[UUID, str] = {}
-    for mb in mailboxes:
-        batch_name = ""
-        if mb.batch_id:
-            if mb.batch_id not in batch_cache:
-                batch = await db.get(SetupBatch, mb.batch_id)
-                batch_cache[mb.batch_id] = batch.name if batch else ""
-            batch_name = batch_cache[mb.batch_id]
-
-        tenant_name = ""
-        domain_name = mb.email.split("@")[1] if "@" in mb.email else ""
-        if mb.tenant:
-            tenant_name = mb.tenant.name or mb.tenant.onmicrosoft_domain or ""
-
-        writer.writerow([
+    def to_row(mb):
+        return [
             mb.email, mb.display_name, mb.password or "",
-            tenant_name, domain_name, batch_name,
+            mb.tenant_name or "", mb.email.split("@")[1] if "@" in mb.email else "", mb.batch_name or "",
             mb.setup_complete, mb.uploaded_to_sequencer,
             mb.uploaded_at.isoformat() if mb.uploaded_at else "",
             mb.sequencer_name or "",
             mb.upload_error or "",
             mb.status.value,
-        ])
+        ]
 
-    output.seek(0)
     filename = f"all_mailboxes_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.csv"
-
-    return StreamingResponse(
-        io.BytesIO(output.getvalue().encode("utf-8")),
-        media_type="text/csv",
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
-    )
+    return csv_response(stream_csv(stmt, header, to_row, compress=gzip), filename, compress=gzip)
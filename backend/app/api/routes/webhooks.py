@@ -9,6 +9,7 @@ from fastapi import APIRouter, BackgroundTasks
 from pydantic import BaseModel
 from sqlalchemy import update
 
+from app.db.bulk import bulk_update
 from app.db.session import SessionLocal
 from app.models.tenant import Tenant
 from app.models.mailbox import Mailbox
@@ -134,23 +135,20 @@ async def _process_mailbox_creation_results(
 
     async with SessionLocal() as db:
         try:
-            for email in created:
+            if created:
                 await db.execute(
                     update(Mailbox)
-                    .where(Mailbox.email == email)
-                    .values(
-                        created_in_m365=True,
-                        m365_id=email,
-                    )
+                    .where(Mailbox.email.in_(created))
+                    .values(created_in_exchange=True)
                 )
 
             for failure in failed:
                 logger.error("[%s] Mailbox creation failed: %s", tenant_id[:8], failure)
-                await db.execute(
-                    update(Mailbox)
-                    .where(Mailbox.email == failure.get("email"))
-                    .values(error=failure.get("error", "Unknown error"))
-                )
+            await bulk_update(db, Mailbox, "email", [
+                {"email": failure["email"], "error_message": failure.get("error", "Unknown error")}
+                for failure in failed
+                if failure.get("email")
+            ])
 
             await db.execute(
                 update(Tenant)
@@ -207,11 +205,11 @@ async def _process_delegation_results(
 
     async with SessionLocal() as db:
         try:
-            for email in delegated:
+            if delegated:
                 await db.execute(
                     update(Mailbox)
-                    .where(Mailbox.email == email)
-                    .values(delegation_done=True)
+                    .where(Mailbox.email.in_(delegated))
+                    .values(delegated=True)
                 )
 
             all_done = len(failed) == 0
@@ -6,20 +6,24 @@ All endpoints now require a batch_id parameter for independent setup sessions.
 """
 
 from datetime import datetime
-from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, BackgroundTasks, Response
-from fastapi.responses import StreamingResponse, PlainTextResponse
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, Response
+from fastapi.responses import PlainTextResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, update, text
 from sqlalchemy.orm import selectinload
 from typing import Optional, List
 from pydantic import BaseModel
 from uuid import UUID
+import asyncio
 import csv
 import io
 import logging
 import os
 
-from app.db.session import get_db_session as get_db, async_engine, get_db_session_with_retry, RetryableSession, SessionLocal, async_session_factory
+from app.db.session import get_db_session as get_db, async_engine, get_read_db_session as get_read_db, get_read_db_session_with_retry, RetryableSession, SessionLocal, async_session_factory
+from app.services import batch_counters, job_queue
+from app.services.job_queue import JobContext, job_handler
+from app.services.csv_export import csv_response, email_domain, stream_csv
 from app.services.tenant_import import tenant_import_service
 from app.services.tenant_automation import process_tenants_parallel, get_progress
 from app.services.domain_import import parse_domains_csv, DomainImportData
@@ -32,6 +36,7 @@ from app.services.email_generator import generate_email_addresses
 from app.services.m365_scripts import m365_scripts
 from app.services.mailbox_scripts import mailbox_scripts
 from app.services.orchestrator import process_batch, SetupConfig
+from app.services.background_jobs import DKIM_RETRY_SWEEP_JOB, retry_dkim_enable_job
 from app.services.m365_setup import run_step5_for_batch, run_step5_for_tenant, Step5Result
 from app.services.selenium.parallel_processor import run_parallel_step5, DomainTask
 from app.services.selenium.admin_portal import get_all_progress as get_live_progress, clear_all_progress
@@ -47,14 +52,14 @@ router = APIRouter(prefix="/api/v1/wizard", tags=["wizard"])
 
 logger = logging.getLogger(__name__)
 
-# C2 FIX: prevent fire-and-forget asyncio tasks from being garbage-collected
-_background_tasks: set = set()
-
 # Store active automation jobs
 active_jobs = {}
 
-# Store active Step 4 automation jobs (per batch)
+# Store active Step 4 automation jobs (per batch); runs are "step4_batch"/"step4_tenant"
+# jobs in the durable job queue, so the browsers run wherever the job runner does
 step4_jobs = {}
+STEP4_BATCH_JOB = "step4_batch"
+STEP4_TENANT_JOB = "step4_tenant"
 
 # Store Step 8 (Instantly Upload) job progress
 step8_jobs = {}
@@ -173,7 +178,7 @@ class Step7StartRequest(BaseModel):
 # ============== BATCH MANAGEMENT ==============
 
 @router.get("/batches", response_model=List[BatchResponse])
-async def list_batches(db: AsyncSession = Depends(get_db)):
+async def list_batches(db: AsyncSession = Depends(get_read_db)):
     """List all setup batches with summary counts."""
     result = await db.execute(select(SetupBatch).order_by(SetupBatch.created_at.desc()))
     batches = result.scalars().all()
@@ -243,7 +248,7 @@ async def create_batch(
 
 
 @router.get("/batches/{batch_id}", response_model=BatchResponse)
-async def get_batch(batch_id: UUID, db: AsyncSession = Depends(get_db)):
+async def get_batch(batch_id: UUID, db: AsyncSession = Depends(get_read_db)):
     """Get a specific batch by ID."""
     batch = await db.get(SetupBatch, batch_id)
     if not batch:
@@ -442,8 +447,9 @@ async def set_batch_sequencer(
 
 # ============== FEATURE 2: AUTO-RUN (Steps 4-5-6-7 automatically) ==============
 
-# Store auto-run job progress
+# Store auto-run job progress (runs are "auto_run" jobs in the durable job queue)
 auto_run_jobs = {}
+AUTO_RUN_JOB = "auto_run"
 
 
 async def _persist_auto_run_state(batch_id: UUID) -> None:
@@ -522,7 +528,6 @@ async def _apply_sequencer_selection(
 async def start_auto_run(
     batch_id: UUID,
     request: AutoRunRequest,
-    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -553,14 +558,15 @@ async def start_auto_run(
     if not batch:
         raise HTTPException(status_code=404, detail="Batch not found")
     
-    # Check if auto-run is already in progress
+    # Check if auto-run is already in progress (in this or any other process)
     job_id = str(batch_id)
-    if job_id in auto_run_jobs and auto_run_jobs[job_id].get("status") == "running":
+    active = await job_queue.get_active(db, AUTO_RUN_JOB, job_id)
+    if active:
         return {
             "success": False,
             "message": "Auto-run already in progress for this batch",
             "job_id": job_id,
-            "started_at": auto_run_jobs[job_id].get("started_at")
+            "started_at": (auto_run_jobs.get(job_id) or batch.auto_run_state or {}).get("started_at")
         }
     
     # Count tenants
@@ -585,7 +591,6 @@ async def start_auto_run(
     
     # Enable auto-progress flag
     batch.auto_progress_enabled = True
-    await db.commit()
     
     # Initialize job tracking
     auto_run_jobs[job_id] = {
@@ -610,14 +615,18 @@ async def start_auto_run(
         "errors": [],
         "display_name": request.display_name,
     }
+    batch.auto_run_state = dict(auto_run_jobs[job_id])
     
     # Run in background
-    background_tasks.add_task(
-        _run_auto_progression,
-        batch_id,
-        request.new_password,
-        request.display_name
+    await job_queue.enqueue(
+        db,
+        AUTO_RUN_JOB,
+        {"batch_id": job_id, "new_password": request.new_password, "display_name": request.display_name},
+        key=job_id,
+        secret_keys=["new_password"],
     )
+    await db.commit()
+    job_queue.wake_runner()
     
     logger.info(f"Auto-run started for batch {batch_id} ({batch.name})")
     
@@ -636,6 +645,38 @@ async def start_auto_run(
     }
 
 
+@job_handler(AUTO_RUN_JOB)
+async def _run_auto_run_job(ctx: JobContext):
+    """Job queue entry point for _run_auto_progression."""
+    batch_id = UUID(ctx.payload["batch_id"])
+    job_id = str(batch_id)
+
+    if auto_run_jobs.get(job_id, {}).get("status") != "running":
+        # Started by another process, or before a restart: continue from the persisted state
+        async with async_session_factory() as db:
+            batch = await db.get(SetupBatch, batch_id)
+        state = dict(batch.auto_run_state or {}) if batch else {}
+        if not state or state.get("status") in ("stopped", "completed"):
+            logger.info(f"Auto-run job for batch {batch_id} has nothing to resume (state: {state.get('status')})")
+            return
+        state["status"] = "running"
+        state["message"] = f"Resuming auto-run at step {state.get('current_step')}..."
+        auto_run_jobs[job_id] = state
+        logger.info(f"Resuming auto-run for batch {batch_id} at step {state.get('current_step')} (attempt {ctx.attempt})")
+
+    def _stopped_elsewhere():
+        # Stop requested through an API process that does not run this job
+        state = auto_run_jobs.get(job_id)
+        if state and state.get("status") == "running":
+            state["status"] = "stopped"
+            state["message"] = "Auto-run was stopped by user. Progress has been preserved."
+            state["completed_at"] = datetime.utcnow().isoformat()
+
+    ctx.progress = lambda: auto_run_jobs.get(job_id)
+    ctx.on_cancel = _stopped_elsewhere
+    await _run_auto_progression(batch_id, ctx.payload["new_password"], ctx.payload["display_name"])
+
+
 async def _run_auto_progression(batch_id: UUID, new_password: str, display_name: str):
     """
     Background task: Run steps 4-5-6-7 with auto-retry.
@@ -652,52 +693,58 @@ async def _run_auto_progression(batch_id: UUID, new_password: str, display_name:
     
     try:
         sequencer_name = auto_run_jobs[job_id].get("sequencer_app_name", "Sequencer")
+        progress = auto_run_jobs[job_id]["progress"]
+        # Steps already completed (before a restart) are not run again
         # === STEP 4: First Login ===
-        auto_run_jobs[job_id]["current_step"] = 4
-        auto_run_jobs[job_id]["current_step_name"] = "First Login"
-        auto_run_jobs[job_id]["message"] = "Running first-login automation..."
-        auto_run_jobs[job_id]["progress"]["step4"]["status"] = "running"
-        await _persist_auto_run_state(batch_id)
+        if progress["step4"]["status"] != "completed":
+            auto_run_jobs[job_id]["current_step"] = 4
+            auto_run_jobs[job_id]["current_step_name"] = "First Login"
+            auto_run_jobs[job_id]["message"] = "Running first-login automation..."
+            auto_run_jobs[job_id]["progress"]["step4"]["status"] = "running"
+            await _persist_auto_run_state(batch_id)
 
-        await _run_step4_with_retry(batch_id, new_password, job_id)
+            await _run_step4_with_retry(batch_id, new_password, job_id)
 
-        auto_run_jobs[job_id]["progress"]["step4"]["status"] = "completed"
-        await _persist_auto_run_state(batch_id)
+            auto_run_jobs[job_id]["progress"]["step4"]["status"] = "completed"
+            await _persist_auto_run_state(batch_id)
 
         # === STEP 5: Email Setup (Domain + DKIM) ===
-        auto_run_jobs[job_id]["current_step"] = 5
-        auto_run_jobs[job_id]["current_step_name"] = "Email Setup"
-        auto_run_jobs[job_id]["message"] = "Adding domains to M365 and configuring DKIM..."
-        auto_run_jobs[job_id]["progress"]["step5"]["status"] = "running"
-        await _persist_auto_run_state(batch_id)
+        if progress["step5"]["status"] != "completed":
+            auto_run_jobs[job_id]["current_step"] = 5
+            auto_run_jobs[job_id]["current_step_name"] = "Email Setup"
+            auto_run_jobs[job_id]["message"] = "Adding domains to M365 and configuring DKIM..."
+            auto_run_jobs[job_id]["progress"]["step5"]["status"] = "running"
+            await _persist_auto_run_state(batch_id)
 
-        await _run_step5_with_retry(batch_id, job_id)
+            await _run_step5_with_retry(batch_id, job_id)
 
-        auto_run_jobs[job_id]["progress"]["step5"]["status"] = "completed"
-        await _persist_auto_run_state(batch_id)
+            auto_run_jobs[job_id]["progress"]["step5"]["status"] = "completed"
+            await _persist_auto_run_state(batch_id)
 
         # === STEP 6: Mailbox Creation ===
-        auto_run_jobs[job_id]["current_step"] = 6
-        auto_run_jobs[job_id]["current_step_name"] = "Mailbox Creation"
-        auto_run_jobs[job_id]["message"] = f"Creating mailboxes with display name '{display_name}'..."
-        auto_run_jobs[job_id]["progress"]["step6"]["status"] = "running"
-        await _persist_auto_run_state(batch_id)
+        if progress["step6"]["status"] != "completed":
+            auto_run_jobs[job_id]["current_step"] = 6
+            auto_run_jobs[job_id]["current_step_name"] = "Mailbox Creation"
+            auto_run_jobs[job_id]["message"] = f"Creating mailboxes with display name '{display_name}'..."
+            auto_run_jobs[job_id]["progress"]["step6"]["status"] = "running"
+            await _persist_auto_run_state(batch_id)
 
-        await _run_step6_with_retry(batch_id, display_name, job_id)
+            await _run_step6_with_retry(batch_id, display_name, job_id)
 
-        auto_run_jobs[job_id]["progress"]["step6"]["status"] = "completed"
-        await _persist_auto_run_state(batch_id)
+            auto_run_jobs[job_id]["progress"]["step6"]["status"] = "completed"
+            await _persist_auto_run_state(batch_id)
 
         # === STEP 7: SMTP Auth ===
-        auto_run_jobs[job_id]["current_step"] = 7
-        auto_run_jobs[job_id]["current_step_name"] = f"SMTP Auth + {sequencer_name} Consent"
-        auto_run_jobs[job_id]["message"] = f"Enabling SMTP authentication and granting {sequencer_name} consent..."
-        auto_run_jobs[job_id]["progress"]["step7"]["status"] = "running"
-        await _persist_auto_run_state(batch_id)
+        if progress["step7"]["status"] != "completed":
+            auto_run_jobs[job_id]["current_step"] = 7
+            auto_run_jobs[job_id]["current_step_name"] = f"SMTP Auth + {sequencer_name} Consent"
+            auto_run_jobs[job_id]["message"] = f"Enabling SMTP authentication and granting {sequencer_name} consent..."
+            auto_run_jobs[job_id]["progress"]["step7"]["status"] = "running"
+            await _persist_auto_run_state(batch_id)
 
-        await _run_step7_with_retry(batch_id, job_id)
+            await _run_step7_with_retry(batch_id, job_id)
 
-        auto_run_jobs[job_id]["progress"]["step7"]["status"] = "completed"
+            auto_run_jobs[job_id]["progress"]["step7"]["status"] = "completed"
 
         # === COMPLETE ===
         auto_run_jobs[job_id]["status"] = "completed"
@@ -1041,7 +1088,7 @@ async def _run_step7_with_retry(batch_id: UUID, job_id: str):
 
 
 @router.get("/batches/{batch_id}/auto-run/status")
-async def get_auto_run_status(batch_id: UUID, db: AsyncSession = Depends(get_db)):
+async def get_auto_run_status(batch_id: UUID, db: AsyncSession = Depends(get_read_db)):
     """
     Get real-time status of auto-run job.
     
@@ -1057,13 +1104,17 @@ async def get_auto_run_status(batch_id: UUID, db: AsyncSession = Depends(get_db)
         # C5 FIX: Try to restore from persisted DB state (survives server restarts)
         batch = await db.get(SetupBatch, batch_id)
         if batch and batch.auto_run_state:
+            job = await job_queue.get_active(db, AUTO_RUN_JOB, job_id)
+            if job:
+                # Queued, resuming after a restart, or running in another process
+                return job.progress or batch.auto_run_state
             # Restore into memory so subsequent polls are fast
             auto_run_jobs[job_id] = batch.auto_run_state
-            # If the server restarted mid-run, mark as interrupted
+            # If the job is gone while the state says running, it gave up
             if batch.auto_run_state.get("status") == "running":
                 auto_run_jobs[job_id]["status"] = "interrupted"
                 auto_run_jobs[job_id]["message"] = (
-                    "Auto-run was in progress when server restarted. "
+                    "Auto-run was interrupted and could not be resumed. "
                     "Progress up to the last completed step has been preserved. "
                     "Re-start auto-run or continue manually from the current step."
                 )
@@ -1092,34 +1143,42 @@ async def stop_auto_run(batch_id: UUID, db: AsyncSession = Depends(get_db)):
     in-progress browser automation. Current operations will complete.
     """
     job_id = str(batch_id)
-    
-    if job_id not in auto_run_jobs:
+    job = await job_queue.get_active(db, AUTO_RUN_JOB, job_id)
+    batch = await db.get(SetupBatch, batch_id)
+
+    state = auto_run_jobs.get(job_id)
+    if state is None and job:
+        # Running in another process (worker): work from its last reported state
+        state = dict(job.progress or (batch.auto_run_state if batch else None) or {"status": "running"})
+    if state is None:
         raise HTTPException(status_code=404, detail="No auto-run job found for this batch")
     
-    if auto_run_jobs[job_id].get("status") != "running":
+    if state.get("status") != "running":
         return {
             "success": False,
-            "message": f"Job is not running (status: {auto_run_jobs[job_id].get('status')})"
+            "message": f"Job is not running (status: {state.get('status')})"
         }
     
     # Mark as stopped
-    auto_run_jobs[job_id]["status"] = "stopped"
-    auto_run_jobs[job_id]["message"] = "Auto-run was stopped by user. Progress has been preserved."
-    auto_run_jobs[job_id]["completed_at"] = datetime.utcnow().isoformat()
+    state["status"] = "stopped"
+    state["message"] = "Auto-run was stopped by user. Progress has been preserved."
+    state["completed_at"] = datetime.utcnow().isoformat()
     
     # Disable auto-progress on batch and persist stopped state
-    batch = await db.get(SetupBatch, batch_id)
     if batch:
         batch.auto_progress_enabled = False
-        batch.auto_run_state = dict(auto_run_jobs[job_id])
-        await db.commit()
+        batch.auto_run_state = dict(state)
+    # Don't resume it after a restart; a runner in another process sees this on its next heartbeat
+    if job:
+        await job_queue.request_cancel(db, job)
+    await db.commit()
     
     logger.info(f"Auto-run STOPPED for batch {batch_id}")
     
     return {
         "success": True,
         "message": "Auto-run job marked as stopped. In-progress operations will complete.",
-        "current_step": auto_run_jobs[job_id].get("current_step")
+        "current_step": state.get("current_step")
     }
 
 
@@ -1176,7 +1235,6 @@ async def rerun_step(
     batch_id: UUID,
     step_number: int,
     force: bool = False,
-    background_tasks: BackgroundTasks = None,
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -1457,108 +1515,33 @@ async def rerun_step(
 # ============== BATCH STATUS ==============
 
 @router.get("/batches/{batch_id}/status", response_model=BatchWizardStatus)
-async def get_batch_status(batch_id: UUID, db: RetryableSession = Depends(get_db_session_with_retry)):
+async def get_batch_status(batch_id: UUID, db: RetryableSession = Depends(get_read_db_session_with_retry)):
     """Get detailed status for a specific batch.
     
-    Uses RetryableSession to handle transient connection errors during
-    the multiple sequential count queries.
+    Uses RetryableSession to handle transient connection errors. The frontend
+    polls this endpoint continuously, so the counters come from the batch's
+    batch_counters row rather than recounting its domains/tenants/mailboxes.
     """
     batch = await db.get(SetupBatch, batch_id)
     if not batch:
         raise HTTPException(status_code=404, detail="Batch not found")
     
-    # Count domains for this batch
-    domains_total = await db.scalar(
-        select(func.count(Domain.id)).where(Domain.batch_id == batch_id)
-    ) or 0
-    
-    zones_created = await db.scalar(
-        select(func.count(Domain.id)).where(
-            Domain.batch_id == batch_id,
-            Domain.cloudflare_zone_id.isnot(None)
-        )
-    ) or 0
-    
-    ns_propagated = await db.scalar(
-        select(func.count(Domain.id)).where(
-            Domain.batch_id == batch_id,
-            Domain.status == DomainStatus.NS_PROPAGATED
-        )
-    ) or 0
-    
-    redirects_configured = await db.scalar(
-        select(func.count(Domain.id)).where(
-            Domain.batch_id == batch_id,
-            Domain.redirect_configured == True
-        )
-    ) or 0
-    
-    # Count tenants for this batch
-    tenants_total = await db.scalar(
-        select(func.count(Tenant.id)).where(Tenant.batch_id == batch_id)
-    ) or 0
-    
-    tenants_linked = await db.scalar(
-        select(func.count(Tenant.id)).where(
-            Tenant.batch_id == batch_id,
-            Tenant.domain_id.isnot(None)
-        )
-    ) or 0
-    
-    tenants_m365_verified = await db.scalar(
-        select(func.count(Tenant.id)).where(
-            Tenant.batch_id == batch_id,
-            Tenant.status == TenantStatus.DOMAIN_VERIFIED
-        )
-    ) or 0
-    
-    tenants_dkim_enabled = await db.scalar(
-        select(func.count(Tenant.id)).where(
-            Tenant.batch_id == batch_id,
-            Tenant.status == TenantStatus.DKIM_ENABLED
-        )
-    ) or 0
-    
-    # Count mailboxes for this batch
-    mailboxes_total = await db.scalar(
-        select(func.count(Mailbox.id)).where(Mailbox.batch_id == batch_id)
-    ) or 0
-    
-    mailboxes_pending = await db.scalar(
-        select(func.count(Mailbox.id)).where(
-            Mailbox.batch_id == batch_id,
-            Mailbox.status == MailboxStatus.PENDING
-        )
-    ) or 0
-    
-    mailboxes_ready = await db.scalar(
-        select(func.count(Mailbox.id)).where(
-            Mailbox.batch_id == batch_id,
-            Mailbox.status == MailboxStatus.READY
-        )
-    ) or 0
-    
-    # Step 7 stats (Sequencer prep)
-    step6_complete_count = await db.scalar(
-        select(func.count(Tenant.id)).where(
-            Tenant.batch_id == batch_id,
-            Tenant.step6_complete == True,
-        )
-    ) or 0
-    step7_complete_count = await db.scalar(
-        select(func.count(Tenant.id)).where(
-            Tenant.batch_id == batch_id,
-            Tenant.step7_complete == True,
-        )
-    ) or 0
-    step7_failed_count = await db.scalar(
-        select(func.count(Tenant.id)).where(
-            Tenant.batch_id == batch_id,
-            Tenant.step6_complete == True,
-            Tenant.step7_complete.is_not(True),
-            Tenant.step7_error.isnot(None),
-        )
-    ) or 0
+    counts = await batch_counters.get_batch_counters(db, batch_id)
+
+    domains_total = counts["domains_total"]
+    zones_created = counts["domains_zone_created"]
+    ns_propagated = counts["domains_ns_propagated"]
+    redirects_configured = counts["domains_redirect_configured"]
+    tenants_total = counts["tenants_total"]
+    tenants_linked = counts["tenants_linked"]
+    tenants_m365_verified = counts["tenants_domain_verified"]
+    tenants_dkim_enabled = counts["tenants_dkim_enabled"]
+    mailboxes_total = counts["mailboxes_total"]
+    mailboxes_pending = counts["mailboxes_pending"]
+    mailboxes_ready = counts["mailboxes_ready"]
+    step6_complete_count = counts["tenants_step6_complete"]
+    step7_complete_count = counts["tenants_step7_complete"]
+    step7_failed_count = counts["tenants_step7_failed"]
 
     # Determine step name
     step_names = {
@@ -1610,6 +1593,9 @@ async def get_batch_status(batch_id: UUID, db: RetryableSession = Depends(get_db
 
 # ============== FULL AUTOMATION ENDPOINTS ==============
 
+FULL_AUTOMATION_JOB = "full_automation"
+
+
 @router.post("/batches/{batch_id}/start-full-automation")
 async def start_full_automation(
     batch_id: UUID,
@@ -1618,7 +1604,6 @@ async def start_full_automation(
     last_name: str = Form(...),
     mailboxes_per_tenant: int = Form(50),
     max_workers: int = Form(10),
-    background_tasks: BackgroundTasks = BackgroundTasks(),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -1649,26 +1634,22 @@ async def start_full_automation(
     tenants = result.scalars().all()
     active_jobs[job_id]["total"] = len(tenants)
     
-    config = SetupConfig(
-        new_password=new_password,
-        first_name=first_name,
-        last_name=last_name,
-        mailboxes_per_tenant=mailboxes_per_tenant
+    await _enqueue_job(
+        db,
+        FULL_AUTOMATION_JOB,
+        {
+            "batch_id": batch_id,
+            "new_password": new_password,
+            "first_name": first_name,
+            "last_name": last_name,
+            "mailboxes_per_tenant": mailboxes_per_tenant,
+            "max_workers": max_workers,
+            "state": active_jobs[job_id],
+        },
+        key=job_id,
+        secret_keys=("new_password",),
     )
     
-    async def run():
-        try:
-            def on_progress(completed, total):
-                active_jobs[job_id]["completed"] = completed
-            
-            await process_batch(db, batch_id, config, max_workers, on_progress)
-            active_jobs[job_id]["status"] = "completed"
-        except Exception as e:
-            active_jobs[job_id]["status"] = "error"
-            active_jobs[job_id]["error"] = str(e)
-    
-    background_tasks.add_task(run)
-    
     return {
         "success": True,
         "job_id": job_id,
@@ -1676,39 +1657,62 @@ async def start_full_automation(
     }
 
 
+@job_handler(FULL_AUTOMATION_JOB)
+async def _run_full_automation_job(ctx: JobContext):
+    """Job queue entry point for process_batch."""
+    batch_id = UUID(ctx.payload["batch_id"])
+    job_id = str(batch_id)
+    if active_jobs.get(job_id, {}).get("status") != "running":
+        # Queued by another process, or resumed after a restart
+        active_jobs[job_id] = dict(ctx.payload["state"])
+    ctx.progress = lambda: active_jobs.get(job_id)
+    
+    config = SetupConfig(
+        new_password=ctx.payload["new_password"],
+        first_name=ctx.payload["first_name"],
+        last_name=ctx.payload["last_name"],
+        mailboxes_per_tenant=ctx.payload["mailboxes_per_tenant"]
+    )
+    
+    try:
+        def on_progress(completed, total):
+            active_jobs[job_id]["completed"] = completed
+        
+        async with async_session_factory() as db:
+            await process_batch(db, batch_id, config, ctx.payload["max_workers"], on_progress)
+        active_jobs[job_id]["status"] = "completed"
+    except Exception as e:
+        active_jobs[job_id]["status"] = "error"
+        active_jobs[job_id]["error"] = str(e)
+
+
 @router.get("/batches/{batch_id}/automation-status")
-async def get_automation_status(batch_id: UUID):
+async def get_automation_status(batch_id: UUID, db: AsyncSession = Depends(get_read_db)):
     """Get automation progress."""
     job_id = str(batch_id)
     
-    if job_id not in active_jobs:
+    job = active_jobs.get(job_id) or await _latest_job_progress(db, FULL_AUTOMATION_JOB, job_id)
+    if not job:
         return {"status": "not_started"}
     
-    return active_jobs[job_id]
+    return job
 
 
 @router.get("/batches/{batch_id}/export-credentials")
-async def export_credentials(batch_id: UUID, db: AsyncSession = Depends(get_db)):
-    """Export all mailbox credentials as CSV."""
-    result = await db.execute(
-        select(Mailbox).where(Mailbox.batch_id == batch_id)
+async def export_credentials(batch_id: UUID, gzip: bool = False):
+    """Export all mailbox credentials as CSV, streamed sorted by domain, then email."""
+    query = (
+        select(Mailbox.email, Mailbox.password, Mailbox.display_name)
+        .where(Mailbox.batch_id == batch_id)
+        .order_by(email_domain(Mailbox.email), Mailbox.email)
     )
-    mailboxes = result.scalars().all()
-    
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(["Email", "Password", "Display Name"])
-    
-    for mb in mailboxes:
-        writer.writerow([mb.email, mb.password, mb.display_name])
-    
-    output.seek(0)
-    
-    return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv",
-        headers={"Content-Disposition": f"attachment; filename=credentials_{batch_id}.csv"}
+    rows = stream_csv(
+        query,
+        ["Email", "Password", "Display Name"],
+        lambda mb: [mb.email, mb.password, mb.display_name],
+        compress=gzip,
     )
+    return csv_response(rows, f"credentials_{batch_id}.csv", compress=gzip)
 
 
 # ============== BATCH-SCOPED STEP ENDPOINTS ==============
@@ -2129,30 +2133,25 @@ async def batch_check_propagation(batch_id: UUID, db: AsyncSession = Depends(get
     )
     domains = result.scalars().all()
     
-    propagated = 0
     pending = 0
-    
-    for domain in domains:
-        # Skip already propagated domains
-        if domain.status == DomainStatus.NS_PROPAGATED:
+
+    # Skip already propagated domains
+    propagated = sum(1 for d in domains if d.status == DomainStatus.NS_PROPAGATED)
+    to_check = [d for d in domains if d.status != DomainStatus.NS_PROPAGATED and d.cloudflare_nameservers]
+    
+    # All lookups at once (bounded concurrency)
+    checks = await cloudflare_service.bulk_check_ns_propagation([
+        {"domain": d.name, "expected_ns": d.cloudflare_nameservers} for d in to_check
+    ])
+    for domain, check in zip(to_check, checks):
+        if check["propagated"]:
+            domain.status = DomainStatus.NS_PROPAGATED
+            domain.ns_propagated_at = datetime.utcnow()
             propagated += 1
-            continue
-        
-        if domain.cloudflare_nameservers:
-            try:
-                is_propagated = await cloudflare_service.check_ns_propagation(
-                    domain.name, domain.cloudflare_nameservers
-                )
-                
-                if is_propagated:
-                    domain.status = DomainStatus.NS_PROPAGATED
-                    domain.ns_propagated_at = datetime.utcnow()
-                    propagated += 1
-                else:
-                    pending += 1
-            except Exception as e:
-                pending += 1
-                print(f"NS check error for {domain.name}: {e}")
+        else:
+            pending += 1
+            if check["error"]:
+                print(f"NS check error for {domain.name}: {check['error']}")
     
     await db.commit()
     
@@ -2485,7 +2484,6 @@ async def start_automation(
     batch_id: UUID,
     new_password: str = Form(...),
     max_workers: int = Form(default=10),
-    background_tasks: BackgroundTasks = BackgroundTasks(),
     db: AsyncSession = Depends(get_db)
 ):
     """Start parallel first-login automation."""
@@ -2502,9 +2500,9 @@ async def start_automation(
             )
             max_workers = STEP4_MAX_WORKERS
         
-        # Check if automation is already running for this batch
+        # Check if automation is already running for this batch (in this or any other process)
         job_id = str(batch_id)
-        if job_id in step4_jobs and step4_jobs[job_id].get("status") == "running":
+        if await job_queue.get_active(db, STEP4_BATCH_JOB, job_id):
             logger.warning(f"=== STEP 4 ALREADY RUNNING for batch {batch_id} ===")
             return {
                 "success": False,
@@ -2547,11 +2545,6 @@ async def start_automation(
         logger.info(f"Total tenants to process: {len(tenants)}")
         logger.info(f"=" * 60)
         
-        tenant_data = [
-            {"tenant_id": str(t.id), "admin_email": t.admin_email, "initial_password": t.admin_password}
-            for t in tenants
-        ]
-        
         # Initialize job tracking
         step4_jobs[job_id] = {
             "status": "running",
@@ -2560,62 +2553,21 @@ async def start_automation(
             "started_at": datetime.utcnow().isoformat()
         }
         
-        async def run():
-            try:
-                results = await process_tenants_parallel(tenant_data, new_password, max_workers)
-                for r in results:
-                    try:
-                        async with AsyncSession(async_engine, expire_on_commit=False) as session:
-                            t = await session.get(Tenant, UUID(r["tenant_id"]))
-                            if not t:
-                                logger.error(f"Tenant {r['tenant_id']} not found for result save")
-                                continue
-                            
-                            if r.get("success"):
-                                # BUG FIX: Only update password if it was actually changed during first login
-                                if r.get("password_changed"):
-                                    t.admin_password = r.get("new_password", new_password)
-                                    t.password_changed = True
-                                    logger.info(f"[Step 4] Password was CHANGED for {t.admin_email}")
-                                else:
-                                    t.password_changed = False
-                                    logger.info(f"[Step 4] Password was NOT changed for {t.admin_email}, keeping original")
-                                t.first_login_completed = True
-                                t.first_login_at = datetime.utcnow()
-                                t.setup_error = None
-                                t.status = "first_login_complete"
-                                
-                                # TOTP: use worker result, but also double-check
-                                if r.get("totp_secret") and not t.totp_secret:
-                                    t.totp_secret = r["totp_secret"]
-                                
-                                t.security_defaults_disabled = r.get("security_defaults_disabled", False)
-                                
-                                logger.info(f"✅ Saved results for {t.admin_email}: pwd_changed={r.get('password_changed')}, totp={bool(t.totp_secret)}")
-                            else:
-                                t.setup_error = r.get("error", "Unknown error")
-                                logger.warning(f"❌ Tenant {t.admin_email} failed: {r.get('error')}")
-                            
-                            await session.commit()
-                    except Exception as e:
-                        logger.error(f"Failed to save result for tenant {r.get('tenant_id')}: {e}")
-                
-                # Mark job as completed
-                step4_jobs[job_id]["status"] = "completed"
-                step4_jobs[job_id]["completed_at"] = datetime.utcnow().isoformat()
-                logger.info(f"Step 4 automation completed for batch {batch_id}")
-                
-            except Exception as e:
-                # Mark job as failed
-                step4_jobs[job_id]["status"] = "failed"
-                step4_jobs[job_id]["error"] = str(e)
-                step4_jobs[job_id]["completed_at"] = datetime.utcnow().isoformat()
-                logger.error(f"Step 4 automation failed for batch {batch_id}: {str(e)}")
-                import traceback
-                logger.error(traceback.format_exc())
-        
-        background_tasks.add_task(run)
-        logger.info(f"=== STEP 4 BACKGROUND TASK ADDED ===")
+        # The job reads the tenants' credentials itself; only the new password is kept in it
+        await _enqueue_job(
+            db,
+            STEP4_BATCH_JOB,
+            {
+                "batch_id": batch_id,
+                "tenant_ids": [t.id for t in tenants],
+                "new_password": new_password,
+                "max_workers": max_workers,
+                "state": step4_jobs[job_id],
+            },
+            key=job_id,
+            secret_keys=("new_password",),
+        )
+        logger.info(f"=== STEP 4 JOB QUEUED ===")
         
         return {
             "success": True,
@@ -2631,6 +2583,92 @@ async def start_automation(
         raise
 
 
+async def _step4_tenant_data(tenant_ids: list) -> list:
+    """First-login input for process_tenants_parallel, read from the tenant rows."""
+    async with async_session_factory() as db:
+        tenants = (await db.execute(
+            select(Tenant).where(Tenant.id.in_(tenant_ids), Tenant.first_login_completed.is_not(True))
+        )).scalars().all()
+    return [
+        {"tenant_id": str(t.id), "admin_email": t.admin_email, "initial_password": t.admin_password}
+        for t in tenants
+    ]
+
+
+@job_handler(STEP4_BATCH_JOB)
+async def _run_step4_batch_job(ctx: JobContext):
+    """Job queue entry point for the Step 4 first-login automation of a batch.
+
+    Tenants whose first login finished before a restart are not run again.
+    """
+    batch_id = UUID(ctx.payload["batch_id"])
+    job_id = str(batch_id)
+    if step4_jobs.get(job_id, {}).get("status") != "running":
+        # Queued by another process, or resumed after a restart
+        step4_jobs[job_id] = dict(ctx.payload["state"])
+    ctx.progress = lambda: step4_jobs.get(job_id)
+
+    tenant_data = await _step4_tenant_data([UUID(tid) for tid in ctx.payload["tenant_ids"]])
+    await _run_step4_batch(batch_id, tenant_data, ctx.payload["new_password"], ctx.payload["max_workers"])
+
+
+async def _run_step4_batch(batch_id: UUID, tenant_data: list, new_password: str, max_workers: int):
+    """Run first login for tenant_data and save each tenant's result."""
+    job_id = str(batch_id)
+    try:
+        results = await process_tenants_parallel(tenant_data, new_password, max_workers)
+        for r in results:
+            try:
+                async with AsyncSession(async_engine, expire_on_commit=False) as session:
+                    t = await session.get(Tenant, UUID(r["tenant_id"]))
+                    if not t:
+                        logger.error(f"Tenant {r['tenant_id']} not found for result save")
+                        continue
+                    
+                    if r.get("success"):
+                        # BUG FIX: Only update password if it was actually changed during first login
+                        if r.get("password_changed"):
+                            t.admin_password = r.get("new_password", new_password)
+                            t.password_changed = True
+                            logger.info(f"[Step 4] Password was CHANGED for {t.admin_email}")
+                        else:
+                            t.password_changed = False
+                            logger.info(f"[Step 4] Password was NOT changed for {t.admin_email}, keeping original")
+                        t.first_login_completed = True
+                        t.first_login_at = datetime.utcnow()
+                        t.setup_error = None
+                        t.status = "first_login_complete"
+                        
+                        # TOTP: use worker result, but also double-check
+                        if r.get("totp_secret") and not t.totp_secret:
+                            t.totp_secret = r["totp_secret"]
+                        
+                        t.security_defaults_disabled = r.get("security_defaults_disabled", False)
+                        
+                        logger.info(f"✅ Saved results for {t.admin_email}: pwd_changed={r.get('password_changed')}, totp={bool(t.totp_secret)}")
+                    else:
+                        t.setup_error = r.get("error", "Unknown error")
+                        logger.warning(f"❌ Tenant {t.admin_email} failed: {r.get('error')}")
+                    
+                    await session.commit()
+            except Exception as e:
+                logger.error(f"Failed to save result for tenant {r.get('tenant_id')}: {e}")
+        
+        # Mark job as completed
+        step4_jobs[job_id]["status"] = "completed"
+        step4_jobs[job_id]["completed_at"] = datetime.utcnow().isoformat()
+        logger.info(f"Step 4 automation completed for batch {batch_id}")
+        
+    except Exception as e:
+        # Mark job as failed
+        step4_jobs[job_id]["status"] = "failed"
+        step4_jobs[job_id]["error"] = str(e)
+        step4_jobs[job_id]["completed_at"] = datetime.utcnow().isoformat()
+        logger.error(f"Step 4 automation failed for batch {batch_id}: {str(e)}")
+        import traceback
+        logger.error(traceback.format_exc())
+
+
 @router.get("/batches/{batch_id}/step4/progress")
 async def get_automation_progress(batch_id: UUID):
     """Get automation progress."""
@@ -2638,7 +2676,7 @@ async def get_automation_progress(batch_id: UUID):
 
 
 @router.get("/batches/{batch_id}/step4/status")
-async def get_step4_status(batch_id: UUID, db: AsyncSession = Depends(get_db)):
+async def get_step4_status(batch_id: UUID, db: AsyncSession = Depends(get_read_db)):
     """Get step 4 completion status."""
     tenants = (await db.execute(
         select(Tenant).where(Tenant.batch_id == batch_id)
@@ -2693,7 +2731,6 @@ async def retry_tenant_first_login(
     batch_id: UUID,
     tenant_id: UUID,
     new_password: str = Form(...),
-    background_tasks: BackgroundTasks = BackgroundTasks(),
     db: AsyncSession = Depends(get_db)
 ):
     """Retry first login for a single tenant."""
@@ -2710,40 +2747,42 @@ async def retry_tenant_first_login(
     tenant.first_login_completed = False
     await db.commit()
     
-    # Queue retry in background
-    tenant_data = [{
-        "tenant_id": str(tenant.id),
-        "admin_email": tenant.admin_email,
-        "initial_password": tenant.admin_password
-    }]
-    
-    async def run_retry():
-        results = await process_tenants_parallel(tenant_data, new_password, max_workers=1)
-        for r in results:
-            async with AsyncSession(async_engine, expire_on_commit=False) as session:
-                t = await session.get(Tenant, UUID(r["tenant_id"]))
-                if t:
-                    t.first_login_completed = r["success"]
-                    t.totp_secret = r["totp_secret"]
-                    t.security_defaults_disabled = r["security_defaults_disabled"]
-                    t.setup_error = r["error"]
-                    if r["success"]:
-                        if r.get("password_changed"):
-                            t.admin_password = r.get("new_password")
-                            t.password_changed = True
-                            logger.info(f"[Step 4 retry] Password was CHANGED for {t.admin_email}")
-                        else:
-                            t.password_changed = False
-                            logger.info(f"[Step 4 retry] Password was NOT changed for {t.admin_email}, keeping original")
-                        t.first_login_at = datetime.utcnow()
-                    await session.commit()
-                    logger.info(" SAVED %s to DB", t.name)
-    
-    background_tasks.add_task(run_retry)
+    # Queue the retry; the job reads the tenant's credentials itself
+    await _enqueue_job(
+        db, STEP4_TENANT_JOB, {"tenant_id": tenant.id, "new_password": new_password},
+        key=str(tenant.id), secret_keys=("new_password",),
+    )
     
     return {"success": True, "message": f"Retrying tenant {tenant.name}"}
 
 
+@job_handler(STEP4_TENANT_JOB)
+async def _run_step4_tenant_job(ctx: JobContext):
+    """Job queue entry point for a single tenant's Step 4 retry."""
+    new_password = ctx.payload["new_password"]
+    tenant_data = await _step4_tenant_data([UUID(ctx.payload["tenant_id"])])
+    results = await process_tenants_parallel(tenant_data, new_password, max_workers=1)
+    for r in results:
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            t = await session.get(Tenant, UUID(r["tenant_id"]))
+            if t:
+                t.first_login_completed = r["success"]
+                t.totp_secret = r["totp_secret"]
+                t.security_defaults_disabled = r["security_defaults_disabled"]
+                t.setup_error = r["error"]
+                if r["success"]:
+                    if r.get("password_changed"):
+                        t.admin_password = r.get("new_password")
+                        t.password_changed = True
+                        logger.info(f"[Step 4 retry] Password was CHANGED for {t.admin_email}")
+                    else:
+                        t.password_changed = False
+                        logger.info(f"[Step 4 retry] Password was NOT changed for {t.admin_email}, keeping original")
+                    t.first_login_at = datetime.utcnow()
+                await session.commit()
+                logger.info(" SAVED %s to DB", t.name)
+
+
 @router.post("/batches/{batch_id}/step4/skip-all-failed")
 async def skip_all_failed_tenants(
     batch_id: UUID,
@@ -2973,14 +3012,27 @@ async def batch_setup_dkim(batch_id: UUID, db: AsyncSession = Depends(get_db)):
 
 # ============== STEP 5 AUTOMATION ENDPOINTS ==============
 
-# Store Step 5 job progress
+# Store Step 5 job progress; runs are jobs in the durable job queue (see STEP6_BATCH_JOB),
+# keyed like their step5_jobs entry, whose state is the job's progress
 step5_jobs = {}
+STEP5_BATCH_JOB = "step5_batch"
+STEP5_TENANT_JOB = "step5_tenant"
+STEP5_PARALLEL_JOB = "step5_parallel"
+STEP5_RETRY_JOB = "step5_retry"
+DKIM_RETRY_JOB = "dkim_retry"
+
+
+def _track_step5_job(ctx: JobContext, job_id: str) -> None:
+    """Report step5_jobs[job_id] as the job's progress (restored from the payload if queued elsewhere)."""
+    if step5_jobs.get(job_id, {}).get("status") != "running":
+        # Queued by another process, or resumed after a restart
+        step5_jobs[job_id] = dict(ctx.payload["state"])
+    ctx.progress = lambda: step5_jobs.get(job_id)
 
 
 @router.post("/batches/{batch_id}/step5/start-automation")
 async def start_step5_automation(
     batch_id: UUID,
-    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -3038,29 +3090,7 @@ async def start_step5_automation(
         "results": []
     }
     
-    async def run_automation():
-        try:
-            # Create fresh DB session for background task
-            from app.db.session import async_engine
-            async with AsyncSession(async_engine, expire_on_commit=False) as bg_db:
-                def on_progress(tenant_id: str, step: str, status: str):
-                    step5_jobs[job_id]["current_tenant"] = tenant_id
-                    step5_jobs[job_id]["current_step"] = f"{step}: {status}"
-                
-                summary = await run_step5_for_batch(batch_id, on_progress)
-                
-                step5_jobs[job_id]["status"] = "completed"
-                step5_jobs[job_id]["completed"] = summary["total"]
-                step5_jobs[job_id]["successful"] = summary["successful"]
-                step5_jobs[job_id]["failed"] = summary["failed"]
-                step5_jobs[job_id]["results"] = summary["results"]
-                step5_jobs[job_id]["completed_at"] = datetime.utcnow().isoformat()
-                
-        except Exception as e:
-            step5_jobs[job_id]["status"] = "error"
-            step5_jobs[job_id]["error"] = str(e)
-    
-    background_tasks.add_task(run_automation)
+    await _enqueue_job(db, STEP5_BATCH_JOB, {"batch_id": batch_id, "state": step5_jobs[job_id]}, key=job_id)
     
     return {
         "success": True,
@@ -3071,12 +3101,37 @@ async def start_step5_automation(
     }
 
 
+@job_handler(STEP5_BATCH_JOB)
+async def _run_step5_batch_job(ctx: JobContext):
+    """Job queue entry point for run_step5_for_batch."""
+    batch_id = UUID(ctx.payload["batch_id"])
+    job_id = str(batch_id)
+    _track_step5_job(ctx, job_id)
+    try:
+        def on_progress(tenant_id: str, step: str, status: str):
+            step5_jobs[job_id]["current_tenant"] = tenant_id
+            step5_jobs[job_id]["current_step"] = f"{step}: {status}"
+        
+        summary = await run_step5_for_batch(batch_id, on_progress)
+        
+        step5_jobs[job_id]["status"] = "completed"
+        step5_jobs[job_id]["completed"] = summary["total"]
+        step5_jobs[job_id]["successful"] = summary["successful"]
+        step5_jobs[job_id]["failed"] = summary["failed"]
+        step5_jobs[job_id]["results"] = summary["results"]
+        step5_jobs[job_id]["completed_at"] = datetime.utcnow().isoformat()
+        
+    except Exception as e:
+        step5_jobs[job_id]["status"] = "error"
+        step5_jobs[job_id]["error"] = str(e)
+
+
 @router.get("/batches/{batch_id}/step5/automation-status")
-async def get_step5_automation_status(batch_id: UUID, db: AsyncSession = Depends(get_db)):
+async def get_step5_automation_status(batch_id: UUID, db: AsyncSession = Depends(get_read_db)):
     """Get the current status of Step 5 automation with real-time live progress.
     
     This endpoint combines:
-    1. Job-level status (from step5_jobs in-memory dict)
+    1. Job-level status (from step5_jobs, or as last reported by the job in another process)
     2. Real-time per-domain progress (from status files written by automation)
     
     The live progress shows exactly what step each domain is on during automation.
@@ -3117,7 +3172,8 @@ async def get_step5_automation_status(batch_id: UUID, db: AsyncSession = Depends
                 "timestamp": progress.get("timestamp")
             })
     
-    if job_id not in step5_jobs:
+    job = step5_jobs.get(job_id) or await _latest_job_progress(db, STEP5_BATCH_JOB, job_id)
+    if not job:
         # Return a proper structure even when no job exists
         # Include live progress for domains that may be processing
         return {
@@ -3135,7 +3191,6 @@ async def get_step5_automation_status(batch_id: UUID, db: AsyncSession = Depends
         }
     
     # Return job status with all expected fields (fill in defaults for missing)
-    job = step5_jobs[job_id]
     return {
         "status": job.get("status", "unknown"),
         "message": job.get("message"),
@@ -3158,7 +3213,6 @@ async def get_step5_automation_status(batch_id: UUID, db: AsyncSession = Depends
 async def setup_single_tenant(
     batch_id: UUID,
     tenant_id: UUID,
-    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -3195,24 +3249,9 @@ async def setup_single_tenant(
         "started_at": datetime.utcnow().isoformat()
     }
     
-    async def run_single():
-        try:
-            from app.db.session import async_engine
-            async with AsyncSession(async_engine, expire_on_commit=False) as bg_db:
-                def on_progress(step: str, status: str):
-                    step5_jobs[job_id]["current_step"] = f"{step}: {status}"
-                
-                result = await run_step5_for_tenant(bg_db, tenant_id, on_progress)
-                
-                step5_jobs[job_id]["status"] = "completed" if result.success else "failed"
-                step5_jobs[job_id]["result"] = result.to_dict()
-                step5_jobs[job_id]["completed_at"] = datetime.utcnow().isoformat()
-                
-        except Exception as e:
-            step5_jobs[job_id]["status"] = "error"
-            step5_jobs[job_id]["error"] = str(e)
-    
-    background_tasks.add_task(run_single)
+    await _enqueue_job(
+        db, STEP5_TENANT_JOB, {"tenant_id": tenant_id, "state": step5_jobs[job_id]}, key=job_id,
+    )
     
     return {
         "success": True,
@@ -3221,11 +3260,32 @@ async def setup_single_tenant(
     }
 
 
+@job_handler(STEP5_TENANT_JOB)
+async def _run_step5_tenant_job(ctx: JobContext):
+    """Job queue entry point for run_step5_for_tenant."""
+    job_id = ctx.key
+    _track_step5_job(ctx, job_id)
+    try:
+        async with async_session_factory() as bg_db:
+            def on_progress(step: str, status: str):
+                step5_jobs[job_id]["current_step"] = f"{step}: {status}"
+            
+            result = await run_step5_for_tenant(bg_db, UUID(ctx.payload["tenant_id"]), on_progress)
+            
+            step5_jobs[job_id]["status"] = "completed" if result.success else "failed"
+            step5_jobs[job_id]["result"] = result.to_dict()
+            step5_jobs[job_id]["completed_at"] = datetime.utcnow().isoformat()
+            
+    except Exception as e:
+        step5_jobs[job_id]["status"] = "error"
+        step5_jobs[job_id]["error"] = str(e)
+
+
 @router.get("/batches/{batch_id}/step5/tenant-status/{tenant_id}")
 async def get_tenant_setup_status(
     batch_id: UUID,
     tenant_id: UUID,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get Step 5 status for a specific tenant."""
     tenant = await db.get(Tenant, tenant_id)
@@ -3263,7 +3323,7 @@ async def get_tenant_setup_status(
 @router.get("/batches/{batch_id}/step5/status")
 async def get_step5_batch_status(
     batch_id: UUID,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get Step 5 status for all tenants in batch.
     
@@ -3493,16 +3553,21 @@ async def mark_bulk_tenants_step5_complete(
     }
 
 
+@job_handler(DKIM_RETRY_SWEEP_JOB)
+async def _run_dkim_retry_sweep_job(ctx: JobContext):
+    """Job queue entry point for the scheduled/manual DKIM retry sweep."""
+    await retry_dkim_enable_job()
+
+
 @router.post("/batches/{batch_id}/step5/retry-dkim")
 async def retry_dkim_for_batch(
     batch_id: UUID,
-    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db)
 ):
     """
     Manually trigger DKIM enable retry for tenants in this batch.
     
-    This runs the background DKIM retry job immediately for this batch's tenants.
+    This queues the background DKIM retry job immediately for this batch's tenants.
     Useful when you don't want to wait for the scheduled 10-minute interval.
     """
     from app.services.background_jobs import trigger_dkim_retry_now, get_dkim_retry_status
@@ -3514,7 +3579,7 @@ async def retry_dkim_for_batch(
     batch_tenants = [t for t in status.get("tenants", []) if True]  # All pending tenants for now
     
     # Trigger the retry job
-    background_tasks.add_task(trigger_dkim_retry_now)
+    await trigger_dkim_retry_now()
     
     return {
         "success": True,
@@ -3528,7 +3593,7 @@ async def retry_dkim_for_batch(
 @router.get("/batches/{batch_id}/step5/dkim-retry-status")
 async def get_batch_dkim_retry_status(
     batch_id: UUID,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get status of pending DKIM retries for tenants in this batch.
@@ -3565,17 +3630,13 @@ async def get_batch_dkim_retry_status(
 async def retry_dkim_for_tenant(
     batch_id: UUID,
     tenant_id: UUID,
-    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db)
 ):
     """
     Manually trigger DKIM enable retry for a single tenant.
     
-    Immediately attempts to enable DKIM via Exchange Admin Center UI.
-    """
-    from app.services.selenium.admin_portal import AdminPortalAutomation
-    from datetime import datetime
-    
+    Queues an attempt to enable DKIM via Exchange Admin Center UI.
+    """    
     tenant = await db.get(Tenant, tenant_id)
     if not tenant:
         raise HTTPException(status_code=404, detail="Tenant not found")
@@ -3601,35 +3662,7 @@ async def retry_dkim_for_tenant(
     tenant.dkim_last_retry_at = datetime.utcnow()
     await db.commit()
     
-    # Run in background
-    async def do_retry():
-        try:
-            automation = AdminPortalAutomation(headless=True)
-            result = await automation.enable_dkim_via_ui(
-                admin_email=tenant.admin_email,
-                admin_password=tenant.admin_password,
-                totp_secret=tenant.totp_secret,
-                domain_name=domain.name
-            )
-            
-            async with AsyncSession(async_engine, expire_on_commit=False) as session:
-                t = await session.get(Tenant, tenant_id)
-                d = await session.get(Domain, domain.id)
-                
-                if result.success:
-                    t.dkim_enabled = True
-                    t.dkim_enabled_at = datetime.utcnow()
-                    t.status = TenantStatus.DKIM_ENABLED
-                    t.setup_error = None
-                    d.dkim_enabled = True
-                    d.status = "active"
-                
-                await session.commit()
-        except Exception as e:
-            import logging
-            logging.getLogger(__name__).error(f"DKIM retry error for {domain.name}: {e}")
-    
-    background_tasks.add_task(do_retry)
+    await _enqueue_job(db, DKIM_RETRY_JOB, {"tenant_id": tenant_id}, key=str(tenant_id))
     
     return {
         "success": True,
@@ -3639,10 +3672,47 @@ async def retry_dkim_for_tenant(
     }
 
 
-@router.post("/batches/{batch_id}/step5/start-parallel")
-async def start_step5_parallel(
-    batch_id: UUID,
-    background_tasks: BackgroundTasks,
+@job_handler(DKIM_RETRY_JOB)
+async def _run_dkim_retry_job(ctx: JobContext):
+    """Job queue entry point for a single tenant's DKIM enable retry."""
+    from app.services.selenium.admin_portal import AdminPortalAutomation
+    
+    tenant_id = UUID(ctx.payload["tenant_id"])
+    async with async_session_factory() as session:
+        tenant = await session.get(Tenant, tenant_id)
+        domain = await session.get(Domain, tenant.domain_id) if tenant and tenant.domain_id else None
+    if not tenant or not domain or tenant.dkim_enabled:
+        return
+    
+    try:
+        automation = AdminPortalAutomation(headless=True)
+        result = await automation.enable_dkim_via_ui(
+            admin_email=tenant.admin_email,
+            admin_password=tenant.admin_password,
+            totp_secret=tenant.totp_secret,
+            domain_name=domain.name
+        )
+        
+        async with async_session_factory() as session:
+            t = await session.get(Tenant, tenant_id)
+            d = await session.get(Domain, domain.id)
+            
+            if result.success:
+                t.dkim_enabled = True
+                t.dkim_enabled_at = datetime.utcnow()
+                t.status = TenantStatus.DKIM_ENABLED
+                t.setup_error = None
+                d.dkim_enabled = True
+                d.status = "active"
+            
+            await session.commit()
+    except Exception as e:
+        logger.error(f"DKIM retry error for {domain.name}: {e}")
+
+
+@router.post("/batches/{batch_id}/step5/start-parallel")
+async def start_step5_parallel(
+    batch_id: UUID,
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -3677,23 +3747,7 @@ async def start_step5_parallel(
             "message": "No eligible tenants found. Ensure tenants have completed first login and are linked to domains."
         }
     
-    # Build tenant data for parallel processor
-    tenants_data = []
-    for tenant in tenants:
-        domain = await db.get(Domain, tenant.domain_id)
-        if not domain or not domain.cloudflare_zone_id:
-            continue
-        
-        tenants_data.append({
-            "tenant_id": tenant.id,
-            "domain_id": domain.id,
-            "domain_name": domain.name,
-            "admin_email": tenant.admin_email,
-            "admin_password": tenant.admin_password,
-            "totp_secret": tenant.totp_secret,
-            "cloudflare_zone_id": domain.cloudflare_zone_id
-        })
-    
+    tenants_data = await _step5_parallel_data(db, tenants)
     if not tenants_data:
         return {
             "success": False,
@@ -3717,74 +3771,13 @@ async def start_step5_parallel(
         "results": []
     }
     
-    async def run_parallel():
-        try:
-            def on_progress(domain_name: str, state: str, message: str):
-                step5_jobs[job_id]["current_step"] = f"{domain_name}: {state} - {message}"
-                # Track active domains
-                if state == "starting":
-                    if domain_name not in step5_jobs[job_id]["current_domains"]:
-                        step5_jobs[job_id]["current_domains"].append(domain_name)
-                elif state == "waiting":
-                    step5_jobs[job_id]["waiting_dns"] = len([
-                        d for d in step5_jobs[job_id]["current_domains"]
-                    ])
-            
-            def on_complete(domain_name: str, success: bool, result: dict):
-                step5_jobs[job_id]["completed"] += 1
-                if success:
-                    step5_jobs[job_id]["successful"] += 1
-                else:
-                    step5_jobs[job_id]["failed"] += 1
-                step5_jobs[job_id]["results"].append(result)
-                # Remove from active
-                if domain_name in step5_jobs[job_id]["current_domains"]:
-                    step5_jobs[job_id]["current_domains"].remove(domain_name)
-            
-            summary = await run_parallel_step5(
-                tenants_data,
-                on_progress=on_progress,
-                on_complete=on_complete
-            )
-            
-            step5_jobs[job_id]["status"] = "completed"
-            step5_jobs[job_id]["successful"] = summary["successful"]
-            step5_jobs[job_id]["failed"] = summary["failed"]
-            step5_jobs[job_id]["completed_at"] = datetime.utcnow().isoformat()
-            
-            # Update database with results
-            from app.db.session import async_engine
-            async with AsyncSession(async_engine, expire_on_commit=False) as bg_db:
-                for result in summary["results"]:
-                    if result.get("success"):
-                        tenant = await bg_db.execute(
-                            select(Tenant).where(Tenant.id == UUID(result["tenant_id"]))
-                        )
-                        tenant = tenant.scalar_one_or_none()
-                        if tenant:
-                            tenant.domain_verified_in_m365 = result.get("domain_verified", False)
-                            tenant.dkim_enabled = result.get("dkim_enabled", False)
-                            if result.get("dkim_enabled"):
-                                tenant.dkim_enabled_at = datetime.utcnow()
-                                tenant.status = TenantStatus.DKIM_ENABLED
-                            tenant.setup_error = None
-                        
-                        domain = await bg_db.execute(
-                            select(Domain).where(Domain.name == result["domain_name"])
-                        )
-                        domain = domain.scalar_one_or_none()
-                        if domain:
-                            domain.dkim_enabled = result.get("dkim_enabled", False)
-                            if result.get("dkim_enabled"):
-                                domain.status = DomainStatus.ACTIVE
-                
-                await bg_db.commit()
-                
-        except Exception as e:
-            step5_jobs[job_id]["status"] = "error"
-            step5_jobs[job_id]["error"] = str(e)
-    
-    background_tasks.add_task(run_parallel)
+    # The job reads the tenants' credentials itself
+    await _enqueue_job(
+        db,
+        STEP5_PARALLEL_JOB,
+        {"batch_id": batch_id, "tenant_ids": [t["tenant_id"] for t in tenants_data], "state": step5_jobs[job_id]},
+        key=job_id,
+    )
     
     # Estimate time: With parallel processing, much faster
     # 3 browsers x (5 min per domain + 10 min DNS wait average) / 3 = ~5 min per domain
@@ -3802,10 +3795,113 @@ async def start_step5_parallel(
     }
 
 
+async def _step5_parallel_data(db: AsyncSession, tenants) -> list:
+    """Input for run_parallel_step5: the tenants whose domain has a Cloudflare zone."""
+    tenants_data = []
+    for tenant in tenants:
+        domain = await db.get(Domain, tenant.domain_id)
+        if not domain or not domain.cloudflare_zone_id:
+            continue
+        
+        tenants_data.append({
+            "tenant_id": tenant.id,
+            "domain_id": domain.id,
+            "domain_name": domain.name,
+            "admin_email": tenant.admin_email,
+            "admin_password": tenant.admin_password,
+            "totp_secret": tenant.totp_secret,
+            "cloudflare_zone_id": domain.cloudflare_zone_id
+        })
+    return tenants_data
+
+
+@job_handler(STEP5_PARALLEL_JOB)
+async def _run_step5_parallel_job(ctx: JobContext):
+    """Job queue entry point for run_parallel_step5.
+
+    Tenants whose DKIM was enabled before a restart are not run again.
+    """
+    job_id = ctx.key
+    _track_step5_job(ctx, job_id)
+    async with async_session_factory() as db:
+        tenants = (await db.execute(
+            select(Tenant).where(
+                Tenant.id.in_([UUID(tid) for tid in ctx.payload["tenant_ids"]]),
+                Tenant.dkim_enabled.is_not(True),
+            )
+        )).scalars().all()
+        tenants_data = await _step5_parallel_data(db, tenants)
+    
+    try:
+        def on_progress(domain_name: str, state: str, message: str):
+            step5_jobs[job_id]["current_step"] = f"{domain_name}: {state} - {message}"
+            # Track active domains
+            if state == "starting":
+                if domain_name not in step5_jobs[job_id]["current_domains"]:
+                    step5_jobs[job_id]["current_domains"].append(domain_name)
+            elif state == "waiting":
+                step5_jobs[job_id]["waiting_dns"] = len([
+                    d for d in step5_jobs[job_id]["current_domains"]
+                ])
+        
+        def on_complete(domain_name: str, success: bool, result: dict):
+            step5_jobs[job_id]["completed"] += 1
+            if success:
+                step5_jobs[job_id]["successful"] += 1
+            else:
+                step5_jobs[job_id]["failed"] += 1
+            step5_jobs[job_id]["results"].append(result)
+            # Remove from active
+            if domain_name in step5_jobs[job_id]["current_domains"]:
+                step5_jobs[job_id]["current_domains"].remove(domain_name)
+        
+        summary = await run_parallel_step5(
+            tenants_data,
+            on_progress=on_progress,
+            on_complete=on_complete
+        )
+        
+        step5_jobs[job_id]["status"] = "completed"
+        step5_jobs[job_id]["successful"] = summary["successful"]
+        step5_jobs[job_id]["failed"] = summary["failed"]
+        step5_jobs[job_id]["completed_at"] = datetime.utcnow().isoformat()
+        
+        # Update database with results
+        from app.db.session import async_engine
+        async with AsyncSession(async_engine, expire_on_commit=False) as bg_db:
+            for result in summary["results"]:
+                if result.get("success"):
+                    tenant = await bg_db.execute(
+                        select(Tenant).where(Tenant.id == UUID(result["tenant_id"]))
+                    )
+                    tenant = tenant.scalar_one_or_none()
+                    if tenant:
+                        tenant.domain_verified_in_m365 = result.get("domain_verified", False)
+                        tenant.dkim_enabled = result.get("dkim_enabled", False)
+                        if result.get("dkim_enabled"):
+                            tenant.dkim_enabled_at = datetime.utcnow()
+                            tenant.status = TenantStatus.DKIM_ENABLED
+                        tenant.setup_error = None
+                    
+                    domain = await bg_db.execute(
+                        select(Domain).where(Domain.name == result["domain_name"])
+                    )
+                    domain = domain.scalar_one_or_none()
+                    if domain:
+                        domain.dkim_enabled = result.get("dkim_enabled", False)
+                        if result.get("dkim_enabled"):
+                            domain.status = DomainStatus.ACTIVE
+            
+            await bg_db.commit()
+            
+    except Exception as e:
+        step5_jobs[job_id]["status"] = "error"
+        step5_jobs[job_id]["error"] = str(e)
+
+
 @router.post("/batches/{batch_id}/step5/retry-failed")
 async def retry_failed_tenants(
     batch_id: UUID,
-    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db)
 ):
     """Retry Step 5 for all failed tenants in batch."""
@@ -3841,27 +3937,12 @@ async def retry_failed_tenants(
         "started_at": datetime.utcnow().isoformat()
     }
     
-    async def run_retry():
-        try:
-            from app.db.session import async_engine
-            async with AsyncSession(async_engine, expire_on_commit=False) as bg_db:
-                for i, tenant in enumerate(failed_tenants):
-                    result = await run_step5_for_tenant(bg_db, tenant.id)
-                    
-                    step5_jobs[job_id]["completed"] = i + 1
-                    if result.success:
-                        step5_jobs[job_id]["successful"] += 1
-                    else:
-                        step5_jobs[job_id]["failed"] += 1
-                
-                step5_jobs[job_id]["status"] = "completed"
-                step5_jobs[job_id]["completed_at"] = datetime.utcnow().isoformat()
-                
-        except Exception as e:
-            step5_jobs[job_id]["status"] = "error"
-            step5_jobs[job_id]["error"] = str(e)
-    
-    background_tasks.add_task(run_retry)
+    await _enqueue_job(
+        db,
+        STEP5_RETRY_JOB,
+        {"tenant_ids": [t.id for t in failed_tenants], "state": step5_jobs[job_id]},
+        key=job_id,
+    )
     
     return {
         "success": True,
@@ -3870,15 +3951,134 @@ async def retry_failed_tenants(
     }
 
 
+@job_handler(STEP5_RETRY_JOB)
+async def _run_step5_retry_job(ctx: JobContext):
+    """Job queue entry point for the Step 5 retry of failed tenants.
+
+    Tenants whose DKIM was enabled before a restart are not run again.
+    """
+    job_id = ctx.key
+    _track_step5_job(ctx, job_id)
+    tenant_ids = [UUID(tid) for tid in ctx.payload["tenant_ids"]]
+    try:
+        async with async_session_factory() as bg_db:
+            done = set((await bg_db.execute(
+                select(Tenant.id).where(Tenant.id.in_(tenant_ids), Tenant.dkim_enabled == True)
+            )).scalars().all())
+            for i, tenant_id in enumerate(tenant_ids):
+                if tenant_id not in done:
+                    result = await run_step5_for_tenant(bg_db, tenant_id)
+                    if result.success:
+                        step5_jobs[job_id]["successful"] += 1
+                    else:
+                        step5_jobs[job_id]["failed"] += 1
+                step5_jobs[job_id]["completed"] = i + 1
+            
+            step5_jobs[job_id]["status"] = "completed"
+            step5_jobs[job_id]["completed_at"] = datetime.utcnow().isoformat()
+            
+    except Exception as e:
+        step5_jobs[job_id]["status"] = "error"
+        step5_jobs[job_id]["error"] = str(e)
+
+
 # =============================================================================
 # STEP 6: MAILBOX CREATION ENDPOINTS
 # =============================================================================
 
 
+# Step 6/7 runs are jobs in the durable job queue, so they survive a restart of the
+# API and can run in a separate worker process (python -m app.worker)
+STEP6_BATCH_JOB = "step6_batch"
+STEP6_TENANT_JOB = "step6_tenant"
+STEP7_BATCH_JOB = "step7_batch"
+
+
+async def _enqueue_job(
+    db: AsyncSession, kind: str, payload: dict, key: Optional[str] = None, secret_keys: tuple = ()
+):
+    """Queue a job, commit, and let this process's runner (if any) claim it right away."""
+    job = await job_queue.enqueue(db, kind, payload, key=key, secret_keys=secret_keys)
+    await db.commit()
+    job_queue.wake_runner()
+    return job
+
+
+async def _latest_job_progress(db: AsyncSession, kind: str, key: str) -> Optional[dict]:
+    """Last progress reported by the newest job of kind/key, e.g. one run by a worker process."""
+    job = await job_queue.get_latest(db, kind, key)
+    return job.progress if job else None
+
+
+async def _step6_live_progress(db: AsyncSession, batch_id: UUID) -> dict:
+    """Per-tenant Step 6 progress: this process's runs, over the last one a worker reported."""
+    progress = {}
+    job = await job_queue.get_active(db, STEP6_BATCH_JOB, str(batch_id))
+    if job and job.progress:
+        progress.update(job.progress.get("tenants", {}))
+    progress.update(get_azure_step6_all_progress())
+    return progress
+
+
+async def _ensure_step6_idle(db: AsyncSession, batch_id: UUID) -> None:
+    """409 if a Step 6 run for the batch is still queued or running (in any process)."""
+    if await job_queue.get_active(db, STEP6_BATCH_JOB, str(batch_id)):
+        raise HTTPException(409, "Step 6 is already running for this batch")
+
+
+async def _ensure_step7_idle(db: AsyncSession, batch_id: UUID) -> None:
+    """409 if a Step 7 run for the batch is still queued or running (in any process)."""
+    if await job_queue.get_active(db, STEP7_BATCH_JOB, str(batch_id)):
+        raise HTTPException(409, "Step 7 is already running for this batch")
+
+
+@job_handler(STEP6_BATCH_JOB)
+async def _run_step6_batch_job(ctx: JobContext):
+    """Job queue entry point for run_azure_step6_for_batch.
+
+    Domains finished before a restart are step6_complete and not picked up again.
+    """
+    batch_id = UUID(ctx.payload["batch_id"])
+    async with async_session_factory() as db:
+        result = await db.execute(select(Tenant.id).where(Tenant.batch_id == batch_id))
+        tenant_ids = {str(tid) for tid in result.scalars().all()}
+
+    # Live per-tenant progress, for the automation-status endpoint of other processes
+    ctx.progress = lambda: {
+        "tenants": {tid: p for tid, p in get_azure_step6_all_progress().items() if tid in tenant_ids}
+    }
+    await run_azure_step6_for_batch(batch_id, ctx.payload["display_name"])
+
+
+@job_handler(STEP6_TENANT_JOB)
+async def _run_step6_tenant_job(ctx: JobContext):
+    """Job queue entry point for run_azure_step6_for_tenant."""
+    tenant_id = ctx.payload["tenant_id"]
+    ctx.progress = lambda: {"tenants": {tenant_id: get_azure_step6_progress(tenant_id)}}
+    await run_azure_step6_for_tenant(UUID(tenant_id))
+
+
+@job_handler(STEP7_BATCH_JOB)
+async def _run_step7_batch_job(ctx: JobContext):
+    """Job queue entry point for _run_step7_batch."""
+    batch_id = UUID(ctx.payload["batch_id"])
+    tenant_ids = [UUID(tid) for tid in ctx.payload["tenant_ids"]]
+    if ctx.resumed:
+        # Tenants completed before the restart are not run again
+        async with async_session_factory() as db:
+            result = await db.execute(
+                select(Tenant.id).where(Tenant.id.in_(tenant_ids), Tenant.step7_complete == True)
+            )
+            done = set(result.scalars().all())
+        tenant_ids = [tid for tid in tenant_ids if tid not in done]
+        logger.info(f"Resuming Step 7 for batch {batch_id}: {len(tenant_ids)} tenant(s) left")
+    await _run_step7_batch(batch_id, tenant_ids)
+
+
 @router.get("/batches/{batch_id}/step6/status")
 async def get_step6_status(
     batch_id: UUID,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Get Step 6 status for all tenants in batch."""
     try:
@@ -3896,16 +4096,22 @@ async def get_step6_status(
         )
         tenants = result.scalars().all()
 
+        # Mailbox counts for every tenant of the batch in one grouped query
+        mailbox_counts = dict((await db.execute(
+            select(Mailbox.tenant_id, func.count(Mailbox.id))
+            .join(Tenant, Tenant.id == Mailbox.tenant_id)
+            .where(Tenant.batch_id == batch_id)
+            .group_by(Mailbox.tenant_id)
+        )).all())
+
+        all_progress = await _step6_live_progress(db, batch_id)
+
         tenant_statuses = []
         for tenant in tenants:
-            # Count mailboxes for this tenant
-            mailbox_result = await db.execute(
-                select(func.count(Mailbox.id)).where(Mailbox.tenant_id == tenant.id)
-            )
-            mailbox_count = mailbox_result.scalar() or 0
+            mailbox_count = mailbox_counts.get(tenant.id, 0)
 
             # Get live progress if available
-            live_progress = get_azure_step6_progress(str(tenant.id))
+            live_progress = all_progress.get(str(tenant.id), {})
 
             tenant_statuses.append(
                 {
@@ -3963,7 +4169,6 @@ async def get_step6_status(
 async def start_step6_automation(
     batch_id: UUID,
     request: dict,
-    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
 ):
     """Start Step 6 automation for a batch."""
@@ -3981,6 +4186,7 @@ async def start_step6_automation(
     batch = batch_result.scalar_one_or_none()
     if not batch:
         raise HTTPException(404, "Batch not found")
+    await _ensure_step6_idle(db, batch_id)
 
     # Check if there are eligible tenants
     tenant_result = await db.execute(
@@ -3997,8 +4203,8 @@ async def start_step6_automation(
             400, "No eligible tenants for Step 6 (need Step 5 complete, Step 6 not complete)"
         )
 
-    # Start Azure Automation in background
-    background_tasks.add_task(run_azure_step6_for_batch, batch_id, display_name)
+    # Queue the Azure Automation run (this process's runner or a worker picks it up)
+    await _enqueue_job(db, STEP6_BATCH_JOB, {"batch_id": batch_id, "display_name": display_name}, key=str(batch_id))
 
     return {
         "success": True,
@@ -4010,7 +4216,7 @@ async def start_step6_automation(
 @router.get("/batches/{batch_id}/step6/automation-status")
 async def get_step6_automation_status(
     batch_id: UUID,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Get real-time automation status for Step 6."""
 
@@ -4021,7 +4227,7 @@ async def get_step6_automation_status(
     tenants = result.scalars().all()
 
     # Get live progress
-    all_progress = get_azure_step6_all_progress()
+    all_progress = await _step6_live_progress(db, batch_id)
 
     statuses = []
     for tenant in tenants:
@@ -4055,53 +4261,27 @@ async def get_step6_automation_status(
 @router.get("/batches/{batch_id}/step6/export-csv")
 async def export_mailboxes_csv(
     batch_id: UUID,
-    db: AsyncSession = Depends(get_db),
+    gzip: bool = False,
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Export all mailboxes as CSV (DisplayName,EmailAddress,Password)."""
-    from fastapi.responses import StreamingResponse
-    import csv
-    import io
-
-    # Get batch for display name
-    batch_result = await db.execute(
-        select(SetupBatch).where(SetupBatch.id == batch_id)
-    )
-    batch = batch_result.scalar_one_or_none()
+    batch = await db.get(SetupBatch, batch_id)
     if not batch:
         raise HTTPException(404, "Batch not found")
 
-    display_name = f"{batch.persona_first_name or ''} {batch.persona_last_name or ''}".strip()
-
-    # Get ALL mailboxes for the batch, sorted by domain then email
-    result = await db.execute(
-        select(Mailbox).where(Mailbox.batch_id == batch_id)
+    # ALL mailboxes for the batch, sorted by domain then email, streamed
+    query = (
+        select(Mailbox.display_name, Mailbox.email, Mailbox.password)
+        .where(Mailbox.batch_id == batch_id)
+        .order_by(email_domain(Mailbox.email), Mailbox.email)
     )
-    mailboxes = list(result.scalars().all())
-    mailboxes.sort(key=lambda mb: (mb.email.split('@')[1] if '@' in mb.email else '', mb.email))
-
-    # Build CSV
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(["DisplayName", "EmailAddress", "Password"])
-
-    for mailbox in mailboxes:
-        writer.writerow(
-            [
-                mailbox.display_name,
-                mailbox.email,
-                mailbox.password,
-            ]
-        )
-
-    output.seek(0)
-
-    return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv",
-        headers={
-            "Content-Disposition": f"attachment; filename=mailboxes_batch_{batch_id}.csv"
-        },
+    rows = stream_csv(
+        query,
+        ["DisplayName", "EmailAddress", "Password"],
+        lambda mb: [mb.display_name, mb.email, mb.password],
+        compress=gzip,
     )
+    return csv_response(rows, f"mailboxes_batch_{batch_id}.csv", compress=gzip)
 
 
 # =============================================================================
@@ -4346,7 +4526,6 @@ async def clear_custom_mailbox_map(
 async def retry_step6_for_tenant(
     tenant_id: UUID,
     request: dict,
-    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
 ):
     """Retry Step 6 for a single tenant."""
@@ -4369,8 +4548,8 @@ async def retry_step6_for_tenant(
     tenant.step6_error = None
     await db.commit()
 
-    # Run in background
-    background_tasks.add_task(run_azure_step6_for_tenant, tenant.id)
+    # Queue the run
+    await _enqueue_job(db, STEP6_TENANT_JOB, {"tenant_id": tenant.id}, key=str(tenant.id))
 
     return {
         "success": True,
@@ -4453,7 +4632,6 @@ async def force_complete_step6_for_tenant(
 async def rerun_step6_automation(
     batch_id: UUID,
     request: dict,
-    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
 ):
     """Rerun Step 6 automation for remaining/failed tenants.
@@ -4479,6 +4657,7 @@ async def rerun_step6_automation(
     batch = batch_result.scalar_one_or_none()
     if not batch:
         raise HTTPException(404, "Batch not found")
+    await _ensure_step6_idle(db, batch_id)
     
     # Find all tenants that need processing:
     # 1. Step 5 complete (domain_verified + dkim_enabled OR step5_complete flag)
@@ -4528,8 +4707,8 @@ async def rerun_step6_automation(
     
     logger.info(f"Rerunning Step 6 for batch {batch_id}: {len(eligible_tenants)} eligible tenants")
     
-    # Start Azure Automation in background
-    background_tasks.add_task(run_azure_step6_for_batch, batch_id, display_name)
+    # Queue the Azure Automation run
+    await _enqueue_job(db, STEP6_BATCH_JOB, {"batch_id": batch_id, "display_name": display_name}, key=str(batch_id))
     
     return {
         "success": True,
@@ -4544,7 +4723,6 @@ async def rerun_step6_automation(
 async def retry_failed_step6_tenants(
     batch_id: UUID,
     request: dict,
-    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
 ):
     """Retry Step 6 for all failed tenants in a batch.
@@ -4565,6 +4743,7 @@ async def retry_failed_step6_tenants(
     batch = batch_result.scalar_one_or_none()
     if not batch:
         raise HTTPException(404, "Batch not found")
+    await _ensure_step6_idle(db, batch_id)
     
     # Find all tenants with errors
     tenant_result = await db.execute(
@@ -4593,8 +4772,8 @@ async def retry_failed_step6_tenants(
     
     logger.info(f"Retrying Step 6 for {len(failed_tenants)} failed tenants in batch {batch_id}")
     
-    # Start Azure Automation in background
-    background_tasks.add_task(run_azure_step6_for_batch, batch_id, display_name)
+    # Queue the Azure Automation run
+    await _enqueue_job(db, STEP6_BATCH_JOB, {"batch_id": batch_id, "display_name": display_name}, key=str(batch_id))
     
     return {
         "success": True,
@@ -4609,7 +4788,6 @@ async def retry_failed_step6_tenants(
 async def resume_step6_processing(
     batch_id: UUID,
     request: dict,
-    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
 ):
     """Resume Step 6 processing for pending tenants.
@@ -4634,6 +4812,7 @@ async def resume_step6_processing(
     batch = batch_result.scalar_one_or_none()
     if not batch:
         raise HTTPException(404, "Batch not found")
+    await _ensure_step6_idle(db, batch_id)
     
     # Find all eligible tenants (step5 complete, step6 not complete)
     tenant_result = await db.execute(
@@ -4662,8 +4841,8 @@ async def resume_step6_processing(
     
     logger.info(f"Resuming Step 6 for batch {batch_id}: Reset {len(eligible_tenants)} tenants")
     
-    # Start automation immediately
-    background_tasks.add_task(run_azure_step6_for_batch, batch_id, display_name)
+    # Queue the automation run
+    await _enqueue_job(db, STEP6_BATCH_JOB, {"batch_id": batch_id, "display_name": display_name}, key=str(batch_id))
     
     return {
         "success": True,
@@ -4854,6 +5033,7 @@ async def start_step7(
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
     sequencer_name = sequencer_config["name"]
+    await _ensure_step7_idle(db, batch_id)
 
     result = await db.execute(
         select(Tenant).where(
@@ -4881,10 +5061,9 @@ async def start_step7(
             "sequencer_app_name": sequencer_name,
         }
 
-    import asyncio
-    task = asyncio.create_task(_run_step7_batch(batch_id, [t.id for t in to_process]))
-    _background_tasks.add(task)
-    task.add_done_callback(_background_tasks.discard)
+    await _enqueue_job(
+        db, STEP7_BATCH_JOB, {"batch_id": batch_id, "tenant_ids": [t.id for t in to_process]}, key=str(batch_id)
+    )
 
     return {
         "success": True,
@@ -5073,7 +5252,7 @@ async def _run_step7_batch(
                             admin_password=admin_password,
                             totp_secret=totp_secret,
                         )
-                        sd_result = disabler.disable_for_tenant(creds)
+                        sd_result = await asyncio.to_thread(disabler.disable_for_tenant, creds)
                         if not sd_result.get("success"):
                             failed_stage = "security_defaults"
                             raise RuntimeError(sd_result.get("error") or "Security Defaults disable failed")
@@ -5242,7 +5421,7 @@ async def _run_step7_batch(
 @router.get("/batches/{batch_id}/step7/status")
 async def get_step7_status(
     batch_id: UUID,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Get Step 7 progress for all tenants in batch."""
     batch = await db.get(SetupBatch, batch_id)
@@ -5315,6 +5494,7 @@ async def retry_step7_failed(
     db: AsyncSession = Depends(get_db),
 ):
     """Retry Step 7 for tenants that failed."""
+    await _ensure_step7_idle(db, batch_id)
     result = await db.execute(
         select(Tenant).where(
             Tenant.batch_id == batch_id,
@@ -5335,10 +5515,7 @@ async def retry_step7_failed(
         tenant_ids.append(t.id)
     await db.commit()
 
-    import asyncio
-    task = asyncio.create_task(_run_step7_batch(batch_id, tenant_ids))
-    _background_tasks.add(task)
-    task.add_done_callback(_background_tasks.discard)
+    await _enqueue_job(db, STEP7_BATCH_JOB, {"batch_id": batch_id, "tenant_ids": tenant_ids}, key=str(batch_id))
 
     return {
         "success": True,
@@ -5352,6 +5529,7 @@ async def rerun_step7_all(
     db: AsyncSession = Depends(get_db),
 ):
     """Rerun Step 7 for all eligible tenants (resets completion + errors)."""
+    await _ensure_step7_idle(db, batch_id)
     result = await db.execute(
         select(Tenant).where(
             Tenant.batch_id == batch_id,
@@ -5377,10 +5555,7 @@ async def rerun_step7_all(
     await db.commit()
 
     tenant_ids = [t.id for t in eligible]
-    import asyncio
-    task = asyncio.create_task(_run_step7_batch(batch_id, tenant_ids))
-    _background_tasks.add(task)
-    task.add_done_callback(_background_tasks.discard)
+    await _enqueue_job(db, STEP7_BATCH_JOB, {"batch_id": batch_id, "tenant_ids": tenant_ids}, key=str(batch_id))
 
     return {
         "success": True,
@@ -5502,29 +5677,24 @@ async def force_complete_step7_for_all(
 
 
 @router.get("/batches/{batch_id}/step6/export-credentials")
-async def batch_export_credentials(batch_id: UUID, db: AsyncSession = Depends(get_db)):
+async def batch_export_credentials(batch_id: UUID, gzip: bool = False, db: AsyncSession = Depends(get_read_db)):
     """Export credentials for this batch."""
     batch = await db.get(SetupBatch, batch_id)
     if not batch:
         raise HTTPException(status_code=404, detail="Batch not found")
-    
-    result = await db.execute(select(Mailbox).where(Mailbox.batch_id == batch_id))
-    mailboxes = result.scalars().all()
-    
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(["DisplayName", "EmailAddress", "Password"])
-    
-    for mb in mailboxes:
-        writer.writerow([mb.display_name, mb.email, mb.password or "#Sendemails1"])  # Safety fallback
-    
-    output.seek(0)
-    
-    return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv",
-        headers={"Content-Disposition": f"attachment; filename={batch.name}_credentials.csv"}
+
+    query = (
+        select(Mailbox.display_name, Mailbox.email, Mailbox.password)
+        .where(Mailbox.batch_id == batch_id)
+        .order_by(email_domain(Mailbox.email), Mailbox.email)
     )
+    rows = stream_csv(
+        query,
+        ["DisplayName", "EmailAddress", "Password"],
+        lambda mb: [mb.display_name, mb.email, mb.password or "#Sendemails1"],  # Safety fallback
+        compress=gzip,
+    )
+    return csv_response(rows, f"{batch.name}_credentials.csv", compress=gzip)
 
 
 @router.get("/batches/{batch_id}/step6/script/create-mailboxes/{tenant_id}")
@@ -5579,54 +5749,27 @@ async def mark_mailboxes_created(batch_id: UUID, tenant_id: UUID, db: AsyncSessi
 # ============== LEGACY STATUS ENDPOINT (backward compatibility) ==============
 
 @router.get("/status", response_model=WizardStatus)
-async def get_wizard_status(db: AsyncSession = Depends(get_db)):
+async def get_wizard_status(db: AsyncSession = Depends(get_read_db)):
     """
     Get current wizard progress. Determines which step user is on based on data state.
     """
-    # Count domains
-    domains_total = (await db.execute(select(func.count(Domain.id)))).scalar() or 0
-    
-    zones_created = (await db.execute(
-        select(func.count(Domain.id)).where(Domain.cloudflare_zone_id.isnot(None))
-    )).scalar() or 0
-    
+    counts = await batch_counters.get_total_counters(db)
+
+    domains_total = counts["domains_total"]
+    zones_created = counts["domains_zone_created"]
     zones_pending = domains_total - zones_created
-    
-    ns_propagated = (await db.execute(
-        select(func.count(Domain.id)).where(Domain.status == DomainStatus.NS_PROPAGATED)
-    )).scalar() or 0
-    
+    ns_propagated = counts["domains_ns_propagated"]
     ns_pending = zones_created - ns_propagated
-    
-    redirects_configured = (await db.execute(
-        select(func.count(Domain.id)).where(Domain.redirect_configured == True)
-    )).scalar() or 0
-    
-    # Count tenants
-    tenants_total = (await db.execute(select(func.count(Tenant.id)))).scalar() or 0
-    
-    tenants_linked = (await db.execute(
-        select(func.count(Tenant.id)).where(Tenant.domain_id.isnot(None))
-    )).scalar() or 0
-    
-    tenants_m365_verified = (await db.execute(
-        select(func.count(Tenant.id)).where(Tenant.status == TenantStatus.DOMAIN_VERIFIED)
-    )).scalar() or 0
-    
-    tenants_dkim_enabled = (await db.execute(
-        select(func.count(Tenant.id)).where(Tenant.status == TenantStatus.DKIM_ENABLED)
-    )).scalar() or 0
-    
-    # Count mailboxes
-    mailboxes_total = (await db.execute(select(func.count(Mailbox.id)))).scalar() or 0
-    
-    mailboxes_pending = (await db.execute(
-        select(func.count(Mailbox.id)).where(Mailbox.status == MailboxStatus.PENDING)
-    )).scalar() or 0
-    
-    mailboxes_ready = (await db.execute(
-        select(func.count(Mailbox.id)).where(Mailbox.status == MailboxStatus.READY)
-    )).scalar() or 0
+    redirects_configured = counts["domains_redirect_configured"]
+
+    tenants_total = counts["tenants_total"]
+    tenants_linked = counts["tenants_linked"]
+    tenants_m365_verified = counts["tenants_domain_verified"]
+    tenants_dkim_enabled = counts["tenants_dkim_enabled"]
+
+    mailboxes_total = counts["mailboxes_total"]
+    mailboxes_pending = counts["mailboxes_pending"]
+    mailboxes_ready = counts["mailboxes_ready"]
     
     # Determine current step
     if domains_total == 0:
@@ -5768,39 +5911,36 @@ async def wizard_create_zones(db: AsyncSession = Depends(get_db)):
         failed_count = 0
         ns_groups = {}
         
-        for domain in domains:
-            try:
-                # Create zone
-                zone_result = await cloudflare_service.create_zone(domain.name)
+        # Zones are found (any account, via the zone index) or created concurrently;
+        # results come back in input order
+        domain_by_name = {d.name: d for d in domains}
+        zone_results = await cloudflare_service.bulk_create_zones(list(domain_by_name))
+        
+        for zone_result in zone_results:
+            domain = domain_by_name[zone_result['domain']]
+            
+            if zone_result['success'] and zone_result.get('zone_id'):
+                domain.cloudflare_zone_id = zone_result['zone_id']
+                domain.cloudflare_nameservers = zone_result['nameservers']
+                domain.cloudflare_zone_status = 'pending'
+                domain.status = DomainStatus.ZONE_CREATED
                 
-                if zone_result.get('zone_id'):
-                    domain.cloudflare_zone_id = zone_result['zone_id']
-                    domain.cloudflare_nameservers = zone_result['nameservers']
-                    domain.cloudflare_zone_status = 'pending'
-                    domain.status = DomainStatus.ZONE_CREATED
-                    
-                    # Create Phase 1 DNS (CNAME + DMARC)
-                    await cloudflare_service.create_phase1_dns(
-                        zone_result['zone_id'], 
-                        domain.name
-                    )
+                # Phase 1 DNS (CNAME + DMARC) is created with the zone; if it failed
+                # the flags stay unset so it is retried without recreating the zone
+                if zone_result.get('phase1_dns') is not None:
                     domain.phase1_cname_added = True
                     domain.phase1_dmarc_added = True
-                    
-                    success_count += 1
-                    
-                    # Group by nameservers
-                    ns_key = tuple(sorted(zone_result['nameservers']))
-                    if ns_key not in ns_groups:
-                        ns_groups[ns_key] = []
-                    ns_groups[ns_key].append(domain.name)
-                else:
-                    failed_count += 1
-                    domain.error_message = zone_result.get('error', 'Unknown error')
-            
-            except Exception as e:
+                
+                success_count += 1
+                
+                # Group by nameservers
+                ns_key = tuple(sorted(zone_result['nameservers']))
+                if ns_key not in ns_groups:
+                    ns_groups[ns_key] = []
+                ns_groups[ns_key].append(domain.name)
+            else:
                 failed_count += 1
-                domain.error_message = str(e)
+                domain.error_message = zone_result.get('error') or 'Unknown error'
         
         await db.commit()
         
@@ -5848,20 +5988,17 @@ async def wizard_check_propagation(db: AsyncSession = Depends(get_db)):
         propagated = 0
         pending = 0
         
-        for domain in domains:
-            if domain.cloudflare_nameservers:
-                is_propagated = await cloudflare_service.check_ns_propagation(
-                    domain.name,
-                    domain.cloudflare_nameservers
-                )
-                
-                if is_propagated:
-                    domain.status = DomainStatus.NS_PROPAGATED
-                    from datetime import datetime
-                    domain.ns_propagated_at = datetime.utcnow()
-                    propagated += 1
-                else:
-                    pending += 1
+        to_check = [d for d in domains if d.cloudflare_nameservers]
+        checks = await cloudflare_service.bulk_check_ns_propagation([
+            {"domain": d.name, "expected_ns": d.cloudflare_nameservers} for d in to_check
+        ])
+        for domain, check in zip(to_check, checks):
+            if check["propagated"]:
+                domain.status = DomainStatus.NS_PROPAGATED
+                domain.ns_propagated_at = datetime.utcnow()
+                propagated += 1
+            else:
+                pending += 1
         
         await db.commit()
         
@@ -6139,29 +6276,23 @@ async def wizard_create_mailboxes(db: AsyncSession = Depends(get_db)):
 
 
 @router.get("/step6/export-credentials")
-async def wizard_export_credentials(db: AsyncSession = Depends(get_db)):
+async def wizard_export_credentials(gzip: bool = False):
     """
     Step 6c: Export all mailbox credentials as CSV.
     
     Format: DisplayName,EmailAddress,Password
     """
-    result = await db.execute(select(Mailbox))
-    mailboxes = result.scalars().all()
-    
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(["DisplayName", "EmailAddress", "Password"])
-    
-    for mb in mailboxes:
-        writer.writerow([mb.display_name, mb.email, mb.password or "#Sendemails1"])  # Safety fallback
-    
-    output.seek(0)
-    
-    return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv",
-        headers={"Content-Disposition": "attachment; filename=mailbox_credentials.csv"}
+    query = (
+        select(Mailbox.display_name, Mailbox.email, Mailbox.password)
+        .order_by(email_domain(Mailbox.email), Mailbox.email)
+    )
+    rows = stream_csv(
+        query,
+        ["DisplayName", "EmailAddress", "Password"],
+        lambda mb: [mb.display_name, mb.email, mb.password or "#Sendemails1"],  # Safety fallback
+        compress=gzip,
     )
+    return csv_response(rows, "mailbox_credentials.csv", compress=gzip)
 
 
 # =============================================================================
@@ -6207,10 +6338,17 @@ class MultiUploadRequest(BaseModel):
     skip_uploaded: bool = True
 
 
+# Sequencer uploads are jobs in the durable job queue (see STEP6_BATCH_JOB);
+# their step8_jobs entry is the job's progress
+INSTANTLY_UPLOAD_JOB = "instantly_upload"
+INSTANTLY_MULTI_UPLOAD_JOB = "instantly_multi_upload"
+SMARTLEAD_UPLOAD_JOB = "smartlead_upload"
+
+
 @router.get("/batches/{batch_id}/step8/status")
 async def get_step8_status(
     batch_id: UUID,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Get Step 8 (Instantly Upload) status for batch.
     
@@ -6245,9 +6383,9 @@ async def get_step8_status(
     
     mailboxes_pending = mailboxes_total - mailboxes_uploaded - mailboxes_failed
     
-    # Get job status if running
+    # Get job status if running (here, or else as last reported by the job)
     job_id = str(batch_id)
-    job_status = step8_jobs.get(job_id, {})
+    job_status = step8_jobs.get(job_id) or await _latest_job_progress(db, INSTANTLY_UPLOAD_JOB, job_id)
     
     return {
         "batch_id": str(batch_id),
@@ -6267,7 +6405,6 @@ async def get_step8_status(
 async def start_step8_upload(
     batch_id: UUID,
     request: Step8StartRequest,
-    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
 ):
     """Start Step 8: Upload mailboxes to Instantly.ai.
@@ -6295,6 +6432,7 @@ async def start_step8_upload(
     # Handle saved account vs manual credentials
     instantly_email = None
     instantly_password = None
+    explicit_api_key = request.instantly_api_key
     
     if request.account_id:
         # Use saved account
@@ -6325,14 +6463,15 @@ async def start_step8_upload(
         instantly_email = request.instantly_email
         instantly_password = request.instantly_password
     
-    # Check if upload already in progress
+    # Check if upload already in progress (in this or any other process)
     job_id = str(batch_id)
-    if job_id in step8_jobs and step8_jobs[job_id].get("status") == "running":
+    active = await job_queue.get_active(db, INSTANTLY_UPLOAD_JOB, job_id)
+    if active:
         return {
             "success": False,
             "message": "Upload already in progress for this batch",
             "job_id": job_id,
-            "started_at": step8_jobs[job_id].get("started_at")
+            "started_at": (step8_jobs.get(job_id) or active.progress or {}).get("started_at")
         }
     
     # Count eligible mailboxes
@@ -6370,38 +6509,23 @@ async def start_step8_upload(
         "errors": []
     }
     
-    # Run in background
-    async def run_upload():
-        try:
-            from app.services.instantly_uploader import run_instantly_upload_for_batch
-            
-            summary = await run_instantly_upload_for_batch(
-                batch_id=batch_id,
-                instantly_email=instantly_email,
-                instantly_password=instantly_password,
-                instantly_api_key=request.instantly_api_key,  # For API verification
-                num_workers=request.num_workers,
-                skip_uploaded=request.skip_uploaded
-            )
-            
-            step8_jobs[job_id]["status"] = "completed"
-            step8_jobs[job_id]["uploaded"] = summary["uploaded"]
-            step8_jobs[job_id]["failed"] = summary["failed"]
-            step8_jobs[job_id]["skipped"] = summary.get("skipped", 0)
-            step8_jobs[job_id]["errors"] = summary.get("errors", [])
-            step8_jobs[job_id]["completed_at"] = datetime.utcnow().isoformat()
-            
-            logger.info(f"Step 8 upload completed for batch {batch_id}: {summary['uploaded']}/{summary['total']} uploaded")
-            
-        except Exception as e:
-            step8_jobs[job_id]["status"] = "failed"
-            step8_jobs[job_id]["error"] = str(e)
-            step8_jobs[job_id]["completed_at"] = datetime.utcnow().isoformat()
-            logger.error(f"Step 8 upload failed for batch {batch_id}: {e}")
-            import traceback
-            logger.error(traceback.format_exc())
-    
-    background_tasks.add_task(run_upload)
+    # Queue the upload; a saved account's credentials are looked up by the job, not stored in it
+    await _enqueue_job(
+        db,
+        INSTANTLY_UPLOAD_JOB,
+        {
+            "batch_id": batch_id,
+            "account_id": request.account_id,
+            "instantly_email": None if request.account_id else instantly_email,
+            "instantly_password": None if request.account_id else instantly_password,
+            "instantly_api_key": explicit_api_key,
+            "num_workers": request.num_workers,
+            "skip_uploaded": request.skip_uploaded,
+            "state": step8_jobs[job_id],
+        },
+        key=job_id,
+        secret_keys=("instantly_email", "instantly_password", "instantly_api_key"),
+    )
     
     logger.info(f"Step 8 upload started for batch {batch_id}: {eligible_count} mailboxes, {request.num_workers} workers")
     
@@ -6420,7 +6544,6 @@ async def start_step8_upload(
 async def retry_step8_failed(
     batch_id: UUID,
     request: Step8StartRequest,
-    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
 ):
     """Retry Step 8 upload for failed mailboxes only.
@@ -6457,7 +6580,64 @@ async def retry_step8_failed(
     
     # Use same start logic but with skip_uploaded=True to only process these
     request.skip_uploaded = True
-    return await start_step8_upload(batch_id, request, background_tasks, db)
+    return await start_step8_upload(batch_id, request, db)
+
+
+@job_handler(INSTANTLY_UPLOAD_JOB)
+async def _run_instantly_upload_job(ctx: JobContext):
+    """Job queue entry point for the Step 8 Instantly upload."""
+    from app.services.instantly_uploader import run_instantly_upload_for_batch
+
+    payload = ctx.payload
+    batch_id = UUID(payload["batch_id"])
+    job_id = str(batch_id)
+
+    if step8_jobs.get(job_id, {}).get("status") != "running":
+        # Queued by another process, or resumed after a restart
+        step8_jobs[job_id] = dict(payload["state"])
+    ctx.progress = lambda: step8_jobs.get(job_id)
+
+    try:
+        instantly_email = payload.get("instantly_email")
+        instantly_password = payload.get("instantly_password")
+        instantly_api_key = payload.get("instantly_api_key")
+        if payload.get("account_id"):
+            from app.models.instantly_account import InstantlyAccount
+
+            async with async_session_factory() as db:
+                account = await db.get(InstantlyAccount, UUID(payload["account_id"]))
+            if not account:
+                raise ValueError("Saved Instantly account no longer exists")
+            instantly_email = account.email
+            instantly_password = account.password
+            instantly_api_key = instantly_api_key or account.api_key
+
+        summary = await run_instantly_upload_for_batch(
+            batch_id=batch_id,
+            instantly_email=instantly_email,
+            instantly_password=instantly_password,
+            instantly_api_key=instantly_api_key,  # For API verification
+            num_workers=payload["num_workers"],
+            # A resumed run never re-uploads what the first attempt finished
+            skip_uploaded=payload["skip_uploaded"] or ctx.resumed,
+        )
+        
+        step8_jobs[job_id]["status"] = "completed"
+        step8_jobs[job_id]["uploaded"] = summary["uploaded"]
+        step8_jobs[job_id]["failed"] = summary["failed"]
+        step8_jobs[job_id]["skipped"] = summary.get("skipped", 0)
+        step8_jobs[job_id]["errors"] = summary.get("errors", [])
+        step8_jobs[job_id]["completed_at"] = datetime.utcnow().isoformat()
+        
+        logger.info(f"Step 8 upload completed for batch {batch_id}: {summary['uploaded']}/{summary['total']} uploaded")
+        
+    except Exception as e:
+        step8_jobs[job_id]["status"] = "failed"
+        step8_jobs[job_id]["error"] = str(e)
+        step8_jobs[job_id]["completed_at"] = datetime.utcnow().isoformat()
+        logger.error(f"Step 8 upload failed for batch {batch_id}: {e}")
+        import traceback
+        logger.error(traceback.format_exc())
 
 
 @router.get("/instantly/accounts")
@@ -6607,7 +6787,7 @@ async def delete_instantly_account(
 
 
 @router.get("/instantly/batches-for-upload")
-async def get_batches_for_upload(db: AsyncSession = Depends(get_db)):
+async def get_batches_for_upload(db: AsyncSession = Depends(get_read_db)):
     """Get list of batches with mailboxes available for Instantly upload.
     
     Used by the standalone /instantly-upload page to select batches.
@@ -6660,7 +6840,6 @@ async def get_batches_for_upload(db: AsyncSession = Depends(get_db)):
 @router.post("/instantly/upload-multiple")
 async def upload_multiple_batches(
     request: MultiUploadRequest,
-    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db)
 ):
     """Upload mailboxes from multiple batches to Instantly.ai.
@@ -6714,40 +6893,21 @@ async def upload_multiple_batches(
         "batch_results": []
     }
     
-    # Run in background
-    async def run_multi_upload():
-        try:
-            from app.services.instantly_uploader import run_instantly_upload_for_batch
-            
-            for batch_id in request.batch_ids:
-                step8_jobs[job_id]["current_batch"] = str(batch_id)
-                
-                summary = await run_instantly_upload_for_batch(
-                    batch_id=batch_id,
-                    instantly_email=request.instantly_email,
-                    instantly_password=request.instantly_password,
-                    instantly_api_key=request.instantly_api_key,
-                    num_workers=request.num_workers,
-                    skip_uploaded=request.skip_uploaded
-                )
-                
-                step8_jobs[job_id]["uploaded"] += summary["uploaded"]
-                step8_jobs[job_id]["failed"] += summary["failed"]
-                step8_jobs[job_id]["skipped"] += summary.get("skipped", 0)
-                step8_jobs[job_id]["batch_results"].append({
-                    "batch_id": str(batch_id),
-                    "summary": summary
-                })
-            
-            step8_jobs[job_id]["status"] = "completed"
-            step8_jobs[job_id]["completed_at"] = datetime.utcnow().isoformat()
-            
-        except Exception as e:
-            step8_jobs[job_id]["status"] = "failed"
-            step8_jobs[job_id]["error"] = str(e)
-            step8_jobs[job_id]["completed_at"] = datetime.utcnow().isoformat()
-    
-    background_tasks.add_task(run_multi_upload)
+    await _enqueue_job(
+        db,
+        INSTANTLY_MULTI_UPLOAD_JOB,
+        {
+            "batch_ids": request.batch_ids,
+            "instantly_email": request.instantly_email,
+            "instantly_password": request.instantly_password,
+            "instantly_api_key": request.instantly_api_key,
+            "num_workers": request.num_workers,
+            "skip_uploaded": request.skip_uploaded,
+            "state": step8_jobs[job_id],
+        },
+        key=job_id,
+        secret_keys=("instantly_email", "instantly_password", "instantly_api_key"),
+    )
     
     return {
         "success": True,
@@ -6758,10 +6918,63 @@ async def upload_multiple_batches(
     }
 
 
+@job_handler(INSTANTLY_MULTI_UPLOAD_JOB)
+async def _run_instantly_multi_upload_job(ctx: JobContext):
+    """Job queue entry point for the multi-batch Instantly upload."""
+    from app.services.instantly_uploader import run_instantly_upload_for_batch
+    
+    payload = ctx.payload
+    job_id = ctx.key
+    if step8_jobs.get(job_id, {}).get("status") != "running":
+        # Queued by another process, or resumed after a restart
+        step8_jobs[job_id] = dict(payload["state"])
+    ctx.progress = lambda: step8_jobs.get(job_id)
+    
+    try:
+        for batch_id in payload["batch_ids"]:
+            step8_jobs[job_id]["current_batch"] = batch_id
+            
+            summary = await run_instantly_upload_for_batch(
+                batch_id=UUID(batch_id),
+                instantly_email=payload["instantly_email"],
+                instantly_password=payload["instantly_password"],
+                instantly_api_key=payload["instantly_api_key"],
+                num_workers=payload["num_workers"],
+                # A resumed run never re-uploads what the first attempt finished
+                skip_uploaded=payload["skip_uploaded"] or ctx.resumed,
+            )
+            
+            step8_jobs[job_id]["uploaded"] += summary["uploaded"]
+            step8_jobs[job_id]["failed"] += summary["failed"]
+            step8_jobs[job_id]["skipped"] += summary.get("skipped", 0)
+            step8_jobs[job_id]["batch_results"].append({
+                "batch_id": batch_id,
+                "summary": summary
+            })
+        
+        step8_jobs[job_id]["status"] = "completed"
+        step8_jobs[job_id]["completed_at"] = datetime.utcnow().isoformat()
+        
+    except Exception as e:
+        step8_jobs[job_id]["status"] = "failed"
+        step8_jobs[job_id]["error"] = str(e)
+        step8_jobs[job_id]["completed_at"] = datetime.utcnow().isoformat()
+
+
 @router.get("/instantly/upload-status/{job_id}")
-async def get_upload_status(job_id: str):
+async def get_upload_status(job_id: str, db: AsyncSession = Depends(get_read_db)):
     """Get status of an Instantly upload job (single or multi-batch)."""
     if job_id not in step8_jobs:
+        # Uploads may be running in another process
+        if job_id.startswith("smartlead_"):
+            kind = SMARTLEAD_UPLOAD_JOB
+        elif job_id.startswith("multi_"):
+            kind = INSTANTLY_MULTI_UPLOAD_JOB
+        else:
+            kind = INSTANTLY_UPLOAD_JOB
+        progress = await _latest_job_progress(db, kind, job_id)
+        if progress:
+            return progress
         return {
             "status": "not_found",
             "message": "Upload job not found"
@@ -6791,7 +7004,7 @@ class SmartleadStartRequest(BaseModel):
 @router.get("/batches/{batch_id}/step8/smartlead/status")
 async def get_step8_smartlead_status(
     batch_id: UUID,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Get Step 8 (Smartlead Upload) status for batch."""
     batch = await db.get(SetupBatch, batch_id)
@@ -6820,9 +7033,9 @@ async def get_step8_smartlead_status(
     
     mailboxes_pending = mailboxes_total - mailboxes_uploaded - mailboxes_failed
     
-    # Get job status if running
+    # Get job status if running (here, or else as last reported by the job)
     job_id = f"smartlead_{batch_id}"
-    job_status = step8_jobs.get(job_id, {})
+    job_status = step8_jobs.get(job_id) or await _latest_job_progress(db, SMARTLEAD_UPLOAD_JOB, job_id)
     
     return {
         "batch_id": str(batch_id),
@@ -6842,7 +7055,6 @@ async def get_step8_smartlead_status(
 async def start_step8_smartlead_upload(
     batch_id: UUID,
     request: SmartleadStartRequest,
-    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
 ):
     """Start Step 8: Upload mailboxes to Smartlead via OAuth."""
@@ -6854,14 +7066,15 @@ async def start_step8_smartlead_upload(
     if not batch:
         raise HTTPException(404, "Batch not found")
     
-    # Check if upload already in progress
+    # Check if upload already in progress (in this or any other process)
     job_id = f"smartlead_{batch_id}"
-    if job_id in step8_jobs and step8_jobs[job_id].get("status") == "running":
+    active = await job_queue.get_active(db, SMARTLEAD_UPLOAD_JOB, job_id)
+    if active:
         return {
             "success": False,
             "message": "Smartlead upload already in progress for this batch",
             "job_id": job_id,
-            "started_at": step8_jobs[job_id].get("started_at")
+            "started_at": (step8_jobs.get(job_id) or active.progress or {}).get("started_at")
         }
     
     # Count eligible mailboxes
@@ -6898,50 +7111,32 @@ async def start_step8_smartlead_upload(
         "errors": []
     }
     
-    # Run in background
-    async def run_upload():
-        try:
-            from app.services.smartlead import run_smartlead_upload_for_batch
-            
-            summary = await run_smartlead_upload_for_batch(
-                batch_id=str(batch_id),
-                api_key=request.api_key,
-                oauth_url=request.oauth_url,
-                num_workers=request.num_workers,
-                skip_uploaded=request.skip_uploaded,
-                configure_settings=request.configure_settings,
-                sending_settings={
-                    "max_per_day": request.max_email_per_day,
-                    "wait_mins": request.time_to_wait_in_mins,
-                    "tracking_url": ""
-                },
-                warmup_settings={
-                    "per_day": request.total_warmup_per_day,
-                    "rampup": request.daily_rampup,
-                    "reply_rate": request.reply_rate_percentage
-                }
-            )
-            
-            step8_jobs[job_id]["status"] = "completed"
-            step8_jobs[job_id]["uploaded"] = summary["uploaded"]
-            step8_jobs[job_id]["failed"] = summary["failed"]
-            step8_jobs[job_id]["skipped"] = summary.get("skipped", 0)
-            step8_jobs[job_id]["settings_configured"] = summary.get("settings_configured", 0)
-            step8_jobs[job_id]["warmup_configured"] = summary.get("warmup_configured", 0)
-            step8_jobs[job_id]["errors"] = summary.get("errors", [])
-            step8_jobs[job_id]["completed_at"] = datetime.utcnow().isoformat()
-            
-            logger.info(f"Smartlead Step 8 upload completed for batch {batch_id}: {summary['uploaded']}/{summary['total']} uploaded")
-            
-        except Exception as e:
-            step8_jobs[job_id]["status"] = "failed"
-            step8_jobs[job_id]["error"] = str(e)
-            step8_jobs[job_id]["completed_at"] = datetime.utcnow().isoformat()
-            logger.error(f"Smartlead Step 8 upload failed for batch {batch_id}: {e}")
-            import traceback
-            logger.error(traceback.format_exc())
-    
-    background_tasks.add_task(run_upload)
+    # Queue the upload
+    await _enqueue_job(
+        db,
+        SMARTLEAD_UPLOAD_JOB,
+        {
+            "batch_id": batch_id,
+            "api_key": request.api_key,
+            "oauth_url": request.oauth_url,
+            "num_workers": request.num_workers,
+            "skip_uploaded": request.skip_uploaded,
+            "configure_settings": request.configure_settings,
+            "sending_settings": {
+                "max_per_day": request.max_email_per_day,
+                "wait_mins": request.time_to_wait_in_mins,
+                "tracking_url": ""
+            },
+            "warmup_settings": {
+                "per_day": request.total_warmup_per_day,
+                "rampup": request.daily_rampup,
+                "reply_rate": request.reply_rate_percentage
+            },
+            "state": step8_jobs[job_id],
+        },
+        key=job_id,
+        secret_keys=("api_key", "oauth_url"),
+    )
     
     logger.info(f"Smartlead Step 8 upload started for batch {batch_id}: {eligible_count} mailboxes, {request.num_workers} workers")
     
@@ -6960,7 +7155,6 @@ async def start_step8_smartlead_upload(
 async def retry_step8_smartlead_failed(
     batch_id: UUID,
     request: SmartleadStartRequest,
-    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
 ):
     """Retry Smartlead Step 8 upload for failed mailboxes only."""
@@ -6994,19 +7188,79 @@ async def retry_step8_smartlead_failed(
     
     # Use same start logic but with skip_uploaded=True to only process these
     request.skip_uploaded = True
-    return await start_step8_smartlead_upload(batch_id, request, background_tasks, db)
+    return await start_step8_smartlead_upload(batch_id, request, db)
+
+
+@job_handler(SMARTLEAD_UPLOAD_JOB)
+async def _run_smartlead_upload_job(ctx: JobContext):
+    """Job queue entry point for the Step 8 Smartlead upload."""
+    from app.services.smartlead import run_smartlead_upload_for_batch
+
+    payload = ctx.payload
+    batch_id = payload["batch_id"]
+    job_id = f"smartlead_{batch_id}"
+
+    if step8_jobs.get(job_id, {}).get("status") != "running":
+        # Queued by another process, or resumed after a restart
+        step8_jobs[job_id] = dict(payload["state"])
+    ctx.progress = lambda: step8_jobs.get(job_id)
+
+    try:
+        summary = await run_smartlead_upload_for_batch(
+            batch_id=batch_id,
+            api_key=payload["api_key"],
+            oauth_url=payload["oauth_url"],
+            num_workers=payload["num_workers"],
+            # A resumed run never re-uploads what the first attempt finished
+            skip_uploaded=payload["skip_uploaded"] or ctx.resumed,
+            configure_settings=payload["configure_settings"],
+            sending_settings=payload["sending_settings"],
+            warmup_settings=payload["warmup_settings"],
+        )
+        
+        step8_jobs[job_id]["status"] = "completed"
+        step8_jobs[job_id]["uploaded"] = summary["uploaded"]
+        step8_jobs[job_id]["failed"] = summary["failed"]
+        step8_jobs[job_id]["skipped"] = summary.get("skipped", 0)
+        step8_jobs[job_id]["settings_configured"] = summary.get("settings_configured", 0)
+        step8_jobs[job_id]["warmup_configured"] = summary.get("warmup_configured", 0)
+        step8_jobs[job_id]["errors"] = summary.get("errors", [])
+        step8_jobs[job_id]["completed_at"] = datetime.utcnow().isoformat()
+        
+        logger.info(f"Smartlead Step 8 upload completed for batch {batch_id}: {summary['uploaded']}/{summary['total']} uploaded")
+        
+    except Exception as e:
+        step8_jobs[job_id]["status"] = "failed"
+        step8_jobs[job_id]["error"] = str(e)
+        step8_jobs[job_id]["completed_at"] = datetime.utcnow().isoformat()
+        logger.error(f"Smartlead Step 8 upload failed for batch {batch_id}: {e}")
+        import traceback
+        logger.error(traceback.format_exc())
 
 
 # =============================================================================
 # CSV-BASED SEQUENCER UPLOAD (Upload from CSV files, no batch required)
 # =============================================================================
 
+# Store CSV upload job progress; uploads are jobs in the durable job queue (see
+# STEP6_BATCH_JOB) whose csv_upload_jobs entry is the job's progress
 csv_upload_jobs = {}
+CSV_INSTANTLY_UPLOAD_JOB = "csv_instantly_upload"
+CSV_SMARTLEAD_UPLOAD_JOB = "csv_smartlead_upload"
+
+
+def _track_csv_upload_job(ctx: JobContext) -> str:
+    """Report csv_upload_jobs[job id] as the job's progress (restored from the payload if queued elsewhere)."""
+    job_id = ctx.key
+    if csv_upload_jobs.get(job_id, {}).get("status") != "running":
+        # Queued by another process, or resumed after a restart
+        csv_upload_jobs[job_id] = dict(ctx.payload["state"])
+    ctx.progress = lambda: csv_upload_jobs.get(job_id)
+    return job_id
 
 
 @router.post("/sequencer/csv-upload")
 async def csv_sequencer_upload(
-    background_tasks: BackgroundTasks,
     files: List[UploadFile] = File(..., description="One or more CSV files with email,password columns"),
     sequencer: str = Form("instantly", description="Sequencer: 'instantly' or 'smartlead'"),
     # Instantly fields
@@ -7167,223 +7421,44 @@ async def csv_sequencer_upload(
         "parse_errors": parse_errors,
     }
     
+    # Saved-account credentials are looked up by the job, not stored in it
     if sequencer == "instantly":
-        async def run_csv_instantly_upload():
-            try:
-                from app.services.instantly_uploader import InstantlyUploader, InstantlyAPI, process_mailbox_sync
-                from concurrent.futures import ThreadPoolExecutor, as_completed
-                import uuid
-                
-                # Check for API key from saved account for verification
-                api = None
-                if account_id:
-                    from app.models.instantly_account import InstantlyAccount
-                    async with async_session_factory() as sess:
-                        acct = await sess.get(InstantlyAccount, account_id)
-                        if acct and acct.api_key:
-                            api = InstantlyAPI(acct.api_key)
-                            if api.test_connection():
-                                existing = api.load_all_accounts()
-                                logger.info(f"[CSV Upload] Loaded {len(existing)} existing Instantly accounts")
-                            else:
-                                api = None
-                
-                # Pre-filter existing accounts if API available + skip_existing
-                mailbox_list = []
-                for mb in all_mailboxes:
-                    mb_id = str(uuid.uuid4())
-                    if skip_existing and api and api.account_exists(mb["email"]):
-                        csv_upload_jobs[job_id]["skipped"] += 1
-                        csv_upload_jobs[job_id]["results"].append({
-                            "email": mb["email"],
-                            "status": "skipped",
-                            "error": "Already exists in Instantly",
-                        })
-                        continue
-                    mailbox_list.append({"id": mb_id, "email": mb["email"], "password": mb["password"]})
-                
-                logger.info(
-                    f"[CSV Upload] Pre-filter complete: {len(mailbox_list)} to upload, "
-                    f"{csv_upload_jobs[job_id]['skipped']} skipped (existing)"
-                )
-                
-                if not mailbox_list:
-                    csv_upload_jobs[job_id]["status"] = "completed"
-                    csv_upload_jobs[job_id]["completed_at"] = datetime.utcnow().isoformat()
-                    return
-                
-                actual_workers = min(num_workers, len(mailbox_list))
-                
-                with ThreadPoolExecutor(max_workers=actual_workers) as executor:
-                    uploaders = []
-                    for i in range(actual_workers):
-                        upl = InstantlyUploader(
-                            instantly_email=instantly_email,
-                            instantly_password=instantly_password,
-                            api=api,
-                            worker_id=i,
-                        )
-                        if not upl.setup_driver():
-                            upl.cleanup()
-                            continue
-                        if not upl.login_to_instantly():
-                            upl.cleanup()
-                            continue
-                        uploaders.append(upl)
-                    
-                    if not uploaders:
-                        csv_upload_jobs[job_id]["status"] = "failed"
-                        csv_upload_jobs[job_id]["error"] = "All browser workers failed to start/login"
-                        csv_upload_jobs[job_id]["completed_at"] = datetime.utcnow().isoformat()
-                        return
-                    
-                    try:
-                        futures = {}
-                        for idx, mb_data in enumerate(mailbox_list):
-                            upl = uploaders[idx % len(uploaders)]
-                            fut = executor.submit(process_mailbox_sync, upl, mb_data)
-                            futures[fut] = mb_data
-                        
-                        for fut in as_completed(futures):
-                            result = fut.result()
-                            mb_data = futures[fut]
-                            csv_upload_jobs[job_id]["current_email"] = mb_data["email"]
-                            
-                            if result["success"]:
-                                csv_upload_jobs[job_id]["uploaded"] += 1
-                                csv_upload_jobs[job_id]["results"].append({
-                                    "email": mb_data["email"],
-                                    "status": "uploaded",
-                                    "error": None,
-                                })
-                            else:
-                                csv_upload_jobs[job_id]["failed"] += 1
-                                csv_upload_jobs[job_id]["errors"].append(f"{mb_data['email']}: {result['error']}")
-                                csv_upload_jobs[job_id]["results"].append({
-                                    "email": mb_data["email"],
-                                    "status": "failed",
-                                    "error": result["error"],
-                                })
-                    finally:
-                        for upl in uploaders:
-                            upl.cleanup()
-                
-                csv_upload_jobs[job_id]["status"] = "completed"
-                csv_upload_jobs[job_id]["completed_at"] = datetime.utcnow().isoformat()
-                csv_upload_jobs[job_id]["current_email"] = None
-                logger.info(f"[CSV Upload] Instantly upload complete: {csv_upload_jobs[job_id]['uploaded']} uploaded, {csv_upload_jobs[job_id]['failed']} failed")
-                
-            except Exception as e:
-                csv_upload_jobs[job_id]["status"] = "failed"
-                csv_upload_jobs[job_id]["error"] = str(e)
-                csv_upload_jobs[job_id]["completed_at"] = datetime.utcnow().isoformat()
-                logger.error(f"[CSV Upload] Instantly upload failed: {e}")
-                import traceback
-                logger.error(traceback.format_exc())
-        
-        background_tasks.add_task(run_csv_instantly_upload)
-    
+        await _enqueue_job(
+            db,
+            CSV_INSTANTLY_UPLOAD_JOB,
+            {
+                "mailboxes": all_mailboxes,
+                "account_id": account_id,
+                "instantly_email": None if account_id else instantly_email,
+                "instantly_password": None if account_id else instantly_password,
+                "num_workers": num_workers,
+                "skip_existing": skip_existing,
+                "state": csv_upload_jobs[job_id],
+            },
+            key=job_id,
+            secret_keys=("mailboxes", "instantly_email", "instantly_password"),
+        )
     else:  # smartlead
-        async def run_csv_smartlead_upload():
-            try:
-                from app.services.smartlead import SmartleadOAuthUploader, SmartleadAPI, process_smartlead_mailbox_sync
-                from concurrent.futures import ThreadPoolExecutor, as_completed
-                import uuid
-                
-                # Check existing accounts
-                api = SmartleadAPI(smartlead_api_key)
-                existing_emails = set()
-                try:
-                    existing_emails = await api.get_existing_emails()
-                    logger.info(f"[CSV Upload] Found {len(existing_emails)} existing Smartlead accounts")
-                except Exception as e:
-                    logger.warning(f"[CSV Upload] Could not fetch existing Smartlead accounts: {e}")
-                
-                # Filter out existing
-                mailbox_list = []
-                for mb in all_mailboxes:
-                    mb_id = str(uuid.uuid4())
-                    if skip_existing and mb["email"].lower() in existing_emails:
-                        csv_upload_jobs[job_id]["skipped"] += 1
-                        csv_upload_jobs[job_id]["results"].append({
-                            "email": mb["email"],
-                            "status": "skipped",
-                            "error": "Already exists in Smartlead",
-                        })
-                        continue
-                    mailbox_list.append({"id": mb_id, "email": mb["email"], "password": mb["password"]})
-                
-                if not mailbox_list:
-                    csv_upload_jobs[job_id]["status"] = "completed"
-                    csv_upload_jobs[job_id]["completed_at"] = datetime.utcnow().isoformat()
-                    await api.close()
-                    return
-                
-                actual_workers = min(num_workers, len(mailbox_list))
-                
-                with ThreadPoolExecutor(max_workers=actual_workers) as executor:
-                    uploaders = [SmartleadOAuthUploader(headless=True, worker_id=i) for i in range(actual_workers)]
-                    
-                    futures = {}
-                    for idx, mb_data in enumerate(mailbox_list):
-                        upl = uploaders[idx % len(uploaders)]
-                        fut = executor.submit(process_smartlead_mailbox_sync, upl, mb_data, smartlead_oauth_url)
-                        futures[fut] = mb_data
-                    
-                    for fut in as_completed(futures):
-                        result = fut.result()
-                        mb_data = futures[fut]
-                        csv_upload_jobs[job_id]["current_email"] = mb_data["email"]
-                        
-                        if result["success"]:
-                            csv_upload_jobs[job_id]["uploaded"] += 1
-                            csv_upload_jobs[job_id]["results"].append({
-                                "email": mb_data["email"],
-                                "status": "uploaded",
-                                "error": None,
-                            })
-                            
-                            # Configure settings if enabled
-                            if configure_settings:
-                                import asyncio
-                                await asyncio.sleep(3)
-                                account_api_id = await api.find_account_id(mb_data["email"])
-                                if account_api_id:
-                                    await api.update_sending_settings(
-                                        account_api_id,
-                                        max_per_day=max_email_per_day,
-                                        wait_mins=time_to_wait_in_mins,
-                                    )
-                                    await api.update_warmup_settings(
-                                        account_api_id,
-                                        per_day=total_warmup_per_day,
-                                        rampup=daily_rampup,
-                                        reply_rate=reply_rate_percentage,
-                                    )
-                        else:
-                            csv_upload_jobs[job_id]["failed"] += 1
-                            csv_upload_jobs[job_id]["errors"].append(f"{mb_data['email']}: {result['error']}")
-                            csv_upload_jobs[job_id]["results"].append({
-                                "email": mb_data["email"],
-                                "status": "failed",
-                                "error": result["error"],
-                            })
-                
-                await api.close()
-                csv_upload_jobs[job_id]["status"] = "completed"
-                csv_upload_jobs[job_id]["completed_at"] = datetime.utcnow().isoformat()
-                csv_upload_jobs[job_id]["current_email"] = None
-                logger.info(f"[CSV Upload] Smartlead upload complete: {csv_upload_jobs[job_id]['uploaded']} uploaded, {csv_upload_jobs[job_id]['failed']} failed")
-                
-            except Exception as e:
-                csv_upload_jobs[job_id]["status"] = "failed"
-                csv_upload_jobs[job_id]["error"] = str(e)
-                csv_upload_jobs[job_id]["completed_at"] = datetime.utcnow().isoformat()
-                logger.error(f"[CSV Upload] Smartlead upload failed: {e}")
-                import traceback
-                logger.error(traceback.format_exc())
-        
-        background_tasks.add_task(run_csv_smartlead_upload)
+        await _enqueue_job(
+            db,
+            CSV_SMARTLEAD_UPLOAD_JOB,
+            {
+                "mailboxes": all_mailboxes,
+                "smartlead_api_key": smartlead_api_key,
+                "smartlead_oauth_url": smartlead_oauth_url,
+                "configure_settings": configure_settings,
+                "max_email_per_day": max_email_per_day,
+                "time_to_wait_in_mins": time_to_wait_in_mins,
+                "total_warmup_per_day": total_warmup_per_day,
+                "daily_rampup": daily_rampup,
+                "reply_rate_percentage": reply_rate_percentage,
+                "num_workers": num_workers,
+                "skip_existing": skip_existing,
+                "state": csv_upload_jobs[job_id],
+            },
+            key=job_id,
+            secret_keys=("mailboxes", "smartlead_api_key", "smartlead_oauth_url"),
+        )
     
     logger.info(f"[CSV Upload] Started {sequencer} upload for {len(all_mailboxes)} mailboxes from {len(files)} CSV file(s)")
     
@@ -7397,12 +7472,261 @@ async def csv_sequencer_upload(
     }
 
 
+@job_handler(CSV_INSTANTLY_UPLOAD_JOB)
+async def _run_csv_instantly_upload_job(ctx: JobContext):
+    """Job queue entry point for the CSV-to-Instantly upload."""
+    job_id = _track_csv_upload_job(ctx)
+    payload = ctx.payload
+    all_mailboxes = payload["mailboxes"]
+    account_id = payload["account_id"]
+    instantly_email = payload["instantly_email"]
+    instantly_password = payload["instantly_password"]
+    num_workers = payload["num_workers"]
+    skip_existing = payload["skip_existing"]
+
+    try:
+        from app.services.instantly_uploader import InstantlyUploader, InstantlyAPI, process_mailbox_sync
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+        import uuid
+        
+        # Saved account: its credentials, and its API key for verification
+        api = None
+        if account_id:
+            from app.models.instantly_account import InstantlyAccount
+            async with async_session_factory() as sess:
+                acct = await sess.get(InstantlyAccount, account_id)
+            if not acct:
+                raise ValueError("Saved Instantly account no longer exists")
+            instantly_email = acct.email
+            instantly_password = acct.password
+            if acct.api_key:
+                api = InstantlyAPI(acct.api_key)
+                if api.test_connection():
+                    existing = api.load_all_accounts()
+                    logger.info(f"[CSV Upload] Loaded {len(existing)} existing Instantly accounts")
+                else:
+                    api = None
+        
+        # Pre-filter existing accounts if API available + skip_existing
+        mailbox_list = []
+        for mb in all_mailboxes:
+            mb_id = str(uuid.uuid4())
+            if skip_existing and api and api.account_exists(mb["email"]):
+                csv_upload_jobs[job_id]["skipped"] += 1
+                csv_upload_jobs[job_id]["results"].append({
+                    "email": mb["email"],
+                    "status": "skipped",
+                    "error": "Already exists in Instantly",
+                })
+                continue
+            mailbox_list.append({"id": mb_id, "email": mb["email"], "password": mb["password"]})
+        
+        logger.info(
+            f"[CSV Upload] Pre-filter complete: {len(mailbox_list)} to upload, "
+            f"{csv_upload_jobs[job_id]['skipped']} skipped (existing)"
+        )
+        
+        if not mailbox_list:
+            csv_upload_jobs[job_id]["status"] = "completed"
+            csv_upload_jobs[job_id]["completed_at"] = datetime.utcnow().isoformat()
+            return
+        
+        actual_workers = min(num_workers, len(mailbox_list))
+        
+        with ThreadPoolExecutor(max_workers=actual_workers) as executor:
+            uploaders = []
+            for i in range(actual_workers):
+                upl = InstantlyUploader(
+                    instantly_email=instantly_email,
+                    instantly_password=instantly_password,
+                    api=api,
+                    worker_id=i,
+                )
+                if not upl.setup_driver():
+                    upl.cleanup()
+                    continue
+                if not upl.login_to_instantly():
+                    upl.cleanup()
+                    continue
+                uploaders.append(upl)
+            
+            if not uploaders:
+                csv_upload_jobs[job_id]["status"] = "failed"
+                csv_upload_jobs[job_id]["error"] = "All browser workers failed to start/login"
+                csv_upload_jobs[job_id]["completed_at"] = datetime.utcnow().isoformat()
+                return
+            
+            try:
+                futures = {}
+                for idx, mb_data in enumerate(mailbox_list):
+                    upl = uploaders[idx % len(uploaders)]
+                    fut = executor.submit(process_mailbox_sync, upl, mb_data)
+                    futures[fut] = mb_data
+                
+                for fut in as_completed(futures):
+                    result = fut.result()
+                    mb_data = futures[fut]
+                    csv_upload_jobs[job_id]["current_email"] = mb_data["email"]
+                    
+                    if result["success"]:
+                        csv_upload_jobs[job_id]["uploaded"] += 1
+                        csv_upload_jobs[job_id]["results"].append({
+                            "email": mb_data["email"],
+                            "status": "uploaded",
+                            "error": None,
+                        })
+                    else:
+                        csv_upload_jobs[job_id]["failed"] += 1
+                        csv_upload_jobs[job_id]["errors"].append(f"{mb_data['email']}: {result['error']}")
+                        csv_upload_jobs[job_id]["results"].append({
+                            "email": mb_data["email"],
+                            "status": "failed",
+                            "error": result["error"],
+                        })
+            finally:
+                for upl in uploaders:
+                    upl.cleanup()
+        
+        csv_upload_jobs[job_id]["status"] = "completed"
+        csv_upload_jobs[job_id]["completed_at"] = datetime.utcnow().isoformat()
+        csv_upload_jobs[job_id]["current_email"] = None
+        logger.info(f"[CSV Upload] Instantly upload complete: {csv_upload_jobs[job_id]['uploaded']} uploaded, {csv_upload_jobs[job_id]['failed']} failed")
+        
+    except Exception as e:
+        csv_upload_jobs[job_id]["status"] = "failed"
+        csv_upload_jobs[job_id]["error"] = str(e)
+        csv_upload_jobs[job_id]["completed_at"] = datetime.utcnow().isoformat()
+        logger.error(f"[CSV Upload] Instantly upload failed: {e}")
+        import traceback
+        logger.error(traceback.format_exc())
+
+
+@job_handler(CSV_SMARTLEAD_UPLOAD_JOB)
+async def _run_csv_smartlead_upload_job(ctx: JobContext):
+    """Job queue entry point for the CSV-to-Smartlead upload."""
+    job_id = _track_csv_upload_job(ctx)
+    payload = ctx.payload
+    all_mailboxes = payload["mailboxes"]
+    smartlead_api_key = payload["smartlead_api_key"]
+    smartlead_oauth_url = payload["smartlead_oauth_url"]
+    configure_settings = payload["configure_settings"]
+    max_email_per_day = payload["max_email_per_day"]
+    time_to_wait_in_mins = payload["time_to_wait_in_mins"]
+    total_warmup_per_day = payload["total_warmup_per_day"]
+    daily_rampup = payload["daily_rampup"]
+    reply_rate_percentage = payload["reply_rate_percentage"]
+    num_workers = payload["num_workers"]
+    skip_existing = payload["skip_existing"]
+
+    try:
+        from app.services.smartlead import SmartleadOAuthUploader, SmartleadAPI, process_smartlead_mailbox_sync
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+        import uuid
+        
+        # Check existing accounts
+        api = SmartleadAPI(smartlead_api_key)
+        existing_emails = set()
+        try:
+            existing_emails = await api.get_existing_emails()
+            logger.info(f"[CSV Upload] Found {len(existing_emails)} existing Smartlead accounts")
+        except Exception as e:
+            logger.warning(f"[CSV Upload] Could not fetch existing Smartlead accounts: {e}")
+        
+        # Filter out existing
+        mailbox_list = []
+        for mb in all_mailboxes:
+            mb_id = str(uuid.uuid4())
+            if skip_existing and mb["email"].lower() in existing_emails:
+                csv_upload_jobs[job_id]["skipped"] += 1
+                csv_upload_jobs[job_id]["results"].append({
+                    "email": mb["email"],
+                    "status": "skipped",
+                    "error": "Already exists in Smartlead",
+                })
+                continue
+            mailbox_list.append({"id": mb_id, "email": mb["email"], "password": mb["password"]})
+        
+        if not mailbox_list:
+            csv_upload_jobs[job_id]["status"] = "completed"
+            csv_upload_jobs[job_id]["completed_at"] = datetime.utcnow().isoformat()
+            await api.close()
+            return
+        
+        actual_workers = min(num_workers, len(mailbox_list))
+        
+        with ThreadPoolExecutor(max_workers=actual_workers) as executor:
+            uploaders = [SmartleadOAuthUploader(headless=True, worker_id=i) for i in range(actual_workers)]
+            
+            futures = {}
+            for idx, mb_data in enumerate(mailbox_list):
+                upl = uploaders[idx % len(uploaders)]
+                fut = executor.submit(process_smartlead_mailbox_sync, upl, mb_data, smartlead_oauth_url)
+                futures[fut] = mb_data
+            
+            for fut in as_completed(futures):
+                result = fut.result()
+                mb_data = futures[fut]
+                csv_upload_jobs[job_id]["current_email"] = mb_data["email"]
+                
+                if result["success"]:
+                    csv_upload_jobs[job_id]["uploaded"] += 1
+                    csv_upload_jobs[job_id]["results"].append({
+                        "email": mb_data["email"],
+                        "status": "uploaded",
+                        "error": None,
+                    })
+                    
+                    # Configure settings if enabled
+                    if configure_settings:
+                        import asyncio
+                        await asyncio.sleep(3)
+                        account_api_id = await api.find_account_id(mb_data["email"])
+                        if account_api_id:
+                            await api.update_sending_settings(
+                                account_api_id,
+                                max_per_day=max_email_per_day,
+                                wait_mins=time_to_wait_in_mins,
+                            )
+                            await api.update_warmup_settings(
+                                account_api_id,
+                                per_day=total_warmup_per_day,
+                                rampup=daily_rampup,
+                                reply_rate=reply_rate_percentage,
+                            )
+                else:
+                    csv_upload_jobs[job_id]["failed"] += 1
+                    csv_upload_jobs[job_id]["errors"].append(f"{mb_data['email']}: {result['error']}")
+                    csv_upload_jobs[job_id]["results"].append({
+                        "email": mb_data["email"],
+                        "status": "failed",
+                        "error": result["error"],
+                    })
+        
+        await api.close()
+        csv_upload_jobs[job_id]["status"] = "completed"
+        csv_upload_jobs[job_id]["completed_at"] = datetime.utcnow().isoformat()
+        csv_upload_jobs[job_id]["current_email"] = None
+        logger.info(f"[CSV Upload] Smartlead upload complete: {csv_upload_jobs[job_id]['uploaded']} uploaded, {csv_upload_jobs[job_id]['failed']} failed")
+        
+    except Exception as e:
+        csv_upload_jobs[job_id]["status"] = "failed"
+        csv_upload_jobs[job_id]["error"] = str(e)
+        csv_upload_jobs[job_id]["completed_at"] = datetime.utcnow().isoformat()
+        logger.error(f"[CSV Upload] Smartlead upload failed: {e}")
+        import traceback
+        logger.error(traceback.format_exc())
+
+
 @router.get("/sequencer/csv-upload/{job_id}/status")
-async def get_csv_upload_status(job_id: str):
-    """Get status of a CSV-based sequencer upload job."""
-    if job_id not in csv_upload_jobs:
+async def get_csv_upload_status(job_id: str, db: AsyncSession = Depends(get_read_db)):
+    """Get status of a CSV-based sequencer upload job (here, or as last reported by its job)."""
+    if job_id in csv_upload_jobs:
+        return csv_upload_jobs[job_id]
+    kind = CSV_SMARTLEAD_UPLOAD_JOB if job_id.startswith("csv_smartlead_") else CSV_INSTANTLY_UPLOAD_JOB
+    progress = await _latest_job_progress(db, kind, job_id)
+    if not progress:
         raise HTTPException(404, "Upload job not found")
-    return csv_upload_jobs[job_id]
+    return progress
 
 
 @router.get("/sequencer/csv-upload-jobs")
@@ -8,6 +8,24 @@ class Settings(BaseSettings):
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", case_sensitive=False)
 
     database_url: str
+    # Optional read replica (e.g. a Neon read-only endpoint) for status/list/export GETs;
+    # unset = a separate read-only pool on database_url
+    database_read_url: str | None = None
+    read_pool_size: int = 10
+    read_max_overflow: int = 10
+    read_pool_timeout: float = 10.0
+
+    # Main pool size; tune from GET /internal/metrics/pools
+    db_pool_size: int = 30
+    db_max_overflow: int = 50
+    # Optional: raise/lower the main pool's max_overflow from observed checkout waits
+    pool_autotune_enabled: bool = False
+    pool_autotune_interval_seconds: float = 30.0
+    pool_autotune_target_wait_seconds: float = 0.1
+    pool_autotune_step: int = 10
+    pool_autotune_max_overflow: int = 150
+    # If set, /internal/* requires header X-Internal-Token with this value
+    internal_metrics_token: str | None = None
     secret_key: str
     debug: bool = False
 
@@ -20,6 +38,71 @@ class Settings(BaseSettings):
     cloudflare_email_2: str | None = None
     cloudflare_account_id_2: str | None = None
 
+    # Cloudflare HTTP client pool (one pooled keep-alive client per account)
+    # HTTP/2 is only used when the optional "h2" package is installed
+    cloudflare_http2: bool = True
+    cloudflare_max_connections: int = 20
+    cloudflare_max_keepalive_connections: int = 10
+    cloudflare_keepalive_expiry_seconds: float = 30.0
+    cloudflare_timeout_seconds: float = 30.0
+
+    # Cloudflare API budget per user: 1200 requests / 5 minutes
+    # burst = requests allowed back-to-back before pacing kicks in
+    cloudflare_rate_limit_requests: int = 1200
+    cloudflare_rate_limit_window_seconds: float = 300.0
+    cloudflare_rate_limit_burst: int = 50
+
+    # How many domains bulk zone operations work on at once (1 = one at a time)
+    cloudflare_bulk_max_workers: int = 10
+
+    # Cross-account zone index: full /zones re-list once it is older than this
+    cloudflare_zone_index_ttl_seconds: int = 900
+    cloudflare_zone_page_size: int = 50
+
+    # Per-zone DNS record snapshot lifetime (our own writes keep it current in between)
+    cloudflare_dns_snapshot_ttl_seconds: float = 60.0
+
+    # NS propagation checks (dnspython async resolver)
+    ns_check_max_concurrency: int = 100
+    ns_check_timeout_seconds: float = 5.0
+    ns_check_lifetime_seconds: float = 10.0
+    # Comma-separated resolver IPs to spread lookups over (empty = system resolvers)
+    ns_check_nameservers: str = ""
+    # "authoritative" asks the parent zone's servers for the delegation; "recursive" uses the resolvers above
+    ns_check_mode: str = "authoritative"
+    ns_check_parent_servers: int = 3
+    ns_check_parent_cache_ttl_seconds: float = 3600.0
+
+    # Pipeline step 3 schedule: first re-check after base seconds, doubling per attempt up to max, +/- jitter
+    ns_schedule_base_seconds: float = 15.0
+    ns_schedule_max_seconds: float = 1800.0
+    ns_schedule_jitter: float = 0.2
+
+    # Buffered bulk status writes (sequencer uploads): flush every N rows or T seconds
+    bulk_write_max_rows: int = 200
+    bulk_write_max_seconds: float = 2.0
+
+    # Pipeline activity log: bulk-insert every N entries or T seconds
+    pipeline_log_flush_rows: int = 100
+    pipeline_log_flush_seconds: float = 1.0
+
+    # Durable job queue (app.services.job_queue)
+    # Run queued jobs inside the API process; false when `python -m app.worker` runs them instead
+    job_runner_enabled: bool = True
+    # Jobs of each kind one process runs at once. Every kind has its own slots, so
+    # pipelines waiting on nameservers cannot starve resets, checks or uploads
+    job_runner_concurrency: int = 10
+    # Per-kind overrides, e.g. JOB_RUNNER_KIND_CONCURRENCY='{"pipeline": 20, "password_reset": 2}'
+    job_runner_kind_concurrency: dict[str, int] = {}
+    job_poll_seconds: float = 2.0
+    # A running job whose lease is not renewed within this long is picked up by another runner
+    job_lease_seconds: float = 120.0
+    job_heartbeat_seconds: float = 30.0
+    job_max_attempts: int = 3
+    # Delay before a failed job is retried: base * 2^(attempt-1), capped
+    job_retry_base_seconds: float = 60.0
+    job_retry_max_seconds: float = 1800.0
+
     azure_client_id: str | None = None
     azure_client_secret: str | None = None
     azure_tenant_id: str | None = None
@@ -56,6 +139,29 @@ class Settings(BaseSettings):
     # 3 = safe default (~1.1GB RAM), 4-5 for larger Railway instances
     checker_parallel_browsers: int = 2
 
+    # Browser slots (app.services.selenium.browser_slots): every Chrome in the process takes one
+    # Chrome instances at once across Steps 4-7, the checker, uploads and retries
+    browser_max_slots: int = 10
+    # Memory one Chrome grows to, and memory always left free for the app itself
+    browser_slot_memory_mb: int = 350
+    browser_memory_reserve_mb: int = 512
+    # A Chrome this young still counts as growing when checking free memory
+    browser_slot_warmup_seconds: float = 20.0
+    # Give up waiting for a slot after this long
+    browser_slot_timeout_seconds: float = 3600.0
+    # Per-subsystem caps on top of the defaults (step5/step6 = max_parallel_browsers,
+    # checker = checker_parallel_browsers, dkim_retry = 1), e.g. "step7=5,instantly=3"
+    browser_slot_quotas: str = ""
+
+    # Pipeline Steps 5-8 run per tenant as soon as its previous step is done (app.services.pipeline_stream)
+    # Tenants in each step at once (0 = MAX_PARALLEL_BROWSERS); browser slots still cap Chrome overall
+    pipeline_first_login_concurrency: int = 2
+    pipeline_m365_concurrency: int = 0
+    pipeline_mailbox_concurrency: int = 0
+    pipeline_smtp_concurrency: int = 2
+    # Wait before a tenant whose step failed is tried again
+    pipeline_stage_retry_seconds: float = 15.0
+
     # Headless stability delays (seconds)
     # Increase in headless to avoid racing Microsoft login screens
     headless_delay_seconds: float = 1.5
@@ -0,0 +1,178 @@
+"""
+Bulk row updates.
+
+bulk_update() writes many per-row updates as one
+`UPDATE t SET ... FROM (VALUES ...) AS v WHERE t.key = v.key` per chunk,
+instead of one statement per row. BufferedUpdater collects updates as results
+come in (e.g. sequencer uploads finishing one by one) and flushes them in bulk
+every N rows or T seconds, in its own short transaction.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Optional
+from uuid import UUID
+
+from sqlalchemy import Uuid, bindparam, column, update, values
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import get_settings
+from app.db.session import async_session_factory
+
+logger = logging.getLogger(__name__)
+
+# Rows per UPDATE ... FROM (VALUES ...) statement
+BULK_UPDATE_CHUNK_SIZE = 500
+
+
+def _coerce(table_column, value: Any) -> Any:
+    if isinstance(table_column.type, Uuid) and isinstance(value, str):
+        return UUID(value)
+    return value
+
+
+def values_update_statement(table, key: str, columns: tuple, rows: List[Dict[str, Any]]):
+    """UPDATE table SET columns FROM (VALUES rows) AS incoming WHERE table.key = incoming.key (PostgreSQL)."""
+    names = (key, *columns)
+    incoming = values(
+        *(column(name, table.c[name].type) for name in names), name="incoming"
+    ).data([tuple(_coerce(table.c[name], row[name]) for name in names) for row in rows])
+    return (
+        update(table)
+        .where(table.c[key] == incoming.c[key])
+        .values({name: incoming.c[name] for name in columns})
+    )
+
+
+async def bulk_update(db: AsyncSession, model, key: str, rows: Iterable[Dict[str, Any]]) -> int:
+    """
+    Apply per-row updates matched on `key`, as few statements as possible.
+
+    Rows that set the same columns share statements (one per
+    BULK_UPDATE_CHUNK_SIZE rows). Does not commit.
+
+    Args:
+        db: Session to execute in
+        model: Mapped class whose table is updated
+        key: Column identifying the row (e.g. "id" or "email"); every row must include it
+        rows: Dicts of {key: ..., column: new value, ...}
+
+    Returns:
+        Number of rows matched
+    """
+    table = model.__table__
+    groups: Dict[tuple, List[Dict[str, Any]]] = {}
+    for row in rows:
+        columns = tuple(sorted(name for name in row if name != key))
+        if columns:
+            groups.setdefault(columns, []).append(row)
+
+    matched = 0
+    if db.get_bind().dialect.name != "postgresql":
+        # No UPDATE ... FROM (VALUES ...) AS v (cols) outside PostgreSQL: one executemany per group
+        for columns, group in groups.items():
+            stmt = (
+                update(table)
+                .where(table.c[key] == bindparam("_key", type_=table.c[key].type))
+                .values({name: bindparam(f"_{name}", type_=table.c[name].type) for name in columns})
+            )
+            params = [
+                {"_key": _coerce(table.c[key], row[key]), **{f"_{name}": row[name] for name in columns}}
+                for row in group
+            ]
+            result = await db.execute(stmt, params)
+            matched += result.rowcount or 0
+        return matched
+
+    for columns, group in groups.items():
+        for start in range(0, len(group), BULK_UPDATE_CHUNK_SIZE):
+            chunk = group[start:start + BULK_UPDATE_CHUNK_SIZE]
+            result = await db.execute(values_update_statement(table, key, columns, chunk))
+            matched += result.rowcount or 0
+    return matched
+
+
+class BufferedUpdater:
+    """
+    Buffer per-row updates and write them with bulk_update().
+
+    Flushes when max_rows updates are pending, when max_seconds have passed
+    since the last flush (checked on add and by a background timer while used
+    as an async context manager), and on exit. Later updates to the same row
+    are merged into the pending one.
+
+    Usage:
+        async with BufferedUpdater(Mailbox, "id") as writer:
+            for result in results:
+                await writer.add(result["mailbox_id"], instantly_uploaded=True)
+    """
+
+    def __init__(
+        self,
+        model,
+        key: str,
+        session_factory: async_sessionmaker = async_session_factory,
+        max_rows: Optional[int] = None,
+        max_seconds: Optional[float] = None,
+    ):
+        settings = get_settings()
+        self.model = model
+        self.key = key
+        self.session_factory = session_factory
+        self.max_rows = max_rows or settings.bulk_write_max_rows
+        self.max_seconds = max_seconds if max_seconds is not None else settings.bulk_write_max_seconds
+        self.written = 0
+        self._pending: Dict[Any, Dict[str, Any]] = {}
+        self._last_flush = time.monotonic()
+        self._lock = asyncio.Lock()
+        self._timer: Optional[asyncio.Task] = None
+
+    async def __aenter__(self) -> "BufferedUpdater":
+        if self.max_seconds > 0:
+            self._timer = asyncio.create_task(self._flush_periodically())
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self._timer:
+            self._timer.cancel()
+            try:
+                await self._timer
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+
+    async def add(self, key_value: Any, **values_: Any) -> None:
+        """Queue an update of the row whose key is key_value; may flush."""
+        self._pending.setdefault(key_value, {self.key: key_value}).update(values_)
+        if len(self._pending) >= self.max_rows or time.monotonic() - self._last_flush >= self.max_seconds:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Write every pending update in one transaction."""
+        async with self._lock:
+            self._last_flush = time.monotonic()
+            if not self._pending:
+                return
+            rows, self._pending = list(self._pending.values()), {}
+            try:
+                async with self.session_factory() as session:
+                    await bulk_update(session, self.model, self.key, rows)
+                    await session.commit()
+            except Exception:
+                # Keep them for the next flush (updates queued meanwhile win)
+                for row in rows:
+                    self._pending[row[self.key]] = {**row, **self._pending.get(row[self.key], {})}
+                raise
+            self.written += len(rows)
+            logger.debug("Flushed %d %s updates", len(rows), self.model.__tablename__)
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.max_seconds)
+            if time.monotonic() - self._last_flush >= self.max_seconds:
+                try:
+                    await self.flush()
+                except Exception as e:
+                    # Still pending; the next add/flush retries and raises to the caller
+                    logger.error("Background flush of %s updates failed: %s", self.model.__tablename__, e)
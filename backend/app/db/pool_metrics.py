@@ -0,0 +1,345 @@
+"""
+Connection pool telemetry.
+
+Every engine in app.db.session is created with one of the Instrumented* pool
+classes below and registered with instrument_engine(), which records per
+engine:
+
+- checkout wait: time spent in pool.connect() (queueing for a free
+  connection, plus opening one on overflow / NullPool, plus pre-ping)
+- hold time: checkout -> checkin
+- connect: time to open a new DBAPI connection, and how many were opened
+- in use / peak in use, pool size and overflow, checkout timeouts,
+  invalidations
+- retries done by execute_with_retry / RetryableSession
+
+snapshot() returns all of it as a dict for GET /internal/metrics/pools.
+
+PoolAutotuner (off by default, POOL_AUTOTUNE_ENABLED=true) watches the main
+pool's checkout waits and raises max_overflow while the p95 wait is above
+target, and lowers it back towards the configured value once waits are low
+and the extra overflow goes unused.
+
+SQLAlchemy has no public API to resize a live pool, so the autotuner writes
+QueuePool's private `_max_overflow`, which QueuePool re-reads on every overflow
+attempt. requirements.txt pins SQLAlchemy to the 2.0/2.1 series this was
+checked against, tests/test_pool_metrics.py exercises the resize on a real
+AsyncAdaptedQueuePool, and supports_live_resize() lets startup skip autotuning
+if a future pool no longer has the attribute.
+"""
+
+import asyncio
+import bisect
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the histogram buckets; the last bucket is open-ended
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram (thread-safe)."""
+
+    def __init__(self, buckets: Tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+            self.count += 1
+            self.total += seconds
+            self.max = max(self.max, seconds)
+
+    def quantile(self, q: float, counts: Optional[List[int]] = None) -> float:
+        """Upper bound of the bucket holding the q-th observation (of `counts`, default all)."""
+        counts = counts if counts is not None else self.counts
+        total = sum(counts)
+        if not total:
+            return 0.0
+        rank, seen = q * total, 0
+        for index, n in enumerate(counts):
+            seen += n
+            if seen >= rank:
+                return self.buckets[index] if index < len(self.buckets) else self.max
+        return self.max
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = list(self.counts)
+            count, total, max_ = self.count, self.total, self.max
+        return {
+            "count": count,
+            "avg": round(total / count, 6) if count else 0.0,
+            "max": round(max_, 6),
+            "p50": self.quantile(0.5, counts),
+            "p95": self.quantile(0.95, counts),
+            "p99": self.quantile(0.99, counts),
+            "buckets": {
+                **{f"le_{bound}": n for bound, n in zip(self.buckets, counts)},
+                "inf": counts[-1],
+            },
+        }
+
+
+class PoolMetrics:
+    """Counters and histograms for one engine's pool."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.pool = None
+        self.checkout_wait = Histogram()
+        self.hold = Histogram()
+        self.connect = Histogram()
+        self.checkouts = 0
+        self.checkins = 0
+        self.timeouts = 0
+        self.invalidations = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+        self._lock = threading.Lock()
+
+    def on_checkout(self) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+
+    def on_checkin(self) -> None:
+        with self._lock:
+            self.checkins += 1
+            self.in_use = max(self.in_use - 1, 0)
+
+    def snapshot(self) -> dict:
+        data = {
+            "pool_class": type(self.pool).__name__ if self.pool else None,
+            "in_use": self.in_use,
+            "peak_in_use": self.peak_in_use,
+            "checkouts": self.checkouts,
+            "checkins": self.checkins,
+            "timeouts": self.timeouts,
+            "invalidations": self.invalidations,
+            "connections_opened": self.connect.count,
+            "checkout_wait_seconds": self.checkout_wait.snapshot(),
+            "hold_seconds": self.hold.snapshot(),
+            "connect_seconds": self.connect.snapshot(),
+        }
+        if isinstance(self.pool, QueuePool):
+            data.update(
+                pool_size=self.pool.size(),
+                checked_in=self.pool.checkedin(),
+                overflow=self.pool.overflow(),
+                max_overflow=self.pool._max_overflow,  # private; see module docstring
+            )
+        return data
+
+
+_engines: Dict[str, PoolMetrics] = {}
+_retries: Dict[str, int] = {}
+_retries_lock = threading.Lock()
+
+
+def get_pool_metrics(name: str) -> Optional[PoolMetrics]:
+    return _engines.get(name)
+
+
+def record_retry(source: str) -> None:
+    """Count one retry after a transient connection error (source: who retried)."""
+    with _retries_lock:
+        _retries[source] = _retries.get(source, 0) + 1
+
+
+def snapshot() -> dict:
+    """All pool metrics, keyed by engine name."""
+    with _retries_lock:
+        retries = dict(_retries)
+    return {
+        "engines": {name: metrics.snapshot() for name, metrics in _engines.items()},
+        "retries": retries,
+    }
+
+
+class _TimedCheckout:
+    """Pool mixin timing pool.connect() into the PoolMetrics set by instrument_engine()."""
+
+    _pool_metrics: Optional[PoolMetrics] = None
+
+    def connect(self):
+        metrics = self._pool_metrics
+        if metrics is None:
+            return super().connect()
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            metrics.timeouts += 1
+            raise
+        finally:
+            metrics.checkout_wait.observe(time.perf_counter() - start)
+
+    def recreate(self):
+        # dispose() swaps in a fresh pool; keep reporting into the same metrics
+        pool = super().recreate()
+        pool._pool_metrics = self._pool_metrics
+        if self._pool_metrics:
+            self._pool_metrics.pool = pool
+        return pool
+
+
+class InstrumentedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class InstrumentedAsyncAdaptedQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+class InstrumentedNullPool(_TimedCheckout, NullPool):
+    pass
+
+
+def instrument_engine(name: str, engine) -> PoolMetrics:
+    """
+    Attach metric hooks to an engine (sync or async).
+
+    Args:
+        name: Label the metrics are reported under ("main", "background", ...)
+        engine: Engine created with one of the Instrumented* pool classes
+
+    Returns:
+        The engine's PoolMetrics
+    """
+    sync_engine = getattr(engine, "sync_engine", engine)
+    metrics = PoolMetrics(name)
+    metrics.pool = sync_engine.pool
+    sync_engine.pool._pool_metrics = metrics
+    _engines[name] = metrics
+
+    @event.listens_for(sync_engine, "do_connect")
+    def _timed_connect(dialect, conn_rec, cargs, cparams):
+        start = time.perf_counter()
+        try:
+            return dialect.connect(*cargs, **cparams)
+        finally:
+            metrics.connect.observe(time.perf_counter() - start)
+
+    @event.listens_for(sync_engine.pool, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = time.perf_counter()
+        metrics.on_checkout()
+
+    @event.listens_for(sync_engine.pool, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        checked_out_at = connection_record.info.pop("checked_out_at", None) if connection_record else None
+        if checked_out_at is not None:
+            metrics.hold.observe(time.perf_counter() - checked_out_at)
+            metrics.on_checkin()
+
+    @event.listens_for(sync_engine.pool, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        metrics.invalidations += 1
+
+    return metrics
+
+
+def supports_live_resize(pool) -> bool:
+    """True if the pool has the private max_overflow PoolAutotuner adjusts."""
+    return isinstance(pool, QueuePool) and isinstance(getattr(pool, "_max_overflow", None), int)
+
+
+class PoolAutotuner:
+    """
+    Adjust a QueuePool's max_overflow from observed checkout waits.
+
+    Every interval: if the p95 checkout wait over the interval is above the
+    target and overflow is in use, max_overflow grows by `step` (up to
+    `ceiling`); if the p95 is under a quarter of the target and fewer than
+    max_overflow - step overflow connections are open, it shrinks by `step`
+    (never below the configured value).
+    """
+
+    def __init__(
+        self,
+        metrics: PoolMetrics,
+        target_wait: Optional[float] = None,
+        step: Optional[int] = None,
+        ceiling: Optional[int] = None,
+        interval: Optional[float] = None,
+    ):
+        if not supports_live_resize(metrics.pool):
+            raise ValueError(f"Pool {metrics.name} ({type(metrics.pool).__name__}) cannot be resized live")
+        settings = get_settings()
+        self.metrics = metrics
+        self.target_wait = target_wait if target_wait is not None else settings.pool_autotune_target_wait_seconds
+        self.step = step or settings.pool_autotune_step
+        self.ceiling = ceiling or settings.pool_autotune_max_overflow
+        self.interval = interval or settings.pool_autotune_interval_seconds
+        self.floor = metrics.pool._max_overflow
+        self._last_counts = list(metrics.checkout_wait.counts)
+        self._task: Optional[asyncio.Task] = None
+
+    def adjust(self) -> Optional[int]:
+        """
+        Run one tuning step.
+
+        Returns:
+            The new max_overflow if it changed, else None
+        """
+        pool = self.metrics.pool
+        counts = list(self.metrics.checkout_wait.counts)
+        window = [now - before for now, before in zip(counts, self._last_counts)]
+        self._last_counts = counts
+        if not sum(window) or not supports_live_resize(pool):
+            return None
+
+        p95 = self.metrics.checkout_wait.quantile(0.95, window)
+        current = pool._max_overflow
+        if p95 > self.target_wait and pool.overflow() >= current - self.step and current < self.ceiling:
+            new = min(current + self.step, self.ceiling)
+        elif p95 < self.target_wait / 4 and pool.overflow() < current - self.step and current > self.floor:
+            new = max(current - self.step, self.floor)
+        else:
+            return None
+
+        # QueuePool reads _max_overflow on every overflow attempt
+        pool._max_overflow = new
+        logger.info(
+            "Pool %s: p95 checkout wait %.3fs, max_overflow %d -> %d",
+            self.metrics.name, p95, current, new,
+        )
+        return new
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.adjust()
+            except Exception as e:
+                logger.error("Pool autotune step failed: %s", e)
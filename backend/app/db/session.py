@@ -19,10 +19,15 @@ from urllib.parse import parse_qs, urlencode, urlparse, urlunparse
 from sqlalchemy import create_engine
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session, sessionmaker
-from sqlalchemy.pool import NullPool
 from sqlalchemy.exc import DBAPIError, OperationalError
 
 from app.core.config import get_settings
+from app.db.pool_metrics import (
+    InstrumentedAsyncAdaptedQueuePool,
+    InstrumentedNullPool,
+    instrument_engine,
+    record_retry,
+)
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
@@ -80,10 +85,12 @@ database_url, connect_args = prepare_database_url(settings.database_url)
 
 # Create async engine with connection pooling settings
 # Pool sized for 300-tenant batch runs: parallel browsers + background jobs + API
+# (DB_POOL_SIZE / DB_MAX_OVERFLOW; see GET /internal/metrics/pools before changing)
 engine = create_async_engine(
     database_url,
-    pool_size=30,
-    max_overflow=50,
+    poolclass=InstrumentedAsyncAdaptedQueuePool,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
     pool_timeout=60,
     pool_recycle=120,       # Neon kills idle connections at ~5 min; recycle at 2 min to stay safe
     pool_pre_ping=True,     # Verify connection is alive before checkout
@@ -97,7 +104,7 @@ engine = create_async_engine(
 # 5-15+ minute Selenium/PowerShell operations.
 _background_engine = create_async_engine(
     database_url,
-    poolclass=NullPool,     # No connection pooling — always fresh
+    poolclass=InstrumentedNullPool,     # No connection pooling — always fresh
     echo=bool(os.getenv("SQL_ECHO")),
     connect_args=connect_args,
 )
@@ -108,6 +115,35 @@ BackgroundSessionLocal = async_sessionmaker(
     expire_on_commit=False,
 )
 
+# Read-only engine for the frontend's status/stats/list/export GETs.
+# Its own (smaller) pool, so polling keeps getting connections while Step 6/7
+# workers hold the main pool; optionally a read replica. Transactions are
+# READ ONLY, so an accidental write fails instead of landing on a replica.
+if settings.database_read_url:
+    read_database_url, read_connect_args = prepare_database_url(settings.database_read_url)
+else:
+    read_database_url, read_connect_args = database_url, connect_args
+
+read_engine = create_async_engine(
+    read_database_url,
+    poolclass=InstrumentedAsyncAdaptedQueuePool,
+    pool_size=settings.read_pool_size,
+    max_overflow=settings.read_max_overflow,
+    pool_timeout=settings.read_pool_timeout,
+    pool_recycle=120,
+    pool_pre_ping=True,
+    echo=bool(os.getenv("SQL_ECHO")),
+    connect_args=read_connect_args,
+    execution_options={"postgresql_readonly": True},
+)
+
+ReadSessionLocal = async_sessionmaker(
+    bind=read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autoflush=False,
+)
+
 
 def is_connection_error(error: Exception) -> bool:
     """Check if an exception is a transient connection error that can be retried."""
@@ -157,6 +193,7 @@ async def execute_with_retry(
         except (DBAPIError, OperationalError) as e:
             last_error = e
             if is_connection_error(e) and attempt < max_retries:
+                record_retry("execute_with_retry")
                 delay = retry_delay * (2 ** attempt)  # Exponential backoff
                 logger.warning(
                     f"Database connection error (attempt {attempt + 1}/{max_retries + 1}), "
@@ -173,6 +210,7 @@ async def execute_with_retry(
         except Exception as e:
             # Check if the underlying cause is a connection error
             if is_connection_error(e) and attempt < max_retries:
+                record_retry("execute_with_retry")
                 delay = retry_delay * (2 ** attempt)
                 logger.warning(
                     f"Database connection error (attempt {attempt + 1}/{max_retries + 1}), "
@@ -196,11 +234,16 @@ sync_connect_args = {"sslmode": "require"} if connect_args.get("ssl") else {}
 
 sync_engine = create_engine(
     database_url.replace("postgresql+asyncpg", "postgresql+psycopg2"),
-    poolclass=NullPool,  # Don't pool connections locally - Neon handles this
+    poolclass=InstrumentedNullPool,  # Don't pool connections locally - Neon handles this
     echo=bool(os.getenv("SQL_ECHO")),
     connect_args=sync_connect_args,
 )
 
+instrument_engine("main", engine)
+instrument_engine("background", _background_engine)
+instrument_engine("read", read_engine)
+instrument_engine("sync", sync_engine)
+
 SyncSessionLocal = sessionmaker(
     bind=sync_engine,
     class_=Session,
@@ -230,6 +273,22 @@ async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
         yield session
 
 
+async def get_read_db_session() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency that provides a read-only session from the read pool.
+
+    Use for GET endpoints that only read (status polling, stats, lists,
+    exports). Reads may lag slightly behind writes when a replica is configured.
+
+    Usage:
+        @router.get("/")
+        async def endpoint(db: AsyncSession = Depends(get_read_db_session)):
+            ...
+    """
+    async with ReadSessionLocal() as session:
+        yield session
+
+
 @asynccontextmanager
 async def get_fresh_db_session() -> AsyncGenerator[AsyncSession, None]:
     """
@@ -283,6 +342,7 @@ class RetryableSession:
             except Exception as e:
                 last_error = e
                 if is_connection_error(e) and attempt < self._max_retries:
+                    record_retry("retryable_session.execute")
                     delay = 0.5 * (2 ** attempt)
                     logger.warning(
                         f"DB connection error on execute (attempt {attempt + 1}), "
@@ -305,6 +365,7 @@ class RetryableSession:
             except Exception as e:
                 last_error = e
                 if is_connection_error(e) and attempt < self._max_retries:
+                    record_retry("retryable_session.get")
                     delay = 0.5 * (2 ** attempt)
                     logger.warning(
                         f"DB connection error on get (attempt {attempt + 1}), "
@@ -327,6 +388,7 @@ class RetryableSession:
             except Exception as e:
                 last_error = e
                 if is_connection_error(e) and attempt < self._max_retries:
+                    record_retry("retryable_session.commit")
                     delay = 0.5 * (2 ** attempt)
                     logger.warning(
                         f"DB connection error on commit (attempt {attempt + 1}), "
@@ -382,4 +444,10 @@ async def get_db_session_with_retry() -> AsyncGenerator[RetryableSession, None]:
             ...
     """
     async with RetryableSession(SessionLocal) as session:
-        yield session
\ No newline at end of file
+        yield session
+
+
+async def get_read_db_session_with_retry() -> AsyncGenerator[RetryableSession, None]:
+    """Retryable variant of get_read_db_session (read pool, read-only)."""
+    async with RetryableSession(ReadSessionLocal) as session:
+        yield session
@@ -53,12 +53,18 @@ from app.api.routes import (
     pipeline_router,
     step8_endpoints_router,
     domain_checker_router,
+    internal_router,
 )
 from app.db.session import get_db_session
 from app.core.config import get_settings
-from app.db.session import engine
+from app.db.session import engine, read_engine
+from app.db.pool_metrics import PoolAutotuner, get_pool_metrics, supports_live_resize
 from app.services.powershell.setup import ensure_powershell_modules, check_powershell_available
 from app.services.background_jobs import start_background_scheduler, stop_background_scheduler
+from app.services.cloudflare import close_cloudflare_clients
+from app.services.cloudflare_sync import close_sync_clients
+from app.services.pipeline_log_sink import pipeline_log_sink
+from app.services.job_queue import start_job_runner, stop_job_runner
 
 logger = logging.getLogger(__name__)
 logger.info("Logging to %s", log_filename)
@@ -93,18 +99,48 @@ async def lifespan(app: FastAPI):
     logger.info("Starting background job scheduler...")
     start_background_scheduler()
 
+    # Startup: Optional max_overflow autotuning for the main pool
+    pool_autotuner = None
+    if settings.pool_autotune_enabled:
+        main_pool = get_pool_metrics("main")
+        if supports_live_resize(main_pool.pool):
+            pool_autotuner = PoolAutotuner(main_pool)
+            pool_autotuner.start()
+            logger.info("Pool autotuning enabled (max_overflow %d..%d)", pool_autotuner.floor, pool_autotuner.ceiling)
+        else:
+            logger.warning("Pool autotuning disabled: %s cannot be resized live", type(main_pool.pool).__name__)
+
     # Resume any pipelines that were running when container restarted
     from app.api.routes.pipeline import resume_interrupted_pipelines
     await resume_interrupted_pipelines()
 
+    # Startup: Run queued jobs (pipeline runs, auto-runs, checks, ...) in this process.
+    # Jobs left running by a previous process are picked up once their lease expires.
+    if settings.job_runner_enabled:
+        start_job_runner()
+
     yield
 
+    # Shutdown: Hand jobs still running back to the queue
+    await stop_job_runner()
+
+    if pool_autotuner:
+        await pool_autotuner.stop()
+
     # Shutdown: Stop background scheduler
     logger.info("Stopping background job scheduler...")
     stop_background_scheduler()
 
-    # Shutdown: Dispose engine
+    # Shutdown: Close pooled Cloudflare HTTP clients
+    await close_cloudflare_clients()
+    await close_sync_clients()
+
+    # Shutdown: Write pipeline activity logs still queued
+    await pipeline_log_sink.close()
+
+    # Shutdown: Dispose engines
     await engine.dispose()
+    await read_engine.dispose()
     logger.info("Database connection closed")
 
 
@@ -159,6 +195,7 @@ app.include_router(domain_lookup_router)
 app.include_router(pipeline_router)
 app.include_router(step8_endpoints_router)
 app.include_router(domain_checker_router)
+app.include_router(internal_router)
 
 
 @app.get("/", tags=["root"])
@@ -1,7 +1,10 @@
 from app.models.base import Base, TimestampUUIDMixin
 from app.models.batch import BatchStatus, SetupBatch
+from app.models.batch_counters import BatchCounters
+from app.models.cloudflare_zone import CloudflareZone
 from app.models.domain import Domain, DomainStatus
 from app.models.instantly_account import InstantlyAccount
+from app.models.job import Job, JobStatus
 from app.models.mailbox import Mailbox, MailboxStatus, WarmupStage
 from app.models.pipeline_log import PipelineLog
 from app.models.tenant import Tenant, TenantStatus
@@ -11,9 +14,13 @@ __all__ = [
     "TimestampUUIDMixin",
     "BatchStatus",
     "SetupBatch",
+    "BatchCounters",
+    "CloudflareZone",
     "Domain",
     "DomainStatus",
     "InstantlyAccount",
+    "Job",
+    "JobStatus",
     "Tenant",
     "TenantStatus",
     "Mailbox",
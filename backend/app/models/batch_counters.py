@@ -0,0 +1,61 @@
+"""
+Batch Counters Model
+
+One row per batch with its per-stage domain/tenant/mailbox counts, so status
+polling reads a single row instead of recounting the batch. Maintained by the
+statement-level triggers installed in migration 029 (see
+app.services.batch_counters for the definitions and the rebuild path).
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import DateTime, ForeignKey, Integer, func
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+def _counter() -> Mapped[int]:
+    return mapped_column(Integer, nullable=False, default=0, server_default="0")
+
+
+class BatchCounters(Base):
+    __tablename__ = "batch_counters"
+
+    batch_id: Mapped[UUID] = mapped_column(
+        PG_UUID(as_uuid=True), ForeignKey("setup_batches.id", ondelete="CASCADE"), primary_key=True
+    )
+
+    # Domains
+    domains_total: Mapped[int] = _counter()
+    domains_zone_created: Mapped[int] = _counter()  # cloudflare_zone_id set
+    domains_ns_propagated: Mapped[int] = _counter()  # status == NS_PROPAGATED
+    domains_redirect_configured: Mapped[int] = _counter()
+    domains_zone_stage: Mapped[int] = _counter()  # status at or past ZONE_CREATED
+    domains_ns_stage: Mapped[int] = _counter()  # status at or past NS_PROPAGATED
+
+    # Tenants
+    tenants_total: Mapped[int] = _counter()
+    tenants_linked: Mapped[int] = _counter()  # domain_id set
+    tenants_domain_verified: Mapped[int] = _counter()  # status == DOMAIN_VERIFIED
+    tenants_dkim_enabled: Mapped[int] = _counter()  # status == DKIM_ENABLED
+    tenants_verified_stage: Mapped[int] = _counter()  # status at or past DOMAIN_VERIFIED
+    tenants_dkim_stage: Mapped[int] = _counter()  # status at or past DKIM_ENABLED
+    tenants_step5_complete: Mapped[int] = _counter()
+    tenants_step6_complete: Mapped[int] = _counter()
+    tenants_step7_complete: Mapped[int] = _counter()
+    tenants_step7_failed: Mapped[int] = _counter()  # step 6 done, step 7 errored and not complete
+
+    # Mailboxes
+    mailboxes_total: Mapped[int] = _counter()
+    mailboxes_pending: Mapped[int] = _counter()  # status == PENDING
+    mailboxes_ready: Mapped[int] = _counter()  # status == READY
+    mailboxes_ready_stage: Mapped[int] = _counter()  # READY, WARMING or CONFIGURED
+
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
+    )
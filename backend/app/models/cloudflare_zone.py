@@ -0,0 +1,35 @@
+"""
+Cloudflare Zone Index Model
+
+One row per zone seen on any configured Cloudflare account. Built by paging
+/zones on each account so domain -> zone lookups don't need per-domain API calls.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, String, func
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class CloudflareZone(Base):
+    __tablename__ = "cloudflare_zones"
+
+    zone_id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    name: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
+    # The account is stored by login email (stable across config reorderings),
+    # and mapped back to an account index when loaded
+    account_email: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
+    status: Mapped[str] = mapped_column(String(50), nullable=False)
+    nameservers: Mapped[list[str]] = mapped_column(JSONB, nullable=False, default=list)
+
+    last_seen_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
+    )
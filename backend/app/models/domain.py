@@ -5,7 +5,7 @@ from enum import Enum
 from typing import TYPE_CHECKING, Optional
 from uuid import UUID
 
-from sqlalchemy import Boolean, DateTime, Enum as SqlEnum, ForeignKey, Integer, String
+from sqlalchemy import Boolean, DateTime, Enum as SqlEnum, ForeignKey, Index, Integer, String, text
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -37,6 +37,19 @@ class DomainStatus(str, Enum):
 
 class Domain(TimestampUUIDMixin, Base):
     __tablename__ = "domains"
+    __table_args__ = (
+        Index("ix_domains_batch_id_status", "batch_id", "status"),
+        Index("ix_domains_tenant_id", "tenant_id"),
+        Index("ix_domains_status", "status"),
+        # Step 3: un-propagated domains of a batch, by next scheduled check
+        Index(
+            "ix_domains_batch_ns_pending",
+            "batch_id",
+            "ns_next_check_at",
+            postgresql_where=text("ns_propagated_at IS NULL AND cloudflare_zone_id IS NOT NULL"),
+            sqlite_where=text("ns_propagated_at IS NULL AND cloudflare_zone_id IS NOT NULL"),
+        ),
+    )
 
     name: Mapped[str] = mapped_column(String(255), unique=True, nullable=False)
     tld: Mapped[str] = mapped_column(String(50), nullable=False)
@@ -84,6 +97,10 @@ class Domain(TimestampUUIDMixin, Base):
 
     # Milestone timestamps
     ns_propagated_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    # NS propagation schedule (pipeline step 3): when to look next, and how many checks so far
+    ns_next_check_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    ns_check_attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
     m365_verified_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
 
     # === MULTI-DOMAIN PER TENANT ===
@@ -0,0 +1,78 @@
+"""Durable background jobs (see app.services.job_queue)."""
+
+from __future__ import annotations
+
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+
+from sqlalchemy import Boolean, DateTime, Index, Integer, String, Text, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base, TimestampUUIDMixin
+
+
+class JobStatus(str, Enum):
+    """Lifecycle of a job row."""
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+ACTIVE_JOB_STATUSES = (JobStatus.QUEUED.value, JobStatus.RUNNING.value)
+
+
+class Job(TimestampUUIDMixin, Base):
+    """
+    One unit of background work, claimed by a JobRunner under a lease.
+
+    A runner owns a running job until lease_expires_at; it pushes the lease
+    forward on every heartbeat. A job whose lease has lapsed (its process
+    died) is claimed again by the next runner that polls, and the handler
+    picks up from `checkpoint`.
+    """
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Claim order: highest priority, then oldest, among queued/running jobs
+        Index(
+            "ix_jobs_claim",
+            "priority", "created_at",
+            postgresql_where=text("status IN ('queued', 'running')"),
+            sqlite_where=text("status IN ('queued', 'running')"),
+        ),
+        # At most one active job per (kind, key), e.g. one pipeline run per batch
+        Index(
+            "uq_jobs_active_kind_key",
+            "kind", "key",
+            unique=True,
+            postgresql_where=text("status IN ('queued', 'running') AND key IS NOT NULL"),
+            sqlite_where=text("status IN ('queued', 'running') AND key IS NOT NULL"),
+        ),
+    )
+
+    kind: Mapped[str] = mapped_column(String(50), nullable=False)  # Handler name: "pipeline", "auto_run", ...
+    key: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)  # Dedupe key, e.g. the batch id
+    payload: Mapped[dict] = mapped_column(JSONB, nullable=False, default=dict)  # Handler arguments
+
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default=JobStatus.QUEUED.value)
+    priority: Mapped[int] = mapped_column(Integer, nullable=False, default=0)  # Higher runs first
+    run_after: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)  # Not claimed before this
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)  # Claims so far
+    max_attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=3)
+
+    # Lease
+    lease_owner: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)  # "<host>:<pid>:<runner>"
+    lease_expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    heartbeat_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    cancel_requested: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+
+    # Resume state written by the handler (items done, step reached, ...) and its live progress
+    checkpoint: Mapped[Optional[dict]] = mapped_column(JSONB, nullable=True)
+    progress: Mapped[Optional[dict]] = mapped_column(JSONB, nullable=True)
+
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
@@ -5,7 +5,7 @@ from enum import Enum
 from typing import TYPE_CHECKING, Optional
 from uuid import UUID
 
-from sqlalchemy import Boolean, DateTime, Enum as SqlEnum, ForeignKey, String, Text
+from sqlalchemy import Boolean, DateTime, Enum as SqlEnum, ForeignKey, Index, String, Text, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.base import Base, TimestampUUIDMixin
@@ -41,6 +41,40 @@ class WarmupStage(str, Enum):
 
 class Mailbox(TimestampUUIDMixin, Base):
     __tablename__ = "mailboxes"
+    __table_args__ = (
+        Index("ix_mailboxes_batch_id_status", "batch_id", "status"),
+        Index("ix_mailboxes_batch_id_email", "batch_id", "email"),
+        Index("ix_mailboxes_tenant_id_email", "tenant_id", "email"),
+        Index("ix_mailboxes_status", "status"),
+        # Upload screens: ready but not yet uploaded ("pending upload")
+        Index(
+            "ix_mailboxes_pending_upload",
+            "batch_id",
+            "email",
+            postgresql_where=text("setup_complete AND NOT uploaded_to_sequencer"),
+            sqlite_where=text("setup_complete AND NOT uploaded_to_sequencer"),
+        ),
+        # Cross-batch upload list, keyset-paginated on (email, id)
+        Index(
+            "ix_mailboxes_pending_upload_email_id",
+            "email",
+            "id",
+            postgresql_where=text("setup_complete AND NOT uploaded_to_sequencer"),
+            sqlite_where=text("setup_complete AND NOT uploaded_to_sequencer"),
+        ),
+        Index(
+            "ix_mailboxes_instantly_pending",
+            "batch_id",
+            postgresql_where=text("NOT instantly_uploaded"),
+            sqlite_where=text("NOT instantly_uploaded"),
+        ),
+        Index(
+            "ix_mailboxes_smartlead_pending",
+            "batch_id",
+            postgresql_where=text("NOT smartlead_uploaded"),
+            sqlite_where=text("NOT smartlead_uploaded"),
+        ),
+    )
 
     email: Mapped[str] = mapped_column(String(255), unique=True, nullable=False)
     local_part: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)  # Part before @
@@ -6,7 +6,7 @@ from datetime import datetime
 from typing import Optional
 from uuid import UUID
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import Boolean, DateTime, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.models.base import Base, TimestampUUIDMixin
@@ -14,6 +14,10 @@ from app.models.base import Base, TimestampUUIDMixin
 
 class PipelineLog(TimestampUUIDMixin, Base):
     __tablename__ = "pipeline_logs"
+    __table_args__ = (
+        # Activity feed: newest entries of a batch
+        Index("ix_pipeline_logs_batch_id_created_at", "batch_id", "created_at"),
+    )
 
     batch_id: Mapped[UUID] = mapped_column(
         ForeignKey("setup_batches.id", ondelete="CASCADE"),
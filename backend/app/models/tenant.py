@@ -5,7 +5,7 @@ from enum import Enum
 from typing import TYPE_CHECKING, Optional
 from uuid import UUID
 
-from sqlalchemy import Boolean, DateTime, Enum as SqlEnum, ForeignKey, Integer, String, Text
+from sqlalchemy import Boolean, DateTime, Enum as SqlEnum, ForeignKey, Index, Integer, String, Text, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.base import Base, TimestampUUIDMixin
@@ -55,6 +55,19 @@ class TenantStatus(str, Enum):
 
 class Tenant(TimestampUUIDMixin, Base):
     __tablename__ = "tenants"
+    __table_args__ = (
+        Index("ix_tenants_batch_id_status", "batch_id", "status"),
+        Index("ix_tenants_batch_id_step6_complete", "batch_id", "step6_complete"),
+        Index("ix_tenants_domain_id", "domain_id"),
+        Index("ix_tenants_status", "status"),
+        # Steps 6+: tenants of a batch still waiting for mailboxes
+        Index(
+            "ix_tenants_batch_step6_pending",
+            "batch_id",
+            postgresql_where=text("step6_complete IS NOT TRUE"),
+            sqlite_where=text("step6_complete IS NOT TRUE"),
+        ),
+    )
 
     # === FROM RESELLER CSV ===
     microsoft_tenant_id: Mapped[str] = mapped_column(String(255), unique=True, nullable=False)
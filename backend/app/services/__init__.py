@@ -1,4 +1,4 @@
-from app.services.cloudflare import CloudflareError, CloudflareService
+from app.services.cloudflare import CloudflareError, CloudflareService, get_shared_cloudflare_service
 from app.services.mailbox_scripts import MailboxScriptGenerator, mailbox_scripts
 from app.services.powershell import (
     PowerShellRunner,
@@ -26,7 +26,7 @@ def get_cloudflare_service() -> CloudflareService:
         async def create_domain(cf: CloudflareService = Depends(get_cloudflare_service)):
             ...
     """
-    return CloudflareService()
+    return get_shared_cloudflare_service()
 
 
 __all__ = [
@@ -16,6 +16,7 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import NoSuchElementException
 
 from app.core.config import get_settings
+from app.services.selenium.browser import launch_chrome
 
 logger = logging.getLogger(__name__)
 
@@ -154,7 +155,7 @@ class AppConsentGranter:
             else:
                 opts.add_argument("--start-maximized")
 
-            self.driver = webdriver.Chrome(options=opts)
+            self.driver = launch_chrome(opts, "step7")
             self.driver.implicitly_wait(5)
 
             self.driver.execute_script(
@@ -34,6 +34,7 @@ from app.services.email_generator import generate_emails_for_domain
 from app.services.powershell_exchange import PowerShellExchangeService
 from app.services.selenium.admin_portal import _login_with_mfa
 from app.services.selenium.browser import create_driver, cleanup_driver
+from app.services.selenium.browser_slots import browser_slots
 from app.services.selenium.user_ops import UserOpsSelenium
 
 logger = logging.getLogger(__name__)
@@ -545,7 +546,7 @@ async def run_step6_for_tenant(tenant_id: UUID, domain_id: UUID = None, domain_i
                         pass
                     driver = None
                 
-                driver = create_driver(headless=settings.step6_headless)
+                driver = create_driver(headless=settings.step6_headless, slot=await browser_slots.acquire_async("step6"))
                 _login_with_mfa(
                     driver=driver,
                     admin_email=tenant_data["admin_email"],
@@ -775,7 +776,7 @@ async def run_step6_for_tenant(tenant_id: UUID, domain_id: UUID = None, domain_i
                     cleanup_driver(driver)
                 except Exception:
                     pass
-                driver = create_driver(headless=settings.step6_headless)
+                driver = create_driver(headless=settings.step6_headless, slot=await browser_slots.acquire_async("step6"))
                 if driver is None:
                     raise Exception("Failed to create fresh Chrome browser for PowerShell auth")
                 _login_with_mfa(
@@ -931,7 +932,7 @@ async def run_step6_for_tenant(tenant_id: UUID, domain_id: UUID = None, domain_i
                     cleanup_driver(driver)
                 except Exception:
                     pass
-                driver = create_driver(headless=settings.step6_headless)
+                driver = create_driver(headless=settings.step6_headless, slot=await browser_slots.acquire_async("step6"))
                 if driver is None:
                     raise Exception("Failed to create fresh Chrome browser for Phase 2")
                 _login_with_mfa(
@@ -970,7 +971,7 @@ async def run_step6_for_tenant(tenant_id: UUID, domain_id: UUID = None, domain_i
                                     except Exception:
                                         pass
                                     driver = None
-                                driver = create_driver(headless=settings.step6_headless)
+                                driver = create_driver(headless=settings.step6_headless, slot=await browser_slots.acquire_async("step6"))
                                 _login_with_mfa(
                                     driver=driver,
                                     admin_email=tenant_data["admin_email"],
@@ -6,6 +6,8 @@ Uses APScheduler to run periodic background tasks.
 Current jobs:
 - DKIM Enable Retry: Retries enabling DKIM for tenants where DKIM CNAMEs
   have been added but enable failed (Microsoft takes time to provision DKIM).
+  The scheduler only queues the sweep (DKIM_RETRY_SWEEP_JOB); a job runner
+  runs the browsers, so an API with JOB_RUNNER_ENABLED=false starts none.
 """
 
 import asyncio
@@ -18,9 +20,10 @@ from apscheduler.triggers.interval import IntervalTrigger
 from sqlalchemy import select, and_
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import async_engine
+from app.db.session import async_engine, async_session_factory
 from app.models.tenant import Tenant, TenantStatus
 from app.models.domain import Domain
+from app.services import job_queue
 
 logger = logging.getLogger(__name__)
 
@@ -30,6 +33,7 @@ scheduler: Optional[AsyncIOScheduler] = None
 # Constants
 DKIM_RETRY_INTERVAL_MINUTES = 10  # How often to check for pending DKIM
 DKIM_RETRY_WINDOW_HOURS = 24  # Stop retrying after this many hours
+DKIM_RETRY_SWEEP_JOB = "dkim_retry_sweep"  # Job kind running retry_dkim_enable_job
 
 
 async def retry_dkim_enable_job():
@@ -170,6 +174,15 @@ async def retry_dkim_enable_job():
         logger.error(traceback.format_exc())
 
 
+async def enqueue_dkim_retry_job():
+    """Queue a DKIM retry sweep unless one is already queued or running."""
+    async with async_session_factory() as session:
+        job = await job_queue.enqueue(session, DKIM_RETRY_SWEEP_JOB, key="all")
+        await session.commit()
+    job_queue.wake_runner()
+    return job
+
+
 def start_background_scheduler():
     """Start the background job scheduler."""
     global scheduler
@@ -182,7 +195,7 @@ def start_background_scheduler():
     
     # Add DKIM retry job - runs every 10 minutes
     scheduler.add_job(
-        retry_dkim_enable_job,
+        enqueue_dkim_retry_job,
         trigger=IntervalTrigger(minutes=DKIM_RETRY_INTERVAL_MINUTES),
         id="dkim_enable_retry",
         name="Retry DKIM Enable",
@@ -210,16 +223,15 @@ def stop_background_scheduler():
 
 async def trigger_dkim_retry_now():
     """
-    Manually trigger the DKIM retry job immediately.
+    Queue the DKIM retry job to run immediately.
     
-    Returns the number of pending tenants found.
+    Returns the queued job's id.
     """
     logger.info("Manual DKIM retry triggered")
     
-    # Run the job directly
-    await retry_dkim_enable_job()
+    job = await enqueue_dkim_retry_job()
     
-    return {"status": "completed", "message": "DKIM retry job completed"}
+    return {"status": "queued", "message": "DKIM retry job queued", "job_id": str(job.id)}
 
 
 async def get_pending_dkim_count() -> int:
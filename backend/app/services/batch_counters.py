@@ -0,0 +1,204 @@
+"""
+Per-batch stage counters (the batch_counters table).
+
+Status endpoints read one batch_counters row instead of recounting the batch's
+domains, tenants and mailboxes, so a poll costs the same for 10 domains as for
+10,000. On PostgreSQL the rows are maintained by statement-level triggers
+(migration 029) in the same transaction as the change that moves a counter.
+
+The counter definitions below must match the trigger predicates in that
+migration. rebuild() recomputes rows from scratch (backfill / repair), and the
+read helpers fall back to a live count for a batch without a row.
+"""
+
+import logging
+from typing import Any, Optional
+from uuid import UUID
+
+from sqlalchemy import delete, func, insert, select, text, true
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.batch import SetupBatch
+from app.models.batch_counters import BatchCounters
+from app.models.domain import Domain, DomainStatus
+from app.models.mailbox import Mailbox, MailboxStatus
+from app.models.tenant import Tenant, TenantStatus
+
+logger = logging.getLogger(__name__)
+
+# Statuses at or past a stage (dashboard semantics)
+DOMAIN_ZONE_STAGE = (
+    DomainStatus.ZONE_CREATED,
+    DomainStatus.NS_UPDATING,
+    DomainStatus.NS_PROPAGATING,
+    DomainStatus.NS_PROPAGATED,
+    DomainStatus.DNS_CONFIGURING,
+    DomainStatus.TENANT_LINKED,
+    DomainStatus.PENDING_M365,
+    DomainStatus.M365_VERIFIED,
+    DomainStatus.PENDING_DKIM,
+    DomainStatus.ACTIVE,
+)
+DOMAIN_NS_STAGE = DOMAIN_ZONE_STAGE[DOMAIN_ZONE_STAGE.index(DomainStatus.NS_PROPAGATED):]
+
+TENANT_DKIM_STAGE = (
+    TenantStatus.DKIM_ENABLED,
+    TenantStatus.MAILBOXES_CREATING,
+    TenantStatus.MAILBOXES_CONFIGURING,
+    TenantStatus.CONFIGURING,
+    TenantStatus.ACTIVE,
+)
+TENANT_VERIFIED_STAGE = (
+    TenantStatus.DOMAIN_VERIFIED,
+    TenantStatus.DNS_CONFIGURING,
+    TenantStatus.DKIM_CONFIGURING,
+) + TENANT_DKIM_STAGE
+
+MAILBOX_READY_STAGE = (MailboxStatus.READY, MailboxStatus.WARMING, MailboxStatus.CONFIGURED)
+
+# counter column -> condition (None = every row)
+DOMAIN_COUNTERS = {
+    "domains_total": None,
+    "domains_zone_created": Domain.cloudflare_zone_id.isnot(None),
+    "domains_ns_propagated": Domain.status == DomainStatus.NS_PROPAGATED,
+    "domains_redirect_configured": Domain.redirect_configured == True,
+    "domains_zone_stage": Domain.status.in_(DOMAIN_ZONE_STAGE),
+    "domains_ns_stage": Domain.status.in_(DOMAIN_NS_STAGE),
+}
+TENANT_COUNTERS = {
+    "tenants_total": None,
+    "tenants_linked": Tenant.domain_id.isnot(None),
+    "tenants_domain_verified": Tenant.status == TenantStatus.DOMAIN_VERIFIED,
+    "tenants_dkim_enabled": Tenant.status == TenantStatus.DKIM_ENABLED,
+    "tenants_verified_stage": Tenant.status.in_(TENANT_VERIFIED_STAGE),
+    "tenants_dkim_stage": Tenant.status.in_(TENANT_DKIM_STAGE),
+    "tenants_step5_complete": Tenant.step5_complete == True,
+    "tenants_step6_complete": Tenant.step6_complete == True,
+    "tenants_step7_complete": Tenant.step7_complete == True,
+    "tenants_step7_failed": (
+        (Tenant.step6_complete == True)
+        & Tenant.step7_complete.is_not(True)
+        & Tenant.step7_error.isnot(None)
+    ),
+}
+MAILBOX_COUNTERS = {
+    "mailboxes_total": None,
+    "mailboxes_pending": Mailbox.status == MailboxStatus.PENDING,
+    "mailboxes_ready": Mailbox.status == MailboxStatus.READY,
+    "mailboxes_ready_stage": Mailbox.status.in_(MAILBOX_READY_STAGE),
+}
+
+COUNTERS = ((Domain, DOMAIN_COUNTERS), (Tenant, TENANT_COUNTERS), (Mailbox, MAILBOX_COUNTERS))
+COUNTER_NAMES = [name for _, counters in COUNTERS for name in counters]
+
+
+def _aggregates(counters: dict) -> list:
+    return [
+        (func.count() if condition is None else func.count().filter(condition)).label(name)
+        for name, condition in counters.items()
+    ]
+
+
+def _joined(subqueries: list):
+    """FROM clause joining single-row subqueries ON TRUE (an explicit cross join)."""
+    joined = subqueries[0]
+    for subquery in subqueries[1:]:
+        joined = joined.join(subquery, true())
+    return joined
+
+
+def _live_statement(where):
+    """
+    One row of every counter: a conditional-aggregate subquery per table, joined on TRUE.
+
+    Args:
+        where: model -> filter condition applied to that model's rows
+    """
+    subqueries = [
+        select(*_aggregates(counters)).where(where(model)).subquery()
+        for model, counters in COUNTERS
+    ]
+    return select(*subqueries).select_from(_joined(subqueries))
+
+
+async def live_counters(db: AsyncSession, batch_id: UUID) -> dict[str, int]:
+    """Count the batch directly (one statement); used when it has no batch_counters row."""
+    stmt = _live_statement(lambda model: model.batch_id == batch_id)
+    return dict((await db.execute(stmt)).one()._mapping)
+
+
+async def get_batch_counters(db: AsyncSession, batch_id: UUID) -> dict[str, int]:
+    """
+    Stage counters of one batch.
+
+    Reads the batch_counters row; a batch without one (never had a row written,
+    or a database without the triggers) is counted live.
+    """
+    row = (await db.execute(
+        select(BatchCounters).where(BatchCounters.batch_id == batch_id)
+    )).scalar_one_or_none()
+    if row is None:
+        return await live_counters(db, batch_id)
+    return {name: getattr(row, name) for name in COUNTER_NAMES}
+
+
+async def get_total_counters(db: AsyncSession) -> dict[str, int]:
+    """
+    Counters summed over all batches, plus rows that belong to no batch.
+
+    Rows with a batch are counted through batch_counters; only the (few)
+    unbatched domains/tenants/mailboxes are counted live.
+    """
+    summed = select(
+        *(func.coalesce(func.sum(getattr(BatchCounters, name)), 0).label(name) for name in COUNTER_NAMES)
+    ).subquery()
+    unbatched = _live_statement(lambda model: model.batch_id.is_(None)).subquery()
+    row = (await db.execute(select(summed, unbatched).select_from(_joined([summed, unbatched])))).one()
+    values = tuple(row)
+    # summed columns come first, then the unbatched ones in the same order
+    return {
+        name: int(values[i]) + int(values[len(COUNTER_NAMES) + i])
+        for i, name in enumerate(COUNTER_NAMES)
+    }
+
+
+async def rebuild(db: AsyncSession, batch_id: Optional[UUID] = None) -> int:
+    """
+    Recompute batch_counters from the domain/tenant/mailbox tables.
+
+    Rebuilds one batch, or every batch when batch_id is None. On PostgreSQL the
+    table is locked first so changes committed concurrently are neither lost nor
+    counted twice by the triggers. Does not commit.
+
+    Returns:
+        Number of batch rows written.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        await db.execute(text("LOCK TABLE batch_counters IN EXCLUSIVE MODE"))
+
+    batch_query = select(SetupBatch.id)
+    if batch_id is not None:
+        batch_query = batch_query.where(SetupBatch.id == batch_id)
+    rows: dict[UUID, dict[str, Any]] = {
+        bid: {"batch_id": bid, **{name: 0 for name in COUNTER_NAMES}}
+        for bid in (await db.execute(batch_query)).scalars()
+    }
+
+    for model, counters in COUNTERS:
+        stmt = select(model.batch_id, *_aggregates(counters)).where(model.batch_id.isnot(None))
+        if batch_id is not None:
+            stmt = stmt.where(model.batch_id == batch_id)
+        for result in (await db.execute(stmt.group_by(model.batch_id))).all():
+            counts = result._mapping
+            if counts["batch_id"] in rows:
+                rows[counts["batch_id"]].update({name: counts[name] for name in counters})
+
+    clear = delete(BatchCounters)
+    if batch_id is not None:
+        clear = clear.where(BatchCounters.batch_id == batch_id)
+    await db.execute(clear)
+    if rows:
+        await db.execute(insert(BatchCounters), list(rows.values()))
+
+    logger.info("Rebuilt batch counters for %d batch(es)", len(rows))
+    return len(rows)
@@ -2,15 +2,122 @@ from __future__ import annotations
 
 import asyncio
 import logging
-from typing import Any, Optional, List
+import time
+import weakref
+from collections.abc import AsyncIterator, Awaitable, Callable, Sequence
+from typing import Any, Optional, List, TypeVar
 
-import dns.resolver
 import httpx
 
 from app.core.config import get_settings
+from app.services.cloudflare_rate_limit import TokenBucket, get_account_bucket, parse_retry_after
+from app.services.cloudflare_zone_index import CloudflareZoneIndex
+from app.services.ns_propagation import check_ns
+from app.services.dns_plan import (
+    DesiredRecord,
+    DnsPlan,
+    build_plan,
+    dkim_records,
+    m365_email_records,
+    spf_record,
+    verification_txt,
+)
 
 logger = logging.getLogger(__name__)
 
+# HTTP/2 needs the optional "h2" package (httpx[http2]); fall back to HTTP/1.1 keep-alive without it
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Every service that has opened a client, so the app lifespan can close them all on shutdown
+_live_services: "weakref.WeakSet[CloudflareService]" = weakref.WeakSet()
+
+_T = TypeVar("_T")
+_R = TypeVar("_R")
+
+
+async def _reconcile_zones(service, zones: list[dict], dry_run: bool, max_workers: int | None) -> list[dict]:
+    """Shared reconcile_zones() for CloudflareService and MultiCloudflareService."""
+    workers = max_workers or get_settings().cloudflare_bulk_max_workers
+
+    async def _one(zone: dict) -> dict:
+        try:
+            outcome = await service.reconcile_dns(zone["zone_id"], zone["domain"], zone["records"], dry_run=dry_run)
+            outcome["error"] = None
+            return outcome
+        except Exception as e:
+            logger.error("DNS reconcile failed for %s: %s", zone["domain"], e)
+            return {"zone_id": zone["zone_id"], "domain": zone["domain"], "plan": None,
+                    "applied": False, "results": {}, "error": str(e)}
+
+    results: list[dict] = [{} for _ in zones]
+    async for i, outcome in bounded_as_completed(zones, _one, workers):
+        results[i] = outcome
+    return results
+
+
+async def _bulk_check_ns_propagation(service, domains: list[dict], max_workers: int | None) -> list[dict]:
+    """Shared bulk_check_ns_propagation() for CloudflareService and MultiCloudflareService."""
+    workers = max_workers or get_settings().ns_check_max_concurrency
+
+    async def _statuses() -> dict[str, str]:
+        if not any(d.get("zone_id") for d in domains):
+            return {}
+        try:
+            return await service.zone_statuses()
+        except Exception as e:
+            logger.warning("Could not list zone statuses for NS check: %s", e)
+            return {}
+
+    async def _lookups() -> list[dict]:
+        results: list[dict] = [{} for _ in domains]
+        async for i, checked in bounded_as_completed(
+            domains, lambda d: check_ns(d["domain"], d.get("expected_ns") or []), workers
+        ):
+            results[i] = checked.as_dict()
+        return results
+
+    # The zone listing runs alongside the DNS lookups
+    statuses, results = await asyncio.gather(_statuses(), _lookups())
+    for item, result in zip(domains, results):
+        result["zone_status"] = statuses.get(item.get("zone_id") or "")
+
+    logger.info(
+        "NS propagation checked for %d domain(s): %d propagated",
+        len(results), sum(1 for r in results if r["propagated"]),
+    )
+    return results
+
+
+async def bounded_as_completed(
+    items: Sequence[_T],
+    worker: Callable[[_T], Awaitable[_R]],
+    max_workers: int,
+) -> AsyncIterator[tuple[int, _R]]:
+    """
+    Run worker(item) for every item with at most max_workers in flight.
+
+    Yields (index, result) as each finishes, so callers can stream progress and
+    still restore input order. Closing the iterator early cancels unfinished work.
+    """
+    semaphore = asyncio.Semaphore(max(1, max_workers))
+
+    async def _run(index: int, item: _T) -> tuple[int, _R]:
+        async with semaphore:
+            return index, await worker(item)
+
+    tasks = [asyncio.create_task(_run(i, item)) for i, item in enumerate(items)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
 
 class CloudflareError(Exception):
     """Custom exception for Cloudflare API errors."""
@@ -25,6 +132,7 @@ class CloudflareService:
     """Async client for Cloudflare API operations."""
 
     BASE_URL = "https://api.cloudflare.com/client/v4"
+    MAX_RATE_LIMIT_RETRIES = 3
 
     def __init__(
         self,
@@ -58,6 +166,95 @@ class CloudflareService:
             "X-Auth-Key": self._api_key,
             "Content-Type": "application/json",
         }
+        # Pooled keep-alive clients, one per event loop, created lazily on first request
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+            weakref.WeakKeyDictionary()
+        )
+        # Cloudflare's budget is per user, so services for the same email share one bucket
+        self._rate_limiter: TokenBucket = get_account_bucket(self._email)
+        # zone_id -> (fetched_at, records), oldest first. Kept in step with our own
+        # creates/updates/deletes so the ensure_*/replace_* helpers don't re-list the same
+        # zone for every record. Expired entries are evicted whenever one is stored.
+        self._dns_snapshots: dict[str, tuple[float, list[dict]]] = {}
+
+    @property
+    def account_email(self) -> str:
+        """Login email of this account (identifies it in the zone index)."""
+        return self._email
+
+    @property
+    def rate_limit_tokens_remaining(self) -> int:
+        """Requests this account can make right now without waiting."""
+        return self._rate_limiter.tokens_remaining
+
+    def rate_limit_status(self) -> dict[str, Any]:
+        """Snapshot of this account's rate limiter for logging/diagnostics."""
+        return {
+            "account": self._label,
+            "tokens_remaining": self._rate_limiter.tokens_remaining,
+            "capacity": int(self._rate_limiter.capacity),
+            "refill_per_second": round(self._rate_limiter.refill_per_second, 2),
+            "blocked_for_seconds": round(self._rate_limiter.blocked_for, 1),
+        }
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Return this account's pooled client for the running loop, creating it on first use."""
+        loop = asyncio.get_running_loop()
+        # A pooled connection is bound to the loop that opened it, so each loop (the API loop,
+        # the cloudflare_sync loop, worker threads with their own loop) gets its own client
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            settings = get_settings()
+            use_http2 = settings.cloudflare_http2 and HTTP2_AVAILABLE
+            client = httpx.AsyncClient(
+                base_url=self.BASE_URL,
+                headers=self._headers,
+                http2=use_http2,
+                timeout=httpx.Timeout(settings.cloudflare_timeout_seconds),
+                limits=httpx.Limits(
+                    max_connections=settings.cloudflare_max_connections,
+                    max_keepalive_connections=settings.cloudflare_max_keepalive_connections,
+                    keepalive_expiry=settings.cloudflare_keepalive_expiry_seconds,
+                ),
+            )
+            self._clients[loop] = client
+            _live_services.add(self)
+            logger.debug("Opened pooled Cloudflare client for %s account (http2=%s)", self._label, use_http2)
+        return client
+
+    async def aclose(self, all_loops: bool = False) -> None:
+        """
+        Close the pooled client of the running loop. Safe to call more than once.
+
+        Args:
+            all_loops: Also close the clients opened on other loops. Each is closed
+                on its own loop: handed to it if it is running (the cloudflare_sync
+                loop), or run on a worker thread if it is stopped but not closed.
+        """
+        current = asyncio.get_running_loop()
+        loops = list(self._clients) if all_loops else [current]
+        for loop in loops:
+            client = self._clients.pop(loop, None)
+            if client is None or client.is_closed:
+                continue
+            if loop.is_closed():
+                # Its connections belong to a loop that can no longer run; they are
+                # released when the client is garbage collected
+                logger.debug("Dropped Cloudflare client of a closed loop for %s account", self._label)
+                continue
+            try:
+                if loop is current:
+                    await client.aclose()
+                elif loop.is_running():
+                    await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(client.aclose(), loop))
+                else:
+                    await asyncio.to_thread(loop.run_until_complete, client.aclose())
+            except Exception as e:
+                logger.warning("Error closing Cloudflare client for %s account: %s", self._label, e)
+                continue
+            logger.debug("Closed pooled Cloudflare client for %s account", self._label)
+        if not self._clients:
+            _live_services.discard(self)
 
     async def _request(
         self,
@@ -71,16 +268,27 @@ class CloudflareService:
         if json_data:
             logger.debug("Request body: %s", json_data)
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.request(
+        for attempt in range(self.MAX_RATE_LIMIT_RETRIES + 1):
+            await self._rate_limiter.acquire()
+            response = await self._get_client().request(
                 method=method,
-                url=url,
-                headers=self._headers,
+                url=endpoint,
                 json=json_data,
             )
+            if response.status_code != 429 or attempt == self.MAX_RATE_LIMIT_RETRIES:
+                break
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            self._rate_limiter.penalize(retry_after)
+            logger.warning(
+                "Cloudflare rate limited %s account on %s %s, retrying in %.0fs (attempt %d/%d)",
+                self._label, method, endpoint, retry_after, attempt + 1, self.MAX_RATE_LIMIT_RETRIES,
+            )
 
         logger.debug("Response status: %s", response.status_code)
-        data = response.json()
+        try:
+            data = response.json()
+        except ValueError:
+            data = {"success": False, "errors": [{"message": f"HTTP {response.status_code}: {response.text[:200]}"}]}
         logger.debug("Response body: %s", data)
 
         if not data.get("success", False):
@@ -198,6 +406,22 @@ class CloudflareService:
         logger.info("Zone %s status: %s", zone_id, status)
         return status
 
+    async def request_activation_check(self, zone_id: str) -> bool:
+        """
+        Ask Cloudflare to re-check a pending zone's nameservers now
+        (PUT /zones/{id}/activation_check) instead of waiting for its own schedule.
+
+        Returns:
+            True if the check was queued
+        """
+        try:
+            await self._request(method="PUT", endpoint=f"/zones/{zone_id}/activation_check")
+            logger.info("Requested activation check for zone %s", zone_id)
+            return True
+        except CloudflareError as e:
+            logger.warning("Activation check for zone %s not accepted: %s", zone_id, e)
+            return False
+
     async def get_zone_by_id(self, zone_id: str) -> Optional[dict]:
         """
         Get zone by ID to verify it still exists in Cloudflare.
@@ -308,37 +532,115 @@ class CloudflareService:
             "already_existed": False
         }
 
-    async def list_dns_records(self, zone_id: str) -> List[dict]:
+    async def list_zones(self, per_page: int | None = None) -> List[dict]:
+        """
+        List every zone on this account, paging through /zones.
+        
+        Args:
+            per_page: Page size (Cloudflare allows up to 50; defaults to settings)
+            
+        Returns:
+            List of {"zone_id": str, "name": str, "status": str, "nameservers": list}
+        """
+        per_page = per_page or get_settings().cloudflare_zone_page_size
+        zones: List[dict] = []
+        page = 1
+
+        while True:
+            data = await self._request(
+                method="GET",
+                endpoint=f"/zones?account.id={self._account_id}&per_page={per_page}&page={page}",
+            )
+            for zone in data.get("result", []):
+                zones.append({
+                    "zone_id": zone["id"],
+                    "name": zone["name"],
+                    "status": zone.get("status", "pending"),
+                    "nameservers": zone.get("name_servers", []),
+                })
+
+            total_pages = data.get("result_info", {}).get("total_pages") or 1
+            if page >= total_pages:
+                break
+            page += 1
+
+        logger.info("Listed %d zones on %s account (%d page(s))", len(zones), self._label, page)
+        return zones
+
+    @staticmethod
+    def _record_summary(r: dict) -> dict:
+        return {
+            "id": r["id"],
+            "type": r["type"],
+            "name": r["name"],
+            "content": r["content"],
+            "proxied": r.get("proxied", False),
+            "priority": r.get("priority")
+        }
+
+    def invalidate_dns_snapshot(self, zone_id: str) -> None:
+        """Drop the cached DNS records for a zone so the next read re-lists it."""
+        if self._dns_snapshots.pop(zone_id, None) is not None:
+            logger.debug("Invalidated DNS snapshot for zone %s", zone_id)
+
+    def _cached_dns_records(self, zone_id: str) -> Optional[list[dict]]:
+        snapshot = self._dns_snapshots.get(zone_id)
+        if snapshot is None:
+            return None
+        fetched_at, records = snapshot
+        if time.monotonic() - fetched_at > get_settings().cloudflare_dns_snapshot_ttl_seconds:
+            self._dns_snapshots.pop(zone_id, None)
+            return None
+        return records
+
+    def _store_dns_snapshot(self, zone_id: str, records: list[dict]) -> None:
+        now = time.monotonic()
+        ttl = get_settings().cloudflare_dns_snapshot_ttl_seconds
+        # Re-inserting keeps the dict ordered by fetch time, so the expired entries
+        # are always at the front
+        self._dns_snapshots.pop(zone_id, None)
+        while self._dns_snapshots:
+            oldest = next(iter(self._dns_snapshots))
+            if now - self._dns_snapshots[oldest][0] <= ttl:
+                break
+            del self._dns_snapshots[oldest]
+        self._dns_snapshots[zone_id] = (now, records)
+
+    async def list_dns_records(self, zone_id: str, refresh: bool = False) -> List[dict]:
         """
         Get all DNS records for a zone.
         
+        Served from the zone's snapshot while it is younger than
+        settings.cloudflare_dns_snapshot_ttl_seconds; our own writes keep it current.
+        
         Args:
             zone_id: Cloudflare zone ID
+            refresh: Ignore the snapshot and re-list from Cloudflare
             
         Returns:
             List of records with id, type, name, content, proxied, priority
         """
+        cached = None if refresh else self._cached_dns_records(zone_id)
+        if cached is not None:
+            logger.debug("Using DNS snapshot for zone %s (%d records)", zone_id, len(cached))
+            return [dict(r) for r in cached]
+
         logger.debug("Listing DNS records for zone: %s", zone_id)
         
-        data = await self._request(
-            method="GET",
-            endpoint=f"/zones/{zone_id}/dns_records",
-        )
+        try:
+            data = await self._request(
+                method="GET",
+                endpoint=f"/zones/{zone_id}/dns_records",
+            )
+        except Exception:
+            self.invalidate_dns_snapshot(zone_id)
+            raise
         
-        records = [
-            {
-                "id": r["id"],
-                "type": r["type"],
-                "name": r["name"],
-                "content": r["content"],
-                "proxied": r.get("proxied", False),
-                "priority": r.get("priority")
-            }
-            for r in data.get("result", [])
-        ]
+        records = [self._record_summary(r) for r in data.get("result", [])]
+        self._store_dns_snapshot(zone_id, records)
         
         logger.debug("Found %d DNS records in zone %s", len(records), zone_id)
-        return records
+        return [dict(r) for r in records]
 
     async def record_exists(self, zone_id: str, record_type: str, name: str, domain: Optional[str] = None) -> Optional[dict]:
         """
@@ -389,11 +691,23 @@ class CloudflareService:
         """
         logger.info("Updating DNS record %s in zone %s: %s", record_id, zone_id, updates)
         
-        await self._request(
-            method="PATCH",
-            endpoint=f"/zones/{zone_id}/dns_records/{record_id}",
-            json_data=updates,
-        )
+        try:
+            data = await self._request(
+                method="PATCH",
+                endpoint=f"/zones/{zone_id}/dns_records/{record_id}",
+                json_data=updates,
+            )
+        except Exception:
+            self.invalidate_dns_snapshot(zone_id)
+            raise
+        
+        cached = self._cached_dns_records(zone_id)
+        if cached is not None:
+            updated = data.get("result") or {}
+            for i, record in enumerate(cached):
+                if record["id"] == record_id:
+                    cached[i] = self._record_summary(updated) if updated.get("id") else {**record, **updates}
+                    break
         
         logger.info("DNS record %s updated successfully", record_id)
 
@@ -410,10 +724,18 @@ class CloudflareService:
         """
         logger.info("Deleting DNS record %s from zone %s", record_id, zone_id)
         
-        await self._request(
-            method="DELETE",
-            endpoint=f"/zones/{zone_id}/dns_records/{record_id}",
-        )
+        try:
+            await self._request(
+                method="DELETE",
+                endpoint=f"/zones/{zone_id}/dns_records/{record_id}",
+            )
+        except Exception:
+            self.invalidate_dns_snapshot(zone_id)
+            raise
+        
+        cached = self._cached_dns_records(zone_id)
+        if cached is not None:
+            cached[:] = [r for r in cached if r["id"] != record_id]
         
         logger.info("DNS record %s deleted successfully", record_id)
         return True
@@ -512,8 +834,8 @@ class CloudflareService:
         """
         Replace all SPF records with a single correct one.
         
-        1. Delete ALL existing SPF records at root domain
-        2. Create the new SPF record
+        Keeps (or patches) one v=spf1 TXT at the root with the new value and
+        deletes every other SPF record, in one batch write.
         
         Args:
             zone_id: Cloudflare zone ID
@@ -521,18 +843,17 @@ class CloudflareService:
             new_spf_value: The correct SPF value (e.g., "v=spf1 include:spf.protection.outlook.com -all")
             
         Returns:
-            New record ID
+            Record ID of the SPF record
         """
         logger.info("[%s] Replacing SPF record with: %s", domain, new_spf_value)
         
-        # Delete all existing SPF records
-        await self.delete_conflicting_spf_records(zone_id, domain, keep_value=None)
-        
-        # Create the new SPF record
-        record_id = await self.create_txt_record(zone_id, "@", new_spf_value)
-        logger.info("[%s] Created new SPF record: %s", domain, record_id)
+        outcome = await self.reconcile_dns(zone_id, domain, [spf_record(new_spf_value)])
+        spf = outcome["results"]["spf"]
+        if not spf["success"]:
+            raise CloudflareError(f"SPF replace failed for {domain}: {spf['error']}")
+        logger.info("[%s] SPF record now: %s", domain, spf["record_id"])
         
-        return record_id
+        return spf["record_id"]
 
     async def replace_dkim_cnames(
         self, zone_id: str, domain: str, selector1_value: str, selector2_value: str
@@ -540,8 +861,9 @@ class CloudflareService:
         """
         Replace DKIM CNAME records with correct values.
         
-        1. Delete ALL existing selector1._domainkey and selector2._domainkey CNAMEs
-        2. Create new ones with the correct values
+        Leaves exactly one DNS-only CNAME at selector1._domainkey and
+        selector2._domainkey with the given targets (conflicting records are
+        deleted), in one batch write.
         
         Args:
             zone_id: Cloudflare zone ID
@@ -556,27 +878,21 @@ class CloudflareService:
         logger.info("[%s] selector1 target: %s", domain, selector1_value)
         logger.info("[%s] selector2 target: %s", domain, selector2_value)
         
-        # Delete existing DKIM CNAMEs
-        await self.delete_conflicting_dkim_records(zone_id, domain)
-        
         result = {"selector1_id": None, "selector2_id": None}
         
-        # Create new DKIM CNAMEs (MUST be proxied=False for DKIM!)
-        try:
-            result["selector1_id"] = await self.create_cname_record(
-                zone_id, "selector1._domainkey", selector1_value, proxied=False
-            )
-            logger.info("[%s] Created selector1._domainkey CNAME", domain)
-        except Exception as e:
-            logger.error("[%s] Failed to create selector1 CNAME: %s", domain, e)
-        
         try:
-            result["selector2_id"] = await self.create_cname_record(
-                zone_id, "selector2._domainkey", selector2_value, proxied=False
-            )
-            logger.info("[%s] Created selector2._domainkey CNAME", domain)
+            outcome = await self.reconcile_dns(zone_id, domain, dkim_records(selector1_value, selector2_value))
         except Exception as e:
-            logger.error("[%s] Failed to create selector2 CNAME: %s", domain, e)
+            logger.error("[%s] Failed to replace DKIM CNAMEs: %s", domain, e)
+            return result
+        
+        for selector in ("selector1", "selector2"):
+            selector_result = outcome["results"][selector]
+            if selector_result["success"]:
+                result[f"{selector}_id"] = selector_result["record_id"]
+                logger.info("[%s] %s._domainkey CNAME in place", domain, selector)
+            else:
+                logger.error("[%s] Failed to create %s CNAME: %s", domain, selector, selector_result["error"])
         
         return result
 
@@ -588,12 +904,8 @@ class CloudflareService:
         you add a domain. If there's an old MS= record from a previous attempt,
         it MUST be replaced with the new one, or verification will fail.
         
-        This method:
-        1. Gets all TXT records at @ (root domain)
-        2. Finds any that start with MS=ms (M365 verification records)
-        3. If found with SAME value -> done (already correct)
-        4. If found with DIFFERENT value -> DELETE it first
-        5. Creates the new TXT record
+        Exactly one MS= TXT record is left at the root: an old one is patched to the
+        new value, extras are deleted, and nothing is written if it is already correct.
         
         Args:
             zone_id: Cloudflare zone ID
@@ -605,37 +917,10 @@ class CloudflareService:
         """
         logger.info("[%s] Ensuring verification TXT: %s", domain, txt_value)
         
-        # Get all DNS records for the zone
-        records = await self.list_dns_records(zone_id)
-        
-        # Check existing TXT records at root domain
-        for record in records:
-            if record["type"] != "TXT":
-                continue
-            
-            # Check if this is a root domain TXT record
-            record_name = record["name"].lower()
-            domain_lower = domain.lower()
-            
-            # Root domain TXT records have name == domain
-            if record_name == domain_lower:
-                content = record.get("content", "")
-                
-                # Check if it's an M365 verification record (starts with MS=ms)
-                if content.startswith("MS=ms") or content.startswith("ms=ms"):
-                    if content == txt_value:
-                        logger.info("[%s] Verification TXT already correct: %s", domain, txt_value)
-                        return True
-                    else:
-                        # Different value - DELETE the old one!
-                        logger.info("[%s] REPLACING old verification TXT: %s -> %s", 
-                                   domain, content, txt_value)
-                        await self.delete_dns_record(zone_id, record["id"])
-                        # Continue to create the new record below
-        
-        # Create the new verification TXT record
-        logger.info("[%s] Creating verification TXT: %s", domain, txt_value)
-        await self.create_txt_record(zone_id, "@", txt_value)
+        outcome = await self.reconcile_dns(zone_id, domain, [verification_txt(txt_value)])
+        verification = outcome["results"]["verification"]
+        if not verification["success"]:
+            raise CloudflareError(f"Verification TXT failed for {domain}: {verification['error']}")
         return True
 
     async def ensure_txt_record(self, zone_id: str, name: str, content: str, domain: Optional[str] = None) -> str:
@@ -755,7 +1040,8 @@ class CloudflareService:
     async def ensure_email_dns_records(self, zone_id: str, domain: str) -> dict:
         """
         Ensure all required email DNS records exist.
-        Creates only missing records.
+        Plans MX, SPF and autodiscover against the zone and applies only the
+        differences (one listing + one batch write).
         
         This is an idempotent operation - safe to call multiple times.
         
@@ -772,43 +1058,19 @@ class CloudflareService:
         """
         logger.info("Ensuring email DNS records exist for %s (zone: %s)", domain, zone_id)
         
-        results = {
-            "mx": {"success": False, "record_id": None, "error": None},
-            "spf": {"success": False, "record_id": None, "error": None},
-            "autodiscover": {"success": False, "record_id": None, "error": None}
-        }
-        
-        # MX Record - points to Microsoft 365
-        mx_target = f"{domain.replace('.', '-')}.mail.protection.outlook.com"
         try:
-            record_id = await self.ensure_mx_record(zone_id, "@", mx_target, 0, domain)
-            results["mx"]["success"] = True
-            results["mx"]["record_id"] = record_id
-            logger.info("MX record ensured for %s", domain)
+            outcome = await self.reconcile_dns(zone_id, domain, m365_email_records(domain))
+            results = outcome["results"]
         except Exception as e:
-            results["mx"]["error"] = str(e)
-            logger.error("Failed to ensure MX record for %s: %s", domain, e)
-        
-        # SPF Record - allows Microsoft 365 to send email
-        spf_content = "v=spf1 include:spf.protection.outlook.com ~all"
-        try:
-            record_id = await self.ensure_txt_record(zone_id, "@", spf_content, domain)
-            results["spf"]["success"] = True
-            results["spf"]["record_id"] = record_id
-            logger.info("SPF record ensured for %s", domain)
-        except Exception as e:
-            results["spf"]["error"] = str(e)
-            logger.error("Failed to ensure SPF record for %s: %s", domain, e)
+            logger.error("Failed to ensure email DNS records for %s: %s", domain, e)
+            results = {
+                key: {"success": False, "record_id": None, "error": str(e)}
+                for key in ("mx", "spf", "autodiscover")
+            }
         
-        # Autodiscover CNAME - for automatic email client configuration
-        try:
-            record_id = await self.ensure_cname_record(zone_id, "autodiscover", "autodiscover.outlook.com", proxied=False, domain=domain)
-            results["autodiscover"]["success"] = True
-            results["autodiscover"]["record_id"] = record_id
-            logger.info("Autodiscover CNAME ensured for %s", domain)
-        except Exception as e:
-            results["autodiscover"]["error"] = str(e)
-            logger.error("Failed to ensure autodiscover CNAME for %s: %s", domain, e)
+        for key, result in results.items():
+            if result["error"]:
+                logger.error("Failed to ensure %s record for %s: %s", key, domain, result["error"])
         
         success_count = sum(1 for r in results.values() if r["success"])
         logger.info("Email DNS records ensured for %s: %d/3 successful", domain, success_count)
@@ -840,38 +1102,204 @@ class CloudflareService:
             "errors": [],
         }
 
-        # Ensure selector1._domainkey CNAME
         try:
-            record_id = await self.ensure_cname_record(
-                zone_id=zone_id,
-                name="selector1._domainkey",
-                target=selector1_value,
-                proxied=False,  # MUST be DNS only for DKIM
-                domain=domain
-            )
-            result["selector1_id"] = record_id
-            logger.info("DKIM selector1 CNAME ensured for %s", domain)
+            outcome = await self.reconcile_dns(zone_id, domain, dkim_records(selector1_value, selector2_value))
         except Exception as e:
-            result["errors"].append(f"selector1 error: {e}")
-            logger.warning("Failed to ensure DKIM selector1 for %s: %s", domain, e)
+            result["errors"].append(f"DKIM error: {e}")
+            logger.warning("Failed to ensure DKIM CNAMEs for %s: %s", domain, e)
+            return result
+
+        for selector in ("selector1", "selector2"):
+            selector_result = outcome["results"][selector]
+            if selector_result["success"]:
+                result[f"{selector}_id"] = selector_result["record_id"]
+                logger.info("DKIM %s CNAME ensured for %s", selector, domain)
+            else:
+                result["errors"].append(f"{selector} error: {selector_result['error']}")
+                logger.warning("Failed to ensure DKIM %s for %s: %s", selector, domain, selector_result["error"])
+
+        return result
+
+    async def batch_dns_records(
+        self,
+        zone_id: str,
+        deletes: list[str] | None = None,
+        patches: list[dict] | None = None,
+        posts: list[dict] | None = None,
+    ) -> dict[str, Any]:
+        """
+        Write several DNS changes in one request (POST /dns_records/batch).
+        
+        Cloudflare applies deletes, then patches, then posts, atomically: either
+        all of them succeed or none do.
+        
+        Args:
+            zone_id: Cloudflare zone ID
+            deletes: Record IDs to delete
+            patches: Partial records, each with "id"
+            posts: New records
+            
+        Returns:
+            {"deletes": [...], "patches": [...], "posts": [...]} as returned by Cloudflare
+        """
+        body: dict[str, Any] = {}
+        if deletes:
+            body["deletes"] = [{"id": record_id} for record_id in deletes]
+        if patches:
+            body["patches"] = patches
+        if posts:
+            body["posts"] = posts
+        logger.info(
+            "Batch DNS write for zone %s: %d delete(s), %d patch(es), %d create(s)",
+            zone_id, len(deletes or []), len(patches or []), len(posts or []),
+        )
 
-        # Ensure selector2._domainkey CNAME
         try:
-            record_id = await self.ensure_cname_record(
-                zone_id=zone_id,
-                name="selector2._domainkey",
-                target=selector2_value,
-                proxied=False,  # MUST be DNS only for DKIM
-                domain=domain
+            data = await self._request(
+                method="POST",
+                endpoint=f"/zones/{zone_id}/dns_records/batch",
+                json_data=body,
             )
-            result["selector2_id"] = record_id
-            logger.info("DKIM selector2 CNAME ensured for %s", domain)
-        except Exception as e:
-            result["errors"].append(f"selector2 error: {e}")
-            logger.warning("Failed to ensure DKIM selector2 for %s: %s", domain, e)
+        except Exception:
+            self.invalidate_dns_snapshot(zone_id)
+            raise
 
+        result = data.get("result") or {}
+        cached = self._cached_dns_records(zone_id)
+        if cached is not None:
+            patched = {r["id"]: self._record_summary(r) for r in result.get("patches", []) if r.get("id")}
+            created = [self._record_summary(r) for r in result.get("posts", []) if r.get("id")]
+            if len(patched) != len(patches or []) or len(created) != len(posts or []):
+                self.invalidate_dns_snapshot(zone_id)
+            else:
+                deleted = set(deletes or [])
+                cached[:] = [patched.get(r["id"], r) for r in cached if r["id"] not in deleted]
+                cached.extend(created)
         return result
 
+    async def plan_dns(self, zone_id: str, domain: str, desired: list[DesiredRecord]) -> DnsPlan:
+        """Diff the desired records against the zone (served from its DNS snapshot)."""
+        existing = await self.list_dns_records(zone_id)
+        return build_plan(zone_id, domain, desired, existing)
+
+    async def apply_dns_plan(self, plan: DnsPlan) -> dict[str, dict[str, Any]]:
+        """
+        Apply a plan with one batch request, falling back to individual calls
+        if the batch is rejected (nothing is applied when a batch fails).
+        
+        Returns:
+            {record key: {"success": bool, "record_id": str?, "error": str?}}
+        """
+        results: dict[str, dict[str, Any]] = {}
+        for record, want in plan.unchanged:
+            results[want.label] = {"success": True, "record_id": record["id"], "error": None}
+        for record, want in plan.patches:
+            results[want.label] = {"success": False, "record_id": record["id"], "error": None}
+        for want in plan.creates:
+            results[want.label] = {"success": False, "record_id": None, "error": None}
+
+        if plan.is_empty:
+            logger.info("[%s] DNS already up to date (%d records)", plan.domain, len(plan.unchanged))
+            return results
+
+        try:
+            batch = await self.batch_dns_records(
+                plan.zone_id,
+                deletes=[r["id"] for r in plan.deletes],
+                patches=[{"id": r["id"], **want.as_cloudflare()} for r, want in plan.patches],
+                posts=[want.as_cloudflare() for want in plan.creates],
+            )
+        except CloudflareError as e:
+            logger.warning(
+                "[%s] Batch DNS write failed (%s), applying %d change(s) one by one",
+                plan.domain, e, plan.change_count,
+            )
+            await self._apply_dns_plan_sequentially(plan, results)
+            return results
+
+        for _, want in plan.patches:
+            results[want.label]["success"] = True
+        created = batch.get("posts", [])
+        for i, want in enumerate(plan.creates):
+            results[want.label]["success"] = True
+            if i < len(created):
+                results[want.label]["record_id"] = created[i].get("id")
+
+        logger.info("[%s] DNS plan applied: %d change(s)", plan.domain, plan.change_count)
+        return results
+
+    async def _apply_dns_plan_sequentially(self, plan: DnsPlan, results: dict[str, dict[str, Any]]) -> None:
+        for record in plan.deletes:
+            try:
+                await self.delete_dns_record(plan.zone_id, record["id"])
+            except Exception as e:
+                logger.warning("[%s] Failed to delete %s %s: %s", plan.domain, record["type"], record["name"], e)
+
+        for record, want in plan.patches:
+            try:
+                await self.update_record(plan.zone_id, record["id"], want.as_cloudflare())
+                results[want.label]["success"] = True
+            except Exception as e:
+                results[want.label]["error"] = str(e)
+
+        for want in plan.creates:
+            try:
+                results[want.label]["record_id"] = await self.create_dns_record(
+                    zone_id=plan.zone_id,
+                    record_type=want.type,
+                    name=want.name,
+                    content=want.content,
+                    priority=want.priority,
+                    proxied=want.proxied,
+                )
+                results[want.label]["success"] = True
+            except Exception as e:
+                results[want.label]["error"] = str(e)
+
+    async def reconcile_dns(
+        self, zone_id: str, domain: str, desired: list[DesiredRecord], dry_run: bool = False
+    ) -> dict[str, Any]:
+        """
+        Bring a zone's records in line with the desired set.
+        
+        Args:
+            zone_id: Cloudflare zone ID
+            domain: Domain name
+            desired: Records the zone should have
+            dry_run: Only report the plan, don't write anything
+            
+        Returns:
+            {"zone_id", "domain", "plan": {...}, "applied": bool, "results": {key: {...}}}
+        """
+        plan = await self.plan_dns(zone_id, domain, desired)
+        outcome: dict[str, Any] = {
+            "zone_id": zone_id,
+            "domain": domain,
+            "plan": plan.to_dict(),
+            "applied": False,
+            "results": {},
+        }
+        if dry_run:
+            return outcome
+        outcome["results"] = await self.apply_dns_plan(plan)
+        outcome["applied"] = True
+        return outcome
+
+    async def reconcile_zones(
+        self, zones: list[dict], dry_run: bool = False, max_workers: int | None = None
+    ) -> list[dict[str, Any]]:
+        """
+        Reconcile many zones in one pass.
+        
+        Args:
+            zones: [{"zone_id": str, "domain": str, "records": [DesiredRecord, ...]}, ...]
+            dry_run: Only report plans
+            
+        Returns:
+            reconcile_dns() outcome per zone, in input order (with "error" set if it failed)
+        """
+        return await _reconcile_zones(self, zones, dry_run, max_workers)
+
     async def create_dns_record(
         self,
         zone_id: str,
@@ -906,13 +1334,24 @@ class CloudflareService:
         if priority is not None:
             json_data["priority"] = priority
 
-        data = await self._request(
-            method="POST",
-            endpoint=f"/zones/{zone_id}/dns_records",
-            json_data=json_data,
-        )
+        try:
+            data = await self._request(
+                method="POST",
+                endpoint=f"/zones/{zone_id}/dns_records",
+                json_data=json_data,
+            )
+        except Exception:
+            self.invalidate_dns_snapshot(zone_id)
+            raise
 
-        record_id = data.get("result", {}).get("id", "")
+        created = data.get("result") or {}
+        record_id = created.get("id", "")
+        cached = self._cached_dns_records(zone_id)
+        if cached is not None:
+            if created.get("id") and created.get("name"):
+                cached.append(self._record_summary(created))
+            else:
+                self.invalidate_dns_snapshot(zone_id)
         logger.info("DNS record created: %s", record_id)
         return record_id
 
@@ -1197,55 +1636,101 @@ class CloudflareService:
         Returns:
             True if NS match, False otherwise
         """
-        logger.info("Checking NS propagation for %s, expecting: %s", domain, expected_ns)
-
-        def _resolve_sync() -> bool:
-            """Synchronous DNS resolution - runs in thread to avoid blocking event loop."""
-            resolver = dns.resolver.Resolver()
-            resolver.timeout = 5
-            resolver.lifetime = 10
-
-            answers = resolver.resolve(domain, "NS")
-            current_ns = sorted([str(rdata.target).rstrip(".").lower() for rdata in answers])
-            expected = sorted([ns.lower() for ns in expected_ns])
-
-            match = current_ns == expected
-            logger.info(
-                "NS propagation check for %s: current=%s, expected=%s, match=%s",
-                domain,
-                current_ns,
-                expected,
-                match,
-            )
-            return match
+        result = await check_ns(domain, expected_ns)
+        logger.info(
+            "NS propagation check for %s: current=%s, expected=%s, match=%s%s",
+            domain,
+            result.current_ns,
+            result.expected_ns,
+            result.propagated,
+            f" ({result.error})" if result.error else "",
+        )
+        return result.propagated
+
+    async def zone_statuses(self) -> dict[str, str]:
+        """Status of every zone on this account (one paged listing): {zone_id: status}."""
+        return {zone["zone_id"]: zone["status"] for zone in await self.list_zones()}
+
+    async def bulk_check_ns_propagation(
+        self, domains: list[dict], max_workers: int | None = None
+    ) -> list[dict[str, Any]]:
+        """
+        Check NS propagation for many domains at once.
+
+        DNS lookups run concurrently (at most max_workers in flight, default
+        settings.ns_check_max_concurrency). Zone statuses come from one paged
+        zone listing instead of a GET per zone.
+
+        Args:
+            domains: [{"domain": str, "expected_ns": [str], "zone_id": str | None}, ...]
+
+        Returns:
+            Per domain, in input order: {"domain", "propagated", "current_ns",
+            "expected_ns", "error", "zone_status"} (zone_status None if unknown)
+        """
+        return await _bulk_check_ns_propagation(self, domains, max_workers)
+
+    async def _create_zone_with_phase1(self, domain: str) -> dict[str, Any]:
+        """Create one zone plus its Phase 1 DNS. Never raises; errors go in the result dict."""
+        result: dict[str, Any] = {
+            "domain": domain,
+            "success": False,
+            "zone_id": None,
+            "nameservers": [],
+            "phase1_dns": None,
+            "error": None,
+        }
 
         try:
-            # Run synchronous DNS resolution in a thread to avoid blocking the event loop
-            return await asyncio.to_thread(_resolve_sync)
-        except dns.resolver.NXDOMAIN:
-            logger.warning("Domain %s not found (NXDOMAIN)", domain)
-            return False
-        except dns.resolver.NoAnswer:
-            logger.warning("No NS records found for %s", domain)
-            return False
-        except dns.resolver.Timeout:
-            logger.warning("DNS timeout checking NS for %s", domain)
-            return False
+            # Step 1: Create zone
+            zone_data = await self.create_zone(domain)
+            result["zone_id"] = zone_data["zone_id"]
+            result["nameservers"] = zone_data["nameservers"]
+
         except Exception as e:
-            logger.error("Error checking NS propagation for %s: %s", domain, e)
-            return False
+            result["error"] = str(e)
+            logger.error("Failed to create zone for %s: %s", domain, e)
+            return result
+
+        # Step 2: Create Phase 1 DNS records. The zone exists either way, so a
+        # failure here leaves phase1_dns=None for a later DNS-only retry.
+        result["success"] = True
+        try:
+            result["phase1_dns"] = await self.create_phase1_dns(zone_data["zone_id"], domain)
+        except Exception as e:
+            logger.warning("Phase 1 DNS failed for %s: %s", domain, e)
+
+        return result
+
+    async def iter_bulk_create_zones(
+        self, domains: list[str], max_workers: int | None = None
+    ) -> AsyncIterator[dict[str, Any]]:
+        """
+        Concurrent bulk_create_zones that yields each domain's result as soon as it finishes.
+
+        Results arrive in completion order (use result["domain"] to match them up).
+        """
+        workers = max_workers or get_settings().cloudflare_bulk_max_workers
+        done = 0
+        async for _, result in bounded_as_completed(domains, self._create_zone_with_phase1, workers):
+            done += 1
+            if result["success"]:
+                logger.info("Successfully created zone for %s (%d/%d)", result["domain"], done, len(domains))
+            yield result
 
-    async def bulk_create_zones(self, domains: list[str]) -> list[dict[str, Any]]:
+    async def bulk_create_zones(
+        self, domains: list[str], max_workers: int | None = None
+    ) -> list[dict[str, Any]]:
         """
-        Create zones for multiple domains with rate limiting.
-        Cloudflare API rate limit: ~4 requests/second
+        Create zones for multiple domains, up to max_workers at a time
+        (defaults to settings.cloudflare_bulk_max_workers; 1 = one at a time).
+        Requests are paced by the per-account token bucket (1200 requests / 5 min).
 
         For each domain:
         1. Call create_zone() to create zone and get nameservers
         2. Call create_phase1_dns() to add CNAME and DMARC
-        3. Wait 0.25 seconds before next domain (rate limiting)
 
-        Returns:
+        Returns (in the same order as domains):
             [
                 {
                     "domain": "example.com",
@@ -1257,95 +1742,78 @@ class CloudflareService:
                 ...
             ]
         """
-        logger.info("Bulk creating zones for %d domains", len(domains))
-        results: list[dict[str, Any]] = []
-
-        for i, domain in enumerate(domains):
-            result: dict[str, Any] = {
-                "domain": domain,
-                "success": False,
-                "zone_id": None,
-                "nameservers": [],
-                "phase1_dns": None,
-                "error": None,
-            }
+        workers = max_workers or get_settings().cloudflare_bulk_max_workers
+        logger.info("Bulk creating zones for %d domains (%d workers)", len(domains), workers)
+        results: list[dict[str, Any]] = [{} for _ in domains]
 
-            try:
-                # Step 1: Create zone
-                zone_data = await self.create_zone(domain)
-                result["zone_id"] = zone_data["zone_id"]
-                result["nameservers"] = zone_data["nameservers"]
-
-                # Step 2: Create Phase 1 DNS records
-                phase1_result = await self.create_phase1_dns(zone_data["zone_id"], domain)
-                result["phase1_dns"] = phase1_result
-                result["success"] = True
+        done = 0
+        async for i, result in bounded_as_completed(domains, self._create_zone_with_phase1, workers):
+            done += 1
+            results[i] = result
+            if result["success"]:
+                logger.info("Successfully created zone for %s (%d/%d)", result["domain"], done, len(domains))
 
-                logger.info("Successfully created zone for %s (%d/%d)", domain, i + 1, len(domains))
+        success_count = sum(1 for r in results if r["success"])
+        logger.info("Bulk zone creation complete: %d/%d successful", success_count, len(domains))
 
-            except CloudflareError as e:
-                result["error"] = str(e)
-                logger.error("Failed to create zone for %s: %s", domain, e)
+        return results
 
-            results.append(result)
+    async def _setup_zone_only(self, domain: str) -> dict[str, Any]:
+        """Create or find one zone and return its nameservers. Never raises."""
+        result: dict[str, Any] = {
+            "domain": domain,
+            "success": False,
+            "zone_id": None,
+            "nameservers": [],
+            "zone_status": None,
+            "already_existed": False,
+            "account_label": None,
+            "error": None,
+        }
 
-            # Rate limiting: wait 0.25 seconds between API calls (4 req/sec)
-            if i < len(domains) - 1:
-                await asyncio.sleep(0.25)
+        try:
+            zone_data = await self.get_or_create_zone(domain)
+            zone_id = zone_data["zone_id"]
+            nameservers = zone_data.get("nameservers", [])
+            if not nameservers and zone_id:
+                nameservers = await self.get_zone_nameservers(zone_id)
 
-        success_count = sum(1 for r in results if r["success"])
-        logger.info("Bulk zone creation complete: %d/%d successful", success_count, len(domains))
+            result.update(
+                {
+                    "success": True,
+                    "zone_id": zone_id,
+                    "nameservers": nameservers,
+                    "zone_status": zone_data.get("status", "pending"),
+                    "already_existed": zone_data.get("already_existed", False),
+                    "account_label": zone_data.get("account_label"),
+                }
+            )
+        except Exception as e:
+            result["error"] = str(e)
+            logger.error("Standalone zone setup failed for %s: %s", domain, e)
 
-        return results
+        return result
 
-    async def bulk_setup_zones_only(self, domains: list[str]) -> list[dict[str, Any]]:
+    async def bulk_setup_zones_only(
+        self, domains: list[str], max_workers: int | None = None
+    ) -> list[dict[str, Any]]:
         """
         Create or find Cloudflare zones and return nameservers only.
 
         This intentionally does not create DNS records or advance the broader
         setup workflow. It is for registrar nameserver handoff.
+        Runs up to max_workers domains at a time; results keep input order.
         """
-        logger.info("Standalone Cloudflare zone setup for %d domains", len(domains))
-        results: list[dict[str, Any]] = []
-
-        for i, domain in enumerate(domains):
-            result: dict[str, Any] = {
-                "domain": domain,
-                "success": False,
-                "zone_id": None,
-                "nameservers": [],
-                "zone_status": None,
-                "already_existed": False,
-                "account_label": None,
-                "error": None,
-            }
-
-            try:
-                zone_data = await self.get_or_create_zone(domain)
-                zone_id = zone_data["zone_id"]
-                nameservers = zone_data.get("nameservers", [])
-                if not nameservers and zone_id:
-                    nameservers = await self.get_zone_nameservers(zone_id)
-
-                result.update(
-                    {
-                        "success": True,
-                        "zone_id": zone_id,
-                        "nameservers": nameservers,
-                        "zone_status": zone_data.get("status", "pending"),
-                        "already_existed": zone_data.get("already_existed", False),
-                        "account_label": zone_data.get("account_label"),
-                    }
-                )
-                logger.info("Standalone zone setup complete for %s (%d/%d)", domain, i + 1, len(domains))
-            except Exception as e:
-                result["error"] = str(e)
-                logger.error("Standalone zone setup failed for %s: %s", domain, e)
-
-            results.append(result)
+        workers = max_workers or get_settings().cloudflare_bulk_max_workers
+        logger.info("Standalone Cloudflare zone setup for %d domains (%d workers)", len(domains), workers)
+        results: list[dict[str, Any]] = [{} for _ in domains]
 
-            if i < len(domains) - 1:
-                await asyncio.sleep(0.25)
+        done = 0
+        async for i, result in bounded_as_completed(domains, self._setup_zone_only, workers):
+            done += 1
+            results[i] = result
+            if result["success"]:
+                logger.info("Standalone zone setup complete for %s (%d/%d)", result["domain"], done, len(domains))
 
         success_count = sum(1 for r in results if r["success"])
         logger.info(
@@ -1505,7 +1973,7 @@ class CloudflareService:
             ...
         ]
         
-        Rate limiting: 4 requests/second (0.25s between calls)
+        Rate limiting: paced by the per-account token bucket
         
         Returns: [
             {"domain": "example.com", "success": true, "redirect_url": "https://main.com"},
@@ -1545,10 +2013,6 @@ class CloudflareService:
                 logger.error("Failed to create redirect rule for %s: %s", domain, e)
             
             results.append(result)
-            
-            # Rate limiting: wait 0.25 seconds between API calls (4 req/sec)
-            if i < len(domains) - 1:
-                await asyncio.sleep(0.25)
         
         success_count = sum(1 for r in results if r["success"])
         logger.info("Bulk redirect rule creation complete: %d/%d successful", success_count, len(domains))
@@ -1598,30 +2062,85 @@ class MultiCloudflareService:
         logger.info("MultiCloudflareService initialized with %d account(s): %s",
                     len(self._services), ", ".join(self._labels))
 
-        # Cache: zone_id -> service index (so we don't re-lookup every time)
+        # Cache: zone_id -> service index (so we don't re-lookup every time).
+        # Read-through layer over the persisted cross-account zone index.
         self._zone_owner_cache: dict[str, int] = {}
+        self.zone_index = CloudflareZoneIndex(self._services)
 
     @property
     def primary(self) -> CloudflareService:
         """Get the primary account service."""
         return self._services[0]
 
+    def rate_limit_status(self) -> list[dict[str, Any]]:
+        """Rate limiter snapshot for every configured account."""
+        return [svc.rate_limit_status() for svc in self._services]
+
+    async def aclose(self) -> None:
+        """Close the pooled client of every account."""
+        for svc in self._services:
+            await svc.aclose()
+
+    async def refresh_zone_index(self, force: bool = False) -> bool:
+        """
+        Make sure the cross-account zone index is loaded and fresh.
+        
+        Costs one paged /zones listing per account when stale, nothing otherwise.
+        Returns True if every account was listed (so index misses can be trusted).
+        """
+        try:
+            return await self.zone_index.refresh(force=force)
+        except Exception as e:
+            logger.warning("Zone index refresh failed: %s", e)
+            return False
+
+    async def resolve_zones(self, domains: list[str]) -> dict[str, Optional[dict]]:
+        """
+        Resolve zones for a whole batch of domains from the zone index.
+        
+        Returns:
+            {domain: {"zone_id", "name", "status", "nameservers", "account_label"} or None}
+        """
+        complete = await self.refresh_zone_index()
+        resolved: dict[str, Optional[dict]] = {}
+        for domain in domains:
+            entry = self.zone_index.lookup(domain)
+            if entry:
+                self._zone_owner_cache[entry.zone_id] = entry.account_index
+                resolved[domain] = {**entry.as_zone_info(), "account_label": self._labels[entry.account_index]}
+            elif complete:
+                resolved[domain] = None
+            else:
+                # Index incomplete (an account failed to list) - fall back to a direct lookup
+                resolved[domain] = await self.get_zone_by_name(domain)
+        return resolved
+
     async def _find_service_for_zone(self, zone_id: str) -> CloudflareService:
         """
-        Find which account owns a zone_id by trying each account.
-        Results are cached for performance.
+        Find which account owns a zone_id.
+        Checks the process cache, then the zone index, then tries each account.
         """
         # Check cache first
         if zone_id in self._zone_owner_cache:
             idx = self._zone_owner_cache[zone_id]
             return self._services[idx]
 
+        # Then the zone index
+        await self.zone_index.ensure_loaded()
+        entry = self.zone_index.get(zone_id)
+        if entry:
+            self._zone_owner_cache[zone_id] = entry.account_index
+            return self._services[entry.account_index]
+
         # Try each account
         for i, svc in enumerate(self._services):
             try:
                 zone_info = await svc.get_zone_by_id(zone_id)
                 if zone_info:
                     self._zone_owner_cache[zone_id] = i
+                    await self.zone_index.record(
+                        i, zone_id, zone_info["name"], zone_info["status"], zone_info["nameservers"]
+                    )
                     logger.info("Zone %s owned by account %s", zone_id, self._labels[i])
                     return svc
             except Exception:
@@ -1632,9 +2151,22 @@ class MultiCloudflareService:
         return self._services[0]
 
     async def get_zone_by_name(self, domain: str) -> Optional[dict]:
-        """Search ALL accounts for a zone by domain name. Prefer active zones."""
+        """
+        Find a zone by domain name across ALL accounts. Prefer active zones.
+        
+        Answered from the zone index when it is fresh; otherwise searches each account.
+        """
+        if await self.refresh_zone_index():
+            entry = self.zone_index.lookup(domain)
+            if entry is None:
+                return None
+            self._zone_owner_cache[entry.zone_id] = entry.account_index
+            return {**entry.as_zone_info(), "account_label": self._labels[entry.account_index]}
+        return await self._search_accounts(domain)
+
+    async def _search_accounts(self, domain: str) -> Optional[dict]:
+        """Look a domain up on each account (?name=), preferring active zones."""
         best_result = None
-        best_service_idx = 0
 
         for i, svc in enumerate(self._services):
             try:
@@ -1642,6 +2174,7 @@ class MultiCloudflareService:
                 if result:
                     zone_id = result["zone_id"]
                     self._zone_owner_cache[zone_id] = i
+                    await self.zone_index.record(i, zone_id, result["name"], result["status"], result["nameservers"])
                     logger.info("Found zone for %s in account %s (status=%s, zone_id=%s)",
                                domain, self._labels[i], result["status"], zone_id)
 
@@ -1650,7 +2183,6 @@ class MultiCloudflareService:
                         return {**result, "account_label": self._labels[i]}
                     elif best_result is None:
                         best_result = {**result, "account_label": self._labels[i]}
-                        best_service_idx = i
             except Exception as e:
                 logger.warning("Error checking account %s for zone %s: %s", self._labels[i], domain, e)
                 continue
@@ -1658,12 +2190,22 @@ class MultiCloudflareService:
         return best_result
 
     async def get_zone_by_id(self, zone_id: str) -> Optional[dict]:
-        """Get zone by ID, trying each account."""
-        for i, svc in enumerate(self._services):
+        """Get zone by ID, asking the owning account first (from cache/index), then each account."""
+        await self.zone_index.ensure_loaded()
+        owner = self._zone_owner_cache.get(zone_id)
+        if owner is None and self.zone_index.get(zone_id):
+            owner = self.zone_index.get(zone_id).account_index
+        order = list(range(len(self._services)))
+        if owner is not None:
+            order.remove(owner)
+            order.insert(0, owner)
+
+        for i in order:
             try:
-                result = await svc.get_zone_by_id(zone_id)
+                result = await self._services[i].get_zone_by_id(zone_id)
                 if result:
                     self._zone_owner_cache[zone_id] = i
+                    await self.zone_index.record(i, zone_id, result["name"], result["status"], result["nameservers"])
                     return result
             except Exception:
                 continue
@@ -1676,7 +2218,12 @@ class MultiCloudflareService:
         This is the key method - it checks every account before creating a new zone.
         """
         # Search all accounts for existing zone
+        index_fresh = self.zone_index.is_fresh
         existing = await self.get_zone_by_name(domain)
+        if existing is None and index_fresh:
+            # The index only knows what this process listed or recorded: another
+            # process (API vs. worker) or the dashboard may have created it since
+            existing = await self._search_accounts(domain)
         if existing:
             logger.info("Using existing zone for %s from account %s (zone_id=%s, status=%s)",
                        domain, existing.get("account_label", "?"), existing["zone_id"], existing["status"])
@@ -1690,12 +2237,10 @@ class MultiCloudflareService:
 
         # Not found in any account - create in primary
         logger.info("Zone not found in any account for %s, creating in primary", domain)
-        zone_data = await self.primary.create_zone(domain)
-        zone_id = zone_data["zone_id"]
-        self._zone_owner_cache[zone_id] = 0
+        zone_data = await self.create_zone(domain)
 
         return {
-            "zone_id": zone_id,
+            "zone_id": zone_data["zone_id"],
             "nameservers": zone_data["nameservers"],
             "status": zone_data["status"],
             "already_existed": False,
@@ -1716,6 +2261,14 @@ class MultiCloudflareService:
         # NS propagation is DNS-level, doesn't need a specific account
         return await self.primary.check_ns_propagation(domain, expected_ns)
 
+    async def zone_statuses(self) -> dict[str, str]:
+        """Status of every zone on every account, from a forced zone index refresh (one paged listing per account)."""
+        await self.refresh_zone_index(force=True)
+        return self.zone_index.statuses()
+
+    async def bulk_check_ns_propagation(self, domains: list[dict], max_workers: int | None = None) -> list[dict]:
+        return await _bulk_check_ns_propagation(self, domains, max_workers)
+
     async def create_txt_record(self, zone_id: str, name: str, value: str) -> str:
         svc = await self._find_service_for_zone(zone_id)
         return await svc.create_txt_record(zone_id, name, value)
@@ -1749,7 +2302,13 @@ class MultiCloudflareService:
         return await svc.ensure_verification_txt(zone_id, domain, txt_value)
 
     async def create_zone(self, domain_name: str) -> dict:
-        return await self.primary.create_zone(domain_name)
+        zone_data = await self.primary.create_zone(domain_name)
+        if zone_data.get("zone_id"):
+            self._zone_owner_cache[zone_data["zone_id"]] = 0
+            await self.zone_index.record(
+                0, zone_data["zone_id"], domain_name, zone_data.get("status", "pending"), zone_data.get("nameservers")
+            )
+        return zone_data
 
     async def create_phase1_dns(self, zone_id: str, domain: str) -> dict:
         svc = await self._find_service_for_zone(zone_id)
@@ -1779,9 +2338,29 @@ class MultiCloudflareService:
         svc = await self._find_service_for_zone(zone_id)
         return await svc.delete_conflicting_dkim_records(zone_id, domain)
 
-    async def list_dns_records(self, zone_id: str) -> list:
+    async def list_dns_records(self, zone_id: str, refresh: bool = False) -> list:
         svc = await self._find_service_for_zone(zone_id)
-        return await svc.list_dns_records(zone_id)
+        return await svc.list_dns_records(zone_id, refresh=refresh)
+
+    def invalidate_dns_snapshot(self, zone_id: str) -> None:
+        for svc in self._services:
+            svc.invalidate_dns_snapshot(zone_id)
+
+    async def plan_dns(self, zone_id: str, domain: str, desired: list[DesiredRecord]) -> DnsPlan:
+        svc = await self._find_service_for_zone(zone_id)
+        return await svc.plan_dns(zone_id, domain, desired)
+
+    async def apply_dns_plan(self, plan: DnsPlan) -> dict:
+        svc = await self._find_service_for_zone(plan.zone_id)
+        return await svc.apply_dns_plan(plan)
+
+    async def reconcile_dns(self, zone_id: str, domain: str, desired: list[DesiredRecord], dry_run: bool = False) -> dict:
+        svc = await self._find_service_for_zone(zone_id)
+        return await svc.reconcile_dns(zone_id, domain, desired, dry_run=dry_run)
+
+    async def reconcile_zones(self, zones: list[dict], dry_run: bool = False, max_workers: int | None = None) -> list[dict]:
+        """Reconcile many zones across all accounts (each zone goes to its owning account)."""
+        return await _reconcile_zones(self, zones, dry_run, max_workers)
 
     async def get_dns_records_by_type(self, zone_id: str, record_type: str) -> list:
         svc = await self._find_service_for_zone(zone_id)
@@ -1791,6 +2370,10 @@ class MultiCloudflareService:
         svc = await self._find_service_for_zone(zone_id)
         return await svc.delete_dns_record(zone_id, record_id)
 
+    async def request_activation_check(self, zone_id: str) -> bool:
+        svc = await self._find_service_for_zone(zone_id)
+        return await svc.request_activation_check(zone_id)
+
     async def get_zone_status(self, zone_id: str) -> str:
         svc = await self._find_service_for_zone(zone_id)
         return await svc.get_zone_status(zone_id)
@@ -1799,104 +2382,139 @@ class MultiCloudflareService:
         svc = await self._find_service_for_zone(zone_id)
         return await svc.get_zone_nameservers(zone_id)
 
-    async def bulk_create_zones(self, domains: list[str]) -> list[dict]:
-        """
-        Create zones for multiple domains, searching ALL accounts first.
-        Uses get_or_create_zone() per domain to prefer active zones from any account.
-        """
-        logger.info("Multi-account bulk creating zones for %d domains", len(domains))
-        results: list[dict] = []
+    async def _get_or_create_zone_with_phase1(self, domain: str) -> dict:
+        """Find (any account) or create one zone plus its Phase 1 DNS. Never raises."""
+        result: dict = {
+            "domain": domain,
+            "success": False,
+            "zone_id": None,
+            "nameservers": [],
+            "phase1_dns": None,
+            "error": None,
+        }
 
-        for i, domain in enumerate(domains):
-            result: dict = {
-                "domain": domain,
-                "success": False,
-                "zone_id": None,
-                "nameservers": [],
-                "phase1_dns": None,
-                "error": None,
-            }
+        try:
+            # Search ALL accounts for existing zone (prefers active over pending)
+            zone_data = await self.get_or_create_zone(domain)
+            result["zone_id"] = zone_data["zone_id"]
+            result["nameservers"] = zone_data["nameservers"]
 
-            try:
-                # Search ALL accounts for existing zone (prefers active over pending)
-                zone_data = await self.get_or_create_zone(domain)
-                result["zone_id"] = zone_data["zone_id"]
-                result["nameservers"] = zone_data["nameservers"]
+            result["account_label"] = zone_data.get("account_label")
 
-                # Create Phase 1 DNS records (uses correct account via _find_service_for_zone)
-                phase1_result = await self.create_phase1_dns(zone_data["zone_id"], domain)
-                result["phase1_dns"] = phase1_result
-                result["success"] = True
+        except Exception as e:
+            result["error"] = str(e)
+            logger.error("Failed to create/find zone for %s: %s", domain, e)
+            return result
 
-                logger.info("Successfully processed zone for %s (%d/%d) from account %s",
-                           domain, i + 1, len(domains), zone_data.get("account_label", "?"))
+        # Create Phase 1 DNS records (uses correct account via _find_service_for_zone).
+        # The zone is kept on failure; phase1_dns=None lets a later DNS-only pass retry.
+        result["success"] = True
+        try:
+            result["phase1_dns"] = await self.create_phase1_dns(zone_data["zone_id"], domain)
+        except Exception as e:
+            logger.warning("Phase 1 DNS failed for %s: %s", domain, e)
 
-            except Exception as e:
-                result["error"] = str(e)
-                logger.error("Failed to create/find zone for %s: %s", domain, e)
+        return result
 
-            results.append(result)
+    async def iter_bulk_create_zones(self, domains: list[str], max_workers: int | None = None) -> AsyncIterator[dict]:
+        """
+        Concurrent multi-account bulk_create_zones that yields each result as soon as it finishes.
+
+        Results arrive in completion order (use result["domain"] to match them up).
+        """
+        workers = max_workers or get_settings().cloudflare_bulk_max_workers
+        await self.refresh_zone_index()
+        done = 0
+        async for _, result in bounded_as_completed(domains, self._get_or_create_zone_with_phase1, workers):
+            done += 1
+            if result["success"]:
+                logger.info("Successfully processed zone for %s (%d/%d) from account %s",
+                           result["domain"], done, len(domains), result.get("account_label", "?"))
+            yield result
 
-            # Rate limiting
-            if i < len(domains) - 1:
-                await asyncio.sleep(0.25)
+    async def bulk_create_zones(self, domains: list[str], max_workers: int | None = None) -> list[dict]:
+        """
+        Create zones for multiple domains, searching ALL accounts first.
+        Uses get_or_create_zone() per domain to prefer active zones from any account.
+        Runs up to max_workers domains at a time; results keep input order.
+        """
+        workers = max_workers or get_settings().cloudflare_bulk_max_workers
+        logger.info("Multi-account bulk creating zones for %d domains (%d workers)", len(domains), workers)
+        # One paged /zones listing per account instead of a lookup per domain per account
+        await self.refresh_zone_index()
+        results: list[dict] = [{} for _ in domains]
+
+        done = 0
+        async for i, result in bounded_as_completed(domains, self._get_or_create_zone_with_phase1, workers):
+            done += 1
+            results[i] = result
+            if result["success"]:
+                logger.info("Successfully processed zone for %s (%d/%d) from account %s",
+                           result["domain"], done, len(domains), result.get("account_label", "?"))
 
         success_count = sum(1 for r in results if r["success"])
         logger.info("Multi-account bulk zone creation complete: %d/%d successful", success_count, len(domains))
         return results
 
-    async def bulk_setup_zones_only(self, domains: list[str]) -> list[dict]:
-        """
-        Create or find Cloudflare zones across all configured accounts and return nameservers only.
-        Does not create DNS records.
-        """
-        logger.info("Multi-account standalone Cloudflare zone setup for %d domains", len(domains))
-        results: list[dict] = []
+    async def _setup_zone_only(self, domain: str) -> dict:
+        """Create or find one zone across all accounts and return its nameservers. Never raises."""
+        result: dict = {
+            "domain": domain,
+            "success": False,
+            "zone_id": None,
+            "nameservers": [],
+            "zone_status": None,
+            "already_existed": False,
+            "account_label": None,
+            "error": None,
+        }
 
-        for i, domain in enumerate(domains):
-            result: dict = {
-                "domain": domain,
-                "success": False,
-                "zone_id": None,
-                "nameservers": [],
-                "zone_status": None,
-                "already_existed": False,
-                "account_label": None,
-                "error": None,
-            }
+        try:
+            zone_data = await self.get_or_create_zone(domain)
+            zone_id = zone_data["zone_id"]
+            nameservers = zone_data.get("nameservers", [])
+            if not nameservers and zone_id:
+                nameservers = await self.get_zone_nameservers(zone_id)
 
-            try:
-                zone_data = await self.get_or_create_zone(domain)
-                zone_id = zone_data["zone_id"]
-                nameservers = zone_data.get("nameservers", [])
-                if not nameservers and zone_id:
-                    nameservers = await self.get_zone_nameservers(zone_id)
-
-                result.update(
-                    {
-                        "success": True,
-                        "zone_id": zone_id,
-                        "nameservers": nameservers,
-                        "zone_status": zone_data.get("status", "pending"),
-                        "already_existed": zone_data.get("already_existed", False),
-                        "account_label": zone_data.get("account_label"),
-                    }
-                )
+            result.update(
+                {
+                    "success": True,
+                    "zone_id": zone_id,
+                    "nameservers": nameservers,
+                    "zone_status": zone_data.get("status", "pending"),
+                    "already_existed": zone_data.get("already_existed", False),
+                    "account_label": zone_data.get("account_label"),
+                }
+            )
+        except Exception as e:
+            result["error"] = str(e)
+            logger.error("Standalone zone setup failed for %s: %s", domain, e)
+
+        return result
+
+    async def bulk_setup_zones_only(self, domains: list[str], max_workers: int | None = None) -> list[dict]:
+        """
+        Create or find Cloudflare zones across all configured accounts and return nameservers only.
+        Does not create DNS records. Runs up to max_workers domains at a time; results keep input order.
+        """
+        workers = max_workers or get_settings().cloudflare_bulk_max_workers
+        logger.info("Multi-account standalone Cloudflare zone setup for %d domains (%d workers)", len(domains), workers)
+        # One paged /zones listing per account instead of a lookup per domain per account
+        await self.refresh_zone_index()
+        results: list[dict] = [{} for _ in domains]
+
+        done = 0
+        async for i, result in bounded_as_completed(domains, self._setup_zone_only, workers):
+            done += 1
+            results[i] = result
+            if result["success"]:
                 logger.info(
                     "Standalone zone setup complete for %s (%d/%d) from account %s",
-                    domain,
-                    i + 1,
+                    result["domain"],
+                    done,
                     len(domains),
-                    zone_data.get("account_label", "?"),
+                    result.get("account_label", "?"),
                 )
-            except Exception as e:
-                result["error"] = str(e)
-                logger.error("Standalone zone setup failed for %s: %s", domain, e)
-
-            results.append(result)
-
-            if i < len(domains) - 1:
-                await asyncio.sleep(0.25)
 
         success_count = sum(1 for r in results if r["success"])
         logger.info(
@@ -1952,3 +2570,27 @@ except CloudflareError:
     # Allow module to load even without credentials (for testing/development)
     cloudflare_service = None  # type: ignore
     logger.warning("CloudflareService not initialized - credentials not configured")
+
+
+def get_shared_cloudflare_service() -> CloudflareService:
+    """
+    Return the primary-account service of the singleton, so callers share its pooled client.
+
+    Raises CloudflareError (like CloudflareService()) when no credentials are configured.
+    """
+    if cloudflare_service is not None:
+        return cloudflare_service.primary
+    return CloudflareService()
+
+
+async def close_cloudflare_clients() -> None:
+    """
+    Close every pooled Cloudflare client, on whichever loop opened it.
+
+    Called from the app lifespan and the worker on shutdown.
+    """
+    for svc in list(_live_services):
+        try:
+            await svc.aclose(all_loops=True)
+        except Exception as e:
+            logger.warning("Error closing Cloudflare client for %s account: %s", svc._label, e)
@@ -0,0 +1,138 @@
+"""
+Cloudflare API rate limiting.
+
+Cloudflare allows 1200 API requests per 5 minutes per user (the X-Auth-Email
+the requests are made as). Every CloudflareService call for an account draws
+from that account's token bucket, so bulk zone/DNS work can run concurrently
+without tripping the limit. A 429 response empties the bucket and blocks it
+for the Retry-After period.
+
+The bucket state is guarded by a threading lock (not an asyncio lock) so the
+same bucket works from the API event loop and from Selenium worker threads.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Optional
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Used when a 429 arrives without a usable Retry-After header
+DEFAULT_RETRY_AFTER_SECONDS = 60.0
+
+
+class TokenBucket:
+    """Token bucket with a hard block window for server-side 429s."""
+
+    def __init__(self, capacity: float, refill_per_second: float, name: str = "") -> None:
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.name = name
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated_at
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.refill_per_second)
+            self._updated_at = now
+
+    def _try_take(self, tokens: float) -> float:
+        """Take tokens if available. Returns 0 on success, otherwise seconds to wait."""
+        with self._lock:
+            now = time.monotonic()
+            if now < self._blocked_until:
+                return self._blocked_until - now
+            self._refill(now)
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.refill_per_second
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        """Wait (asynchronously) until tokens are available, then take them."""
+        while True:
+            wait = self._try_take(tokens)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def acquire_sync(self, tokens: float = 1.0) -> None:
+        """Blocking variant of acquire() for code running in worker threads."""
+        while True:
+            wait = self._try_take(tokens)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    def penalize(self, retry_after: float) -> None:
+        """Empty the bucket and block it for retry_after seconds (after a 429)."""
+        with self._lock:
+            now = time.monotonic()
+            self._blocked_until = max(self._blocked_until, now + retry_after)
+            self._tokens = 0.0
+            # Tokens only start accumulating again once the block is over
+            self._updated_at = self._blocked_until
+
+    @property
+    def tokens_remaining(self) -> int:
+        """Whole tokens currently available (0 while blocked by a 429)."""
+        with self._lock:
+            now = time.monotonic()
+            if now < self._blocked_until:
+                return 0
+            self._refill(now)
+            return int(self._tokens)
+
+    @property
+    def blocked_for(self) -> float:
+        """Seconds left on a 429 block (0 if not blocked)."""
+        with self._lock:
+            return max(0.0, self._blocked_until - time.monotonic())
+
+
+def parse_retry_after(value: Optional[str]) -> float:
+    """Parse a Retry-After header (delta-seconds form) with a safe default."""
+    if value:
+        try:
+            return max(1.0, float(value))
+        except ValueError:
+            pass
+    return DEFAULT_RETRY_AFTER_SECONDS
+
+
+_buckets: dict[str, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def get_account_bucket(account_key: str) -> TokenBucket:
+    """
+    Get the shared token bucket for a Cloudflare user.
+
+    The bucket is sized so that burst + refill over one window never exceeds
+    the per-window budget: capacity=burst, refill=(limit - burst) / window.
+    """
+    with _buckets_lock:
+        bucket = _buckets.get(account_key)
+        if bucket is None:
+            settings = get_settings()
+            limit = settings.cloudflare_rate_limit_requests
+            window = settings.cloudflare_rate_limit_window_seconds
+            burst = min(settings.cloudflare_rate_limit_burst, limit - 1)
+            bucket = TokenBucket(
+                capacity=burst,
+                refill_per_second=(limit - burst) / window,
+                name=account_key,
+            )
+            _buckets[account_key] = bucket
+            logger.debug(
+                "Cloudflare rate limiter for %s: burst=%d, %.2f req/s",
+                account_key, burst, bucket.refill_per_second,
+            )
+        return bucket
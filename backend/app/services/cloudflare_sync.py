@@ -1,176 +1,161 @@
-import httpx
-import os
+"""
+Cloudflare DNS helpers for the Selenium M365 domain setup.
+
+The *_async functions do the work on the shared MultiCloudflareService: pooled
+clients, the per-account rate limiter, the zone index, DNS snapshots and batch
+writes. Credentials come from settings once, at startup.
+
+The plain-named functions (resolve_zone_id, add_txt, add_mx, ...) are thin
+blocking shims for Selenium worker threads. They run the async version on one
+background event loop shared by every worker, so all threads reuse the same
+pooled connections.
+"""
+import asyncio
 import logging
+import threading
+from typing import Any, Optional
+
+from app.services import cloudflare
+from app.services.cloudflare import CloudflareService, MultiCloudflareService
+from app.services.dns_plan import DesiredRecord, cname_record, mx_record, spf_record, verification_txt
 
 logger = logging.getLogger(__name__)
-CF_API = "https://api.cloudflare.com/client/v4"
 
-# Cache: zone_id -> account index (0=primary, 1=secondary)
+# Cache: zone_id -> account index (0=primary, 1=secondary).
+# Read-through layer over the cross-account zone index.
 _zone_account_cache: dict[str, int] = {}
 
 
-def _get_all_creds() -> list[tuple[str, str]]:
-    """Get credentials for ALL configured Cloudflare accounts.
-    
-    Returns:
-        List of (email, api_key) tuples. Primary first, secondary second.
-    """
-    accounts = []
-    env_vars = {}
-    
-    # Read from environment first
-    for key in ["CLOUDFLARE_EMAIL", "CLOUDFLARE_API_KEY", 
-                "CLOUDFLARE_EMAIL_2", "CLOUDFLARE_API_KEY_2"]:
-        env_vars[key] = os.environ.get(key)
-    
-    # Fall back to .env files if any creds are missing
-    any_missing = any(not env_vars.get(k) for k in env_vars)
-    if any_missing:
-        for env_path in [".env", "../.env", "backend/.env"]:
-            try:
-                with open(env_path) as f:
-                    for line in f:
-                        line = line.strip()
-                        if "=" in line and not line.startswith("#"):
-                            k, v = line.split("=", 1)
-                            k = k.strip()
-                            v = v.strip().strip('"').strip("'")
-                            if k in env_vars and not env_vars[k]:
-                                env_vars[k] = v
-            except:
-                continue
-    
-    # Primary account
-    if env_vars.get("CLOUDFLARE_EMAIL") and env_vars.get("CLOUDFLARE_API_KEY"):
-        accounts.append((env_vars["CLOUDFLARE_EMAIL"], env_vars["CLOUDFLARE_API_KEY"]))
-    
-    # Secondary account
-    if env_vars.get("CLOUDFLARE_EMAIL_2") and env_vars.get("CLOUDFLARE_API_KEY_2"):
-        accounts.append((env_vars["CLOUDFLARE_EMAIL_2"], env_vars["CLOUDFLARE_API_KEY_2"]))
-    
-    if not accounts:
+def _multi() -> MultiCloudflareService:
+    if cloudflare.cloudflare_service is None:
         raise ValueError("Cloudflare credentials missing!")
-    
-    return accounts
-
-
-def _get_creds(account_index: int = 0):
-    """Get Cloudflare credentials for a specific account.
-    
-    Args:
-        account_index: 0 for primary, 1 for secondary
-    """
-    accounts = _get_all_creds()
-    if account_index >= len(accounts):
-        return accounts[0]  # Fallback to primary
-    return accounts[account_index]
+    return cloudflare.cloudflare_service
 
 
-def _headers(account_index: int = 0):
-    email, key = _get_creds(account_index)
-    return {"X-Auth-Email": email, "X-Auth-Key": key, "Content-Type": "application/json"}
+async def _service_for_zone(zone_id: str) -> CloudflareService:
+    """Service of the account that owns zone_id."""
+    multi = _multi()
+    if zone_id in _zone_account_cache:
+        return multi._services[_zone_account_cache[zone_id]]
+    svc = await multi._find_service_for_zone(zone_id)
+    _zone_account_cache[zone_id] = multi._services.index(svc)
+    return svc
 
 
-def _headers_for_zone(zone_id: str):
-    """Get headers for the account that owns this zone_id."""
-    account_idx = _zone_account_cache.get(zone_id, 0)
-    return _headers(account_idx)
+async def _zone_domain(svc: CloudflareService, zone_id: str) -> str:
+    """Domain name of a zone, from the zone index when possible."""
+    entry = _multi().zone_index.get(zone_id)
+    if entry:
+        return entry.name
+    zone = await svc.get_zone_by_id(zone_id)
+    return zone["name"] if zone else ""
 
 
-def resolve_zone_id(zone_id, domain):
+async def resolve_zone_id_async(zone_id, domain):
     """
     Validate that zone_id matches the domain, and auto-correct if wrong.
-    Searches ALL configured Cloudflare accounts.
-    
+    Searches ALL configured Cloudflare accounts concurrently.
+
     This is CRITICAL for domains that were pre-existing in Cloudflare before
     being imported into the system. The database may have a stale/wrong zone_id.
-    
+
     Flow:
-    1. For each account, GET /zones/{zone_id} - check if zone exists and name matches
-    2. If zone doesn't exist OR name doesn't match:
-       a. For each account, GET /zones?name={domain} - find the correct zone
-       b. Prefer active zones over pending
-       c. Return the correct zone_id
-    3. If domain not found in ANY Cloudflare account, raise ValueError
-    
+    0. A fresh zone index answers directly (no API calls)
+    1. On every account at once: GET /zones/{zone_id} and GET /zones?name={domain}
+    2. Stored zone_id is ACTIVE on some account and matches the domain -> keep it
+    3. Otherwise the zone found by name (active preferred over pending)
+    4. Otherwise the stored zone_id if it matched but is still pending
+    5. If domain not found in ANY Cloudflare account, raise ValueError
+
     Args:
         zone_id: The zone_id stored in the database (may be wrong)
         domain: The domain name we expect this zone to be for
-        
+
     Returns:
         tuple: (correct_zone_id, was_corrected)
         - correct_zone_id: The validated/corrected zone_id
         - was_corrected: True if the zone_id was wrong and had to be looked up
     """
     logger.info(f"[{domain}] Validating zone_id={zone_id}")
-    all_creds = _get_all_creds()
+    multi = _multi()
+    services = multi._services
     domain_lower = domain.lower().strip()
-    
-    # Step 1: Check if the stored zone_id is valid and matches the domain (check ALL accounts)
-    # BUT: If the stored zone is "pending", DON'T return immediately - check other accounts for "active"
+
+    # Step 0: A fresh zone index answers this without any API calls
+    await multi.zone_index.ensure_loaded()
+    if multi.zone_index.is_fresh:
+        entry = multi.zone_index.lookup(domain_lower)
+        if entry:
+            _zone_account_cache[entry.zone_id] = entry.account_index
+            was_corrected = entry.zone_id != zone_id
+            logger.info(
+                f"[{domain}] Zone resolved from index: {entry.zone_id} "
+                f"(status={entry.status}, account #{entry.account_index}), corrected={was_corrected}"
+            )
+            return entry.zone_id, was_corrected
+
+    # Step 1: Ask every account about the stored zone_id and the domain name at the same time
+    async def _no_zone():
+        return None
+
+    by_id, by_name = await asyncio.gather(
+        asyncio.gather(
+            *((svc.get_zone_by_id(zone_id) if zone_id else _no_zone()) for svc in services),
+            return_exceptions=True,
+        ),
+        asyncio.gather(*(svc.get_zone_by_name(domain_lower) for svc in services), return_exceptions=True),
+    )
+
+    # Step 2: Stored zone_id. If it's "pending", DON'T return yet - another account may have it "active"
     stored_zone_match = None  # (zone_id, acct_idx, status)
-    if zone_id:
-        for acct_idx in range(len(all_creds)):
-            try:
-                headers = _headers(acct_idx)
-                resp = httpx.get(f"{CF_API}/zones/{zone_id}", headers=headers, timeout=30)
-                if _cf_success(resp):
-                    result = resp.json().get("result", {})
-                    zone_name = result.get("name", "").lower().strip()
-                    zone_status = result.get("status", "pending")
-                    if zone_name == domain_lower:
-                        if zone_status == "active":
-                            # Active zone found - use it immediately
-                            logger.info(f"[{domain}] Zone ID validated (ACTIVE): {zone_id} -> {zone_name} (account #{acct_idx})")
-                            _zone_account_cache[zone_id] = acct_idx
-                            return zone_id, False
-                        else:
-                            # Pending zone - note it but keep looking for an active one
-                            logger.info(f"[{domain}] Zone ID matches but PENDING: {zone_id} (account #{acct_idx}). Checking other accounts for active zone...")
-                            stored_zone_match = (zone_id, acct_idx, zone_status)
-                    else:
-                        logger.warning(
-                            f"[{domain}] zone_id={zone_id} belongs to '{zone_name}' in account #{acct_idx}, "
-                            f"not '{domain_lower}'. Continuing search..."
-                        )
-            except Exception as e:
-                logger.warning(f"[{domain}] Error checking zone {zone_id} in account #{acct_idx}: {e}")
-    
-    # Step 2: Look up the correct zone by domain name across ALL accounts (prefer active)
+    for acct_idx, zone in enumerate(by_id):
+        if isinstance(zone, BaseException):
+            logger.warning(f"[{domain}] Error checking zone {zone_id} in account #{acct_idx}: {zone}")
+            continue
+        if not zone:
+            continue
+        zone_name = zone.get("name", "").lower().strip()
+        if zone_name != domain_lower:
+            logger.warning(
+                f"[{domain}] zone_id={zone_id} belongs to '{zone_name}' in account #{acct_idx}, "
+                f"not '{domain_lower}'. Continuing search..."
+            )
+            continue
+        await multi.zone_index.record(acct_idx, zone_id, zone_name, zone["status"], zone["nameservers"])
+        if zone["status"] == "active":
+            logger.info(f"[{domain}] Zone ID validated (ACTIVE): {zone_id} -> {zone_name} (account #{acct_idx})")
+            _zone_account_cache[zone_id] = acct_idx
+            return zone_id, False
+        if stored_zone_match is None:
+            logger.info(f"[{domain}] Zone ID matches but PENDING: {zone_id} (account #{acct_idx}). Checking other accounts for active zone...")
+            stored_zone_match = (zone_id, acct_idx, zone["status"])
+
+    # Step 3: Zone by domain name across ALL accounts (prefer active)
     best_zone = None
     best_acct_idx = 0
-    for acct_idx in range(len(all_creds)):
-        try:
-            headers = _headers(acct_idx)
-            resp = httpx.get(f"{CF_API}/zones?name={domain_lower}", headers=headers, timeout=30)
-            if _cf_success(resp):
-                zones = resp.json().get("result", [])
-                for z in zones:
-                    if z.get("name", "").lower().strip() == domain_lower:
-                        status = z.get("status", "")
-                        logger.info(f"[{domain}] Found zone {z['id']} in account #{acct_idx} (status={status})")
-                        # Prefer active zones
-                        if status == "active" or best_zone is None:
-                            best_zone = z
-                            best_acct_idx = acct_idx
-                        if status == "active":
-                            break  # Active zone found, no need to check more
-        except Exception as e:
-            logger.warning(f"[{domain}] Error searching account #{acct_idx}: {e}")
-    
+    for acct_idx, zone in enumerate(by_name):
+        if isinstance(zone, BaseException):
+            logger.warning(f"[{domain}] Error searching account #{acct_idx}: {zone}")
+            continue
+        if not zone or zone.get("name", "").lower().strip() != domain_lower:
+            continue
+        logger.info(f"[{domain}] Found zone {zone['zone_id']} in account #{acct_idx} (status={zone['status']})")
+        await multi.zone_index.record(acct_idx, zone["zone_id"], domain_lower, zone["status"], zone["nameservers"])
+        if best_zone is None or (zone["status"] == "active" and best_zone["status"] != "active"):
+            best_zone = zone
+            best_acct_idx = acct_idx
+
     if best_zone:
-        correct_zone_id = best_zone["id"]
-        correct_name = best_zone["name"]
-        correct_status = best_zone.get("status", "unknown")
+        correct_zone_id = best_zone["zone_id"]
         _zone_account_cache[correct_zone_id] = best_acct_idx
         was_corrected = correct_zone_id != zone_id
         logger.info(
-            f"[{domain}] RESOLVED correct zone: {correct_zone_id} (name={correct_name}, "
-            f"status={correct_status}, account #{best_acct_idx}). Old zone_id was: {zone_id}, corrected={was_corrected}"
+            f"[{domain}] RESOLVED correct zone: {correct_zone_id} (name={best_zone['name']}, "
+            f"status={best_zone['status']}, account #{best_acct_idx}). Old zone_id was: {zone_id}, corrected={was_corrected}"
         )
         return correct_zone_id, was_corrected
-    
-    # Step 3: If we found a pending zone match in Step 1 but no active zone anywhere, use the pending one
+
+    # Step 4: The stored zone matched but is pending, and there is no active zone anywhere
     if stored_zone_match:
         pending_zone_id, pending_acct_idx, pending_status = stored_zone_match
         _zone_account_cache[pending_zone_id] = pending_acct_idx
@@ -179,125 +164,89 @@ def resolve_zone_id(zone_id, domain):
             f"(status={pending_status}, account #{pending_acct_idx})"
         )
         return pending_zone_id, False
-    
+
     error_msg = f"[{domain}] Domain not found in ANY Cloudflare account! Cannot resolve zone_id."
     logger.error(error_msg)
     raise ValueError(error_msg)
 
 
-def _cf_success(resp) -> bool:
-    """
-    Check if a Cloudflare API response was truly successful.
-    
-    Cloudflare API v4 can return HTTP 200 with {"success": false} in the body.
-    We must check BOTH the HTTP status code AND the JSON body's success field.
-    
-    Args:
-        resp: httpx.Response object
-        
-    Returns:
-        True only if HTTP status is 200 AND body has "success": true
-    """
-    if resp.status_code != 200:
-        return False
-    try:
-        data = resp.json()
-        return data.get("success", False) is True
-    except Exception:
-        return False
+def _txt_content(r) -> str:
+    # Cloudflare may return TXT content wrapped in quotes
+    return r.get("content", "").strip('"')
 
 
-def _cf_error_message(resp) -> str:
-    """
-    Extract a human-readable error message from a Cloudflare API response.
-    
-    Args:
-        resp: httpx.Response object
-        
-    Returns:
-        Error message string
-    """
-    try:
-        data = resp.json()
-        errors = data.get("errors", [])
-        if errors:
-            # Cloudflare errors have "code" and "message" fields
-            messages = [f"{e.get('code', '?')}: {e.get('message', 'Unknown')}" for e in errors]
-            return "; ".join(messages)
-        if not data.get("success", True):
-            return f"API returned success=false (HTTP {resp.status_code})"
-    except Exception:
-        pass
-    return f"HTTP {resp.status_code}: {resp.text[:200]}"
+def _is_verification_txt(r) -> bool:
+    return r.get("type") == "TXT" and _txt_content(r).lower().startswith("ms=")
 
 
-def delete_records_by_type(zone_id, record_type, name_contains=None):
+def _is_spf_txt(r) -> bool:
+    return r.get("type") == "TXT" and "v=spf1" in _txt_content(r).lower()
+
+
+def _conflicts_with_dns_setup(r) -> bool:
+    record_type = r.get("type", "")
+    record_name = r.get("name", "").lower()
+
+    # Old MX and SPF records (will be replaced)
+    if record_type == "MX" or _is_spf_txt(r):
+        return True
+
+    # NOTE: Do NOT delete MS= verification records here!
+    # They don't conflict with MX/SPF/CNAME setup and deleting them
+    # breaks M365 verification if it hasn't completed yet.
+
+    # CNAME/A/AAAA for autodiscover and the DKIM selectors (conflict with the new CNAMEs)
+    if record_type in ("CNAME", "A", "AAAA"):
+        return (
+            "autodiscover" in record_name
+            or "selector1._domainkey" in record_name
+            or "selector2._domainkey" in record_name
+        )
+    return False
+
+
+async def _delete_matching(zone_id, predicate, reason: str) -> None:
+    """Delete every record in the zone matching predicate with one batch write."""
+    svc = await _service_for_zone(zone_id)
+    doomed = [r for r in await svc.list_dns_records(zone_id) if predicate(r)]
+    if not doomed:
+        return
+    await svc.batch_dns_records(zone_id, deletes=[r["id"] for r in doomed])
+    for r in doomed:
+        logger.info(f"Deleted {reason}: {r['type']} {r['name']} -> {r.get('content', '')[:60]}")
+
+
+async def delete_records_by_type_async(zone_id, record_type, name_contains=None):
     """Delete ALL records of a specific type, optionally filtering by name."""
     logger.info(f"Deleting {record_type} records{' containing ' + name_contains if name_contains else ''}...")
     try:
-        headers = _headers_for_zone(zone_id)
-        resp = httpx.get(f"{CF_API}/zones/{zone_id}/dns_records?type={record_type}", headers=headers, timeout=30)
-        if _cf_success(resp):
-            records = resp.json().get("result", [])
-            for r in records:
-                should_delete = True
-                if name_contains and name_contains not in r.get("name", ""):
-                    should_delete = False
-                
-                if should_delete:
-                    del_resp = httpx.delete(f"{CF_API}/zones/{zone_id}/dns_records/{r['id']}", headers=headers, timeout=30)
-                    if _cf_success(del_resp):
-                        logger.info(f"Deleted {record_type}: {r.get('name')} -> {r.get('content', '')[:50]}")
-                    else:
-                        logger.warning(f"Failed to delete {r['id']}: {_cf_error_message(del_resp)}")
-        elif resp.status_code == 200:
-            logger.warning(f"Cloudflare returned 200 but success=false listing {record_type} records: {_cf_error_message(resp)}")
+        await _delete_matching(
+            zone_id,
+            lambda r: r.get("type") == record_type and (not name_contains or name_contains in r.get("name", "")),
+            f"{record_type} record",
+        )
         return True
     except Exception as e:
         logger.error(f"Error deleting {record_type} records: {e}")
         return False
 
-def cleanup_before_verification(zone_id):
+
+async def cleanup_before_verification_async(zone_id):
     """
     Clean up DNS records that would interfere with M365 domain verification.
-    
+
     M365 verification checks TXT records at @ and flags ANY unexpected TXT records
     as "Invalid entry", causing verification to fail. This function removes:
     - ALL old MS=ms* verification codes (from previous attempts)
     - SPF records (v=spf1...) left over from previous failed Step 5 runs
-    
+
     Does NOT touch: proxied CNAMEs (redirects), DMARC, A/AAAA records, etc.
     """
     logger.info(f"=== CLEANUP BEFORE VERIFICATION ===")
     try:
-        headers = _headers_for_zone(zone_id)
-        resp = httpx.get(f"{CF_API}/zones/{zone_id}/dns_records?type=TXT", headers=headers, timeout=30)
-        if _cf_success(resp):
-            for r in resp.json().get("result", []):
-                content = r.get("content", "")
-                record_name = r.get("name", "")
-                
-                # Delete ALL MS= verification records (old codes from previous attempts)
-                if content.startswith("MS=") or content.startswith("ms="):
-                    del_resp = httpx.delete(f"{CF_API}/zones/{zone_id}/dns_records/{r['id']}", headers=headers, timeout=30)
-                    if _cf_success(del_resp):
-                        logger.info(f"Deleted old verification TXT: {content}")
-                    else:
-                        logger.warning(f"Failed to delete old verification TXT {content}: {_cf_error_message(del_resp)}")
-                
-                # Delete SPF records at root (leftover from previous failed runs)
-                # These cause M365 to flag as "Invalid entry" during verification
-                elif "v=spf1" in content.lower():
-                    del_resp = httpx.delete(f"{CF_API}/zones/{zone_id}/dns_records/{r['id']}", headers=headers, timeout=30)
-                    if _cf_success(del_resp):
-                        logger.info(f"Deleted leftover SPF TXT: {content[:60]}")
-                    else:
-                        logger.warning(f"Failed to delete leftover SPF TXT: {_cf_error_message(del_resp)}")
-        elif resp.status_code == 200:
-            logger.warning(f"Cloudflare returned 200 but success=false listing TXT records: {_cf_error_message(resp)}")
-        else:
-            logger.error(f"Failed to list TXT records for cleanup: {_cf_error_message(resp)}")
-        
+        await _delete_matching(
+            zone_id, lambda r: _is_verification_txt(r) or _is_spf_txt(r), "old verification/SPF TXT"
+        )
         logger.info(f"=== CLEANUP BEFORE VERIFICATION COMPLETE ===")
         return True
     except Exception as e:
@@ -305,10 +254,10 @@ def cleanup_before_verification(zone_id):
         return False
 
 
-def cleanup_before_dns_setup(zone_id):
+async def cleanup_before_dns_setup_async(zone_id):
     """
     Clean up DNS records that would conflict with M365 email DNS setup.
-    
+
     Removes records that conflict with what Step 5 is about to add:
     - Old MX records (will be replaced with M365 MX)
     - Old SPF TXT records (will be replaced with M365 SPF)
@@ -316,61 +265,12 @@ def cleanup_before_dns_setup(zone_id):
     - Old DKIM selector CNAMEs (will be replaced)
     - A/AAAA records for 'autodiscover' subdomain (conflict with CNAME)
     - A/AAAA records for selector1/selector2._domainkey (conflict with CNAME)
-    
+
     Does NOT touch: proxied CNAME at @ (redirect), DMARC records, other TXT records
     """
     logger.info(f"=== CLEANUP BEFORE DNS SETUP ===")
     try:
-        headers = _headers_for_zone(zone_id)
-        
-        # Get ALL DNS records for the zone
-        resp = httpx.get(f"{CF_API}/zones/{zone_id}/dns_records", headers=headers, timeout=30)
-        if not _cf_success(resp):
-            logger.error(f"Failed to list DNS records: {_cf_error_message(resp)}")
-            return False
-        
-        records = resp.json().get("result", [])
-        
-        for r in records:
-            record_type = r.get("type", "")
-            record_name = r.get("name", "")
-            content = r.get("content", "")
-            proxied = r.get("proxied", False)
-            
-            should_delete = False
-            reason = ""
-            
-            # Delete old MX records (will be replaced)
-            if record_type == "MX":
-                should_delete = True
-                reason = "old MX record"
-            
-            # Delete old SPF TXT records (will be replaced)
-            elif record_type == "TXT" and "v=spf1" in content.lower():
-                should_delete = True
-                reason = "old SPF TXT"
-            
-            # NOTE: Do NOT delete MS= verification records here!
-            # They don't conflict with MX/SPF/CNAME setup and deleting them
-            # breaks M365 verification if it hasn't completed yet.
-            
-            # Delete CNAME/A/AAAA for autodiscover (conflicts with new CNAME)
-            elif "autodiscover" in record_name.lower() and record_type in ("CNAME", "A", "AAAA"):
-                should_delete = True
-                reason = f"old autodiscover {record_type}"
-            
-            # Delete CNAME/A/AAAA for DKIM selectors (conflicts with new CNAMEs)
-            elif ("selector1._domainkey" in record_name.lower() or "selector2._domainkey" in record_name.lower()) and record_type in ("CNAME", "A", "AAAA"):
-                should_delete = True
-                reason = f"old DKIM {record_type}"
-            
-            if should_delete:
-                del_resp = httpx.delete(f"{CF_API}/zones/{zone_id}/dns_records/{r['id']}", headers=headers, timeout=30)
-                if _cf_success(del_resp):
-                    logger.info(f"Deleted {reason}: {record_type} {record_name} -> {content[:60]}")
-                else:
-                    logger.warning(f"Failed to delete {reason} ({record_type} {record_name}): {_cf_error_message(del_resp)}")
-        
+        await _delete_matching(zone_id, _conflicts_with_dns_setup, "conflicting record")
         logger.info(f"=== CLEANUP BEFORE DNS SETUP COMPLETE ===")
         return True
     except Exception as e:
@@ -378,230 +278,146 @@ def cleanup_before_dns_setup(zone_id):
         return False
 
 
-def _verify_record_exists(zone_id, record_type, content_search, headers):
+async def _reconcile(zone_id, desired: list[DesiredRecord], what: str) -> bool:
     """
-    Verify a DNS record actually exists in Cloudflare after creation.
-    
-    Args:
-        zone_id: Cloudflare zone ID
-        record_type: DNS record type (TXT, MX, CNAME)
-        content_search: String to search for in record content
-        headers: API headers
-        
+    Make the zone match the desired records: one (cached) listing, one batch write.
+
     Returns:
-        True if record found, False otherwise
+        True only if Cloudflare accepted every record
     """
     try:
-        resp = httpx.get(f"{CF_API}/zones/{zone_id}/dns_records?type={record_type}", headers=headers, timeout=30)
-        if _cf_success(resp):
-            for r in resp.json().get("result", []):
-                if content_search.lower() in r.get("content", "").lower():
-                    return True
-        return False
+        svc = await _service_for_zone(zone_id)
+        domain = await _zone_domain(svc, zone_id)
+        if not domain:
+            logger.error(f"{what} add FAILED: zone {zone_id} not found")
+            return False
+        outcome = await svc.reconcile_dns(zone_id, domain, desired)
+        failed = {key: r["error"] for key, r in outcome["results"].items() if not r["success"]}
+        if failed:
+            logger.error(f"{what} add FAILED: {failed}")
+            return False
+        record_ids = {key: r["record_id"] for key, r in outcome["results"].items()}
+        logger.info(f"{what} in place for {domain} (record_ids={record_ids})")
+        return True
     except Exception as e:
-        logger.warning(f"Verification check failed: {e}")
+        logger.error(f"{what} error: {e}")
         return False
 
 
-def add_txt(zone_id, value):
-    """Add TXT record, deleting ALL existing MS= records first.
-    
-    IMPORTANT: Checks both HTTP status code AND Cloudflare API success field
-    to ensure the record was actually created.
-    """
+async def add_txt_async(zone_id, value):
+    """Set the verification TXT at @, replacing ALL existing MS= records."""
     logger.info(f"Adding TXT: {value}")
-    try:
-        headers = _headers_for_zone(zone_id)
-        
-        # Delete ALL existing MS= verification records (may be multiple from retries)
-        resp = httpx.get(f"{CF_API}/zones/{zone_id}/dns_records?type=TXT", headers=headers, timeout=30)
-        if _cf_success(resp):
-            for r in resp.json().get("result", []):
-                content = r.get("content", "")
-                if content.startswith("MS=") or content.startswith("ms="):
-                    del_resp = httpx.delete(f"{CF_API}/zones/{zone_id}/dns_records/{r['id']}", headers=headers, timeout=30)
-                    if _cf_success(del_resp):
-                        logger.info(f"Deleted old TXT: {content}")
-                    else:
-                        logger.warning(f"Failed to delete old TXT {content}: {_cf_error_message(del_resp)}")
-        elif resp.status_code == 200:
-            logger.warning(f"Cloudflare returned 200 but success=false listing TXT records: {_cf_error_message(resp)}")
-        
-        # Add new
-        resp = httpx.post(f"{CF_API}/zones/{zone_id}/dns_records", headers=headers,
-                          json={"type": "TXT", "name": "@", "content": value, "ttl": 1}, timeout=30)
-        
-        if _cf_success(resp):
-            record_id = resp.json().get("result", {}).get("id", "unknown")
-            logger.info(f"TXT added successfully (record_id={record_id})")
-            
-            # Double-check: Verify the record actually exists
-            if _verify_record_exists(zone_id, "TXT", value, headers):
-                logger.info(f"TXT record verified in Cloudflare: {value}")
-            else:
-                logger.warning(f"TXT record NOT found in Cloudflare after creation! API said success but record missing.")
-            
-            return True
-        elif "already exists" in resp.text.lower():
-            logger.info("TXT already exists")
-            return True
-        else:
-            error_msg = _cf_error_message(resp)
-            logger.error(f"TXT add FAILED: {error_msg}")
-            logger.error(f"TXT full response: status={resp.status_code}, body={resp.text[:500]}")
-            return False
-    except Exception as e:
-        logger.error(f"TXT error: {e}")
-        return False
+    return await _reconcile(zone_id, [verification_txt(value)], "TXT")
 
-def add_mx(zone_id, target, priority=0):
-    """Add MX record, deleting ALL existing MX records first.
-    
-    IMPORTANT: Checks both HTTP status code AND Cloudflare API success field.
-    """
+
+async def add_mx_async(zone_id, target, priority=0):
+    """Set the MX record at @, replacing ALL existing MX records there."""
     logger.info(f"Adding MX: {target} (priority {priority})")
-    try:
-        headers = _headers_for_zone(zone_id)
-        
-        # DELETE ALL existing MX records
-        resp = httpx.get(f"{CF_API}/zones/{zone_id}/dns_records?type=MX", headers=headers, timeout=30)
-        if _cf_success(resp):
-            for r in resp.json().get("result", []):
-                del_resp = httpx.delete(f"{CF_API}/zones/{zone_id}/dns_records/{r['id']}", headers=headers, timeout=30)
-                if _cf_success(del_resp):
-                    logger.info(f"Deleted existing MX: {r.get('content')}")
-                else:
-                    logger.warning(f"Failed to delete existing MX: {_cf_error_message(del_resp)}")
-        
-        # Add new
-        resp = httpx.post(f"{CF_API}/zones/{zone_id}/dns_records", headers=headers,
-                          json={"type": "MX", "name": "@", "content": target, "priority": priority, "ttl": 1}, timeout=30)
-        
-        if _cf_success(resp):
-            record_id = resp.json().get("result", {}).get("id", "unknown")
-            logger.info(f"MX added successfully (record_id={record_id})")
-            return True
-        else:
-            error_msg = _cf_error_message(resp)
-            logger.error(f"MX add FAILED: {error_msg}")
-            logger.error(f"MX full response: status={resp.status_code}, body={resp.text[:500]}")
-            return False
-    except Exception as e:
-        logger.error(f"MX error: {e}")
-        return False
+    return await _reconcile(zone_id, [mx_record("", target, priority)], "MX")
 
-def add_spf(zone_id, value):
-    """Add SPF record, deleting ALL existing SPF records first.
-    
-    IMPORTANT: Checks both HTTP status code AND Cloudflare API success field.
-    """
+
+async def add_spf_async(zone_id, value):
+    """Set the SPF record at @, replacing ALL existing SPF records there."""
     logger.info(f"Adding SPF: {value}")
-    try:
-        headers = _headers_for_zone(zone_id)
-        
-        # DELETE ALL existing SPF records (TXT records containing v=spf1)
-        resp = httpx.get(f"{CF_API}/zones/{zone_id}/dns_records?type=TXT", headers=headers, timeout=30)
-        if _cf_success(resp):
-            for r in resp.json().get("result", []):
-                if "v=spf1" in r.get("content", ""):
-                    del_resp = httpx.delete(f"{CF_API}/zones/{zone_id}/dns_records/{r['id']}", headers=headers, timeout=30)
-                    if _cf_success(del_resp):
-                        logger.info(f"Deleted existing SPF: {r.get('content')[:50]}")
-                    else:
-                        logger.warning(f"Failed to delete existing SPF: {_cf_error_message(del_resp)}")
-        
-        # Add new
-        resp = httpx.post(f"{CF_API}/zones/{zone_id}/dns_records", headers=headers,
-                          json={"type": "TXT", "name": "@", "content": value, "ttl": 1}, timeout=30)
-        
-        if _cf_success(resp):
-            record_id = resp.json().get("result", {}).get("id", "unknown")
-            logger.info(f"SPF added successfully (record_id={record_id})")
-            return True
-        else:
-            error_msg = _cf_error_message(resp)
-            logger.error(f"SPF add FAILED: {error_msg}")
-            logger.error(f"SPF full response: status={resp.status_code}, body={resp.text[:500]}")
-            return False
-    except Exception as e:
-        logger.error(f"SPF error: {e}")
-        return False
+    return await _reconcile(zone_id, [spf_record(value)], "SPF")
 
-def add_cname(zone_id, name, target):
-    """Add CNAME record, deleting existing record with same name first.
-    
-    IMPORTANT: Checks both HTTP status code AND Cloudflare API success field.
-    """
+
+async def add_cname_async(zone_id, name, target):
+    """Set a DNS-only CNAME, replacing any CNAME/A/AAAA with the same name."""
     logger.info(f"Adding CNAME: {name} -> {target}")
-    try:
-        headers = _headers_for_zone(zone_id)
-        
-        # Get zone details to get the domain name
-        zone_resp = httpx.get(f"{CF_API}/zones/{zone_id}", headers=headers, timeout=30)
-        domain = ""
-        if _cf_success(zone_resp):
-            domain = zone_resp.json().get("result", {}).get("name", "")
-        
-        # Build full record name
-        if domain and not name.endswith(domain):
-            full_name = f"{name}.{domain}"
-        else:
-            full_name = name
-        
-        # DELETE existing CNAME with this name
-        resp = httpx.get(f"{CF_API}/zones/{zone_id}/dns_records?type=CNAME", headers=headers, timeout=30)
-        if _cf_success(resp):
-            for r in resp.json().get("result", []):
-                if name in r.get("name", "") or r.get("name", "") == full_name:
-                    del_resp = httpx.delete(f"{CF_API}/zones/{zone_id}/dns_records/{r['id']}", headers=headers, timeout=30)
-                    if _cf_success(del_resp):
-                        logger.info(f"Deleted existing CNAME: {r.get('name')}")
-                    else:
-                        logger.warning(f"Failed to delete existing CNAME {r.get('name')}: {_cf_error_message(del_resp)}")
-        
-        # Add new
-        resp = httpx.post(f"{CF_API}/zones/{zone_id}/dns_records", headers=headers,
-                          json={"type": "CNAME", "name": name, "content": target, "ttl": 1, "proxied": False}, timeout=30)
-        
-        if _cf_success(resp):
-            record_id = resp.json().get("result", {}).get("id", "unknown")
-            logger.info(f"CNAME added successfully: {name} -> {target} (record_id={record_id})")
-            return True
-        elif "already exists" in resp.text.lower():
-            logger.info("CNAME already exists")
-            return True
-        else:
-            error_msg = _cf_error_message(resp)
-            logger.error(f"CNAME add FAILED ({name} -> {target}): {error_msg}")
-            logger.error(f"CNAME full response: status={resp.status_code}, body={resp.text[:500]}")
-            return False
-    except Exception as e:
-        logger.error(f"CNAME error: {e}")
-        return False
+    return await _reconcile(zone_id, [cname_record(name, target)], f"CNAME {name}")
 
-def add_dkim(zone_id, selector1_target, selector2_target):
-    """Add both DKIM CNAME records, deleting existing first."""
+
+async def add_dkim_async(zone_id, selector1_target, selector2_target):
+    """Set both DKIM CNAME records in one write."""
     logger.info(f"Adding DKIM records")
-    
-    # Delete existing DKIM records
+    return await _reconcile(
+        zone_id,
+        [
+            cname_record("selector1._domainkey", selector1_target),
+            cname_record("selector2._domainkey", selector2_target),
+        ],
+        "DKIM",
+    )
+
+
+# === Blocking shims for Selenium worker threads ===
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """The background event loop that runs every shim call, started on first use."""
+    global _loop
+    with _loop_lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="cloudflare-sync-loop", daemon=True).start()
+        return _loop
+
+
+def _run(coro) -> Any:
+    """
+    Run a coroutine on the shared loop and block until it finishes.
+
+    Works from any thread, including one that is itself running an event loop.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop()).result()
+
+
+async def close_sync_clients() -> None:
+    """Close the pooled clients opened on the shim loop. Called from the app lifespan on shutdown."""
+    if _loop is None or _loop.is_closed() or cloudflare.cloudflare_service is None:
+        return
     try:
-        headers = _headers_for_zone(zone_id)
-        resp = httpx.get(f"{CF_API}/zones/{zone_id}/dns_records?type=CNAME", headers=headers, timeout=30)
-        if _cf_success(resp):
-            for r in resp.json().get("result", []):
-                if "selector1" in r.get("name", "") or "selector2" in r.get("name", ""):
-                    del_resp = httpx.delete(f"{CF_API}/zones/{zone_id}/dns_records/{r['id']}", headers=headers, timeout=30)
-                    if _cf_success(del_resp):
-                        logger.info(f"Deleted existing DKIM: {r.get('name')}")
-                    else:
-                        logger.warning(f"Failed to delete existing DKIM {r.get('name')}: {_cf_error_message(del_resp)}")
+        await asyncio.wrap_future(
+            asyncio.run_coroutine_threadsafe(cloudflare.cloudflare_service.aclose(), _loop)
+        )
     except Exception as e:
-        logger.warning(f"Error cleaning up old DKIM records: {e}")
-    
-    # Add selector1
-    result1 = add_cname(zone_id, "selector1._domainkey", selector1_target)
-    
-    # Add selector2
-    result2 = add_cname(zone_id, "selector2._domainkey", selector2_target)
-    
-    return result1 and result2
+        logger.warning(f"Error closing Cloudflare clients of the sync loop: {e}")
+
+
+def resolve_zone_id(zone_id, domain):
+    """Blocking resolve_zone_id_async()."""
+    return _run(resolve_zone_id_async(zone_id, domain))
+
+
+def delete_records_by_type(zone_id, record_type, name_contains=None):
+    """Blocking delete_records_by_type_async()."""
+    return _run(delete_records_by_type_async(zone_id, record_type, name_contains))
+
+
+def cleanup_before_verification(zone_id):
+    """Blocking cleanup_before_verification_async()."""
+    return _run(cleanup_before_verification_async(zone_id))
+
+
+def cleanup_before_dns_setup(zone_id):
+    """Blocking cleanup_before_dns_setup_async()."""
+    return _run(cleanup_before_dns_setup_async(zone_id))
+
+
+def add_txt(zone_id, value):
+    """Blocking add_txt_async()."""
+    return _run(add_txt_async(zone_id, value))
+
+
+def add_mx(zone_id, target, priority=0):
+    """Blocking add_mx_async()."""
+    return _run(add_mx_async(zone_id, target, priority))
+
+
+def add_spf(zone_id, value):
+    """Blocking add_spf_async()."""
+    return _run(add_spf_async(zone_id, value))
+
+
+def add_cname(zone_id, name, target):
+    """Blocking add_cname_async()."""
+    return _run(add_cname_async(zone_id, name, target))
+
+
+def add_dkim(zone_id, selector1_target, selector2_target):
+    """Blocking add_dkim_async()."""
+    return _run(add_dkim_async(zone_id, selector1_target, selector2_target))
@@ -0,0 +1,329 @@
+"""
+Cross-account Cloudflare zone index.
+
+Maps domain name -> (zone_id, account index, status, nameservers) for every zone
+on every configured Cloudflare account. The index is built by paging /zones on
+each account (a handful of list calls instead of one lookup per domain per
+account) and persisted in the cloudflare_zones table so it survives restarts.
+
+Refreshes are incremental: a re-list only writes rows whose status/nameservers
+changed, deletes zones that disappeared, and bumps last_seen_at for the rest.
+Zones created or found through the API are written through immediately.
+
+One index is shared by the API event loop and the loops that the
+cloudflare_sync shims run on, so it is guarded by threading locks rather than
+asyncio locks: a short state lock around every read/write of the in-memory maps,
+and a refresh lock (polled, never blocking a loop) that serializes load/refresh.
+
+The index is an optimization, never a hard dependency: if the table is missing
+or the database is unreachable it keeps working in memory and callers fall back
+to per-account lookups.
+"""
+
+import asyncio
+import logging
+import threading
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Optional
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.config import get_settings
+from app.db.session import BackgroundSessionLocal
+from app.models.cloudflare_zone import CloudflareZone
+
+if TYPE_CHECKING:
+    from app.services.cloudflare import CloudflareService
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ZoneIndexEntry:
+    zone_id: str
+    name: str
+    account_index: int
+    status: str
+    nameservers: list[str] = field(default_factory=list)
+
+    def as_zone_info(self) -> dict:
+        """Same shape as CloudflareService.get_zone_by_name()."""
+        return {
+            "zone_id": self.zone_id,
+            "name": self.name,
+            "status": self.status,
+            "nameservers": list(self.nameservers),
+        }
+
+
+def _normalize(domain: str) -> str:
+    return domain.lower().strip().rstrip(".")
+
+
+def _upsert_statement():
+    stmt = insert(CloudflareZone)
+    return stmt.on_conflict_do_update(
+        index_elements=[CloudflareZone.zone_id],
+        set_={
+            "name": stmt.excluded.name,
+            "account_email": stmt.excluded.account_email,
+            "status": stmt.excluded.status,
+            "nameservers": stmt.excluded.nameservers,
+            "last_seen_at": func.now(),
+            "updated_at": func.now(),
+        },
+    )
+
+
+class CloudflareZoneIndex:
+    """In-memory zone index for a set of accounts, backed by the cloudflare_zones table."""
+
+    def __init__(self, services: list["CloudflareService"]) -> None:
+        self._services = services
+        self._account_by_email = {svc.account_email.lower(): i for i, svc in enumerate(services)}
+        self._by_id: dict[str, ZoneIndexEntry] = {}
+        self._by_name: dict[str, dict[str, ZoneIndexEntry]] = {}
+        self._loaded = False
+        # Time of the last refresh that listed every account successfully
+        self._refreshed_at: datetime | None = None
+        # Zones written through by record() while a load/refresh is reading the
+        # accounts; it must not overwrite or drop those. Cleared when it ends.
+        self._listing = False
+        self._recorded: set[str] = set()
+        self._state_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    @asynccontextmanager
+    async def _refreshing(self):
+        """Hold the refresh lock without blocking the calling event loop."""
+        while not self._refresh_lock.acquire(blocking=False):
+            await asyncio.sleep(0.05)
+        with self._state_lock:
+            self._listing = True
+        try:
+            yield
+        finally:
+            with self._state_lock:
+                self._listing = False
+                self._recorded.clear()
+            self._refresh_lock.release()
+
+    @property
+    def is_fresh(self) -> bool:
+        """True if every account was listed within the TTL, so a miss means "no such zone"."""
+        if self._refreshed_at is None:
+            return False
+        age = datetime.now(timezone.utc) - self._refreshed_at
+        return age < timedelta(seconds=get_settings().cloudflare_zone_index_ttl_seconds)
+
+    def __len__(self) -> int:
+        with self._state_lock:
+            return len(self._by_id)
+
+    def _put(self, entry: ZoneIndexEntry) -> None:
+        # Callers hold _state_lock
+        old = self._by_id.get(entry.zone_id)
+        if old and old.name != entry.name:
+            self._by_name.get(old.name, {}).pop(entry.zone_id, None)
+        self._by_id[entry.zone_id] = entry
+        self._by_name.setdefault(entry.name, {})[entry.zone_id] = entry
+
+    def _drop(self, zone_id: str) -> None:
+        old = self._by_id.pop(zone_id, None)
+        if old:
+            by_name = self._by_name.get(old.name, {})
+            by_name.pop(zone_id, None)
+            if not by_name:
+                self._by_name.pop(old.name, None)
+
+    def lookup(self, domain: str) -> Optional[ZoneIndexEntry]:
+        """Best zone for a domain across all accounts (active preferred), or None."""
+        with self._state_lock:
+            entries = list(self._by_name.get(_normalize(domain), {}).values())
+        if not entries:
+            return None
+        return min(entries, key=lambda e: (e.status != "active", e.account_index))
+
+    def get(self, zone_id: str) -> Optional[ZoneIndexEntry]:
+        with self._state_lock:
+            return self._by_id.get(zone_id)
+
+    def statuses(self) -> dict[str, str]:
+        """{zone_id: status} for every indexed zone."""
+        with self._state_lock:
+            return {zone_id: entry.status for zone_id, entry in self._by_id.items()}
+
+    async def ensure_loaded(self) -> None:
+        """Load the persisted index once per process."""
+        if self._loaded:
+            return
+        async with self._refreshing():
+            if self._loaded:
+                return
+            try:
+                async with BackgroundSessionLocal() as db:
+                    rows = (await db.execute(select(CloudflareZone))).scalars().all()
+            except Exception as e:
+                logger.warning("Could not load Cloudflare zone index from DB: %s", e)
+                rows = []
+
+            seen_by_account: dict[int, datetime] = {}
+            with self._state_lock:
+                for row in rows:
+                    idx = self._account_by_email.get(row.account_email.lower())
+                    if idx is None:
+                        continue  # Account no longer configured
+                    if row.zone_id in self._recorded:
+                        continue  # Written through while the load was in flight
+                    self._put(ZoneIndexEntry(
+                        zone_id=row.zone_id,
+                        name=row.name,
+                        account_index=idx,
+                        status=row.status,
+                        nameservers=list(row.nameservers or []),
+                    ))
+                    if idx not in seen_by_account or row.last_seen_at < seen_by_account[idx]:
+                        seen_by_account[idx] = row.last_seen_at
+
+                # Every row of an account is touched on each refresh, so its oldest
+                # last_seen_at is when that account was last fully listed
+                if rows and len(seen_by_account) == len(self._services):
+                    self._refreshed_at = min(seen_by_account.values())
+
+                self._loaded = True
+            logger.info("Loaded %d zones from Cloudflare zone index (fresh=%s)", len(self), self.is_fresh)
+
+    async def refresh(self, force: bool = False) -> bool:
+        """
+        Re-list zones on every account if the index is stale (or force=True).
+
+        Returns:
+            True if the index is complete and fresh afterwards
+        """
+        await self.ensure_loaded()
+        if not force and self.is_fresh:
+            return True
+
+        async with self._refreshing():
+            if not force and self.is_fresh:
+                return True
+
+            started_at = datetime.now(timezone.utc)
+            listings = await asyncio.gather(
+                *(svc.list_zones() for svc in self._services),
+                return_exceptions=True,
+            )
+
+            complete = True
+            for idx, listed in enumerate(listings):
+                if isinstance(listed, BaseException):
+                    complete = False
+                    logger.warning("Zone index refresh failed for account #%d: %s", idx, listed)
+                    continue
+
+                seen: set[str] = set()
+                changed: list[ZoneIndexEntry] = []
+                with self._state_lock:
+                    # Zones recorded after the listing started are newer than it
+                    recent = set(self._recorded)
+                    for zone in listed:
+                        entry = ZoneIndexEntry(
+                            zone_id=zone["zone_id"],
+                            name=_normalize(zone["name"]),
+                            account_index=idx,
+                            status=zone["status"],
+                            nameservers=list(zone["nameservers"]),
+                        )
+                        seen.add(entry.zone_id)
+                        if entry.zone_id not in recent and self._by_id.get(entry.zone_id) != entry:
+                            changed.append(entry)
+                    gone = [
+                        zid for zid, e in self._by_id.items()
+                        if e.account_index == idx and zid not in seen and zid not in recent
+                    ]
+
+                    for entry in changed:
+                        self._put(entry)
+                    for zone_id in gone:
+                        self._drop(zone_id)
+                await self._persist_account(idx, changed, gone)
+
+                logger.info(
+                    "Zone index refreshed for account #%d: %d zones (%d changed, %d removed)",
+                    idx, len(seen), len(changed), len(gone),
+                )
+
+            if complete:
+                with self._state_lock:
+                    self._refreshed_at = started_at
+            return complete
+
+    async def _persist_account(self, idx: int, changed: list[ZoneIndexEntry], gone: list[str]) -> None:
+        email = self._services[idx].account_email
+        try:
+            async with BackgroundSessionLocal() as db:
+                if changed:
+                    await db.execute(_upsert_statement(), [
+                        {
+                            "zone_id": e.zone_id,
+                            "name": e.name,
+                            "account_email": email,
+                            "status": e.status,
+                            "nameservers": e.nameservers,
+                        }
+                        for e in changed
+                    ])
+                if gone:
+                    await db.execute(delete(CloudflareZone).where(CloudflareZone.zone_id.in_(gone)))
+                await db.execute(
+                    update(CloudflareZone)
+                    .where(CloudflareZone.account_email == email)
+                    .values(last_seen_at=func.now())
+                )
+                await db.commit()
+        except Exception as e:
+            logger.warning("Could not persist Cloudflare zone index for %s: %s", email, e)
+
+    async def record(
+        self,
+        account_index: int,
+        zone_id: str,
+        name: str,
+        status: str,
+        nameservers: list[str] | None = None,
+    ) -> None:
+        """Write-through a zone that was just created or looked up via the API."""
+        if not zone_id:
+            return
+        entry = ZoneIndexEntry(
+            zone_id=zone_id,
+            name=_normalize(name),
+            account_index=account_index,
+            status=status or "pending",
+            nameservers=list(nameservers or []),
+        )
+        with self._state_lock:
+            if self._listing:
+                self._recorded.add(zone_id)
+            if self._by_id.get(zone_id) == entry:
+                return
+            self._put(entry)
+        await self._persist_entry(entry)
+
+    async def _persist_entry(self, entry: ZoneIndexEntry) -> None:
+        try:
+            async with BackgroundSessionLocal() as db:
+                await db.execute(_upsert_statement(), [{
+                    "zone_id": entry.zone_id,
+                    "name": entry.name,
+                    "account_email": self._services[entry.account_index].account_email,
+                    "status": entry.status,
+                    "nameservers": entry.nameservers,
+                }])
+                await db.commit()
+        except Exception as e:
+            logger.warning("Could not persist zone %s to zone index: %s", entry.zone_id, e)
+
@@ -0,0 +1,222 @@
+"""
+Declarative DNS planning.
+
+Describe the records a zone should have (DesiredRecord), diff them against the
+zone's current records, and get back the minimal set of deletes / patches /
+creates (DnsPlan). CloudflareService.apply_dns_plan() sends a plan as a single
+/dns_records/batch request; a plan on its own is the dry-run report.
+
+Each desired record "owns" a set of existing records (by default every record
+of the same type at the same name). Owned records that don't match are patched
+into shape or deleted, so e.g. an SPF slot leaves exactly one v=spf1 TXT at the
+root, and a CNAME slot clears conflicting A/AAAA records at its name.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+# Ownership scopes for DesiredRecord.owns
+OWNS_SAME_TYPE = "same_type"      # every record of this type at this name (MX, plain TXT)
+OWNS_SPF = "spf"                  # TXT records at this name containing v=spf1
+OWNS_MS_VERIFICATION = "ms"       # TXT records at this name starting with MS=
+OWNS_HOSTNAME = "hostname"        # CNAME/A/AAAA at this name (they can't coexist with a CNAME)
+OWNS_EXACT = "exact"              # only a record with identical content (never deletes anything)
+
+
+@dataclass(frozen=True)
+class DesiredRecord:
+    type: str
+    name: str  # "@" for the zone apex, otherwise relative ("autodiscover", "_dmarc")
+    content: str
+    priority: Optional[int] = None
+    proxied: bool = False
+    owns: str = OWNS_SAME_TYPE
+    key: str = ""  # label used in results ("mx", "spf", "selector1", ...)
+
+    @property
+    def label(self) -> str:
+        return self.key or f"{self.type} {self.name}"
+
+    def fqdn(self, domain: str) -> str:
+        domain = domain.lower().rstrip(".")
+        if self.name in ("@", "", domain):
+            return domain
+        name = self.name.lower().rstrip(".")
+        return name if name.endswith("." + domain) else f"{name}.{domain}"
+
+    def as_cloudflare(self) -> dict[str, Any]:
+        body: dict[str, Any] = {
+            "type": self.type,
+            "name": self.name,
+            "content": self.content,
+            "ttl": 1,
+        }
+        if self.type in ("A", "AAAA", "CNAME"):
+            body["proxied"] = self.proxied
+        if self.priority is not None:
+            body["priority"] = self.priority
+        return body
+
+
+# === Standard record sets ===
+
+M365_SPF = "v=spf1 include:spf.protection.outlook.com ~all"
+
+
+def mx_record(domain: str, target: Optional[str] = None, priority: int = 0) -> DesiredRecord:
+    target = target or f"{domain.replace('.', '-')}.mail.protection.outlook.com"
+    return DesiredRecord("MX", "@", target, priority=priority, key="mx")
+
+
+def spf_record(value: str = M365_SPF) -> DesiredRecord:
+    return DesiredRecord("TXT", "@", value, owns=OWNS_SPF, key="spf")
+
+
+def verification_txt(value: str) -> DesiredRecord:
+    return DesiredRecord("TXT", "@", value, owns=OWNS_MS_VERIFICATION, key="verification")
+
+
+def cname_record(name: str, target: str, proxied: bool = False, key: str = "") -> DesiredRecord:
+    return DesiredRecord("CNAME", name, target, proxied=proxied, owns=OWNS_HOSTNAME, key=key or name)
+
+
+def dkim_records(selector1_value: str, selector2_value: str) -> list[DesiredRecord]:
+    # DKIM CNAMEs MUST be DNS only (proxied=False)
+    return [
+        cname_record("selector1._domainkey", selector1_value, key="selector1"),
+        cname_record("selector2._domainkey", selector2_value, key="selector2"),
+    ]
+
+
+def m365_email_records(domain: str) -> list[DesiredRecord]:
+    """MX + SPF + autodiscover for a Microsoft 365 mail domain."""
+    return [
+        mx_record(domain),
+        spf_record(),
+        cname_record("autodiscover", "autodiscover.outlook.com", key="autodiscover"),
+    ]
+
+
+# === Diffing ===
+
+def _norm_content(record_type: str, content: str) -> str:
+    content = (content or "").strip()
+    if record_type == "TXT":
+        # Cloudflare may return TXT content wrapped in quotes
+        if len(content) >= 2 and content[0] == content[-1] == '"':
+            content = content[1:-1]
+        return content
+    return content.lower().rstrip(".")
+
+
+def _owned_by(desired: DesiredRecord, record: dict, domain: str) -> bool:
+    if record.get("name", "").lower().rstrip(".") != desired.fqdn(domain):
+        return False
+    record_type = record.get("type")
+    content = _norm_content("TXT", record.get("content", "")) if record_type == "TXT" else ""
+    if desired.owns == OWNS_HOSTNAME:
+        return record_type in ("CNAME", "A", "AAAA")
+    if record_type != desired.type:
+        return False
+    if desired.owns == OWNS_SPF:
+        return "v=spf1" in content.lower()
+    if desired.owns == OWNS_MS_VERIFICATION:
+        return content.lower().startswith("ms=")
+    if desired.owns == OWNS_EXACT:
+        return _norm_content(record_type, record.get("content", "")) == _norm_content(desired.type, desired.content)
+    return True
+
+
+def _matches(desired: DesiredRecord, record: dict) -> bool:
+    if record.get("type") != desired.type:
+        return False
+    if _norm_content(desired.type, record.get("content", "")) != _norm_content(desired.type, desired.content):
+        return False
+    if desired.priority is not None and record.get("priority") != desired.priority:
+        return False
+    if desired.type in ("A", "AAAA", "CNAME") and bool(record.get("proxied")) != desired.proxied:
+        return False
+    return True
+
+
+@dataclass
+class DnsPlan:
+    zone_id: str
+    domain: str
+    creates: list[DesiredRecord] = field(default_factory=list)
+    patches: list[tuple[dict, DesiredRecord]] = field(default_factory=list)  # (existing record, desired)
+    deletes: list[dict] = field(default_factory=list)
+    unchanged: list[tuple[dict, DesiredRecord]] = field(default_factory=list)
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.creates or self.patches or self.deletes)
+
+    @property
+    def change_count(self) -> int:
+        return len(self.creates) + len(self.patches) + len(self.deletes)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Dry-run report."""
+        return {
+            "zone_id": self.zone_id,
+            "domain": self.domain,
+            "creates": [
+                {"key": d.label, "type": d.type, "name": d.name, "content": d.content}
+                for d in self.creates
+            ],
+            "patches": [
+                {
+                    "key": d.label,
+                    "id": r["id"],
+                    "type": d.type,
+                    "name": r["name"],
+                    "from": r.get("content"),
+                    "to": d.content,
+                }
+                for r, d in self.patches
+            ],
+            "deletes": [
+                {"id": r["id"], "type": r["type"], "name": r["name"], "content": r.get("content")}
+                for r in self.deletes
+            ],
+            "unchanged": [d.label for _, d in self.unchanged],
+        }
+
+
+def build_plan(zone_id: str, domain: str, desired: list[DesiredRecord], existing: list[dict]) -> DnsPlan:
+    """
+    Diff desired records against a zone's current records.
+
+    Per desired record: keep an exact match if there is one, otherwise patch an
+    owned record of the same type, otherwise create. Every other owned record
+    is deleted.
+    """
+    plan = DnsPlan(zone_id=zone_id, domain=domain)
+    claimed: set[str] = set()
+    to_delete: dict[str, dict] = {}
+
+    for want in desired:
+        owned = [r for r in existing if r["id"] not in claimed and _owned_by(want, r, domain)]
+        keep = next((r for r in owned if _matches(want, r)), None)
+        if keep is None:
+            keep = next((r for r in owned if r.get("type") == want.type), None)
+            if keep is not None:
+                plan.patches.append((keep, want))
+        else:
+            plan.unchanged.append((keep, want))
+
+        if keep is None:
+            plan.creates.append(want)
+        else:
+            claimed.add(keep["id"])
+            to_delete.pop(keep["id"], None)
+
+        for r in owned:
+            if r is not keep and r["id"] not in claimed:
+                to_delete[r["id"]] = r
+
+    plan.deletes = list(to_delete.values())
+    return plan
@@ -25,7 +25,7 @@ from sqlalchemy.orm import selectinload
 from app.models.domain import Domain, DomainStatus
 from app.models.tenant import Tenant, TenantStatus
 from app.models.mailbox import Mailbox, MailboxStatus
-from app.services.cloudflare import CloudflareService
+from app.services.cloudflare import CloudflareService, get_shared_cloudflare_service
 from app.services.powershell.runner import PowerShellRunner
 
 logger = logging.getLogger(__name__)
@@ -40,7 +40,7 @@ class DomainRemovalService:
     def _get_cf_service(self) -> Optional[CloudflareService]:
         """Get a CloudflareService instance, or None if not configured."""
         try:
-            return CloudflareService()
+            return get_shared_cloudflare_service()
         except Exception as e:
             logger.warning(f"CloudflareService not available: {e}")
             return None
@@ -32,7 +32,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.mailbox import Mailbox
 from app.models.tenant import Tenant
 from app.models.batch import SetupBatch
+from app.db.bulk import BufferedUpdater
 from app.db.session import async_session_factory
+from app.services.selenium.browser import launch_chrome
 
 logger = logging.getLogger(__name__)
 
@@ -213,7 +215,7 @@ class InstantlyUploader:
                 offset = self.worker_id * 50
                 opts.add_argument(f"--window-position={offset},{offset}")
 
-            self.driver = webdriver.Chrome(options=opts)
+            self.driver = launch_chrome(opts, "instantly")
             self.driver.execute_script(
                 "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
             )
@@ -867,16 +869,15 @@ async def run_instantly_upload_for_batch(
                     logger.info(
                         f"Pre-filter: {len(already_uploaded)} accounts already in Instantly (API cache)"
                     )
-                    for mb in already_uploaded:
-                        await session.execute(
-                            update(Mailbox)
-                            .where(Mailbox.id == mb["id"])
-                            .values(
-                                instantly_uploaded=True,
-                                instantly_uploaded_at=datetime.utcnow(),
-                                instantly_upload_error=None,
-                            )
+                    await session.execute(
+                        update(Mailbox)
+                        .where(Mailbox.id.in_([mb["id"] for mb in already_uploaded]))
+                        .values(
+                            instantly_uploaded=True,
+                            instantly_uploaded_at=datetime.utcnow(),
+                            instantly_upload_error=None,
                         )
+                    )
                     await session.commit()
 
                     mailbox_list = [
@@ -934,40 +935,33 @@ async def run_instantly_upload_for_batch(
                     futures.append(fut)
                     future_to_mb[fut] = mb_data
 
-                for fut in as_completed(futures):
-                    res = fut.result()
-                    mb_data = future_to_mb[fut]
+                # Results are written in bulk every N results / T seconds
+                async with BufferedUpdater(Mailbox, "id") as writer:
+                    for fut in as_completed(futures):
+                        res = fut.result()
+                        mb_data = future_to_mb[fut]
 
-                    async with async_session_factory() as session:
                         if res["success"]:
-                            await session.execute(
-                                update(Mailbox)
-                                .where(Mailbox.id == res["mailbox_id"])
-                                .values(
-                                    instantly_uploaded=True,
-                                    instantly_uploaded_at=datetime.utcnow(),
-                                    instantly_upload_error=None,
-                                )
+                            await writer.add(
+                                res["mailbox_id"],
+                                instantly_uploaded=True,
+                                instantly_uploaded_at=datetime.utcnow(),
+                                instantly_upload_error=None,
                             )
                             uploaded += 1
                         else:
-                            await session.execute(
-                                update(Mailbox)
-                                .where(Mailbox.id == res["mailbox_id"])
-                                .values(
-                                    instantly_uploaded=False,
-                                    instantly_upload_error=res["error"],
-                                )
+                            await writer.add(
+                                res["mailbox_id"],
+                                instantly_uploaded=False,
+                                instantly_upload_error=res["error"],
                             )
                             failed += 1
                             errs.append(res["error"])
                             failed_mbs.append(mb_data)
 
-                        await session.commit()
-
-                    logger.info(
-                        f"[{pass_label}] Progress: {uploaded + failed}/{len(mb_list)} processed"
-                    )
+                        logger.info(
+                            f"[{pass_label}] Progress: {uploaded + failed}/{len(mb_list)} processed"
+                        )
             finally:
                 for upl in uploaders:
                     upl.cleanup()
@@ -1001,15 +995,14 @@ async def run_instantly_upload_for_batch(
         await asyncio.sleep(5)
 
         async with async_session_factory() as session:
-            for mb_data in remaining_failed:
-                await session.execute(
-                    update(Mailbox)
-                    .where(Mailbox.id == mb_data["id"])
-                    .values(
-                        instantly_uploaded=False,
-                        instantly_upload_error=None,
-                    )
+            await session.execute(
+                update(Mailbox)
+                .where(Mailbox.id.in_([mb_data["id"] for mb_data in remaining_failed]))
+                .values(
+                    instantly_uploaded=False,
+                    instantly_upload_error=None,
                 )
+            )
             await session.commit()
 
         retry_result = await _run_upload_pass(
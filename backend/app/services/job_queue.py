@@ -0,0 +1,654 @@
+"""
+Durable job queue.
+
+Pipeline runs, auto-runs, domain checks and password resets are rows in
+`jobs` rather than BackgroundTasks tracked only in a process-local dict, so a
+restart no longer strands them:
+
+- enqueue() adds a job; there is at most one queued/running job per
+  (kind, key), e.g. one pipeline run per batch.
+- A JobRunner claims jobs with SELECT ... FOR UPDATE SKIP LOCKED, so any
+  number of processes/replicas can poll the same table without running a job
+  twice, and holds a lease on each job it runs.
+- While a handler runs, the runner heartbeats every job_heartbeat_seconds:
+  it pushes the lease forward and saves the job's checkpoint and progress.
+  If the process dies the lease lapses, and the next runner to poll claims
+  the job again; the handler sees ctx.resumed and carries on from
+  ctx.checkpoint.
+- A handler that raises is retried with exponential backoff, up to
+  max_attempts claims in total.
+- Payload keys passed as enqueue(secret_keys=...) (passwords, API keys) are
+  blanked when the job ends for good, so finished rows keep no credentials.
+- Each kind has its own concurrency limit per runner, so long-running kinds
+  (a pipeline waiting up to a day for nameservers) never hold the slots of
+  short ones.
+- Jobs run in the API process (start_job_runner, from main.py) and/or in
+  dedicated worker processes (python -m app.worker); the API only needs
+  to enqueue and read progress back from the row.
+
+Handlers are registered per kind in the module that owns the work:
+
+    @job_handler("password_reset")
+    async def _reset_passwords_job(ctx: JobContext) -> None:
+        for tenant in tenants:
+            if ctx.is_done(tenant.id):
+                continue  # finished before the restart
+            ...
+            ctx.mark_done(tenant.id)
+
+    job = await job_queue.enqueue(db, "password_reset", {"tenant_id": None}, key="all")
+    await db.commit()
+"""
+
+import asyncio
+import logging
+import os
+import socket
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Union
+from uuid import UUID, uuid4
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import get_settings
+from app.db.session import async_session_factory
+from app.models.job import ACTIVE_JOB_STATUSES, Job, JobStatus
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[["JobContext"], Awaitable[None]]
+
+_handlers: Dict[str, JobHandler] = {}
+
+# Payload field listing the payload keys that hold secrets
+SECRET_KEYS_FIELD = "_secret_keys"
+
+
+def job_handler(kind: str) -> Callable[[JobHandler], JobHandler]:
+    """Register the coroutine that runs jobs of this kind."""
+    def register(func: JobHandler) -> JobHandler:
+        _handlers[kind] = func
+        return func
+    return register
+
+
+def registered_kinds() -> List[str]:
+    return sorted(_handlers)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def scrub_secrets(payload: Optional[dict]) -> Optional[dict]:
+    """The payload with its secret keys set to None (unchanged if it has none)."""
+    secret_keys = set((payload or {}).get(SECRET_KEYS_FIELD) or ())
+    if not secret_keys:
+        return payload
+    return {name: None if name in secret_keys else value for name, value in payload.items()}
+
+
+# ============== QUEUE OPERATIONS ==============
+
+
+async def get_job(db: AsyncSession, job_id: Union[UUID, str]) -> Optional[Job]:
+    try:
+        return await db.get(Job, UUID(str(job_id)))
+    except ValueError:
+        return None
+
+
+async def get_active(db: AsyncSession, kind: str, key: str) -> Optional[Job]:
+    """The queued/running job of this kind and key, if any."""
+    result = await db.execute(
+        select(Job).where(
+            Job.kind == kind,
+            Job.key == str(key),
+            Job.status.in_(ACTIVE_JOB_STATUSES),
+        )
+    )
+    return result.scalar_one_or_none()
+
+
+async def get_latest(db: AsyncSession, kind: str, key: str) -> Optional[Job]:
+    """The newest job of this kind and key, whatever its status (for status polls after it ended)."""
+    result = await db.execute(
+        select(Job)
+        .where(Job.kind == kind, Job.key == str(key))
+        .order_by(Job.created_at.desc())
+        .limit(1)
+    )
+    return result.scalar_one_or_none()
+
+
+async def enqueue(
+    db: AsyncSession,
+    kind: str,
+    payload: Optional[dict] = None,
+    key: Optional[str] = None,
+    priority: int = 0,
+    max_attempts: Optional[int] = None,
+    delay_seconds: float = 0.0,
+    secret_keys: Iterable[str] = (),
+) -> Job:
+    """
+    Queue a job, or return the queued/running job that already holds (kind, key).
+
+    Flushes but does not commit: the job becomes claimable when the caller
+    commits, together with whatever else the request changed.
+
+    Args:
+        db: Session to add the job in
+        kind: Handler name (see job_handler)
+        payload: JSON-serializable handler arguments
+        key: Dedupe key; None = always a new job
+        priority: Higher is claimed first
+        max_attempts: Claims before the job is given up on (default job_max_attempts)
+        delay_seconds: Not claimed before this many seconds from now
+        secret_keys: Payload keys blanked once the job has ended (succeeded,
+            cancelled, or failed on its last attempt)
+
+    Returns:
+        The new job, or the existing active one
+    """
+    if key is not None:
+        key = str(key)
+        existing = await get_active(db, kind, key)
+        if existing:
+            return existing
+
+    payload = jsonable_encoder(payload or {})
+    secret_keys = sorted(secret_keys)
+    if secret_keys:
+        payload[SECRET_KEYS_FIELD] = secret_keys
+    job = Job(
+        kind=kind,
+        key=key,
+        payload=payload,
+        status=JobStatus.QUEUED.value,
+        priority=priority,
+        run_after=_now() + timedelta(seconds=delay_seconds),
+        attempts=0,
+        max_attempts=max_attempts or get_settings().job_max_attempts,
+        cancel_requested=False,
+    )
+    try:
+        async with db.begin_nested():
+            db.add(job)
+    except IntegrityError:
+        # Another request queued the same key between our check and insert
+        existing = await get_active(db, kind, key) if key is not None else None
+        if existing:
+            return existing
+        raise
+    logger.info("Queued %s job %s (key=%s)", kind, job.id, key)
+    return job
+
+
+async def request_cancel(db: AsyncSession, job: Job) -> None:
+    """
+    Cancel a queued job, or ask the runner of a running one to stop.
+
+    Running jobs stop at the handler's next check of ctx.cancel_requested;
+    one whose lease lapses meanwhile is not resumed. Does not commit.
+    """
+    if job.status == JobStatus.QUEUED.value:
+        job.status = JobStatus.CANCELLED.value
+        job.finished_at = _now()
+        job.payload = scrub_secrets(job.payload)
+    elif job.status == JobStatus.RUNNING.value:
+        job.cancel_requested = True
+
+
+async def claim(
+    owner: str,
+    kinds: Iterable[str],
+    lease_seconds: float,
+    session_factory: async_sessionmaker = async_session_factory,
+) -> Optional[Job]:
+    """
+    Lease the next runnable job: queued and due, or running with a lapsed lease.
+
+    Rows locked by other runners are skipped (FOR UPDATE SKIP LOCKED), so
+    concurrent claims never return the same job. A lapsed job that already
+    used all its attempts, or was asked to cancel, is closed instead.
+
+    Returns:
+        The claimed job (status running, attempts incremented), or None
+    """
+    kinds = list(kinds)
+    if not kinds:
+        return None
+
+    async with session_factory() as db:
+        while True:
+            now = _now()
+            job = (await db.execute(
+                select(Job)
+                .where(
+                    Job.kind.in_(kinds),
+                    or_(
+                        and_(Job.status == JobStatus.QUEUED.value, Job.run_after <= now),
+                        and_(Job.status == JobStatus.RUNNING.value, Job.lease_expires_at < now),
+                    ),
+                )
+                .order_by(Job.priority.desc(), Job.created_at)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            )).scalar_one_or_none()
+
+            if job is None:
+                await db.rollback()
+                return None
+
+            if job.status == JobStatus.RUNNING.value:
+                logger.warning(
+                    "Lease on %s job %s (held by %s) expired after attempt %d",
+                    job.kind, job.id, job.lease_owner, job.attempts,
+                )
+                if job.cancel_requested or job.attempts >= job.max_attempts:
+                    job.status = (JobStatus.CANCELLED if job.cancel_requested else JobStatus.FAILED).value
+                    job.last_error = job.last_error or f"Lease expired on attempt {job.attempts} ({job.lease_owner})"
+                    job.lease_owner = None
+                    job.lease_expires_at = None
+                    job.finished_at = now
+                    job.payload = scrub_secrets(job.payload)
+                    await db.commit()
+                    continue
+
+            job.status = JobStatus.RUNNING.value
+            job.lease_owner = owner
+            job.lease_expires_at = now + timedelta(seconds=lease_seconds)
+            job.heartbeat_at = now
+            job.started_at = now
+            job.attempts += 1
+            await db.commit()
+            return job
+
+
+async def heartbeat(
+    job_id: UUID,
+    owner: str,
+    lease_seconds: float,
+    checkpoint: Optional[dict] = None,
+    progress: Optional[dict] = None,
+    session_factory: async_sessionmaker = async_session_factory,
+) -> Optional[bool]:
+    """
+    Extend the lease on a running job and save its checkpoint/progress.
+
+    Returns:
+        None if owner no longer holds the lease (the job must stop),
+        else whether cancellation has been requested
+    """
+    now = _now()
+    values: Dict[str, Any] = {"heartbeat_at": now, "lease_expires_at": now + timedelta(seconds=lease_seconds)}
+    if checkpoint is not None:
+        values["checkpoint"] = jsonable_encoder(checkpoint)
+    if progress is not None:
+        values["progress"] = jsonable_encoder(progress)
+
+    async with session_factory() as db:
+        result = await db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.lease_owner == owner, Job.status == JobStatus.RUNNING.value)
+            .values(**values)
+            .returning(Job.cancel_requested)
+        )
+        row = result.first()
+        await db.commit()
+    return None if row is None else bool(row[0])
+
+
+async def finish(
+    job_id: UUID,
+    owner: str,
+    status: JobStatus,
+    error: Optional[str] = None,
+    retry_in: Optional[float] = None,
+    checkpoint: Optional[dict] = None,
+    progress: Optional[dict] = None,
+    session_factory: async_sessionmaker = async_session_factory,
+) -> bool:
+    """
+    Release a job this owner holds: close it with `status`, or (retry_in set) queue it again.
+
+    Closing a job blanks its secret payload keys.
+
+    Returns:
+        False if the lease had already been lost (nothing written)
+    """
+    now = _now()
+    values: Dict[str, Any] = {"lease_owner": None, "lease_expires_at": None, "last_error": error}
+    if retry_in is not None:
+        values.update(status=JobStatus.QUEUED.value, run_after=now + timedelta(seconds=retry_in))
+    else:
+        values.update(status=status.value, finished_at=now)
+    if checkpoint is not None:
+        values["checkpoint"] = jsonable_encoder(checkpoint)
+    if progress is not None:
+        values["progress"] = jsonable_encoder(progress)
+
+    async with session_factory() as db:
+        if retry_in is None:
+            payload = (await db.execute(
+                select(Job.payload).where(Job.id == job_id).with_for_update()
+            )).scalar_one_or_none()
+            scrubbed = scrub_secrets(payload)
+            if scrubbed is not payload:
+                values["payload"] = scrubbed
+        result = await db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.lease_owner == owner, Job.status == JobStatus.RUNNING.value)
+            .values(**values)
+        )
+        await db.commit()
+    return bool(result.rowcount)
+
+
+async def release(
+    job_id: UUID,
+    owner: str,
+    checkpoint: Optional[dict] = None,
+    progress: Optional[dict] = None,
+    session_factory: async_sessionmaker = async_session_factory,
+) -> bool:
+    """Hand a running job back to the queue on shutdown, without using up an attempt."""
+    values: Dict[str, Any] = {
+        "status": JobStatus.QUEUED.value,
+        "lease_owner": None,
+        "lease_expires_at": None,
+        "run_after": _now(),
+        "attempts": Job.attempts - 1,
+    }
+    if checkpoint is not None:
+        values["checkpoint"] = jsonable_encoder(checkpoint)
+    if progress is not None:
+        values["progress"] = jsonable_encoder(progress)
+
+    async with session_factory() as db:
+        result = await db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.lease_owner == owner, Job.status == JobStatus.RUNNING.value)
+            .values(**values)
+        )
+        await db.commit()
+    return bool(result.rowcount)
+
+
+def retry_delay(attempt: int) -> float:
+    """Backoff before re-running a job that failed on `attempt` (1-based)."""
+    settings = get_settings()
+    return min(settings.job_retry_base_seconds * 2 ** max(attempt - 1, 0), settings.job_retry_max_seconds)
+
+
+# ============== RUNNER ==============
+
+
+class JobContext:
+    """
+    What a handler gets: the job's arguments plus its resume state.
+
+    checkpoint is saved with every heartbeat and when the job ends; use
+    mark_done()/is_done() for per-item progress, or any other JSON keys.
+    progress (a dict, or a callable returning one) is the job's live status,
+    saved alongside it so other processes can report on the job.
+    on_cancel, if set, is called once when a heartbeat first sees
+    cancel_requested (e.g. to flip the handler's own stop flag).
+    """
+
+    def __init__(self, job: Job, runner: Optional["JobRunner"] = None):
+        self.id: UUID = job.id
+        self.kind: str = job.kind
+        self.key: Optional[str] = job.key
+        self.payload: dict = dict(job.payload or {})
+        self.attempt: int = job.attempts
+        self.max_attempts: int = job.max_attempts
+        self.checkpoint: dict = dict(job.checkpoint or {})
+        self.progress: Union[dict, Callable[[], Optional[dict]], None] = None
+        self.cancel_requested: bool = bool(job.cancel_requested)
+        self.on_cancel: Optional[Callable[[], None]] = None
+        self._runner = runner
+
+    @property
+    def resumed(self) -> bool:
+        """True when an earlier attempt got (part of) the way through."""
+        return self.attempt > 1 or bool(self.checkpoint)
+
+    def is_done(self, item: Any) -> bool:
+        return str(item) in self.checkpoint.get("done", {})
+
+    def mark_done(self, item: Any, result: Any = True) -> None:
+        self.checkpoint.setdefault("done", {})[str(item)] = result
+
+    def done_items(self) -> Dict[str, Any]:
+        return self.checkpoint.get("done", {})
+
+    def current_progress(self) -> Optional[dict]:
+        progress = self.progress() if callable(self.progress) else self.progress
+        return dict(progress) if progress is not None else None
+
+    async def save(self) -> None:
+        """Write checkpoint and progress now instead of at the next heartbeat."""
+        if self._runner:
+            await self._runner.heartbeat(self)
+
+
+class JobRunner:
+    """
+    Claim and run queued jobs in this process.
+
+    Runs jobs of the given kinds (default: every kind with a registered
+    handler), up to `concurrency` of each kind at once unless kind_concurrency
+    sets a different limit for that kind. stop() hands unfinished jobs back to
+    the queue so another runner can pick them up straight away.
+    """
+
+    def __init__(
+        self,
+        kinds: Optional[Iterable[str]] = None,
+        concurrency: Optional[int] = None,
+        kind_concurrency: Optional[Dict[str, int]] = None,
+        session_factory: async_sessionmaker = async_session_factory,
+        poll_seconds: Optional[float] = None,
+        lease_seconds: Optional[float] = None,
+        heartbeat_seconds: Optional[float] = None,
+        name: str = "api",
+    ):
+        settings = get_settings()
+        self._kinds = list(kinds) if kinds is not None else None
+        self.concurrency = concurrency or settings.job_runner_concurrency
+        self.kind_concurrency = dict(
+            kind_concurrency if kind_concurrency is not None else settings.job_runner_kind_concurrency
+        )
+        self.session_factory = session_factory
+        self.poll_seconds = poll_seconds if poll_seconds is not None else settings.job_poll_seconds
+        self.lease_seconds = lease_seconds or settings.job_lease_seconds
+        self.heartbeat_seconds = heartbeat_seconds or settings.job_heartbeat_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{name}:{uuid4().hex[:8]}"
+        self.running: Dict[UUID, asyncio.Task] = {}
+        self._running_kinds: Dict[UUID, str] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+
+    @property
+    def kinds(self) -> List[str]:
+        return self._kinds if self._kinds is not None else registered_kinds()
+
+    def limit(self, kind: str) -> int:
+        """Jobs of this kind run at once."""
+        return self.kind_concurrency.get(kind, self.concurrency)
+
+    def claimable_kinds(self) -> List[str]:
+        """Kinds with a free slot."""
+        counts: Dict[str, int] = {}
+        for kind in self._running_kinds.values():
+            counts[kind] = counts.get(kind, 0) + 1
+        return [kind for kind in self.kinds if counts.get(kind, 0) < self.limit(kind)]
+
+    def start(self) -> None:
+        if self._task is None:
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+            logger.info("Job runner %s started (kinds: %s)", self.owner, ", ".join(self.kinds))
+
+    def wake(self) -> None:
+        """Poll now instead of after poll_seconds (e.g. right after enqueueing)."""
+        if self._wake:
+            self._wake.set()
+
+    async def stop(self) -> None:
+        """Stop claiming, and hand the jobs still running back to the queue."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        tasks = list(self.running.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def run_once(self, kinds: Optional[Iterable[str]] = None) -> Optional[asyncio.Task]:
+        """Claim one job (of `kinds`, default all) and start it; returns its task, or None if nothing was due."""
+        job = await claim(
+            self.owner, kinds if kinds is not None else self.kinds, self.lease_seconds, self.session_factory
+        )
+        if job is None:
+            return None
+        task = asyncio.create_task(self._execute(job))
+        self.running[job.id] = task
+        self._running_kinds[job.id] = job.kind
+        task.add_done_callback(lambda _: self._on_done(job.id))
+        return task
+
+    def _on_done(self, job_id: UUID) -> None:
+        self.running.pop(job_id, None)
+        self._running_kinds.pop(job_id, None)
+        self.wake()
+
+    async def _run(self) -> None:
+        while True:
+            started = None
+            kinds = self.claimable_kinds()
+            if kinds:
+                try:
+                    started = await self.run_once(kinds)
+                except Exception as e:
+                    logger.error("Job claim failed: %s", e)
+            if started is None:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+
+    async def heartbeat(self, ctx: JobContext) -> bool:
+        """Renew ctx's lease; False if it has been lost."""
+        try:
+            cancel = await heartbeat(
+                ctx.id, self.owner, self.lease_seconds,
+                checkpoint=ctx.checkpoint, progress=ctx.current_progress(),
+                session_factory=self.session_factory,
+            )
+        except Exception as e:
+            # Transient DB trouble: the lease is still good until it expires
+            logger.warning("Heartbeat for job %s failed: %s", ctx.id, e)
+            return True
+        if cancel is None:
+            return False
+        if cancel and not ctx.cancel_requested and ctx.on_cancel:
+            logger.info("Cancellation requested for %s job %s", ctx.kind, ctx.id)
+            try:
+                ctx.on_cancel()
+            except Exception as e:
+                logger.error("on_cancel for job %s failed: %s", ctx.id, e)
+        ctx.cancel_requested = cancel
+        return True
+
+    async def _execute(self, job: Job) -> None:
+        ctx = JobContext(job, self)
+        handler = _handlers.get(job.kind)
+        if handler is None:
+            await finish(job.id, self.owner, JobStatus.FAILED, error=f"No handler for job kind {job.kind!r}",
+                         session_factory=self.session_factory)
+            return
+
+        logger.info("Running %s job %s (attempt %d/%d)", job.kind, job.id, ctx.attempt, ctx.max_attempts)
+        work = asyncio.create_task(handler(ctx))
+        try:
+            while True:
+                done, _ = await asyncio.wait({work}, timeout=self.heartbeat_seconds)
+                if done:
+                    break
+                if not await self.heartbeat(ctx):
+                    logger.error("Lost the lease on %s job %s, stopping it", job.kind, job.id)
+                    work.cancel()
+                    await asyncio.gather(work, return_exceptions=True)
+                    return
+            work.result()
+        except asyncio.CancelledError:
+            work.cancel()
+            await asyncio.gather(work, return_exceptions=True)
+            try:
+                await release(job.id, self.owner, ctx.checkpoint, ctx.current_progress(), self.session_factory)
+                logger.info("Returned %s job %s to the queue", job.kind, job.id)
+            except Exception as e:
+                logger.error("Could not return job %s to the queue (picked up after its lease expires): %s", job.id, e)
+            raise
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            retry_in = retry_delay(ctx.attempt) if ctx.attempt < ctx.max_attempts else None
+            logger.error(
+                "%s job %s failed on attempt %d/%d: %s%s",
+                job.kind, job.id, ctx.attempt, ctx.max_attempts, error,
+                f" (retrying in {retry_in:.0f}s)" if retry_in is not None else "",
+            )
+            await self._finish(ctx, JobStatus.FAILED, error=error, retry_in=retry_in)
+            return
+
+        status = JobStatus.CANCELLED if ctx.cancel_requested else JobStatus.SUCCEEDED
+        await self._finish(ctx, status)
+        logger.info("%s job %s %s", job.kind, job.id, status.value)
+
+    async def _finish(self, ctx: JobContext, status: JobStatus, error: Optional[str] = None,
+                      retry_in: Optional[float] = None) -> None:
+        try:
+            await finish(
+                ctx.id, self.owner, status, error=error, retry_in=retry_in,
+                checkpoint=ctx.checkpoint, progress=ctx.current_progress(),
+                session_factory=self.session_factory,
+            )
+        except Exception as e:
+            logger.error("Could not record the end of job %s (re-run after its lease expires): %s", ctx.id, e)
+
+
+job_runner: Optional[JobRunner] = None
+
+
+def start_job_runner() -> JobRunner:
+    """Start this process's runner for every registered kind (see main.py lifespan)."""
+    global job_runner
+    if job_runner is None:
+        job_runner = JobRunner()
+        job_runner.start()
+    return job_runner
+
+
+async def stop_job_runner() -> None:
+    global job_runner
+    if job_runner:
+        await job_runner.stop()
+        job_runner = None
+
+
+def wake_runner() -> None:
+    """Let this process's runner claim newly committed jobs without waiting for its next poll."""
+    if job_runner:
+        job_runner.wake()
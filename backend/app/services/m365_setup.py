@@ -585,6 +585,45 @@ async def run_step5_for_tenant(db: AsyncSession, tenant_id: UUID, on_progress=No
     return result
 
 
+async def run_step5_for_domain(domain_id: UUID) -> Dict[str, Any]:
+    """
+    Run Step 6 for one domain: the work of one run_step5_for_batch worker.
+
+    The pipeline calls this per domain as soon as the tenant's first login and
+    the domain's DNS are done, instead of waiting for the whole batch.
+
+    Returns:
+        {"success": bool, "error": str or None}
+    """
+    async with get_fresh_db_session() as db:
+        domain = await db.get(Domain, domain_id)
+        tenant = await db.get(Tenant, domain.tenant_id) if domain and domain.tenant_id else None
+
+    if not domain:
+        return {"success": False, "error": "Domain not found"}
+    if not tenant:
+        logger.warning(f"[{domain.name}] Tenant record not found for domain, skipping")
+        return {"success": False, "error": "Tenant not found for domain"}
+    if not tenant.admin_email or not tenant.admin_password or not tenant.totp_secret:
+        logger.warning(f"[{domain.name}] Missing tenant credentials, skipping")
+        return {"success": False, "error": "Missing credentials (admin_email, admin_password, or totp_secret)"}
+
+    domain_data = {
+        "tenant_id": str(tenant.id),
+        "domain_id": str(domain.id),
+        "domain": domain.name,
+        "zone_id": domain.cloudflare_zone_id,
+        "admin_email": tenant.admin_email,
+        "admin_password": tenant.admin_password,
+        "totp_secret": tenant.totp_secret,
+        "already_verified": domain.domain_verified_in_m365,
+    }
+
+    selenium_result = await asyncio.get_event_loop().run_in_executor(None, _sync_setup_domain, domain_data)
+    await _save_step6_result(domain_data, selenium_result)
+    return {"success": bool(selenium_result.get("success")), "error": selenium_result.get("error")}
+
+
 # ============================================================
 # LEGACY M365SetupService CLASS (kept for compatibility)
 # ============================================================
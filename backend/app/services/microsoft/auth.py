@@ -90,9 +90,10 @@ class DeviceCodeAuth:
         
         # Step 2: Use Selenium to enter code
         from app.services.selenium.browser import create_driver
+        from app.services.selenium.browser_slots import browser_slots
         import pyotp
         
-        driver = create_driver(headless=headless)
+        driver = create_driver(headless=headless, slot=await browser_slots.acquire_async("step4"))
         
         try:
             driver.get(self.DEVICE_LOGIN_URL)
@@ -0,0 +1,262 @@
+"""
+Nameserver propagation checks on dnspython's asyncio resolver.
+
+Two modes (settings.ns_check_mode):
+
+- "authoritative" (default): ask the parent zone's own servers (e.g. the .com
+  gTLD servers) for the domain's delegation, non-recursively. That is what the
+  registry publishes right now, so a registrar NS change shows up immediately
+  instead of after a recursive resolver's cached NS answer expires. The parent's
+  server addresses are looked up once per parent zone and cached; concurrent
+  checks under the same parent share one lookup.
+- "recursive": ask the normal resolvers for the domain's NS records.
+
+Recursive lookups go through a small pool of shared resolvers: one per
+configured nameserver (ns_check_nameservers), or a single system-configured
+resolver. The pool is built once per process and shares one answer cache.
+"""
+
+import asyncio
+import itertools
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+import dns.asyncquery
+import dns.asyncresolver
+import dns.exception
+import dns.flags
+import dns.message
+import dns.name
+import dns.rcode
+import dns.rdatatype
+import dns.resolver
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+MODE_AUTHORITATIVE = "authoritative"
+MODE_RECURSIVE = "recursive"
+
+
+@dataclass
+class NsCheckResult:
+    domain: str
+    propagated: bool
+    current_ns: list[str] = field(default_factory=list)
+    expected_ns: list[str] = field(default_factory=list)
+    error: Optional[str] = None
+    mode: str = MODE_RECURSIVE
+    # Authoritative mode: parent server -> the NS set it delegates to (empty if it didn't answer)
+    parent_servers: dict[str, list[str]] = field(default_factory=dict)
+    agreeing_servers: list[str] = field(default_factory=list)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "domain": self.domain,
+            "propagated": self.propagated,
+            "current_ns": self.current_ns,
+            "expected_ns": self.expected_ns,
+            "error": self.error,
+            "mode": self.mode,
+            "parent_servers": self.parent_servers,
+            "agreeing_servers": self.agreeing_servers,
+        }
+
+
+def _normalize_ns(names) -> list[str]:
+    return sorted(str(ns).rstrip(".").lower() for ns in names)
+
+
+_pool: Optional["itertools.cycle[dns.asyncresolver.Resolver]"] = None
+_pool_lock = threading.Lock()
+
+
+def _build_pool() -> list[dns.asyncresolver.Resolver]:
+    settings = get_settings()
+    cache = dns.resolver.LRUCache()
+    nameservers = [ns.strip() for ns in settings.ns_check_nameservers.split(",") if ns.strip()]
+
+    def _resolver(nameserver: Optional[str]) -> dns.asyncresolver.Resolver:
+        resolver = dns.asyncresolver.Resolver(configure=nameserver is None)
+        if nameserver is not None:
+            resolver.nameservers = [nameserver]
+        resolver.timeout = settings.ns_check_timeout_seconds
+        resolver.lifetime = settings.ns_check_lifetime_seconds
+        resolver.cache = cache
+        return resolver
+
+    return [_resolver(ns) for ns in nameservers] or [_resolver(None)]
+
+
+def get_resolver() -> dns.asyncresolver.Resolver:
+    """Next resolver from the shared pool (round-robin)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = itertools.cycle(_build_pool())
+        return next(_pool)
+
+
+def _lookup_error(e: Exception) -> str:
+    if isinstance(e, dns.resolver.NXDOMAIN):
+        return "NXDOMAIN"
+    if isinstance(e, dns.resolver.NoAnswer):
+        return "no NS records"
+    if isinstance(e, dns.exception.Timeout):
+        return "DNS timeout"
+    return str(e) or type(e).__name__
+
+
+async def check_ns_recursive(domain: str, expected_ns: list[str]) -> NsCheckResult:
+    """Compare the NS records the recursive resolvers return with the expected nameservers."""
+    result = NsCheckResult(domain=domain, propagated=False, expected_ns=_normalize_ns(expected_ns))
+    try:
+        answers = await get_resolver().resolve(domain, "NS")
+        result.current_ns = _normalize_ns(rdata.target for rdata in answers)
+        result.propagated = result.current_ns == result.expected_ns
+    except Exception as e:
+        result.error = _lookup_error(e)
+        logger.debug("NS check for %s failed: %s", domain, result.error)
+    return result
+
+
+# === Authoritative (parent zone) delegation checks ===
+
+# parent zone -> (started_at, lookup of [(server name, ip), ...]). The lookup task
+# itself is cached, so concurrent checks under one parent zone share it.
+_parent_servers: dict[str, tuple[float, "asyncio.Task[list[tuple[str, str]]]"]] = {}
+
+
+def _parent_zone(domain: str) -> str:
+    """Zone that holds the delegation: "example.com" -> "com", "example.co.uk" -> "co.uk"."""
+    return domain.lower().rstrip(".").partition(".")[2]
+
+
+async def _lookup_parent_servers(parent: str) -> list[tuple[str, str]]:
+    resolver = get_resolver()
+    names = _normalize_ns(rdata.target for rdata in await resolver.resolve(parent + ".", "NS"))
+    addresses = await asyncio.gather(*(resolver.resolve(name, "A") for name in names), return_exceptions=True)
+    servers = [
+        (name, answer[0].address)
+        for name, answer in zip(names, addresses)
+        if not isinstance(answer, BaseException) and len(answer)
+    ]
+    if not servers:
+        raise dns.exception.DNSException(f"no addresses for the {parent} servers")
+    logger.info("Cached %d authoritative servers for .%s", len(servers), parent)
+    return servers
+
+
+async def parent_servers(parent: str) -> list[tuple[str, str]]:
+    """
+    (name, IPv4 address) of the parent zone's authoritative servers, cached per parent zone.
+
+    Callers arriving while the lookup is still running wait for that same lookup.
+    Raises if the parent's NS records can't be resolved; failures are not cached.
+    """
+    cached = _parent_servers.get(parent)
+    ttl = get_settings().ns_check_parent_cache_ttl_seconds
+    if (
+        cached is None
+        or time.monotonic() - cached[0] >= ttl
+        or cached[1].get_loop() is not asyncio.get_running_loop()
+    ):
+        cached = (time.monotonic(), asyncio.ensure_future(_lookup_parent_servers(parent)))
+        _parent_servers[parent] = cached
+
+    try:
+        # Shielded: one waiter being cancelled must not cancel the lookup for the others
+        return await asyncio.shield(cached[1])
+    except Exception:
+        if _parent_servers.get(parent) is cached:
+            del _parent_servers[parent]
+        raise
+
+
+async def query_delegation(domain: str, server_ip: str) -> list[str]:
+    """
+    Ask one parent server (non-recursively) which nameservers the domain is delegated to.
+
+    Returns an empty list if the parent has no delegation for the domain.
+    """
+    timeout = get_settings().ns_check_timeout_seconds
+    query = dns.message.make_query(domain, dns.rdatatype.NS)
+    query.flags &= ~dns.flags.RD
+    response = await dns.asyncquery.udp(query, server_ip, timeout=timeout)
+    if response.flags & dns.flags.TC:
+        response = await dns.asyncquery.tcp(query, server_ip, timeout=timeout)
+    if response.rcode() == dns.rcode.NXDOMAIN:
+        return []
+
+    owner = dns.name.from_text(domain)
+    # The delegation is in the authority section of the referral (or the answer, if the
+    # parent also serves the child zone)
+    return _normalize_ns(
+        rdata.target
+        for rrset in (*response.answer, *response.authority)
+        if rrset.rdtype == dns.rdatatype.NS and rrset.name == owner
+        for rdata in rrset
+    )
+
+
+async def check_delegation(domain: str, expected_ns: list[str]) -> NsCheckResult:
+    """
+    Ask the parent zone's servers which nameservers the domain is delegated to.
+
+    Propagated when every parent server that answered delegates to exactly the
+    expected nameservers. Falls back to a recursive check if no parent server
+    can be reached.
+    """
+    result = NsCheckResult(
+        domain=domain, propagated=False, expected_ns=_normalize_ns(expected_ns), mode=MODE_AUTHORITATIVE
+    )
+    try:
+        servers = (await parent_servers(_parent_zone(domain)))[: max(1, get_settings().ns_check_parent_servers)]
+    except Exception as e:
+        logger.debug("Parent servers for %s unavailable (%s), using recursive lookup", domain, _lookup_error(e))
+        return await check_ns_recursive(domain, expected_ns)
+
+    answers = await asyncio.gather(
+        *(query_delegation(domain, ip) for _, ip in servers), return_exceptions=True
+    )
+    errors = []
+    for (name, _), answer in zip(servers, answers):
+        if isinstance(answer, BaseException):
+            errors.append(f"{name}: {_lookup_error(answer)}")
+            result.parent_servers[name] = []
+            continue
+        result.parent_servers[name] = answer
+        if answer == result.expected_ns:
+            result.agreeing_servers.append(name)
+        elif answer:
+            result.current_ns = answer
+
+    if len(errors) == len(servers):
+        logger.debug("No parent server answered for %s (%s), using recursive lookup", domain, "; ".join(errors))
+        return await check_ns_recursive(domain, expected_ns)
+
+    answered = len(servers) - len(errors)
+    result.propagated = len(result.agreeing_servers) == answered
+    if result.propagated:
+        result.current_ns = result.expected_ns
+    elif not any(result.parent_servers.values()):
+        result.error = "not delegated"
+    if errors:
+        result.error = "; ".join(([result.error] if result.error else []) + errors)
+    return result
+
+
+async def check_ns(domain: str, expected_ns: list[str], mode: Optional[str] = None) -> NsCheckResult:
+    """
+    Check whether a domain's nameservers are the expected ones (mode defaults to settings.ns_check_mode).
+
+    Never raises: lookup failures come back as propagated=False with error set.
+    """
+    mode = mode or get_settings().ns_check_mode
+    if mode == MODE_AUTHORITATIVE:
+        return await check_delegation(domain, expected_ns)
+    return await check_ns_recursive(domain, expected_ns)
@@ -0,0 +1,202 @@
+"""
+Buffered PipelineLog writer.
+
+The pipeline logs an activity entry for almost every item it touches. Writing
+each one in its own session/transaction costs a pool checkout and a commit per
+entry, so entries are queued here instead and bulk-inserted by a background
+task every `pipeline_log_flush_seconds`, or as soon as
+`pipeline_log_flush_rows` are waiting. `created_at` is stamped when the entry
+is queued, so the activity feed keeps the order events happened in. Readers
+merge queued() into what they read from the table instead of forcing a flush.
+
+Call `await pipeline_log_sink.close()` on shutdown to write what is left.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+from sqlalchemy import insert
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.config import get_settings
+from app.db.session import async_session_factory
+from app.models.pipeline_log import PipelineLog
+
+logger = logging.getLogger(__name__)
+
+
+class PipelineLogSink:
+    """
+    Queue PipelineLog rows and insert them in batches.
+
+    emit() never touches the database; a background task (started on the
+    first emit) does the writing. If a bulk insert fails, rows are retried one
+    by one so a single bad row (e.g. its batch was deleted meanwhile) does not
+    hold back the rest. At most max_pending rows are kept while the database
+    is unreachable; older ones are dropped first.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker = async_session_factory,
+        max_rows: Optional[int] = None,
+        max_seconds: Optional[float] = None,
+        max_pending: Optional[int] = None,
+    ):
+        self.session_factory = session_factory
+        self._max_rows = max_rows
+        self._max_seconds = max_seconds
+        self._max_pending = max_pending
+        self.written = 0
+        self.dropped = 0
+        self._pending: List[Dict[str, Any]] = []
+        # Rows taken by a flush that is still writing them
+        self._in_flight: List[Dict[str, Any]] = []
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        # Set by close(): the task finishes the flush it is in and exits
+        self._stopping = False
+
+    @property
+    def max_rows(self) -> int:
+        return self._max_rows or get_settings().pipeline_log_flush_rows
+
+    @property
+    def max_seconds(self) -> float:
+        return self._max_seconds if self._max_seconds is not None else get_settings().pipeline_log_flush_seconds
+
+    @property
+    def max_pending(self) -> int:
+        return self._max_pending or 50 * self.max_rows
+
+    def emit(
+        self,
+        batch_id,
+        step: int,
+        step_name: str,
+        item_type: Optional[str] = None,
+        item_id: Optional[str] = None,
+        item_name: Optional[str] = None,
+        status: str = "started",
+        message: Optional[str] = None,
+        error_detail: Optional[str] = None,
+    ) -> None:
+        """Queue one PipelineLog row. Must be called from the event loop."""
+        now = datetime.now(timezone.utc)
+        self._pending.append({
+            "id": uuid4(),
+            "batch_id": batch_id,
+            "step": step,
+            "step_name": step_name,
+            "item_type": item_type,
+            "item_id": str(item_id) if item_id is not None else None,
+            "item_name": item_name,
+            "status": status,
+            "message": message,
+            "error_detail": error_detail,
+            "retryable": True,
+            "created_at": now,
+            "updated_at": now,
+        })
+        self._trim()
+        self._ensure_running()
+        if len(self._pending) >= self.max_rows:
+            self._wake.set()
+
+    def queued(self, batch_id) -> List[Dict[str, Any]]:
+        """Rows of one batch that are not committed yet (being written or waiting), oldest first."""
+        key = str(batch_id)
+        return [row for row in (*self._in_flight, *self._pending) if str(row["batch_id"]) == key]
+
+    async def flush(self) -> int:
+        """
+        Insert everything queued so far.
+
+        Returns:
+            Number of rows written
+        """
+        rows, self._pending = self._pending, []
+        if not rows:
+            return 0
+        self._in_flight = rows
+        try:
+            async with self.session_factory() as session:
+                await session.execute(insert(PipelineLog), rows)
+                await session.commit()
+            written = len(rows)
+        except Exception as e:
+            logger.warning("Bulk insert of %d pipeline logs failed (%s), retrying row by row", len(rows), e)
+            written = await self._insert_one_by_one(rows)
+        finally:
+            self._in_flight = []
+        self.written += written
+        logger.debug("Flushed %d pipeline logs", written)
+        return written
+
+    async def close(self) -> None:
+        """Stop the background task and write whatever is still queued."""
+        if self._task:
+            # Cancelling could interrupt a flush between taking rows from
+            # _pending and committing them; let it finish instead
+            self._stopping = True
+            self._wake.set()
+            try:
+                await self._task
+            finally:
+                self._stopping = False
+                self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error("Final pipeline log flush failed: %s", e)
+
+    async def _insert_one_by_one(self, rows: List[Dict[str, Any]]) -> int:
+        written = 0
+        for index, row in enumerate(rows):
+            try:
+                async with self.session_factory() as session:
+                    await session.execute(insert(PipelineLog), [row])
+                    await session.commit()
+                written += 1
+            except (IntegrityError, DataError) as e:
+                self.dropped += 1
+                logger.error("Dropping pipeline log for batch %s: %s", row["batch_id"], e)
+            except Exception as e:
+                # Database unreachable: keep the rest for the next flush
+                logger.error("Pipeline log flush failed: %s", e)
+                self._pending[:0] = rows[index:]
+                self._trim()
+                break
+        return written
+
+    def _trim(self) -> None:
+        overflow = len(self._pending) - self.max_pending
+        if overflow > 0:
+            del self._pending[:overflow]
+            self.dropped += overflow
+            logger.warning("Pipeline log queue full, dropped %d oldest entries", overflow)
+
+    def _ensure_running(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._wake = asyncio.Event()
+            self._task = loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.max_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error("Pipeline log flush failed: %s", e)
+
+
+pipeline_log_sink = PipelineLogSink()
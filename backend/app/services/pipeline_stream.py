@@ -0,0 +1,339 @@
+"""
+Per-item streaming for pipeline Steps 5-8.
+
+run_pipeline used to run each step for every tenant of a batch before any
+tenant started the next one, so one slow tenant in Step 5 held up mailbox
+creation for all the others. Now each tenant moves on as soon as its own
+prerequisites are met:
+
+    5 first login -> per domain: 6 M365 setup + DKIM -> 7 mailboxes
+                  -> 8 SMTP auth (once the tenant has mailboxes)
+
+next_stage() reads a tenant's next stage off its Tenant/Domain rows, so the
+rows stay the only state and a restarted run carries on where it stopped.
+ItemStream runs ready stages as they turn up (one per tenant at a time, at
+most limits[step] per step), re-reads the rows whenever a stage finishes and
+retries failed stages after a delay. Attempts are counted per item: the
+domain for Steps 6-7, the tenant for Steps 5 and 8. step_counts() derives batch progress
+from the same rows.
+
+The rows only say what is finished. ItemStream.checkpoint() adds per-item
+markers (last stage reached, attempts per item and step, whether the stage was in
+flight, last error class); the pipeline keeps them in its job checkpoint so
+a restarted run restore()s them, re-drives the interrupted stages first with
+the same attempt number and keeps every item's retry budget.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from uuid import UUID
+
+logger = logging.getLogger(__name__)
+
+FIRST_LOGIN = 5
+M365_SETUP = 6
+MAILBOXES = 7
+SMTP_AUTH = 8
+STREAM_STEPS = (FIRST_LOGIN, M365_SETUP, MAILBOXES, SMTP_AUTH)
+
+READY = "ready"
+WAITING = "waiting"  # A domain still waits for its NS propagation / DNS records
+DONE = "done"
+
+
+@dataclass(frozen=True)
+class Stage:
+    """One step for one tenant (and, for Steps 6-7, one of its domains)."""
+
+    step: int
+    tenant_id: UUID
+    domain_id: Optional[UUID] = None
+    name: str = ""
+
+    @property
+    def key(self) -> str:
+        return str(self.tenant_id)
+
+    @property
+    def item(self) -> str:
+        """What attempts are counted for: the domain for Steps 6-7, else the tenant."""
+        return str(self.domain_id or self.tenant_id)
+
+
+def next_stage(tenant, domains: Iterable, first_step: int = FIRST_LOGIN, dns_settled: bool = True,
+               max_retries: int = 4, given_up: Iterable[Tuple[str, int]] = ()) -> Tuple[str, Optional[Stage]]:
+    """
+    The stage a tenant needs next.
+
+    Retry counts above max_retries and the skipped flags mean the pipeline gave
+    up on that step for the item, as in the step-by-step pipeline.
+
+    Args:
+        tenant: Tenant row
+        domains: The tenant's Domain rows
+        first_step: Steps before this one are not run (the run was started later)
+        dns_settled: Steps 3-4 are over, so domains without DNS records go ahead anyway
+        max_retries: Per-step retry limit
+        given_up: (item, step) pairs not to hand out (ItemStream gave up on them), see Stage.item
+
+    Returns:
+        (READY, stage), (WAITING, None) or (DONE, None)
+    """
+    name = tenant.custom_domain or tenant.name
+    given_up = set(given_up)
+    tenant_key = str(tenant.id)
+    if not tenant.first_login_completed:
+        if (first_step <= FIRST_LOGIN and (tenant_key, FIRST_LOGIN) not in given_up
+                and (tenant.step4_retry_count or 0) <= max_retries):
+            return READY, Stage(FIRST_LOGIN, tenant.id, name=name)
+        return DONE, None
+
+    # SMTP auth is per tenant; enabling it right after the first mailboxes makes those usable
+    if (first_step <= SMTP_AUTH and (tenant_key, SMTP_AUTH) not in given_up
+            and tenant.step6_complete and not tenant.step7_smtp_auth_enabled
+            and (tenant.step7_retry_count or 0) <= max_retries):
+        return READY, Stage(SMTP_AUTH, tenant.id, name=name)
+
+    waiting = False
+    for domain in sorted(domains, key=lambda d: d.domain_index_in_tenant or 0):
+        domain_key = str(domain.id)
+        if not domain.domain_verified_in_m365:
+            if (first_step > M365_SETUP or (domain_key, M365_SETUP) in given_up
+                    or domain.step5_skipped or (domain.step5_retry_count or 0) > max_retries):
+                continue
+            if not (domain.dns_records_created or dns_settled):
+                waiting = True
+                continue
+            return READY, Stage(M365_SETUP, tenant.id, domain.id, domain.name)
+        if (first_step <= MAILBOXES and (domain_key, MAILBOXES) not in given_up and domain.dkim_enabled
+                and not domain.step6_complete and not domain.step6_skipped):
+            return READY, Stage(MAILBOXES, tenant.id, domain.id, domain.name)
+    return (WAITING, None) if waiting else (DONE, None)
+
+
+def step_counts(tenants: Iterable, domains: Iterable, max_retries: int = 4) -> Dict[int, Dict[str, int]]:
+    """Per step: items done, given up on, and in total (Steps 5 and 8 count tenants, 6-7 domains)."""
+    tenants = list(tenants)
+    domains = [d for d in domains if d.tenant_id]
+    return {
+        FIRST_LOGIN: {
+            "completed": sum(1 for t in tenants if t.first_login_completed and (t.step4_retry_count or 0) <= max_retries),
+            "failed": sum(1 for t in tenants if (t.step4_retry_count or 0) > max_retries),
+            "total": len(tenants),
+        },
+        M365_SETUP: {
+            "completed": sum(1 for d in domains if d.domain_verified_in_m365 and d.dkim_enabled),
+            "failed": sum(
+                1 for d in domains
+                if not d.domain_verified_in_m365 and (d.step5_skipped or (d.step5_retry_count or 0) > max_retries)
+            ),
+            "total": len(domains),
+        },
+        MAILBOXES: {
+            "completed": sum(1 for d in domains if d.step6_complete),
+            "failed": sum(1 for d in domains if d.step6_skipped and not d.step6_complete),
+            "total": len(domains),
+        },
+        SMTP_AUTH: {
+            "completed": sum(1 for t in tenants if t.step7_smtp_auth_enabled),
+            "failed": sum(1 for t in tenants if not t.step7_smtp_auth_enabled and (t.step7_retry_count or 0) > max_retries),
+            "total": len(tenants),
+        },
+    }
+
+
+def error_class(error) -> str:
+    """Short class of a failed stage's error: "TimeoutException" for "TimeoutException: ...", else "Failed"."""
+    match = re.match(r"([A-Z]\w*)(?=:| \()", error) if isinstance(error, str) else None
+    return match.group(1) if match else "Failed"
+
+
+class ItemStream:
+    """
+    Runs ready stages as they turn up, each step under its own concurrency limit.
+
+    Args:
+        run_stage: Runs one stage (attempt counts from 1 per item and step, see Stage.item,
+            and starts over once the stage succeeds); True if it succeeded, else False or
+            the error message
+        limits: Stages running at once per step
+        retry_seconds: Wait before an item whose stage failed is tried again
+        max_attempts: Attempts per item and step; then the item is left alone
+        poll_seconds: How often the rows are re-read while no stage finishes
+    """
+
+    def __init__(
+        self,
+        run_stage: Callable[[Stage, int], Awaitable[bool]],
+        limits: Dict[int, int],
+        retry_seconds: float = 15.0,
+        max_attempts: int = 5,
+        poll_seconds: float = 5.0,
+    ):
+        self.run_stage = run_stage
+        self.limits = limits
+        self.retry_seconds = retry_seconds
+        self.max_attempts = max_attempts
+        self.poll_seconds = poll_seconds
+        self.running: Dict[str, Tuple[Stage, asyncio.Task]] = {}
+        self.attempts: Dict[Tuple[str, int], int] = {}  # (item, step) -> attempts
+        self.retry_at: Dict[str, float] = {}
+        self.given_up: Set[Tuple[str, int]] = set()  # (item, step)
+        self.owners: Dict[str, str] = {}  # Item -> its tenant's key
+        self.stages: Dict[str, Stage] = {}  # Last stage started per item
+        self.errors: Dict[str, str] = {}  # Last error class per item
+        self.interrupted: Dict[str, Tuple[int, Optional[str]]] = {}  # Restored in-flight (step, domain_id)
+
+    def active(self, step: int) -> int:
+        return sum(1 for stage, _ in self.running.values() if stage.step == step)
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        return {
+            "running": {str(step): self.active(step) for step in sorted(self.limits)},
+            "retrying": sum(1 for key, at in self.retry_at.items() if at > now and key not in self.running),
+            "given_up": len(self.given_up),
+            "interrupted": len(self.interrupted),
+        }
+
+    def checkpoint(self) -> Dict[str, dict]:
+        """Per-item progress markers (JSON-ready) for restore() in a later run."""
+        items = {}
+        for key, stage in self.stages.items():
+            attempts, given_up = {}, {}
+            for (item, step), n in self.attempts.items():
+                if self.owners.get(item, item) == key:
+                    attempts.setdefault(item, {})[str(step)] = n
+            for item, step in sorted(self.given_up):
+                if self.owners.get(item, item) == key:
+                    given_up.setdefault(item, []).append(step)
+            items[key] = {
+                "step": stage.step,
+                "domain_id": str(stage.domain_id) if stage.domain_id else None,
+                "name": stage.name,
+                "in_flight": key in self.running,
+                "attempts": attempts,
+                "given_up": given_up,
+                "error": self.errors.get(key),
+            }
+        return items
+
+    def restore(self, items: Dict[str, dict]) -> None:
+        """
+        Pick up the markers of an interrupted run.
+
+        A stage that was in flight does not use up an attempt: it is started
+        again, ahead of other ready stages, with the attempt number it had.
+        """
+        for key, item in items.items():
+            for item_key, steps in (item.get("attempts") or {}).items():
+                self.owners[item_key] = key
+                for step, n in steps.items():
+                    self.attempts[(item_key, int(step))] = n
+            for item_key, steps in (item.get("given_up") or {}).items():
+                self.owners[item_key] = key
+                self.given_up.update((item_key, int(step)) for step in steps)
+            if item.get("error"):
+                self.errors[key] = item["error"]
+            if item.get("in_flight"):
+                attempts_key = (item.get("domain_id") or key, item["step"])
+                self.attempts[attempts_key] = max(self.attempts.get(attempts_key, 1) - 1, 0)
+                self.interrupted[key] = (item["step"], item.get("domain_id"))
+
+    async def run(
+        self,
+        find_stages: Callable[[], Awaitable[Tuple[List[Stage], int]]],
+        stopped: Callable[[], Awaitable[bool]],
+    ) -> bool:
+        """
+        Run until no item has a stage left.
+
+        Args:
+            find_stages: Returns (every item's ready stage, number of items waiting on Steps 3-4)
+            stopped: Checked before each round; when True, running stages finish and nothing new starts
+
+        Returns:
+            False if stopped
+        """
+        try:
+            while True:
+                if await stopped():
+                    await asyncio.gather(*(task for _, task in self.running.values()), return_exceptions=True)
+                    self._reap()
+                    return False
+
+                ready, waiting = await find_stages()
+                now = time.monotonic()
+                held = []
+                for stage in sorted(ready, key=lambda s: not self._was_interrupted(s)):
+                    if stage.key in self.running or (stage.item, stage.step) in self.given_up:
+                        continue
+                    held.append(self.retry_at.get(stage.key, 0.0))
+                    if held[-1] > now or self.active(stage.step) >= self.limits.get(stage.step, 1):
+                        continue
+                    self._start(stage)
+
+                if not self.running and not held and not waiting:
+                    return True
+
+                if self.running:
+                    await asyncio.wait(
+                        [task for _, task in self.running.values()],
+                        timeout=self.poll_seconds,
+                        return_when=asyncio.FIRST_COMPLETED,
+                    )
+                else:
+                    next_retry = min((at for at in held if at > now), default=now + self.poll_seconds)
+                    await asyncio.sleep(min(max(next_retry - now, 0.0), self.poll_seconds))
+                self._reap()
+        finally:
+            for _, task in self.running.values():
+                task.cancel()
+            await asyncio.gather(*(task for _, task in self.running.values()), return_exceptions=True)
+
+    def _was_interrupted(self, stage: Stage) -> bool:
+        domain_id = str(stage.domain_id) if stage.domain_id else None
+        return self.interrupted.get(stage.key) == (stage.step, domain_id)
+
+    def _start(self, stage: Stage) -> None:
+        attempt = self.attempts.get((stage.item, stage.step), 0) + 1
+        self.attempts[(stage.item, stage.step)] = attempt
+        self.owners[stage.item] = stage.key
+        if self._was_interrupted(stage):
+            logger.info("Re-driving interrupted step %d for %s (attempt %d, last error %s)",
+                        stage.step, stage.name, attempt, self.errors.get(stage.key))
+        self.interrupted.pop(stage.key, None)
+        self.stages[stage.key] = stage
+        self.running[stage.key] = (stage, asyncio.create_task(self.run_stage(stage, attempt)))
+
+    def _reap(self) -> None:
+        for key, (stage, task) in list(self.running.items()):
+            if not task.done():
+                continue
+            del self.running[key]
+            ok = False
+            if task.cancelled():
+                logger.warning("Step %d for %s was cancelled", stage.step, stage.name)
+                self.errors[key] = "CancelledError"
+            elif task.exception() is not None:
+                exc = task.exception()
+                logger.error("Step %d for %s crashed: %s: %s", stage.step, stage.name, type(exc).__name__, exc)
+                self.errors[key] = type(exc).__name__
+            else:
+                ok = task.result() is True
+                if not ok:
+                    self.errors[key] = error_class(task.result())
+            if ok:
+                self.attempts.pop((stage.item, stage.step), None)
+                self.retry_at.pop(key, None)
+                self.errors.pop(key, None)
+                continue
+            self.retry_at[key] = time.monotonic() + self.retry_seconds
+            if self.attempts[(stage.item, stage.step)] >= self.max_attempts:
+                self.given_up.add((stage.item, stage.step))
+                logger.warning("Step %d for %s: giving up after %d attempts in this run",
+                               stage.step, stage.name, self.max_attempts)
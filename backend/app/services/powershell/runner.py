@@ -880,6 +880,8 @@ try {{
         from selenium.webdriver.support.ui import WebDriverWait
         from selenium.webdriver.support import expected_conditions as EC
         from selenium.common.exceptions import TimeoutException, NoSuchElementException
+        from app.services.selenium.browser import launch_chrome
+        from app.services.selenium.browser_slots import browser_slots
         
         logger.info(f"Starting Selenium OAuth flow for {admin_email}")
         
@@ -922,7 +924,7 @@ try {{
         
         driver = None
         try:
-            driver = webdriver.Chrome(options=options)
+            driver = launch_chrome(options, slot=await browser_slots.acquire_async("step6"))
             wait = WebDriverWait(driver, 30)
             
             # Navigate to auth URL
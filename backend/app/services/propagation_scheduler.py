@@ -0,0 +1,94 @@
+"""
+Per-domain schedule for NS propagation checks (pipeline step 3).
+
+Each domain carries its own ns_next_check_at / ns_check_attempts, so a round
+only looks at domains that are due and the state survives restarts. Domains
+whose nameservers were just changed are checked after ns_schedule_base_seconds;
+each miss doubles the wait (capped at ns_schedule_max_seconds) with random
+jitter, so stragglers stop costing a lookup every round and checks don't
+synchronise into bursts.
+"""
+
+import logging
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+from uuid import UUID
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.models.domain import Domain
+
+logger = logging.getLogger(__name__)
+
+
+def backoff_seconds(attempts: int, rand: Callable[[], float] = random.random) -> float:
+    """
+    Wait before the next check after `attempts` unsuccessful checks.
+
+    base * 2^(attempts-1), capped at the max, then scaled by 1 +/- jitter.
+    """
+    settings = get_settings()
+    exponent = min(max(attempts - 1, 0), 32)
+    delay = min(settings.ns_schedule_base_seconds * (2 ** exponent), settings.ns_schedule_max_seconds)
+    jitter = settings.ns_schedule_jitter
+    return delay * (1 - jitter + 2 * jitter * rand())
+
+
+def _pending_filter(batch_id: UUID):
+    return (
+        Domain.batch_id == batch_id,
+        Domain.cloudflare_zone_id.isnot(None),
+        Domain.ns_propagated_at.is_(None),
+    )
+
+
+async def due_domains(db: AsyncSession, batch_id: UUID, now: Optional[datetime] = None) -> list[Domain]:
+    """Un-propagated domains of the batch whose next check is due (never-checked first)."""
+    now = now or datetime.now(timezone.utc)
+    result = await db.execute(
+        select(Domain)
+        .where(
+            *_pending_filter(batch_id),
+            (Domain.ns_next_check_at.is_(None)) | (Domain.ns_next_check_at <= now),
+        )
+        .order_by(Domain.ns_next_check_at.asc().nulls_first())
+    )
+    return list(result.scalars().all())
+
+
+async def seconds_until_next_check(db: AsyncSession, batch_id: UUID, now: Optional[datetime] = None) -> Optional[float]:
+    """Seconds until the earliest scheduled check in the batch (0 if one is due), or None if nothing is pending."""
+    now = now or datetime.now(timezone.utc)
+    pending, next_at = (await db.execute(
+        select(func.count(Domain.id), func.min(Domain.ns_next_check_at)).where(*_pending_filter(batch_id))
+    )).one()
+    if not pending:
+        return None
+    if next_at is None:
+        return 0.0
+    return max((next_at - now).total_seconds(), 0.0)
+
+
+def schedule_next_check(domain: Domain, now: Optional[datetime] = None) -> None:
+    """Record an unsuccessful check and push the domain's next check out."""
+    now = now or datetime.now(timezone.utc)
+    domain.ns_check_attempts = (domain.ns_check_attempts or 0) + 1
+    domain.ns_next_check_at = now + timedelta(seconds=backoff_seconds(domain.ns_check_attempts))
+
+
+def mark_checked_propagated(domain: Domain) -> None:
+    """Clear the schedule of a domain that propagated."""
+    domain.ns_next_check_at = None
+
+
+async def reset_schedule(db: AsyncSession, batch_id: UUID) -> None:
+    """Make every un-propagated domain of the batch due now (e.g. right after its nameservers were changed)."""
+    await db.execute(
+        update(Domain)
+        .where(*_pending_filter(batch_id))
+        .values(ns_next_check_at=None, ns_check_attempts=0)
+    )
+    logger.info("Reset NS check schedule for batch %s", batch_id)
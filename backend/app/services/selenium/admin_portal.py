@@ -19,6 +19,7 @@ import logging
 # Import the working BrowserWorker from tenant_automation.py
 # This ensures Step 5 uses the EXACT same browser setup as Step 4
 from app.services.tenant_automation import BrowserWorker
+from app.services.selenium.browser_slots import browser_slots
 
 logger = logging.getLogger(__name__)
 SCREENSHOTS = "C:/temp/screenshots"
@@ -659,7 +660,7 @@ def setup_domain_complete_via_admin_portal(domain, zone_id, admin_email, admin_p
     
     for chrome_attempt in range(CHROME_STARTUP_RETRIES):
         try:
-            worker = BrowserWorker(worker_id=f"step5-{uuid.uuid4()}", headless=headless)
+            worker = BrowserWorker(worker_id=f"step5-{uuid.uuid4()}", headless=headless, subsystem="step5")
             driver = worker._create_driver()
             driver.implicitly_wait(15)  # Increased from 10
             driver.set_page_load_timeout(60)  # Add page load timeout
@@ -1616,8 +1617,8 @@ async def enable_org_smtp_auth(
 
     try:
         logger.info(f"[{domain}] Step 7: Initializing browser")
-        worker = BrowserWorker(worker_id=f"step7-{uuid.uuid4()}", headless=True)
-        driver = worker._create_driver()
+        worker = BrowserWorker(worker_id=f"step7-{uuid.uuid4()}", headless=True, subsystem="step7")
+        driver = worker._create_driver(slot=await browser_slots.acquire_async("step7"))
         driver.implicitly_wait(10)
         driver.set_page_load_timeout(120)
 
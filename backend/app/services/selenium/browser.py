@@ -4,18 +4,44 @@ import os
 import tempfile
 import uuid
 import logging
+from typing import Optional
+
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.desired_capabilities import DesiredCapabilities
 
+from app.core.config import get_settings
+from app.services.selenium.browser_slots import BrowserSlot, browser_slots
+
 logger = logging.getLogger(__name__)
 
 SCREENSHOT_DIR = os.environ.get("SCREENSHOT_DIR", "/tmp/screenshots")
 os.makedirs(SCREENSHOT_DIR, exist_ok=True)
 
 
-def create_driver(headless: bool = True) -> webdriver.Chrome:
-    """Create a Chrome driver with basic stability options."""
+def launch_chrome(options: Options, subsystem: str = "default", slot: Optional[BrowserSlot] = None) -> webdriver.Chrome:
+    """
+    Start Chrome under a browser slot; the slot is freed when the driver quits.
+
+    Args:
+        options: Chrome options
+        subsystem: Slot owner for quotas, priority and metrics
+        slot: Slot already taken (async callers: `await browser_slots.acquire_async(...)`)
+    """
+    if slot is None:
+        slot = browser_slots.acquire(subsystem, timeout=get_settings().browser_slot_timeout_seconds)
+    try:
+        driver = webdriver.Chrome(options=options)
+    except BaseException:
+        slot.release()
+        raise
+    return slot.bind(driver)
+
+
+def create_driver(
+    headless: bool = True, subsystem: str = "default", slot: Optional[BrowserSlot] = None
+) -> webdriver.Chrome:
+    """Create a Chrome driver with basic stability options (see launch_chrome for subsystem/slot)."""
     opts = Options()
 
     # Headless mode (default True for production)
@@ -59,7 +85,7 @@ def create_driver(headless: bool = True) -> webdriver.Chrome:
     user_data_dir = os.path.join(tempfile.gettempdir(), f"chrome_profile_{uuid.uuid4().hex[:8]}")
     opts.add_argument(f"--user-data-dir={user_data_dir}")
 
-    return webdriver.Chrome(options=opts)
+    return launch_chrome(opts, subsystem, slot)
 
 
 def cleanup_driver(driver: webdriver.Chrome) -> None:
@@ -0,0 +1,477 @@
+"""
+Process-wide browser slot scheduler.
+
+Every Chrome this process starts takes a slot first (create_driver,
+launch_chrome and BrowserWorker._create_driver do it), and gives it back
+when the driver quits. One scheduler sees Steps 4-7, the domain checker,
+the sequencer uploads and the DKIM retry job together, instead of each
+sizing its own pool and all of them overlapping into an OOM kill:
+
+- browser_max_slots caps Chrome instances across all subsystems.
+- Optional per-subsystem quotas (browser_slot_quotas, "step6=7,checker=2")
+  keep one subsystem from taking every slot; Steps 5/6 and the checker
+  default to the settings that sized them before.
+- Waiters are served by priority (higher first), FIFO within a priority.
+- A slot is only granted while the container has room for another Chrome:
+  free memory (cgroup limit minus usage, else MemAvailable) minus
+  browser_memory_reserve_mb and minus the expected growth of browsers
+  launched in the last browser_slot_warmup_seconds must still fit
+  browser_slot_memory_mb. With no browser running a slot is always
+  granted, so a low reading cannot stall everything.
+
+Sync code (Selenium in worker threads) blocks in acquire(); async code must
+use `await acquire_async()` and pass the slot in, e.g.
+
+    driver = create_driver(headless=True, slot=await browser_slots.acquire_async("step6"))
+
+acquire() on an event loop thread never waits: it takes a slot over the
+limits and logs a warning rather than freezing the loop.
+
+snapshot() (GET /internal/metrics/browsers) reports active slots, queue
+depth and wait times per subsystem, and the current memory reading.
+"""
+
+import asyncio
+import itertools
+import logging
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional
+
+from app.core.config import get_settings
+from app.db.pool_metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+# Higher is served first; user-driven setup steps before uploads, the checker and background retries
+DEFAULT_PRIORITIES: Dict[str, int] = {
+    "step4": 50,
+    "step5": 50,
+    "step6": 50,
+    "step7": 50,
+    "password_reset": 40,
+    "domain_removal": 40,
+    "instantly": 30,
+    "smartlead": 30,
+    "checker": 20,
+    "dkim_retry": 10,
+}
+DEFAULT_PRIORITY = 40
+
+# Waiters re-check free memory this often (it also frees up without a slot being released)
+POLL_SECONDS = 1.0
+# Free-memory readings are reused for this long
+MEMORY_CACHE_SECONDS = 0.5
+
+# Wait-time histogram buckets (seconds)
+WAIT_BUCKETS = (0.01, 0.1, 0.5, 1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+
+
+class BrowserSlotTimeout(TimeoutError):
+    """No browser slot became free within the timeout."""
+
+
+def parse_quotas(value: str) -> Dict[str, int]:
+    """"step6=7, checker=2" -> {"step6": 7, "checker": 2}"""
+    quotas = {}
+    for part in (value or "").split(","):
+        name, _, limit = part.partition("=")
+        if name.strip() and limit.strip():
+            quotas[name.strip()] = int(limit)
+    return quotas
+
+
+def _read_int(path: str) -> Optional[int]:
+    try:
+        with open(path) as f:
+            raw = f.read().strip()
+    except OSError:
+        return None
+    return int(raw) if raw.isdigit() else None
+
+
+def _inactive_file_bytes(stat_path: str) -> int:
+    """Reclaimable page cache counted in a cgroup's usage."""
+    try:
+        with open(stat_path) as f:
+            for line in f:
+                key, _, value = line.partition(" ")
+                if key in ("inactive_file", "total_inactive_file"):
+                    return int(value)
+    except (OSError, ValueError):
+        pass
+    return 0
+
+
+def available_memory_mb() -> Optional[float]:
+    """
+    Memory (MB) another process could still use: the container's cgroup
+    limit minus its working set, else the host's MemAvailable.
+
+    Returns:
+        None when it cannot be read (e.g. on Windows without psutil)
+    """
+    # cgroup v2, then v1 (a "no limit" v1 cgroup reports a huge number)
+    for limit_path, usage_path, stat_path in (
+        ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory.current", "/sys/fs/cgroup/memory.stat"),
+        ("/sys/fs/cgroup/memory/memory.limit_in_bytes", "/sys/fs/cgroup/memory/memory.usage_in_bytes",
+         "/sys/fs/cgroup/memory/memory.stat"),
+    ):
+        limit = _read_int(limit_path)
+        usage = _read_int(usage_path)
+        if limit and usage is not None and limit < 1 << 60:
+            working_set = max(usage - _inactive_file_bytes(stat_path), 0)
+            return max(limit - working_set, 0) / MB
+
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.virtual_memory().available / MB
+
+
+class BrowserSlot:
+    """One admitted Chrome; release() (or quitting the bound driver) frees it."""
+
+    def __init__(self, scheduler: "BrowserSlotScheduler", subsystem: str, forced: bool = False):
+        self.scheduler = scheduler
+        self.subsystem = subsystem
+        self.forced = forced
+        self.granted_at = time.monotonic()
+        self._released = False
+
+    def release(self) -> None:
+        """Give the slot back; safe to call more than once."""
+        self.scheduler._release(self)
+
+    def bind(self, driver):
+        """
+        Tie the slot to a driver: driver.quit() releases it, and so does the
+        driver being garbage-collected without quitting.
+        """
+        original_quit = driver.quit
+
+        def quit(*args, **kwargs):
+            try:
+                return original_quit(*args, **kwargs)
+            finally:
+                self.release()
+
+        driver.quit = quit
+        driver._browser_slot = self
+        weakref.finalize(driver, self.release)
+        return driver
+
+
+class _Waiter:
+    __slots__ = ("subsystem", "priority", "seq", "enqueued_at", "slot", "wake")
+
+    def __init__(self, subsystem: str, priority: int, seq: int, wake: Callable[[], None]):
+        self.subsystem = subsystem
+        self.priority = priority
+        self.seq = seq
+        self.enqueued_at = time.monotonic()
+        self.slot: Optional[BrowserSlot] = None
+        self.wake = wake
+
+
+class _SubsystemStats:
+    def __init__(self):
+        self.active = 0
+        self.peak_active = 0
+        self.granted = 0
+        self.forced = 0
+        self.timeouts = 0
+        self.wait = Histogram(WAIT_BUCKETS)
+
+
+class BrowserSlotScheduler:
+    """
+    Admission control for Chrome instances (see module docstring).
+
+    Args:
+        max_slots: Chrome instances at once, all subsystems together
+        quotas: Per-subsystem caps (subsystems not listed share max_slots freely)
+        slot_memory_mb: Memory one Chrome is expected to grow to
+        reserve_mb: Memory always left free for the app itself
+        warmup_seconds: How long a new Chrome counts as still growing
+        memory_probe: Returns free MB, or None if unknown (default available_memory_mb)
+    """
+
+    def __init__(
+        self,
+        max_slots: int,
+        quotas: Optional[Dict[str, int]] = None,
+        slot_memory_mb: float = 350.0,
+        reserve_mb: float = 512.0,
+        warmup_seconds: float = 20.0,
+        memory_probe: Callable[[], Optional[float]] = available_memory_mb,
+    ):
+        self.max_slots = max(1, max_slots)
+        self.quotas = dict(quotas or {})
+        self.slot_memory_mb = slot_memory_mb
+        self.reserve_mb = reserve_mb
+        self.warmup_seconds = warmup_seconds
+        self.memory_probe = memory_probe
+
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+        self._waiters: List[_Waiter] = []
+        self._active: Deque[BrowserSlot] = deque()
+        self._stats: Dict[str, _SubsystemStats] = {}
+        self._memory_mb: Optional[float] = None
+        self._memory_read_at = 0.0
+        self.memory_waits = 0  # Dispatches where free memory held the queue back
+
+    # ---------- acquiring ----------
+
+    def acquire(self, subsystem: str, priority: Optional[int] = None, timeout: Optional[float] = None) -> BrowserSlot:
+        """
+        Block until a slot is granted (call from worker threads).
+
+        Raises:
+            BrowserSlotTimeout: none was granted within timeout seconds
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            return self._acquire_on_loop(subsystem)
+
+        event = threading.Event()
+        waiter = self._enqueue(subsystem, priority, event.set)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if event.wait(POLL_SECONDS):
+                return waiter.slot
+            if deadline is not None and time.monotonic() >= deadline:
+                return self._give_up(waiter, timeout)
+            self._dispatch()
+
+    async def acquire_async(
+        self, subsystem: str, priority: Optional[int] = None, timeout: Optional[float] = None
+    ) -> BrowserSlot:
+        """
+        Wait for a slot without blocking the event loop.
+
+        Raises:
+            BrowserSlotTimeout: none was granted within timeout seconds
+        """
+        loop = asyncio.get_running_loop()
+        event = asyncio.Event()
+
+        def wake():
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:  # Loop already closed
+                pass
+
+        waiter = self._enqueue(subsystem, priority, wake)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(event.wait(), POLL_SECONDS)
+                    return waiter.slot
+                except asyncio.TimeoutError:
+                    pass
+                if deadline is not None and time.monotonic() >= deadline:
+                    return self._give_up(waiter, timeout)
+                self._dispatch()
+        except asyncio.CancelledError:
+            self._withdraw(waiter)
+            raise
+
+    def _acquire_on_loop(self, subsystem: str) -> BrowserSlot:
+        """Sync acquire on an event loop thread: waiting would freeze the loop, so never wait."""
+        with self._lock:
+            if self._admissible(subsystem):
+                return self._grant_locked(subsystem)
+            logger.warning(
+                "Browser slot for %s taken over the limit on the event loop thread "
+                "(%d active); acquire it with acquire_async()", subsystem, len(self._active),
+            )
+            return self._grant_locked(subsystem, forced=True)
+
+    def _enqueue(self, subsystem: str, priority: Optional[int], wake: Callable[[], None]) -> _Waiter:
+        if priority is None:
+            priority = DEFAULT_PRIORITIES.get(subsystem, DEFAULT_PRIORITY)
+        waiter = _Waiter(subsystem, priority, next(self._seq), wake)
+        with self._lock:
+            self._waiters.append(waiter)
+            self._waiters.sort(key=lambda w: (-w.priority, w.seq))
+        self._dispatch()
+        return waiter
+
+    def _give_up(self, waiter: _Waiter, timeout: float) -> BrowserSlot:
+        slot = self._withdraw(waiter, keep=True)
+        if slot:
+            return slot  # Granted just now
+        with self._lock:
+            self._stat(waiter.subsystem).timeouts += 1
+        raise BrowserSlotTimeout(f"No browser slot for {waiter.subsystem} within {timeout:.0f}s")
+
+    def _withdraw(self, waiter: _Waiter, keep: bool = False) -> Optional[BrowserSlot]:
+        """Leave the queue; a slot granted meanwhile is returned (keep) or released."""
+        with self._lock:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            slot = waiter.slot
+        if slot and not keep:
+            slot.release()
+            return None
+        return slot
+
+    # ---------- admission ----------
+
+    def _stat(self, subsystem: str) -> _SubsystemStats:
+        stats = self._stats.get(subsystem)
+        if stats is None:
+            stats = self._stats[subsystem] = _SubsystemStats()
+        return stats
+
+    def _free_memory_mb(self) -> Optional[float]:
+        now = time.monotonic()
+        if now - self._memory_read_at >= MEMORY_CACHE_SECONDS:
+            try:
+                self._memory_mb = self.memory_probe()
+            except Exception as e:
+                logger.debug("Memory probe failed: %s", e)
+                self._memory_mb = None
+            self._memory_read_at = now
+        return self._memory_mb
+
+    def _headroom_mb(self) -> Optional[float]:
+        """Free memory left for new browsers after the reserve and browsers still warming up."""
+        free = self._free_memory_mb()
+        if free is None:
+            return None
+        now = time.monotonic()
+        warming = sum(1 for slot in self._active if now - slot.granted_at < self.warmup_seconds)
+        return free - self.reserve_mb - warming * self.slot_memory_mb
+
+    def _admissible(self, subsystem: str) -> bool:
+        quota = self.quotas.get(subsystem)
+        if quota is not None and self._stat(subsystem).active >= quota:
+            return False
+        if len(self._active) >= self.max_slots:
+            return False
+        headroom = self._headroom_mb()
+        return not self._active or headroom is None or headroom >= self.slot_memory_mb
+
+    def _grant_locked(self, subsystem: str, forced: bool = False) -> BrowserSlot:
+        slot = BrowserSlot(self, subsystem, forced=forced)
+        self._active.append(slot)
+        stats = self._stat(subsystem)
+        stats.active += 1
+        stats.peak_active = max(stats.peak_active, stats.active)
+        stats.granted += 1
+        if forced:
+            stats.forced += 1
+        return slot
+
+    def _dispatch(self) -> None:
+        """Grant slots to waiters, best priority first, while the limits allow."""
+        woken = []
+        with self._lock:
+            for waiter in list(self._waiters):
+                quota = self.quotas.get(waiter.subsystem)
+                if quota is not None and self._stat(waiter.subsystem).active >= quota:
+                    continue  # Others may still fit under their own quota
+                if len(self._active) >= self.max_slots:
+                    break
+                headroom = self._headroom_mb()
+                if self._active and headroom is not None and headroom < self.slot_memory_mb:
+                    self.memory_waits += 1
+                    break  # Nobody fits; don't let lower priorities jump the queue
+                self._waiters.remove(waiter)
+                waiter.slot = self._grant_locked(waiter.subsystem)
+                self._stat(waiter.subsystem).wait.observe(time.monotonic() - waiter.enqueued_at)
+                woken.append(waiter)
+        for waiter in woken:
+            waiter.wake()
+
+    def _release(self, slot: BrowserSlot) -> None:
+        with self._lock:
+            if slot._released:
+                return
+            slot._released = True
+            try:
+                self._active.remove(slot)
+            except ValueError:
+                pass
+            stats = self._stat(slot.subsystem)
+            stats.active = max(stats.active - 1, 0)
+        self._dispatch()
+
+    # ---------- reporting ----------
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            waiting: Dict[str, int] = {}
+            for waiter in self._waiters:
+                waiting[waiter.subsystem] = waiting.get(waiter.subsystem, 0) + 1
+            oldest = min((w.enqueued_at for w in self._waiters), default=None)
+            headroom = self._headroom_mb()
+            subsystems = {
+                name: {
+                    "active": stats.active,
+                    "peak_active": stats.peak_active,
+                    "waiting": waiting.get(name, 0),
+                    "quota": self.quotas.get(name),
+                    "priority": DEFAULT_PRIORITIES.get(name, DEFAULT_PRIORITY),
+                    "granted": stats.granted,
+                    "forced": stats.forced,
+                    "timeouts": stats.timeouts,
+                    "wait_seconds": stats.wait.snapshot(),
+                }
+                for name, stats in self._stats.items()
+            }
+            return {
+                "max_slots": self.max_slots,
+                "active": len(self._active),
+                "waiting": len(self._waiters),
+                "oldest_wait_seconds": round(time.monotonic() - oldest, 3) if oldest is not None else 0.0,
+                "memory": {
+                    "available_mb": round(self._memory_mb, 1) if self._memory_mb is not None else None,
+                    "headroom_mb": round(headroom, 1) if headroom is not None else None,
+                    "slot_mb": self.slot_memory_mb,
+                    "reserve_mb": self.reserve_mb,
+                    "waits": self.memory_waits,
+                },
+                "subsystems": subsystems,
+            }
+
+
+def _from_settings() -> BrowserSlotScheduler:
+    settings = get_settings()
+    quotas = {
+        "step5": settings.max_parallel_browsers,
+        "step6": settings.max_parallel_browsers,
+        "checker": settings.checker_parallel_browsers,
+        "dkim_retry": 1,
+    }
+    quotas.update(parse_quotas(settings.browser_slot_quotas))
+    return BrowserSlotScheduler(
+        max_slots=settings.browser_max_slots,
+        quotas=quotas,
+        slot_memory_mb=settings.browser_slot_memory_mb,
+        reserve_mb=settings.browser_memory_reserve_mb,
+        warmup_seconds=settings.browser_slot_warmup_seconds,
+    )
+
+
+browser_slots = _from_settings()
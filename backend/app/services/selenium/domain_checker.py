@@ -227,7 +227,7 @@ def check_tenant_domains(
         driver = None
         try:
             # === CREATE BROWSER ===
-            driver = create_driver(headless=headless)
+            driver = create_driver(headless=headless, subsystem="checker")
             driver.implicitly_wait(8)
             driver.set_page_load_timeout(45)
 
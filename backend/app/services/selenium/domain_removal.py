@@ -24,6 +24,8 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, ElementClickInterceptedException
 import logging
 
+from app.services.selenium.browser import launch_chrome
+
 logger = logging.getLogger(__name__)
 SCREENSHOT_DIR = os.environ.get("SCREENSHOT_DIR", os.path.join(os.environ.get("TEMP", os.environ.get("TMP", "/tmp")), "screenshots"))
 os.makedirs(SCREENSHOT_DIR, exist_ok=True)
@@ -438,7 +440,7 @@ def create_browser(headless=True):
     last_error = None
     for attempt in range(3):
         try:
-            driver = webdriver.Chrome(options=options)
+            driver = launch_chrome(options, "domain_removal")
             driver.implicitly_wait(10)
             driver.set_page_load_timeout(60)
             return driver
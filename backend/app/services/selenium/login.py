@@ -30,6 +30,7 @@ from selenium.common.exceptions import TimeoutException, NoSuchElementException
 import pyotp
 
 from .browser import create_driver, take_screenshot, cleanup_driver
+from .browser_slots import browser_slots
 from app.core.config import get_settings
 
 logger = logging.getLogger(__name__)
@@ -747,7 +748,7 @@ class MicrosoftLoginAutomation:
         result = FirstLoginResult(success=False)
         
         try:
-            self.driver = create_driver(self.headless)
+            self.driver = create_driver(self.headless, slot=await browser_slots.acquire_async("step4"))
             self.driver.get("https://portal.azure.com")
             # Wait for initial page load
             try:
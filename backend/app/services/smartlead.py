@@ -213,6 +213,7 @@ class SmartleadOAuthUploader:
         """Upload a single M365 account via OAuth. Returns True on success."""
         from selenium import webdriver
         from selenium.webdriver.common.by import By
+        from app.services.selenium.browser import launch_chrome
         from selenium.webdriver.support.ui import WebDriverWait
         from selenium.webdriver.support import expected_conditions as EC
         from selenium.common.exceptions import TimeoutException
@@ -231,7 +232,7 @@ class SmartleadOAuthUploader:
             if self.headless:
                 chrome_options.add_argument("--headless=new")
 
-            driver = webdriver.Chrome(options=chrome_options)
+            driver = launch_chrome(chrome_options, "smartlead")
             driver.execute_script(
                 "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
             )
@@ -490,6 +491,7 @@ async def run_smartlead_upload_for_batch(
     from app.models.mailbox import Mailbox
     from app.models.tenant import Tenant
     from app.models.batch import SetupBatch
+    from app.db.bulk import BufferedUpdater
     from app.db.session import async_session_factory
 
     logger.info(f"Starting Smartlead upload for batch {batch_id} with {num_workers} workers")
@@ -548,25 +550,28 @@ async def run_smartlead_upload_for_batch(
     
     # Filter out already existing accounts
     to_upload = []
-    skipped_count = 0
+    already_exists = []
     for mb in mailbox_list:
         if mb["email"].lower() in existing_emails:
-            skipped_count += 1
             logger.info(f"Skipping {mb['email']} - already exists in Smartlead")
-            # Mark as uploaded in DB
-            async with async_session_factory() as session:
-                await session.execute(
-                    update(Mailbox)
-                    .where(Mailbox.id == mb["id"])
-                    .values(
-                        smartlead_uploaded=True,
-                        smartlead_uploaded_at=datetime.utcnow(),
-                        smartlead_upload_error="Skipped - already exists"
-                    )
-                )
-                await session.commit()
+            already_exists.append(mb["id"])
         else:
             to_upload.append(mb)
+    skipped_count = len(already_exists)
+
+    # Mark the existing ones as uploaded in DB (one statement)
+    if already_exists:
+        async with async_session_factory() as session:
+            await session.execute(
+                update(Mailbox)
+                .where(Mailbox.id.in_(already_exists))
+                .values(
+                    smartlead_uploaded=True,
+                    smartlead_uploaded_at=datetime.utcnow(),
+                    smartlead_upload_error="Skipped - already exists"
+                )
+            )
+            await session.commit()
     
     if not to_upload:
         await api.close()
@@ -605,53 +610,43 @@ async def run_smartlead_upload_for_batch(
                 )
                 futures.append(future)
             
-            # Process results as they complete
-            for future in as_completed(futures):
-                result = future.result()
-                
-                # Update database
-                async with async_session_factory() as session:
+            email_by_id = {mb["id"]: mb["email"] for mb in to_upload}
+
+            # Process results as they complete; DB writes are buffered and
+            # flushed in bulk every N results / T seconds
+            async with BufferedUpdater(Mailbox, "id") as writer:
+                for future in as_completed(futures):
+                    result = future.result()
+
                     if result["success"]:
-                        await session.execute(
-                            update(Mailbox)
-                            .where(Mailbox.id == result["mailbox_id"])
-                            .values(
-                                smartlead_uploaded=True,
-                                smartlead_uploaded_at=datetime.utcnow(),
-                                smartlead_upload_error=None
-                            )
+                        await writer.add(
+                            result["mailbox_id"],
+                            smartlead_uploaded=True,
+                            smartlead_uploaded_at=datetime.utcnow(),
+                            smartlead_upload_error=None
                         )
                         uploaded_count += 1
-                        
+
                         # Configure settings if enabled
-                        if configure_settings:
-                            mb_result = await session.execute(
-                                select(Mailbox).where(Mailbox.id == result["mailbox_id"])
-                            )
-                            mb = mb_result.scalar_one_or_none()
-                            if mb:
-                                await asyncio.sleep(3)  # Wait for Smartlead to register
-                                account_id = await api.find_account_id(mb.email)
-                                if account_id:
-                                    if await api.update_sending_settings(account_id, **sending):
-                                        settings_configured += 1
-                                    if await api.update_warmup_settings(account_id, **warmup):
-                                        warmup_configured += 1
+                        email = email_by_id.get(result["mailbox_id"])
+                        if configure_settings and email:
+                            await asyncio.sleep(3)  # Wait for Smartlead to register
+                            account_id = await api.find_account_id(email)
+                            if account_id:
+                                if await api.update_sending_settings(account_id, **sending):
+                                    settings_configured += 1
+                                if await api.update_warmup_settings(account_id, **warmup):
+                                    warmup_configured += 1
                     else:
-                        await session.execute(
-                            update(Mailbox)
-                            .where(Mailbox.id == result["mailbox_id"])
-                            .values(
-                                smartlead_uploaded=False,
-                                smartlead_upload_error=result["error"]
-                            )
+                        await writer.add(
+                            result["mailbox_id"],
+                            smartlead_uploaded=False,
+                            smartlead_upload_error=result["error"]
                         )
                         failed_count += 1
                         errors.append(result["error"])
-                    
-                    await session.commit()
-                
-                logger.info(f"Progress: {uploaded_count + failed_count}/{len(to_upload)} processed")
+
+                    logger.info(f"Progress: {uploaded_count + failed_count}/{len(to_upload)} processed")
         
         finally:
             pass  # Uploaders clean up automatically (no login state to maintain)
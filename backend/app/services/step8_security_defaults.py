@@ -26,6 +26,8 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 
+from app.services.selenium.browser import launch_chrome
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
@@ -111,7 +113,7 @@ class SecurityDefaultsDisabler:
             else:
                 opts.add_argument("--start-maximized")
             
-            self.driver = webdriver.Chrome(options=opts)
+            self.driver = launch_chrome(opts, "step7")
             self.driver.implicitly_wait(5)
             
             # Hide automation indicators
@@ -39,6 +39,9 @@ import pyotp
 from PIL import Image
 from uuid import UUID
 
+from app.services.selenium.browser import launch_chrome
+from app.services.selenium.browser_slots import BrowserSlot, browser_slots
+
 try:
     from pyzbar.pyzbar import decode as decode_qr
     HAS_PYZBAR = True
@@ -245,9 +248,10 @@ class TenantResult:
 class BrowserWorker:
     """Single browser for tenant automation."""
     
-    def __init__(self, worker_id: int, headless: bool = True):
+    def __init__(self, worker_id: int, headless: bool = True, subsystem: str = "step4"):
         self.worker_id = worker_id
         self.headless = headless
+        self.subsystem = subsystem  # Browser slot owner (quota, priority, metrics)
         self.driver = None
         self.tenant_id = None  # Set during process() for screenshot naming
     
@@ -266,7 +270,8 @@ class BrowserWorker:
             logger.error(f"[W{self.worker_id}] Screenshot failed: {e}")
             return ""
     
-    def _create_driver(self):
+    def _create_driver(self, slot: Optional[BrowserSlot] = None):
+        """Start Chrome under a browser slot (pass one taken with acquire_async from async code)."""
         opts = Options()
         if self.headless:
             # Use new headless flag for better compatibility
@@ -297,7 +302,7 @@ class BrowserWorker:
         # This captures all network requests including Authorization headers
         opts.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
         
-        driver = webdriver.Chrome(options=opts)
+        driver = launch_chrome(opts, self.subsystem, slot)
         driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
         driver._profile_dir = profile_dir
         return driver
@@ -2464,7 +2469,7 @@ async def process_tenant(tenant, db, worker_id: int = 0) -> dict:
     worker.tenant_id = str(tenant.id)
     
     try:
-        worker.driver = worker._create_driver()
+        worker.driver = worker._create_driver(slot=await browser_slots.acquire_async("step4"))
         worker.driver.get("https://portal.azure.com")
         time.sleep(3)
         worker._screenshot("01_start")
@@ -29,7 +29,8 @@ from dataclasses import dataclass
 logger = logging.getLogger(__name__)
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import insert as sa_insert, select, func, or_, update
+from sqlalchemy.dialects.postgresql import insert
 
 from app.models.tenant import Tenant, TenantStatus
 from app.models.domain import Domain, DomainStatus
@@ -47,6 +48,9 @@ class CredentialData:
 _DOMAIN_LINK_DIGIT_RE = re.compile(r"\bdomain\b.*?\d+", re.IGNORECASE)
 _DOMAIN_LINK_PHRASE_RE = re.compile(r"link\s*tenant", re.IGNORECASE)
 
+# Keys per IN (...) lookup and rows per INSERT statement during import
+IMPORT_CHUNK_SIZE = 500
+
 
 def _normalize_domain_name(raw: str) -> str:
     """
@@ -545,6 +549,62 @@ class TenantImportService:
         
         return merged, unmatched_tenants, unmatched_creds
     
+    async def _load_existing_tenants(
+        self,
+        db: AsyncSession,
+        merged: List[Dict[str, Any]],
+    ) -> Tuple[Dict[str, Tenant], Dict[str, Tenant]]:
+        """
+        Load every tenant matching the file's tenant IDs or onmicrosoft domains.
+
+        One query per IMPORT_CHUNK_SIZE keys instead of two lookups per row.
+
+        Returns:
+            (by microsoft_tenant_id, by onmicrosoft_domain)
+        """
+        tenant_ids = sorted({d["microsoft_tenant_id"] for d in merged if d.get("microsoft_tenant_id")})
+        domains = sorted({d["onmicrosoft_domain"] for d in merged if d.get("onmicrosoft_domain")})
+
+        by_tid: Dict[str, Tenant] = {}
+        by_domain: Dict[str, Tenant] = {}
+        for start in range(0, max(len(tenant_ids), len(domains)), IMPORT_CHUNK_SIZE):
+            tid_chunk = tenant_ids[start:start + IMPORT_CHUNK_SIZE]
+            domain_chunk = domains[start:start + IMPORT_CHUNK_SIZE]
+            conditions = []
+            if tid_chunk:
+                conditions.append(Tenant.microsoft_tenant_id.in_(tid_chunk))
+            if domain_chunk:
+                conditions.append(Tenant.onmicrosoft_domain.in_(domain_chunk))
+            result = await db.execute(select(Tenant).where(or_(*conditions)))
+            for tenant in result.scalars():
+                by_tid[tenant.microsoft_tenant_id] = tenant
+                by_domain[tenant.onmicrosoft_domain] = tenant
+        return by_tid, by_domain
+
+    async def _insert_new_tenants(self, db: AsyncSession, rows: List[Dict[str, Any]]) -> None:
+        """
+        Write new tenants with chunked INSERT ... ON CONFLICT (microsoft_tenant_id) DO UPDATE.
+
+        The conflict clause only matters if the same tenant was inserted by
+        someone else after the pre-load; the file's values win, as they would
+        for a reassignment. Outside PostgreSQL this is a plain chunked INSERT.
+        """
+        if not rows:
+            return
+        if db.get_bind().dialect.name == "postgresql":
+            stmt = insert(Tenant)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[Tenant.microsoft_tenant_id],
+                set_={
+                    **{key: stmt.excluded[key] for key in rows[0] if key != "microsoft_tenant_id"},
+                    "updated_at": func.now(),
+                },
+            )
+        else:
+            stmt = sa_insert(Tenant)
+        for start in range(0, len(rows), IMPORT_CHUNK_SIZE):
+            await db.execute(stmt, rows[start:start + IMPORT_CHUNK_SIZE])
+
     async def import_tenants(
         self,
         db: AsyncSession,
@@ -593,6 +653,14 @@ class TenantImportService:
             if ed:
                 explicit_domain_map[data["onmicrosoft_domain"].lower()] = list(ed)
 
+        # Everything matching the file, loaded up front; rows are then resolved in
+        # memory and written in bulk
+        existing_by_tid, existing_by_domain = await self._load_existing_tenants(db, merged)
+        new_rows: List[Dict[str, Any]] = []
+        new_by_tid: Dict[str, Dict[str, Any]] = {}
+        new_by_domain: Dict[str, Dict[str, Any]] = {}
+        unlink_domain_ids: List[UUID] = []
+
         imported = 0
         skipped = 0
         reassigned = 0
@@ -626,21 +694,32 @@ class TenantImportService:
             # Check duplicate by tenant ID or domain
             existing = None
             if data["microsoft_tenant_id"]:
-                existing = await db.execute(
-                    select(Tenant).where(
-                        Tenant.microsoft_tenant_id == data["microsoft_tenant_id"]
-                    )
-                )
-                existing = existing.scalar_one_or_none()
+                existing = existing_by_tid.get(data["microsoft_tenant_id"])
+            if not existing:
+                existing = existing_by_domain.get(data["onmicrosoft_domain"])
 
+            # Same tenant listed earlier in this file: treat like an existing
+            # tenant of this batch
+            pending = None
             if not existing:
-                # Also check by domain
-                existing = await db.execute(
-                    select(Tenant).where(
-                        Tenant.onmicrosoft_domain == data["onmicrosoft_domain"]
-                    )
+                pending = (
+                    new_by_tid.get(data["microsoft_tenant_id"])
+                    or new_by_domain.get(data["onmicrosoft_domain"])
                 )
-                existing = existing.scalar_one_or_none()
+            if pending:
+                if data["admin_password"]:
+                    pending["admin_password"] = data["admin_password"]
+                    pending["initial_password"] = data["admin_password"]
+                if has_preconfigured_mfa:
+                    pending["totp_secret"] = preconfigured_totp
+                    pending["first_login_completed"] = True
+                    pending["first_login_at"] = pending["first_login_at"] or datetime.utcnow()
+                    pending["password_changed"] = True
+                    pending["setup_error"] = None
+                    pending["status"] = TenantStatus.FIRST_LOGIN_COMPLETE
+                    preconfigured_totp_saved += 1
+                skipped += 1
+                continue
 
             if existing:
                 if existing.batch_id == batch_id:
@@ -735,14 +814,12 @@ class TenantImportService:
 
                     # Clear domain linkage since it's a new batch
                     if existing.domain_id:
-                        old_domain = await db.execute(
-                            select(Domain).where(Domain.id == existing.domain_id)
-                        )
-                        old_domain = old_domain.scalar_one_or_none()
-                        if old_domain:
-                            old_domain.tenant_id = None
+                        unlink_domain_ids.append(existing.domain_id)
                     existing.domain_id = None
                     existing.custom_domain = None
+                    # Later rows in the file may match the tenant under its new keys
+                    existing_by_tid[existing.microsoft_tenant_id] = existing
+                    existing_by_domain[existing.onmicrosoft_domain] = existing
                     reassigned += 1
                     imported += 1
                     if has_preconfigured_mfa:
@@ -754,7 +831,7 @@ class TenantImportService:
 
             initial_pwd = data["admin_password"] or ""
 
-            tenant = Tenant(
+            row = dict(
                 batch_id=batch_id,
                 name=data["name"],
                 onmicrosoft_domain=data["onmicrosoft_domain"],
@@ -770,6 +847,7 @@ class TenantImportService:
                 first_login_completed=has_preconfigured_mfa,
                 first_login_at=datetime.utcnow() if has_preconfigured_mfa else None,
                 password_changed=has_preconfigured_mfa,
+                setup_error=None,
                 provider=provider or data.get("provider") or "Unknown",
                 status=(
                     TenantStatus.FIRST_LOGIN_COMPLETE
@@ -777,7 +855,9 @@ class TenantImportService:
                     else TenantStatus.IMPORTED
                 )
             )
-            db.add(tenant)
+            new_rows.append(row)
+            new_by_tid[row["microsoft_tenant_id"]] = row
+            new_by_domain[row["onmicrosoft_domain"]] = row
             imported += 1
             if has_preconfigured_mfa:
                 preconfigured_totp_saved += 1
@@ -789,6 +869,16 @@ class TenantImportService:
             f"preconfigured_totp_saved={preconfigured_totp_saved}, "
             f"explicit_assignments={len(explicit_domain_map)}"
         )
+        # Changes to existing tenants are flushed by the ORM (batched per
+        # statement shape); new tenants and old-domain unlinks go in bulk
+        await self._insert_new_tenants(db, new_rows)
+        if unlink_domain_ids:
+            await db.execute(
+                update(Domain)
+                .where(Domain.id.in_(unlink_domain_ids))
+                .values(tenant_id=None)
+                .execution_options(synchronize_session=False)
+            )
         await db.commit()
         logger.info(f"Tenant import: db.commit() completed successfully for batch {batch_id}")
 
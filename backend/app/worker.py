@@ -0,0 +1,123 @@
+"""
+Automation worker: runs queued jobs in a process of its own.
+
+    python -m app.worker [--kinds pipeline,step6_batch] [--concurrency 4]
+
+The API only enqueues work (pipeline runs, auto-runs, full automation,
+Step 4-7 runs, DKIM retries, sequencer and CSV uploads, domain checks,
+password resets) and reports on it; the browsers and PowerShell sessions
+run here. With JOB_RUNNER_ENABLED=false on the API service, an API deploy
+or crash no longer kills in-flight automation, and the two can be sized
+independently. Any number of workers can poll the same queue (jobs are
+claimed with FOR UPDATE SKIP LOCKED).
+
+SIGTERM/SIGINT stop claiming and hand running jobs back to the queue, where
+the next worker resumes them from their checkpoint.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import sys
+from datetime import datetime
+from typing import List, Optional
+
+logger = logging.getLogger("app.worker")
+
+
+def _setup_logging() -> str:
+    """Same handlers and quiet loggers as the API (app.main), in logs/worker_*.log."""
+    os.makedirs("logs", exist_ok=True)
+    log_filename = f"logs/worker_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+        handlers=[
+            logging.FileHandler(log_filename),
+            logging.StreamHandler(sys.stdout),
+        ],
+    )
+    if not os.getenv("SQL_ECHO"):
+        logging.getLogger("sqlalchemy.engine.Engine").setLevel(logging.WARNING)
+        logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
+        logging.getLogger("sqlalchemy.pool").setLevel(logging.WARNING)
+    for name in ("httpcore", "httpx", "urllib3", "aiohttp"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    return log_filename
+
+
+async def run_worker(kinds: Optional[List[str]] = None, concurrency: Optional[int] = None) -> None:
+    """
+    Run jobs until SIGTERM/SIGINT.
+
+    Args:
+        kinds: Job kinds to claim (default: every registered kind)
+        concurrency: Jobs of each kind run at once (default job_runner_concurrency;
+            job_runner_kind_concurrency overrides single kinds)
+    """
+    # Importing the routes registers every job handler (@job_handler lives next to its endpoints)
+    import app.api.routes  # noqa: F401
+    from app.db.session import engine, read_engine
+    from app.services.cloudflare import close_cloudflare_clients
+    from app.services.cloudflare_sync import close_sync_clients
+    from app.services.job_queue import JobRunner, registered_kinds
+    from app.services.pipeline_log_sink import pipeline_log_sink
+    from app.services.powershell.setup import check_powershell_available, ensure_powershell_modules
+
+    unknown = sorted(set(kinds or []) - set(registered_kinds()))
+    if unknown:
+        raise SystemExit(f"Unknown job kind(s): {', '.join(unknown)} (known: {', '.join(registered_kinds())})")
+
+    if check_powershell_available():
+        if not ensure_powershell_modules():
+            logger.error("Failed to setup PowerShell modules - M365 automation will not work")
+    else:
+        logger.warning("PowerShell not available - M365 automation will not work")
+
+    runner = JobRunner(kinds=kinds, concurrency=concurrency, name="worker")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:  # Windows: Ctrl+C raises KeyboardInterrupt instead
+            pass
+
+    runner.start()
+    logger.info(
+        "Worker %s running up to %d job(s) of each kind at once (overrides: %s)",
+        runner.owner, runner.concurrency, runner.kind_concurrency or "none",
+    )
+    try:
+        await stop.wait()
+    finally:
+        logger.info("Worker stopping: returning %d running job(s) to the queue", len(runner.running))
+        await runner.stop()
+        await close_cloudflare_clients()
+        await close_sync_clients()
+        await pipeline_log_sink.close()
+        await engine.dispose()
+        await read_engine.dispose()
+        logger.info("Worker stopped")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.worker", description="Run queued automation jobs.")
+    parser.add_argument("--kinds", help="Comma-separated job kinds to run (default: all)")
+    parser.add_argument("--concurrency", type=int, help="Jobs of each kind run at once (default: JOB_RUNNER_CONCURRENCY)")
+    args = parser.parse_args(argv)
+
+    log_filename = _setup_logging()
+    logger.info("Logging to %s", log_filename)
+    kinds = [k.strip() for k in args.kinds.split(",") if k.strip()] if args.kinds else None
+    try:
+        asyncio.run(run_worker(kinds, args.concurrency))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Rebuild the batch_counters table from the domains/tenants/mailboxes tables.
+
+The counters are normally kept current by database triggers; run this after a
+bulk fix-up done with the triggers disabled, or if the counts look off.
+
+Usage:
+    python -m scripts.rebuild_batch_counters
+    python -m scripts.rebuild_batch_counters --batch-id <uuid>
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import uuid
+
+from app.db.session import async_session_factory
+from app.services import batch_counters
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("rebuild_batch_counters")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch-id", help="Optional batch UUID to rebuild a single batch")
+    args = parser.parse_args()
+
+    batch_id = uuid.UUID(args.batch_id) if args.batch_id else None
+    async with async_session_factory() as session:
+        rebuilt = await batch_counters.rebuild(session, batch_id)
+        await session.commit()
+
+    logger.info("Rebuilt counters for %s batch(es)", rebuilt)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
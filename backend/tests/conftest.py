@@ -17,7 +17,8 @@ from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_asyn
 from sqlalchemy.pool import StaticPool
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID, JSONB
 
-from app.db.session import get_db_session
+from app.api.deps import get_read_db
+from app.db.session import RetryableSession, get_db_session, get_read_db_session, get_read_db_session_with_retry
 
 
 # SQLite in-memory database URL for tests
@@ -109,7 +110,14 @@ async def client(test_engine) -> AsyncGenerator[AsyncClient, None]:
         async with async_session() as session:
             yield session
     
+    async def override_get_read_db_with_retry():
+        async with RetryableSession(async_session) as session:
+            yield session
+
     app.dependency_overrides[get_db_session] = override_get_db
+    app.dependency_overrides[get_read_db_session] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    app.dependency_overrides[get_read_db_session_with_retry] = override_get_read_db_with_retry
     
     # Create test client with ASGI transport
     transport = ASGITransport(app=app)
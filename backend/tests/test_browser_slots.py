@@ -0,0 +1,108 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.services.selenium.browser_slots import BrowserSlotScheduler, BrowserSlotTimeout, parse_quotas
+
+
+class _Driver:
+    def __init__(self):
+        self.quits = 0
+
+    def quit(self):
+        self.quits += 1
+
+
+async def test_waiters_are_served_by_priority_within_quotas():
+    slots = BrowserSlotScheduler(max_slots=2, quotas={"checker": 1}, memory_probe=lambda: None)
+    first = await slots.acquire_async("step6")
+    checker = await slots.acquire_async("checker")
+    order = []
+
+    async def wait(subsystem, priority=None):
+        slot = await slots.acquire_async(subsystem, priority=priority)
+        order.append(subsystem)
+        return slot
+
+    tasks = [
+        asyncio.create_task(wait("checker")),
+        asyncio.create_task(wait("dkim_retry")),
+        asyncio.create_task(wait("step7")),
+    ]
+    await asyncio.sleep(0.01)
+    assert slots.snapshot()["waiting"] == 3
+
+    # step7 outranks dkim_retry; the queued checker is over its quota until the first one quits
+    first.release()
+    first.release()
+    step7 = await tasks[2]
+    assert order == ["step7"]
+    step7.release()
+    dkim = await tasks[1]
+    checker.release()
+    second_checker = await tasks[0]
+    assert order == ["step7", "dkim_retry", "checker"]
+
+    data = slots.snapshot()
+    assert (data["active"], data["waiting"]) == (2, 0)
+    assert data["subsystems"]["checker"]["peak_active"] == 1
+    assert data["subsystems"]["step7"]["wait_seconds"]["count"] == 1
+    dkim.release()
+    second_checker.release()
+    assert slots.snapshot()["active"] == 0
+
+
+async def test_new_browsers_wait_for_free_memory():
+    free = {"mb": 1500.0}
+    slots = BrowserSlotScheduler(
+        max_slots=10, slot_memory_mb=300, reserve_mb=500, warmup_seconds=0, memory_probe=lambda: free["mb"]
+    )
+    # With nothing running a slot is granted whatever the reading
+    free["mb"] = 100.0
+    driver = slots.acquire("step6").bind(_Driver())
+
+    waiter = asyncio.create_task(slots.acquire_async("step6"))
+    await asyncio.sleep(0.01)
+    assert not waiter.done()
+    assert slots.snapshot()["memory"]["waits"] >= 1
+
+    # Quitting the driver frees the slot; the next one only needs room for itself then
+    driver.quit()
+    driver.quit()
+    slot = await asyncio.wait_for(waiter, 1)
+    assert driver.quits == 2 and slots.snapshot()["active"] == 1
+
+    free["mb"] = 900.0
+    slots._memory_read_at = 0
+    second = await asyncio.wait_for(slots.acquire_async("step6"), 1)
+    slot.release()
+    second.release()
+
+
+def test_blocking_acquire_times_out_and_runs_on_loop_are_never_blocked():
+    slots = BrowserSlotScheduler(max_slots=1, memory_probe=lambda: None)
+    held = slots.acquire("step5")
+
+    errors = []
+    thread = threading.Thread(target=lambda: errors.append(_timeout(slots)))
+    thread.start()
+    thread.join(5)
+    assert isinstance(errors[0], BrowserSlotTimeout)
+    assert slots.snapshot()["subsystems"]["instantly"]["timeouts"] == 1
+
+    async def on_loop():
+        return slots.acquire("step7")
+
+    forced = asyncio.run(on_loop())
+    assert forced.forced and slots.snapshot()["active"] == 2
+    forced.release()
+    held.release()
+
+    assert parse_quotas(" step7=5, checker=2,") == {"step7": 5, "checker": 2}
+
+
+def _timeout(slots):
+    with pytest.raises(BrowserSlotTimeout) as exc:
+        slots.acquire("instantly", timeout=0.05)
+    return exc.value
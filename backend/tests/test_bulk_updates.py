@@ -0,0 +1,80 @@
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.db.bulk import BufferedUpdater, bulk_update, values_update_statement
+from app.models.mailbox import Mailbox, MailboxStatus, WarmupStage
+from app.models.tenant import Tenant, TenantStatus
+
+
+async def _mailboxes(session, count):
+    tenant = Tenant(
+        microsoft_tenant_id="tid", name="t", onmicrosoft_domain="t.onmicrosoft.com", provider="test",
+        admin_email="admin@t.onmicrosoft.com", admin_password="x", status=TenantStatus.IMPORTED,
+    )
+    session.add(tenant)
+    await session.flush()
+    mailboxes = [
+        Mailbox(email=f"user{i}@example.com", display_name=f"User {i}", password="pw",
+                tenant_id=tenant.id, status=MailboxStatus.PENDING, warmup_stage=list(WarmupStage)[0])
+        for i in range(count)
+    ]
+    session.add_all(mailboxes)
+    await session.commit()
+    return mailboxes
+
+
+async def test_bulk_update_by_email_with_mixed_column_sets(test_session):
+    mailboxes = await _mailboxes(test_session, 3)
+
+    matched = await bulk_update(test_session, Mailbox, "email", [
+        {"email": "user0@example.com", "instantly_uploaded": True, "instantly_upload_error": None},
+        {"email": "user1@example.com", "instantly_uploaded": False, "instantly_upload_error": "login failed"},
+        {"email": "user2@example.com", "error_message": "boom"},
+        {"email": "missing@example.com", "error_message": "nobody"},
+    ])
+    await test_session.commit()
+
+    assert matched == 3
+    rows = {
+        mb.email: mb
+        for mb in (await test_session.execute(
+            select(Mailbox).execution_options(populate_existing=True)
+        )).scalars()
+    }
+    assert rows["user0@example.com"].instantly_uploaded is True
+    assert rows["user1@example.com"].instantly_upload_error == "login failed"
+    assert rows["user2@example.com"].error_message == "boom"
+    assert rows["user2@example.com"].instantly_uploaded is False
+    assert len(mailboxes) == 3
+
+
+async def test_buffered_updater_flushes_by_count_and_on_exit(test_engine, test_session):
+    mailboxes = await _mailboxes(test_session, 5)
+    factory = async_sessionmaker(bind=test_engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with BufferedUpdater(Mailbox, "id", session_factory=factory, max_rows=2, max_seconds=60) as writer:
+        for mb in mailboxes:
+            # ids as strings, as the upload workers report them
+            await writer.add(str(mb.id), smartlead_uploaded=True)
+        await writer.add(str(mailboxes[4].id), smartlead_upload_error="merged")
+        assert writer.written == 4
+
+    assert writer.written == 5
+    uploaded = (await test_session.execute(
+        select(Mailbox).where(Mailbox.smartlead_uploaded == True).execution_options(populate_existing=True)
+    )).scalars().all()
+    assert len(uploaded) == 5
+    assert {mb.smartlead_upload_error for mb in uploaded} == {None, "merged"}
+
+
+def test_postgres_statement_is_a_single_update_from_values():
+    stmt = values_update_statement(
+        Mailbox.__table__, "email", ("instantly_upload_error", "instantly_uploaded"),
+        [{"email": f"user{i}@example.com", "instantly_uploaded": True, "instantly_upload_error": None} for i in range(3)],
+    )
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+
+    assert sql.startswith("UPDATE mailboxes SET")
+    assert "FROM (VALUES" in sql and "AS incoming (email, instantly_upload_error, instantly_uploaded)" in sql
+    assert "WHERE mailboxes.email = incoming.email" in sql
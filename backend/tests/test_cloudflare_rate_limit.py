@@ -0,0 +1,57 @@
+import pytest
+
+from app.services import cloudflare_rate_limit
+from app.services.cloudflare_rate_limit import TokenBucket, parse_retry_after
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(cloudflare_rate_limit.time, "monotonic", fake.monotonic)
+    return fake
+
+
+def test_bucket_allows_burst_then_reports_wait(clock):
+    bucket = TokenBucket(capacity=3, refill_per_second=2)
+
+    assert [bucket._try_take(1) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.tokens_remaining == 0
+    assert bucket._try_take(1) == pytest.approx(0.5)
+
+    clock.now += 1.0
+    assert bucket.tokens_remaining == 2
+
+
+def test_penalize_blocks_until_retry_after(clock):
+    bucket = TokenBucket(capacity=10, refill_per_second=1)
+
+    bucket.penalize(30)
+
+    assert bucket.tokens_remaining == 0
+    assert bucket._try_take(1) == pytest.approx(30)
+
+    clock.now += 35
+    # Refill only counts time after the block ended
+    assert bucket.tokens_remaining == 5
+
+
+def test_parse_retry_after_defaults():
+    assert parse_retry_after("12") == 12.0
+    assert parse_retry_after(None) == cloudflare_rate_limit.DEFAULT_RETRY_AFTER_SECONDS
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == cloudflare_rate_limit.DEFAULT_RETRY_AFTER_SECONDS
+
+
+def test_account_bucket_is_shared_and_fits_the_window():
+    bucket = cloudflare_rate_limit.get_account_bucket("shared@example.com")
+
+    assert cloudflare_rate_limit.get_account_bucket("shared@example.com") is bucket
+    # burst + refill over a full window never exceeds 1200 requests / 5 min
+    assert bucket.capacity + bucket.refill_per_second * 300 == pytest.approx(1200)
@@ -0,0 +1,226 @@
+import asyncio
+
+from app.services.cloudflare import CloudflareService, bounded_as_completed
+
+
+async def test_bounded_as_completed_caps_concurrency_and_reports_index():
+    in_flight = 0
+    peak = 0
+
+    async def worker(delay):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(delay)
+        in_flight -= 1
+        return delay * 10
+
+    items = [0.03, 0.01, 0.02, 0.01, 0.0]
+    seen = [pair async for pair in bounded_as_completed(items, worker, max_workers=2)]
+
+    assert peak == 2
+    assert sorted(seen) == [(i, d * 10) for i, d in enumerate(items)]
+
+
+async def test_bulk_create_zones_keeps_input_order_and_shape():
+    service = CloudflareService(api_key="key", email="bulk@example.com", account_id="acct")
+
+    async def fake_create_zone(domain):
+        # Later domains finish first
+        await asyncio.sleep(0.01 * (3 - len(domain.split(".")[0])))
+        if domain.startswith("bad"):
+            raise RuntimeError("boom")
+        return {"zone_id": f"zone-{domain}", "nameservers": ["a.ns", "b.ns"]}
+
+    async def fake_phase1(zone_id, domain):
+        return {"cname_created": True, "dmarc_created": True}
+
+    service.create_zone = fake_create_zone
+    service.create_phase1_dns = fake_phase1
+
+    results = await service.bulk_create_zones(["a.com", "bad.com", "cc.com"], max_workers=3)
+
+    assert [r["domain"] for r in results] == ["a.com", "bad.com", "cc.com"]
+    assert results[0]["success"] and results[0]["zone_id"] == "zone-a.com"
+    assert results[1]["success"] is False and results[1]["error"] == "boom"
+    assert set(results[2]) == {"domain", "success", "zone_id", "nameservers", "phase1_dns", "error"}
+
+
+async def test_phase1_failure_keeps_the_created_zone():
+    service = CloudflareService(api_key="key", email="phase1@example.com", account_id="acct")
+
+    async def fake_create_zone(domain):
+        return {"zone_id": f"zone-{domain}", "nameservers": ["a.ns", "b.ns"]}
+
+    async def failing_phase1(zone_id, domain):
+        raise RuntimeError("dns down")
+
+    service.create_zone = fake_create_zone
+    service.create_phase1_dns = failing_phase1
+
+    results = [r async for r in service.iter_bulk_create_zones(["a.com"], max_workers=1)]
+
+    assert results[0]["success"] is True
+    assert results[0]["zone_id"] == "zone-a.com"
+    assert results[0]["phase1_dns"] is None
+    assert results[0]["error"] is None
+
+
+def _dns_service(monkeypatch):
+    service = CloudflareService(api_key="key", email="dns@example.com", account_id="acct")
+    calls = []
+    records = [{"id": "r1", "type": "TXT", "name": "example.com", "content": "v=spf1 -all", "proxied": False}]
+
+    async def fake_request(method, endpoint, json_data=None):
+        calls.append((method, endpoint))
+        if method == "GET":
+            return {"success": True, "result": [dict(r) for r in records]}
+        if method == "POST":
+            if json_data["content"] == "bad":
+                raise RuntimeError("boom")
+            return {"success": True, "result": {"id": "new", "name": "example.com", "proxied": False, **json_data}}
+        return {"success": True, "result": {"id": endpoint.rsplit("/", 1)[-1]}}
+
+    monkeypatch.setattr(service, "_request", fake_request)
+    return service, calls
+
+
+async def test_dns_snapshot_is_listed_once_and_written_through(monkeypatch):
+    service, calls = _dns_service(monkeypatch)
+
+    await service.ensure_txt_record("z1", "@", "v=spf1 include:spf.protection.outlook.com ~all", "example.com")
+    await service.delete_conflicting_spf_records(
+        "z1", "example.com", keep_value="v=spf1 include:spf.protection.outlook.com ~all"
+    )
+    records = await service.list_dns_records("z1")
+
+    assert [c[0] for c in calls] == ["GET", "POST", "DELETE"]
+    assert [r["id"] for r in records] == ["new"]
+
+
+async def test_dns_snapshot_is_dropped_on_error(monkeypatch):
+    service, calls = _dns_service(monkeypatch)
+
+    await service.list_dns_records("z1")
+    try:
+        await service.create_txt_record("z1", "@", "bad")
+    except RuntimeError:
+        pass
+    await service.list_dns_records("z1")
+
+    assert [c[0] for c in calls] == ["GET", "POST", "GET"]
+
+
+async def test_expired_dns_snapshots_are_evicted_when_a_zone_is_listed(monkeypatch):
+    from types import SimpleNamespace
+
+    from app.services import cloudflare
+
+    service, calls = _dns_service(monkeypatch)
+    now = [1000.0]
+    monkeypatch.setattr(cloudflare, "time", SimpleNamespace(monotonic=lambda: now[0]))
+
+    for zone in ("z1", "z2", "z3"):
+        await service.list_dns_records(zone)
+        now[0] += 30
+    await service.list_dns_records("z1", refresh=True)  # re-listed: now the newest
+    now[0] += 20
+    await service.list_dns_records("z4")
+
+    # z2 (fetched 80s ago) is past the 60s TTL; z3, z1 and z4 are not
+    assert list(service._dns_snapshots) == ["z3", "z1", "z4"]
+
+
+async def test_bulk_ns_check_lists_zone_statuses_once(monkeypatch):
+    from app.services import cloudflare
+    from app.services.ns_propagation import NsCheckResult
+
+    service = CloudflareService(api_key="key", email="ns@example.com", account_id="acct")
+    listings = []
+
+    async def fake_zone_statuses():
+        listings.append(1)
+        return {"z1": "active", "z2": "pending"}
+
+    async def fake_check_ns(domain, expected_ns):
+        await asyncio.sleep(0.01)
+        return NsCheckResult(domain=domain, propagated=domain != "late.com", expected_ns=expected_ns)
+
+    service.zone_statuses = fake_zone_statuses
+    monkeypatch.setattr(cloudflare, "check_ns", fake_check_ns)
+
+    results = await service.bulk_check_ns_propagation([
+        {"domain": "a.com", "expected_ns": ["a.ns"], "zone_id": "z1"},
+        {"domain": "late.com", "expected_ns": ["a.ns"], "zone_id": "z2"},
+        {"domain": "b.com", "expected_ns": ["a.ns"], "zone_id": "gone"},
+    ])
+
+    assert listings == [1]
+    assert [(r["domain"], r["propagated"], r["zone_status"]) for r in results] == [
+        ("a.com", True, "active"), ("late.com", False, "pending"), ("b.com", True, None),
+    ]
+
+
+async def test_get_or_create_zone_asks_accounts_before_creating_on_index_miss(monkeypatch):
+    from app.core.config import get_settings
+    from app.services import cloudflare
+
+    settings = get_settings().model_copy(update={
+        "cloudflare_api_key": "key", "cloudflare_email": "multi@example.com", "cloudflare_account_id": "acct",
+    })
+    monkeypatch.setattr(cloudflare, "get_settings", lambda: settings)
+    service = cloudflare.MultiCloudflareService()
+    service.zone_index._loaded = True
+
+    async def nothing(*args):
+        pass
+
+    async def no_zones():
+        return []
+
+    async def created_elsewhere(domain):
+        # Created by the worker process (or the dashboard) after this process listed the account
+        return {"zone_id": "z1", "name": domain, "status": "pending", "nameservers": ["a.ns"]}
+
+    async def create_zone(domain):
+        raise AssertionError("zone already exists")
+
+    monkeypatch.setattr(service.zone_index, "_persist_account", nothing)
+    monkeypatch.setattr(service.zone_index, "_persist_entry", nothing)
+    monkeypatch.setattr(service.primary, "list_zones", no_zones)
+    monkeypatch.setattr(service.primary, "get_zone_by_name", created_elsewhere)
+    service.create_zone = create_zone
+
+    assert await service.refresh_zone_index() and service.zone_index.is_fresh
+    zone = await service.get_or_create_zone("new.com")
+
+    assert (zone["zone_id"], zone["already_existed"]) == ("z1", True)
+    assert service.zone_index.lookup("new.com").zone_id == "z1"
+
+
+async def test_close_cloudflare_clients_closes_clients_of_other_loops():
+    import threading
+
+    from app.services.cloudflare import close_cloudflare_clients
+
+    service = CloudflareService(api_key="key", email="loops@example.com", account_id="acct")
+
+    async def open_client():
+        return service._get_client()
+
+    # A loop running in its own thread (like the cloudflare_sync loop) and one that has stopped
+    running = asyncio.new_event_loop()
+    threading.Thread(target=running.run_forever, daemon=True).start()
+    stopped = asyncio.new_event_loop()
+    clients = [
+        service._get_client(),
+        asyncio.run_coroutine_threadsafe(open_client(), running).result(),
+        await asyncio.to_thread(stopped.run_until_complete, open_client()),
+    ]
+
+    await close_cloudflare_clients()
+
+    assert all(client.is_closed for client in clients)
+    assert not service._clients
+    running.call_soon_threadsafe(running.stop)
+    stopped.close()
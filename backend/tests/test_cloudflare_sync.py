@@ -0,0 +1,64 @@
+import asyncio
+
+from app.services import cloudflare, cloudflare_sync
+from app.services.cloudflare_zone_index import CloudflareZoneIndex
+
+
+class FakeAccount:
+    def __init__(self, email, zones):
+        self.account_email = email
+        self.zones = zones
+
+    async def get_zone_by_id(self, zone_id):
+        await asyncio.sleep(0.05)
+        return next((z for z in self.zones if z["zone_id"] == zone_id), None)
+
+    async def get_zone_by_name(self, domain):
+        await asyncio.sleep(0.05)
+        return next((z for z in self.zones if z["name"] == domain), None)
+
+
+class FakeMulti:
+    def __init__(self, accounts):
+        self._services = accounts
+        self.zone_index = CloudflareZoneIndex(accounts)
+        self.zone_index._loaded = True  # skip the DB load
+
+        async def no_persist(entry):
+            pass
+
+        self.zone_index._persist_entry = no_persist
+
+
+def _zone(zone_id, name, status):
+    return {"zone_id": zone_id, "name": name, "status": status, "nameservers": ["a.ns", "b.ns"]}
+
+
+def _install(monkeypatch):
+    multi = FakeMulti([
+        FakeAccount("one@example.com", [_zone("p1", "example.com", "pending")]),
+        FakeAccount("two@example.com", [_zone("s1", "example.com", "active")]),
+    ])
+    monkeypatch.setattr(cloudflare, "cloudflare_service", multi)
+    monkeypatch.setattr(cloudflare_sync, "_zone_account_cache", {})
+    return multi
+
+
+async def test_resolve_prefers_active_zone_and_queries_accounts_concurrently(monkeypatch):
+    multi = _install(monkeypatch)
+
+    started = asyncio.get_running_loop().time()
+    zone_id, corrected = await cloudflare_sync.resolve_zone_id_async("p1", "Example.com")
+    elapsed = asyncio.get_running_loop().time() - started
+
+    assert (zone_id, corrected) == ("s1", True)
+    assert cloudflare_sync._zone_account_cache["s1"] == 1
+    assert multi.zone_index.get("p1").account_index == 0
+    # 4 lookups of 50ms each, all in flight at once
+    assert elapsed < 0.15
+
+
+async def test_sync_shim_blocks_even_inside_a_running_loop(monkeypatch):
+    _install(monkeypatch)
+
+    assert cloudflare_sync.resolve_zone_id("s1", "example.com") == ("s1", False)
@@ -0,0 +1,120 @@
+import asyncio
+import threading
+
+from app.services.cloudflare_zone_index import CloudflareZoneIndex
+
+
+class FakeAccount:
+    def __init__(self, email, zones):
+        self.account_email = email
+        self.zones = zones
+        self.list_calls = 0
+
+    async def list_zones(self):
+        self.list_calls += 1
+        return list(self.zones)
+
+
+def _zone(zone_id, name, status="pending"):
+    return {"zone_id": zone_id, "name": name, "status": status, "nameservers": ["a.ns", "b.ns"]}
+
+
+def _index(accounts, monkeypatch):
+    index = CloudflareZoneIndex(accounts)
+    index._loaded = True  # skip the DB load
+    persisted = []
+
+    async def fake_persist(idx, changed, gone):
+        persisted.append((idx, [e.zone_id for e in changed], gone))
+
+    monkeypatch.setattr(index, "_persist_account", fake_persist)
+    return index, persisted
+
+
+async def test_lookup_prefers_active_zone_from_any_account(monkeypatch):
+    primary = FakeAccount("one@example.com", [_zone("p1", "Example.com"), _zone("p2", "other.com")])
+    secondary = FakeAccount("two@example.com", [_zone("s1", "example.com", "active")])
+    index, _ = _index([primary, secondary], monkeypatch)
+
+    assert await index.refresh() is True
+
+    assert index.lookup("example.com").zone_id == "s1"
+    assert index.lookup("example.com").account_index == 1
+    assert index.lookup("other.com").zone_id == "p2"
+    assert index.lookup("missing.com") is None
+
+    # Fresh index: no further list calls
+    await index.refresh()
+    assert primary.list_calls == 1
+
+
+async def test_refresh_only_writes_changes(monkeypatch):
+    primary = FakeAccount("one@example.com", [_zone("p1", "a.com"), _zone("p2", "b.com")])
+    index, persisted = _index([primary], monkeypatch)
+    await index.refresh()
+
+    primary.zones = [_zone("p1", "a.com", "active")]
+    await index.refresh(force=True)
+
+    assert persisted[-1] == (0, ["p1"], ["p2"])
+    assert index.get("p2") is None
+    assert index.lookup("a.com").status == "active"
+
+
+async def test_failed_account_leaves_index_incomplete(monkeypatch):
+    class BrokenAccount(FakeAccount):
+        async def list_zones(self):
+            raise RuntimeError("boom")
+
+    index, _ = _index(
+        [FakeAccount("one@example.com", [_zone("p1", "a.com")]), BrokenAccount("two@example.com", [])],
+        monkeypatch,
+    )
+
+    assert await index.refresh() is False
+    assert not index.is_fresh
+    assert index.lookup("a.com").zone_id == "p1"
+
+
+async def test_zone_recorded_during_refresh_is_not_dropped(monkeypatch):
+    index = None
+
+    class SlowAccount(FakeAccount):
+        async def list_zones(self):
+            # A zone is created through the API while the listing is in flight
+            await index.record(0, "new", "new.com", "pending", ["a.ns"])
+            return await super().list_zones()
+
+    index, persisted = _index([SlowAccount("one@example.com", [_zone("p1", "a.com")])], monkeypatch)
+
+    async def fake_persist_entry(entry):
+        pass
+
+    monkeypatch.setattr(index, "_persist_entry", fake_persist_entry)
+
+    await index.refresh()
+
+    assert index.lookup("new.com").zone_id == "new"
+    assert persisted[-1] == (0, ["p1"], [])
+    # Only kept while a listing is in flight
+    assert not index._recorded
+
+
+def test_refresh_is_serialized_across_event_loops(monkeypatch):
+    class SlowAccount(FakeAccount):
+        async def list_zones(self):
+            await asyncio.sleep(0.05)
+            return await super().list_zones()
+
+    account = SlowAccount("one@example.com", [_zone("p1", "a.com")])
+    index, _ = _index([account], monkeypatch)
+
+    # Each thread runs its own loop, like the cloudflare_sync shims
+    threads = [threading.Thread(target=asyncio.run, args=(index.refresh(),)) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert account.list_calls == 1
+    assert index.lookup("a.com").zone_id == "p1"
@@ -0,0 +1,60 @@
+import gzip
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models.mailbox import Mailbox, MailboxStatus, WarmupStage
+from app.models.tenant import Tenant, TenantStatus
+from app.services.csv_export import email_domain, stream_csv
+
+
+async def _seed(session):
+    tenant = Tenant(
+        microsoft_tenant_id="tid", name="t", onmicrosoft_domain="t.onmicrosoft.com", provider="test",
+        admin_email="admin@t.onmicrosoft.com", admin_password="x", status=TenantStatus.IMPORTED,
+    )
+    session.add(tenant)
+    await session.flush()
+    session.add_all([
+        Mailbox(email=email, display_name="Jack, Jr", password="pw", tenant_id=tenant.id,
+                status=MailboxStatus.READY, warmup_stage=list(WarmupStage)[0])
+        for email in ["b@zeta.com", "a@zeta.com", "c@alpha.com", "z@beta.com"]
+    ])
+    await session.commit()
+
+
+async def test_stream_csv_sorts_in_sql_and_chunks_per_batch(test_engine, test_session):
+    await _seed(test_session)
+    factory = async_sessionmaker(bind=test_engine, class_=AsyncSession, expire_on_commit=False)
+    stmt = select(Mailbox.display_name, Mailbox.email).order_by(email_domain(Mailbox.email), Mailbox.email)
+
+    chunks = [
+        chunk async for chunk in stream_csv(
+            stmt, ["DisplayName", "EmailAddress"], lambda mb: [mb.display_name, mb.email],
+            session_factory=factory, batch_size=3,
+        )
+    ]
+
+    # Header first, then one chunk per cursor batch
+    assert len(chunks) == 3
+    assert b"".join(chunks).decode().splitlines() == [
+        "DisplayName,EmailAddress",
+        '"Jack, Jr",c@alpha.com',
+        '"Jack, Jr",z@beta.com',
+        '"Jack, Jr",a@zeta.com',
+        '"Jack, Jr",b@zeta.com',
+    ]
+
+    compressed = b"".join([
+        chunk async for chunk in stream_csv(
+            stmt, ["DisplayName", "EmailAddress"], lambda mb: [mb.display_name, mb.email],
+            session_factory=factory, compress=True,
+        )
+    ])
+    assert gzip.decompress(compressed) == b"".join(chunks)
+
+
+def test_email_domain_uses_split_part_on_postgres():
+    sql = str(select(email_domain(Mailbox.email)).compile(dialect=postgresql.dialect()))
+    assert "split_part(mailboxes.email, '@', 2)" in sql
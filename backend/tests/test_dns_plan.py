@@ -0,0 +1,55 @@
+from app.services.dns_plan import build_plan, dkim_records, m365_email_records, spf_record, verification_txt
+
+
+def _rec(record_id, record_type, name, content, proxied=False, priority=None):
+    return {"id": record_id, "type": record_type, "name": name, "content": content,
+            "proxied": proxied, "priority": priority}
+
+
+def test_plan_creates_missing_and_keeps_matching_records():
+    existing = [
+        _rec("mx1", "MX", "example.com", "example-com.mail.protection.outlook.com", priority=0),
+        _rec("dmarc", "TXT", "_dmarc.example.com", "v=DMARC1; p=none"),
+    ]
+
+    plan = build_plan("z1", "example.com", m365_email_records("example.com"), existing)
+
+    assert [d.label for d in plan.creates] == ["spf", "autodiscover"]
+    assert [d.label for _, d in plan.unchanged] == ["mx"]
+    assert plan.patches == [] and plan.deletes == []
+
+
+def test_plan_patches_one_spf_and_deletes_the_rest():
+    existing = [
+        _rec("s1", "TXT", "example.com", "v=spf1 -all"),
+        _rec("s2", "TXT", "example.com", '"v=spf1 include:old.example ~all"'),
+        _rec("ms", "TXT", "example.com", "MS=ms123"),
+    ]
+
+    plan = build_plan("z1", "example.com", [spf_record()], existing)
+
+    assert [(r["id"], d.label) for r, d in plan.patches] == [("s1", "spf")]
+    assert [r["id"] for r in plan.deletes] == ["s2"]
+    assert plan.creates == []
+
+
+def test_plan_replaces_conflicting_hostname_records_and_fixes_proxied():
+    existing = [
+        _rec("c1", "CNAME", "selector1._domainkey.example.com", "old.target", proxied=True),
+        _rec("a1", "A", "selector2._domainkey.example.com", "1.2.3.4"),
+    ]
+
+    plan = build_plan("z1", "example.com", dkim_records("new1.target", "new2.target"), existing)
+
+    assert [(r["id"], d.content) for r, d in plan.patches] == [("c1", "new1.target")]
+    assert [d.label for d in plan.creates] == ["selector2"]
+    assert [r["id"] for r in plan.deletes] == ["a1"]
+
+
+def test_verification_txt_already_correct_is_a_no_op():
+    existing = [_rec("ms", "TXT", "example.com", "MS=ms123"), _rec("s1", "TXT", "example.com", "v=spf1 -all")]
+
+    plan = build_plan("z1", "example.com", [verification_txt("MS=ms123")], existing)
+
+    assert plan.is_empty
+    assert plan.to_dict()["unchanged"] == ["verification"]
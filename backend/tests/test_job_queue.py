@@ -0,0 +1,200 @@
+import asyncio
+from datetime import timedelta
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models.job import Job, JobStatus
+from app.services import job_queue
+from app.services.job_queue import JobContext, JobRunner, job_handler
+
+
+async def test_lapsed_lease_is_reclaimed_with_its_checkpoint(test_engine, test_session):
+    factory = async_sessionmaker(bind=test_engine, class_=AsyncSession, expire_on_commit=False)
+    job = await job_queue.enqueue(test_session, "test_items", {"items": ["a", "b", "c"]}, key="batch-1")
+    again = await job_queue.enqueue(test_session, "test_items", {"items": []}, key="batch-1")
+    await test_session.commit()
+    assert again.id == job.id
+
+    first = await job_queue.claim("worker-1", ["test_items"], 60, factory)
+    assert (first.id, first.attempts) == (job.id, 1)
+    assert await job_queue.claim("worker-2", ["test_items"], 60, factory) is None
+
+    # worker-1 finishes one item, then dies
+    ctx = JobContext(first)
+    ctx.mark_done("a")
+    assert await job_queue.heartbeat(first.id, "worker-1", 60, checkpoint=ctx.checkpoint, session_factory=factory) is False
+    async with factory() as db:
+        await db.execute(
+            update(Job).where(Job.id == job.id).values(lease_expires_at=first.lease_expires_at - timedelta(seconds=120))
+        )
+        await db.commit()
+
+    second = await job_queue.claim("worker-2", ["test_items"], 60, factory)
+    resumed = JobContext(second)
+    assert (second.attempts, second.lease_owner) == (2, "worker-2")
+    assert resumed.resumed and resumed.is_done("a") and not resumed.is_done("b")
+
+    # The old owner has lost the lease and can no longer write
+    assert await job_queue.heartbeat(first.id, "worker-1", 60, session_factory=factory) is None
+    assert not await job_queue.finish(first.id, "worker-1", JobStatus.SUCCEEDED, session_factory=factory)
+    assert await job_queue.finish(second.id, "worker-2", JobStatus.SUCCEEDED, session_factory=factory)
+
+    # Finished jobs free the key
+    fresh = await job_queue.enqueue(test_session, "test_items", {}, key="batch-1")
+    assert fresh.id != job.id
+
+
+async def test_runner_retries_failed_jobs_then_gives_up(test_engine, test_session, monkeypatch):
+    factory = async_sessionmaker(bind=test_engine, class_=AsyncSession, expire_on_commit=False)
+    monkeypatch.setattr(job_queue, "retry_delay", lambda attempt: 0)
+    monkeypatch.setattr(job_queue, "_handlers", dict(job_queue._handlers))
+    calls = []
+
+    @job_handler("test_flaky")
+    async def _flaky(ctx: JobContext):
+        calls.append(ctx.attempt)
+        ctx.progress = {"attempt": ctx.attempt}
+        if ctx.attempt < 2:
+            raise RuntimeError("boom")
+
+    @job_handler("test_broken")
+    async def _broken(ctx: JobContext):
+        raise RuntimeError("always")
+
+    flaky = await job_queue.enqueue(test_session, "test_flaky", max_attempts=3)
+    broken = await job_queue.enqueue(test_session, "test_broken", max_attempts=2)
+    await test_session.commit()
+
+    runner = JobRunner(kinds=["test_flaky", "test_broken"], session_factory=factory, heartbeat_seconds=5)
+    for _ in range(6):
+        task = await runner.run_once()
+        if task is None:
+            break
+        await task
+        await asyncio.sleep(0)
+
+    await test_session.refresh(flaky)
+    await test_session.refresh(broken)
+    assert calls == [1, 2]
+    assert (flaky.status, flaky.attempts, flaky.progress) == ("succeeded", 2, {"attempt": 2})
+    assert (broken.status, broken.attempts) == ("failed", 2)
+    assert "always" in broken.last_error
+
+
+async def test_cancel_from_another_process_reaches_the_handler(test_engine, test_session, monkeypatch):
+    factory = async_sessionmaker(bind=test_engine, class_=AsyncSession, expire_on_commit=False)
+    monkeypatch.setattr(job_queue, "_handlers", dict(job_queue._handlers))
+    stopped = asyncio.Event()
+
+    @job_handler("test_long")
+    async def _long(ctx: JobContext):
+        ctx.progress = {"step": 1}
+        ctx.on_cancel = stopped.set
+        await asyncio.wait_for(stopped.wait(), timeout=5)
+
+    job = await job_queue.enqueue(test_session, "test_long", key="batch-1")
+    await test_session.commit()
+
+    runner = JobRunner(kinds=["test_long"], session_factory=factory, heartbeat_seconds=0.2)
+    task = await runner.run_once()
+    # Write between heartbeats: the test engine shares one SQLite connection
+    await asyncio.sleep(0.05)
+
+    # The API process only has the row to go on
+    async with factory() as db:
+        await job_queue.request_cancel(db, await db.get(Job, job.id))
+        await db.commit()
+    await task
+
+    latest = await job_queue.get_latest(test_session, "test_long", "batch-1")
+    await test_session.refresh(latest)
+    assert latest.id == job.id
+    assert (latest.status, latest.progress) == ("cancelled", {"step": 1})
+
+
+async def test_each_kind_has_its_own_slots(test_engine, test_session, monkeypatch):
+    factory = async_sessionmaker(bind=test_engine, class_=AsyncSession, expire_on_commit=False)
+    monkeypatch.setattr(job_queue, "_handlers", dict(job_queue._handlers))
+    release = asyncio.Event()
+    ran = []
+
+    @job_handler("test_waiting")
+    async def _waiting(ctx: JobContext):
+        ran.append(ctx.kind)
+        await asyncio.wait_for(release.wait(), timeout=5)
+
+    @job_handler("test_quick")
+    async def _quick(ctx: JobContext):
+        ran.append(ctx.kind)
+
+    for key in ("b1", "b2", "b3"):
+        await job_queue.enqueue(test_session, "test_waiting", key=key, priority=1)
+    await job_queue.enqueue(test_session, "test_quick")
+    await test_session.commit()
+
+    runner = JobRunner(
+        kinds=["test_waiting", "test_quick"], concurrency=1, kind_concurrency={"test_waiting": 2},
+        session_factory=factory, heartbeat_seconds=5,
+    )
+    waiting = [await runner.run_once(runner.claimable_kinds()) for _ in range(2)]
+    await asyncio.sleep(0)
+
+    # Both waiting-kind slots are taken; the quick kind still has its own
+    assert runner.claimable_kinds() == ["test_quick"]
+    quick = await runner.run_once(runner.claimable_kinds())
+    await quick
+    assert ran == ["test_waiting", "test_waiting", "test_quick"]
+
+    release.set()
+    await asyncio.gather(*waiting)
+    await asyncio.sleep(0)
+    assert runner.claimable_kinds() == ["test_waiting", "test_quick"]
+
+
+async def test_secret_payload_keys_are_blanked_when_the_job_ends(test_engine, test_session, monkeypatch):
+    factory = async_sessionmaker(bind=test_engine, class_=AsyncSession, expire_on_commit=False)
+    monkeypatch.setattr(job_queue, "retry_delay", lambda attempt: 0)
+    monkeypatch.setattr(job_queue, "_handlers", dict(job_queue._handlers))
+    seen = []
+
+    @job_handler("test_secret")
+    async def _secret(ctx: JobContext):
+        seen.append(ctx.payload["api_key"])
+        if ctx.attempt < 2:
+            raise RuntimeError("boom")
+
+    job = await job_queue.enqueue(
+        test_session, "test_secret", {"api_key": "sk-1", "batch": "b1"}, max_attempts=2, secret_keys=["api_key"]
+    )
+    queued = await job_queue.enqueue(test_session, "test_secret", {"api_key": "sk-2"}, secret_keys=["api_key"])
+    await test_session.commit()
+    async with factory() as db:
+        await job_queue.request_cancel(db, await db.get(Job, queued.id))
+        await db.commit()
+
+    runner = JobRunner(kinds=["test_secret"], session_factory=factory, heartbeat_seconds=5)
+    for _ in range(2):
+        await (await runner.run_once())
+
+    # The retry still had the key; the finished rows do not
+    assert seen == ["sk-1", "sk-1"]
+    await test_session.refresh(job)
+    await test_session.refresh(queued)
+    assert job.status == "succeeded"
+    assert (job.payload["api_key"], job.payload["batch"]) == (None, "b1")
+    assert (queued.status, queued.payload["api_key"]) == ("cancelled", None)
+
+
+async def test_scheduled_and_manual_dkim_sweeps_share_one_job(test_engine, test_session, monkeypatch):
+    from app.services import background_jobs
+
+    factory = async_sessionmaker(bind=test_engine, class_=AsyncSession, expire_on_commit=False)
+    monkeypatch.setattr(background_jobs, "async_session_factory", factory)
+
+    scheduled = await background_jobs.enqueue_dkim_retry_job()
+    manual = await background_jobs.trigger_dkim_retry_now()
+
+    assert manual == {"status": "queued", "message": "DKIM retry job queued", "job_id": str(scheduled.id)}
+    job = await test_session.get(Job, scheduled.id)
+    assert (job.kind, job.status) == (background_jobs.DKIM_RETRY_SWEEP_JOB, JobStatus.QUEUED.value)
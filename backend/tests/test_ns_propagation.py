@@ -0,0 +1,169 @@
+import asyncio
+from types import SimpleNamespace
+
+import dns.asyncquery
+import dns.flags
+import dns.message
+import dns.rcode
+import dns.resolver
+import dns.rrset
+import pytest
+
+from app.services import ns_propagation
+
+CF_NS = ["ada.ns.cloudflare.com", "bob.ns.cloudflare.com"]
+
+
+def _parents(monkeypatch, delegations):
+    async def fake_parent_servers(parent):
+        assert parent == "com"
+        return [(name, f"ip-{name}") for name in delegations]
+
+    async def fake_query(domain, server_ip):
+        answer = delegations[server_ip.removeprefix("ip-")]
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    monkeypatch.setattr(ns_propagation, "parent_servers", fake_parent_servers)
+    monkeypatch.setattr(ns_propagation, "query_delegation", fake_query)
+
+
+async def test_delegation_propagated_when_every_answering_parent_agrees(monkeypatch):
+    _parents(monkeypatch, {
+        "a.gtld-servers.net": list(CF_NS),
+        "b.gtld-servers.net": list(CF_NS),
+        "c.gtld-servers.net": TimeoutError("timed out"),
+    })
+
+    result = await ns_propagation.check_ns("example.com", ["Bob.ns.cloudflare.com.", "ada.ns.cloudflare.com"], mode="authoritative")
+
+    assert result.propagated
+    assert result.agreeing_servers == ["a.gtld-servers.net", "b.gtld-servers.net"]
+    assert "c.gtld-servers.net" in result.error
+
+
+async def test_delegation_reports_disagreeing_parents(monkeypatch):
+    _parents(monkeypatch, {
+        "a.gtld-servers.net": list(CF_NS),
+        "b.gtld-servers.net": ["ns1.registrar.example"],
+    })
+
+    result = await ns_propagation.check_ns("example.com", CF_NS, mode="authoritative")
+
+    assert not result.propagated
+    assert result.agreeing_servers == ["a.gtld-servers.net"]
+    assert result.current_ns == ["ns1.registrar.example"]
+
+
+async def test_undelegated_domain(monkeypatch):
+    _parents(monkeypatch, {"a.gtld-servers.net": []})
+
+    result = await ns_propagation.check_ns("example.com", CF_NS, mode="authoritative")
+
+    assert not result.propagated and result.error == "not delegated"
+
+
+
+class _StubResolver:
+    """Answers NS/A lookups from a dict; counts them and can hold them until released."""
+
+    def __init__(self, records):
+        self.records = records
+        self.calls = []
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def resolve(self, name, rdtype):
+        self.calls.append((name, rdtype))
+        await self.release.wait()
+        answer = self.records[(name, rdtype)]
+        if isinstance(answer, Exception):
+            raise answer
+        if rdtype == "NS":
+            return [SimpleNamespace(target=target) for target in answer]
+        return [SimpleNamespace(address=address) for address in answer]
+
+
+GTLD_RECORDS = {
+    ("com.", "NS"): ["b.gtld-servers.net.", "a.gtld-servers.net."],
+    ("a.gtld-servers.net", "A"): ["192.5.6.30"],
+    ("b.gtld-servers.net", "A"): dns.resolver.NoAnswer(),
+}
+
+
+async def test_parent_servers_share_one_lookup_per_zone(monkeypatch):
+    resolver = _StubResolver(GTLD_RECORDS)
+    resolver.release.clear()
+    monkeypatch.setattr(ns_propagation, "_parent_servers", {})
+    monkeypatch.setattr(ns_propagation, "get_resolver", lambda: resolver)
+
+    waiting = [asyncio.create_task(ns_propagation.parent_servers("com")) for _ in range(5)]
+    await asyncio.sleep(0)
+    resolver.release.set()
+    results = await asyncio.gather(*waiting)
+
+    # Servers without an address are left out
+    assert results == [[("a.gtld-servers.net", "192.5.6.30")]] * 5
+    assert resolver.calls.count(("com.", "NS")) == 1
+    assert await ns_propagation.parent_servers("com") == results[0]
+    assert resolver.calls.count(("com.", "NS")) == 1
+
+
+async def test_parent_server_failures_are_not_cached(monkeypatch):
+    resolver = _StubResolver({("com.", "NS"): dns.resolver.NoNameservers()})
+    monkeypatch.setattr(ns_propagation, "_parent_servers", {})
+    monkeypatch.setattr(ns_propagation, "get_resolver", lambda: resolver)
+
+    with pytest.raises(dns.resolver.NoNameservers):
+        await ns_propagation.parent_servers("com")
+    resolver.records = GTLD_RECORDS
+    assert await ns_propagation.parent_servers("com") == [("a.gtld-servers.net", "192.5.6.30")]
+
+
+def _parent_answering(monkeypatch, delegated_to, rcode=dns.rcode.NOERROR, truncated=False):
+    """Stub UDP/TCP queries with a referral for example.com from the parent."""
+    sent = []
+
+    def respond(query, transport):
+        assert not query.flags & dns.flags.RD  # the parent is asked non-recursively
+        sent.append(transport)
+        response = dns.message.make_response(query)
+        response.set_rcode(rcode)
+        if truncated and transport == "udp":
+            response.flags |= dns.flags.TC
+            return response
+        if delegated_to:
+            response.authority.append(
+                dns.rrset.from_text_list("example.com.", 172800, "IN", "NS", delegated_to)
+            )
+        return response
+
+    async def fake_udp(query, where, timeout=None):
+        return respond(query, "udp")
+
+    async def fake_tcp(query, where, timeout=None):
+        return respond(query, "tcp")
+
+    monkeypatch.setattr(dns.asyncquery, "udp", fake_udp)
+    monkeypatch.setattr(dns.asyncquery, "tcp", fake_tcp)
+    return sent
+
+
+async def test_query_delegation_reads_the_referral(monkeypatch):
+    _parent_answering(monkeypatch, ["Bob.NS.cloudflare.com.", "ada.ns.cloudflare.com."])
+
+    assert await ns_propagation.query_delegation("example.com", "192.5.6.30") == CF_NS
+
+
+async def test_query_delegation_returns_a_different_delegation_as_is(monkeypatch):
+    sent = _parent_answering(monkeypatch, ["ns1.registrar.example."], truncated=True)
+
+    assert await ns_propagation.query_delegation("example.com", "192.5.6.30") == ["ns1.registrar.example"]
+    assert sent == ["udp", "tcp"]  # retried over TCP after a truncated UDP answer
+
+
+async def test_query_delegation_nxdomain_means_not_delegated(monkeypatch):
+    _parent_answering(monkeypatch, [], rcode=dns.rcode.NXDOMAIN)
+
+    assert await ns_propagation.query_delegation("example.com", "192.5.6.30") == []
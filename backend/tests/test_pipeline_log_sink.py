@@ -0,0 +1,99 @@
+import asyncio
+from uuid import uuid4
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models.batch import SetupBatch
+from app.models.pipeline_log import PipelineLog
+from app.services.pipeline_log_sink import PipelineLogSink
+
+
+async def _logs(session):
+    return (await session.execute(select(PipelineLog).order_by(PipelineLog.created_at))).scalars().all()
+
+
+async def test_sink_batches_writes_and_flushes_on_close(test_engine, test_session):
+    batch = SetupBatch(name="a")
+    test_session.add(batch)
+    await test_session.commit()
+    factory = async_sessionmaker(bind=test_engine, class_=AsyncSession, expire_on_commit=False)
+    sink = PipelineLogSink(session_factory=factory, max_rows=3, max_seconds=60)
+
+    for i in range(4):
+        sink.emit(batch.id, step=1, step_name="Create Zones", item_name=f"d{i}.com", status="completed")
+        await asyncio.sleep(0.05)
+    # Size limit reached: the first three are written, the fourth waits for the timer or close()
+    assert sink.written == 3
+    assert len(await _logs(test_session)) == 3
+
+    await sink.close()
+    logs = await _logs(test_session)
+    assert [log.item_name for log in logs] == ["d0.com", "d1.com", "d2.com", "d3.com"]
+    assert sink.written == 4
+
+
+async def test_close_lets_a_flush_in_progress_finish(test_engine, test_session):
+    batch = SetupBatch(name="a")
+    test_session.add(batch)
+    await test_session.commit()
+    factory = async_sessionmaker(bind=test_engine, class_=AsyncSession, expire_on_commit=False)
+
+    def slow_factory():
+        session = factory()
+        execute = session.execute
+
+        async def slow_execute(*args, **kwargs):
+            await asyncio.sleep(0.1)
+            return await execute(*args, **kwargs)
+
+        session.execute = slow_execute
+        return session
+
+    sink = PipelineLogSink(session_factory=slow_factory, max_rows=1, max_seconds=60)
+    sink.emit(batch.id, step=1, step_name="Create Zones", item_name="d0.com", status="completed")
+    await asyncio.sleep(0.02)
+    assert sink.queued(batch.id) and not sink._pending  # taken by the background flush, not committed
+
+    await sink.close()
+    assert sink.written == 1
+    assert [log.item_name for log in await _logs(test_session)] == ["d0.com"]
+
+
+async def test_sink_drops_only_rows_that_cannot_be_written(test_engine, test_session):
+    batch = SetupBatch(name="a")
+    test_session.add(batch)
+    await test_session.commit()
+    factory = async_sessionmaker(bind=test_engine, class_=AsyncSession, expire_on_commit=False)
+    sink = PipelineLogSink(session_factory=factory, max_rows=100, max_seconds=60)
+
+    sink.emit(batch.id, step=1, step_name="Create Zones", status="started")
+    sink.emit(batch.id, step=1, step_name=None, status="failed")  # violates NOT NULL
+    sink.emit(batch.id, step=2, step_name="Propagation", status="started")
+    await sink.close()
+
+    assert (sink.written, sink.dropped) == (2, 1)
+    assert [log.step for log in await _logs(test_session)] == [1, 2]
+
+
+async def test_activity_log_merges_queued_entries_without_flushing(client, test_engine, test_session, monkeypatch):
+    from app.api.routes import pipeline
+
+    batch = SetupBatch(name="a")
+    test_session.add(batch)
+    await test_session.commit()
+    factory = async_sessionmaker(bind=test_engine, class_=AsyncSession, expire_on_commit=False)
+    sink = PipelineLogSink(session_factory=factory, max_rows=100, max_seconds=60)
+    monkeypatch.setattr(pipeline, "pipeline_log_sink", sink)
+
+    sink.emit(batch.id, step=1, step_name="Create Zones", item_name="old.com", status="completed")
+    await sink.flush()
+    sink.emit(batch.id, step=2, step_name="Propagation", item_name="new.com", status="started")
+    sink.emit(uuid4(), step=2, step_name="Propagation", item_name="other-batch.com", status="started")
+
+    response = await client.get(f"/api/v1/pipeline/{batch.id}/activity-log")
+
+    assert response.status_code == 200
+    assert [log["item_name"] for log in response.json()["logs"]] == ["new.com", "old.com"]
+    assert sink.written == 1  # the GET did not write anything
+    await sink.close()
@@ -0,0 +1,241 @@
+import asyncio
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+from app.services.pipeline_stream import (
+    DONE,
+    READY,
+    WAITING,
+    ItemStream,
+    Stage,
+    error_class,
+    next_stage,
+    step_counts,
+)
+
+
+def _tenant(**kw):
+    fields = dict(
+        id=uuid4(), name="t", custom_domain="a.com", first_login_completed=False, step4_retry_count=0,
+        step6_complete=False, step7_smtp_auth_enabled=False, step7_retry_count=0,
+    )
+    fields.update(kw)
+    return SimpleNamespace(**fields)
+
+
+def _domain(tenant, index, **kw):
+    fields = dict(
+        id=uuid4(), tenant_id=tenant.id, name=f"d{index}.com", domain_index_in_tenant=index,
+        dns_records_created=True, domain_verified_in_m365=False, dkim_enabled=False, step5_skipped=False,
+        step5_retry_count=0, step6_complete=False, step6_skipped=False,
+    )
+    fields.update(kw)
+    return SimpleNamespace(**fields)
+
+
+def test_tenant_moves_through_its_own_steps():
+    tenant = _tenant()
+    first, second = _domain(tenant, 0), _domain(tenant, 1)
+    domains = [second, first]
+
+    def step():
+        state, stage = next_stage(tenant, domains)
+        return (state, stage.step, stage.domain_id) if stage else (state, None, None)
+
+    assert step() == (READY, 5, None)
+    tenant.first_login_completed = True
+    assert step() == (READY, 6, first.id)
+    first.domain_verified_in_m365 = first.dkim_enabled = True
+    assert step() == (READY, 7, first.id)
+    # First domain's mailboxes make the tenant ready for SMTP auth before the second domain is set up
+    first.step6_complete = tenant.step6_complete = True
+    assert step() == (READY, 8, None)
+    tenant.step7_smtp_auth_enabled = True
+    assert step() == (READY, 6, second.id)
+    second.step5_skipped = True
+    assert step() == (DONE, None, None)
+
+
+def test_waiting_on_dns_first_step_and_skipped_steps():
+    tenant = _tenant(first_login_completed=True)
+    domain = _domain(tenant, 0, dns_records_created=False)
+
+    assert next_stage(tenant, [domain], dns_settled=False) == (WAITING, None)
+    assert next_stage(tenant, [domain])[1].step == 6
+    assert next_stage(tenant, [domain], given_up={(str(domain.id), 6)}) == (DONE, None)
+    assert next_stage(tenant, [domain], first_step=7) == (DONE, None)
+    assert next_stage(_tenant(), [domain], first_step=6) == (DONE, None)
+    assert next_stage(_tenant(step4_retry_count=5), [domain]) == (DONE, None)
+
+
+def test_step_counts_split_completed_and_failed():
+    done = _tenant(first_login_completed=True, step6_complete=True, step7_smtp_auth_enabled=True)
+    failed = _tenant(first_login_completed=True, step4_retry_count=5, step7_retry_count=5)
+    domains = [
+        _domain(done, 0, domain_verified_in_m365=True, dkim_enabled=True, step6_complete=True),
+        _domain(failed, 0, step5_skipped=True),
+        _domain(failed, 1, domain_verified_in_m365=True, dkim_enabled=True, step6_skipped=True),
+        SimpleNamespace(tenant_id=None),
+    ]
+
+    counts = step_counts([done, failed], domains)
+    assert counts[5] == {"completed": 1, "failed": 1, "total": 2}
+    assert counts[6] == {"completed": 2, "failed": 1, "total": 3}
+    assert counts[7] == {"completed": 1, "failed": 1, "total": 3}
+    assert counts[8] == {"completed": 1, "failed": 1, "total": 2}
+
+
+async def test_item_stream_limits_steps_and_gives_up_after_retries():
+    items = {f"t{i}": 5 for i in range(4)}  # Item -> step it is on
+    items["bad"] = 6
+    peak = {5: 0, 6: 0}
+    running = {5: 0, 6: 0}
+    attempts = []
+
+    async def run_stage(stage, attempt):
+        running[stage.step] += 1
+        peak[stage.step] = max(peak[stage.step], running[stage.step])
+        await asyncio.sleep(0.01)
+        running[stage.step] -= 1
+        attempts.append((stage.name, attempt))
+        if stage.name == "bad":
+            return False
+        items[stage.name] += 1
+        return True
+
+    stream = ItemStream(run_stage, limits={5: 2, 6: 1}, retry_seconds=0, max_attempts=3, poll_seconds=0.05)
+
+    async def find_stages():
+        ready = [
+            Stage(step, name, name=name) for name, step in items.items()
+            if step < 7 and (name, step) not in stream.given_up
+        ]
+        return ready, 0
+
+    async def stopped():
+        return False
+
+    assert await asyncio.wait_for(stream.run(find_stages, stopped), 5)
+    assert all(step == 7 for name, step in items.items() if name != "bad")
+    assert peak == {5: 2, 6: 1}
+    assert [a for name, a in attempts if name == "bad"] == [1, 2, 3]
+    assert stream.given_up == {("bad", 6)}
+    assert stream.snapshot()["given_up"] == 1
+
+
+async def test_item_stream_counts_attempts_per_domain_of_a_tenant():
+    tenant = _tenant(first_login_completed=True)
+    domains = [_domain(tenant, i) for i in range(6)]
+    broken = domains[2]
+    attempts = []
+
+    async def run_stage(stage, attempt):
+        await asyncio.sleep(0)
+        attempts.append((stage.step, stage.name, attempt))
+        domain = next((d for d in domains if d.id == stage.domain_id), None)
+        if stage.step == 6:
+            # Every domain fails its first M365 setup; d2 never gets through
+            if domain is broken or attempt == 1:
+                return "TimeoutException: M365 admin center"
+            domain.domain_verified_in_m365 = domain.dkim_enabled = True
+        elif stage.step == 7:
+            domain.step6_complete = tenant.step6_complete = True
+        else:
+            tenant.step7_smtp_auth_enabled = True
+        return True
+
+    stream = ItemStream(run_stage, limits={5: 1, 6: 1, 7: 1, 8: 1}, retry_seconds=0, max_attempts=2,
+                        poll_seconds=0.05)
+
+    async def find_stages():
+        state, stage = next_stage(tenant, domains, given_up=stream.given_up)
+        return ([stage] if state == READY else []), 0
+
+    async def stopped():
+        return False
+
+    assert await asyncio.wait_for(stream.run(find_stages, stopped), 5)
+    # Earlier domains' attempts (and their successes) do not count against later ones
+    assert [(name, a) for step, name, a in attempts if step == 6 and name != "d2.com"] == [
+        (d.name, a) for d in domains if d is not broken for a in (1, 2)
+    ]
+    assert all(a == 1 for step, _, a in attempts if step != 6)
+    assert stream.given_up == {(str(broken.id), 6)}
+    # Giving up on d2 leaves the tenant's other domains alone
+    assert all(d.step6_complete for d in domains if d is not broken)
+    assert tenant.step7_smtp_auth_enabled
+
+
+async def test_item_stream_propagates_errors_after_stopping_running_stages():
+    cancelled = []
+
+    async def run_stage(stage, attempt):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(stage.name)
+            raise
+
+    stream = ItemStream(run_stage, limits={5: 2}, poll_seconds=0.01)
+    rounds = []
+
+    async def find_stages():
+        rounds.append(1)
+        if len(rounds) > 1:
+            raise ConnectionError("database went away")
+        return [Stage(5, "a", name="a.com"), Stage(5, "b", name="b.com")], 0
+
+    async def stopped():
+        return False
+
+    with pytest.raises(ConnectionError):
+        await stream.run(find_stages, stopped)
+    # The in-flight stages have finished cancelling by the time run() returns
+    assert sorted(cancelled) == ["a.com", "b.com"]
+    assert all(task.done() for _, task in stream.running.values())
+
+
+async def test_checkpoint_restores_attempts_and_redrives_in_flight_items_first():
+    domain_id = uuid4()
+    first = ItemStream(lambda stage, attempt: asyncio.sleep(10), limits={7: 2, 8: 1})
+    first._start(Stage(7, "a", domain_id, "a.com"))
+    first.attempts[("b", 8)] = 4
+    first.stages["b"] = Stage(8, "b", name="b.com")
+    first.errors["b"] = error_class("TimeoutException: Message: login page")
+    first.given_up.add(("c", 8))
+    first.stages["c"] = Stage(8, "c", name="c.com")
+    items = first.checkpoint()
+    first.running["a"][1].cancel()
+    assert items["a"]["in_flight"] and items["a"]["domain_id"] == str(domain_id)
+    assert items["b"] == {
+        "step": 8, "domain_id": None, "name": "b.com", "in_flight": False,
+        "attempts": {"b": {"8": 4}}, "given_up": {}, "error": "TimeoutException",
+    }
+
+    started = []
+
+    async def run_stage(stage, attempt):
+        started.append((stage.name, attempt))
+        done.add(stage.key)
+        return True if stage.key == "a" else "Failed to enable SMTP auth"
+
+    done = set()
+    resumed = ItemStream(run_stage, limits={7: 1, 8: 1}, retry_seconds=0, max_attempts=5, poll_seconds=0.05)
+    resumed.restore(items)
+    assert resumed.snapshot()["interrupted"] == 1
+
+    async def find_stages():
+        ready = [Stage(8, "b", name="b.com"), Stage(8, "c", name="c.com"), Stage(7, "a", domain_id, "a.com")]
+        return [stage for stage in ready if stage.key not in done], 0
+
+    async def stopped():
+        return False
+
+    assert await asyncio.wait_for(resumed.run(find_stages, stopped), 5)
+    # The interrupted stage keeps its attempt number; b continues from its saved attempts
+    assert started == [("a.com", 1), ("b.com", 5)]
+    assert resumed.given_up == {("b", 8), ("c", 8)}
+    assert resumed.checkpoint()["b"]["error"] == "Failed"
+    assert "a" not in resumed.errors
@@ -0,0 +1,89 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.db import pool_metrics
+from app.db.pool_metrics import (
+    InstrumentedAsyncAdaptedQueuePool,
+    InstrumentedNullPool,
+    InstrumentedQueuePool,
+    PoolAutotuner,
+    instrument_engine,
+    supports_live_resize,
+)
+
+
+def _engine(name, **kw):
+    engine = create_engine("sqlite://", poolclass=InstrumentedQueuePool, pool_size=1, max_overflow=1, **kw)
+    return engine, instrument_engine(name, engine)
+
+
+def test_checkouts_holds_and_connects_are_recorded():
+    engine, metrics = _engine("test_telemetry")
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        assert metrics.in_use == 1
+    with engine.connect() as a, engine.connect() as b:
+        assert metrics.snapshot()["overflow"] == 1
+
+    data = pool_metrics.snapshot()["engines"]["test_telemetry"]
+    assert (data["checkouts"], data["checkins"], data["in_use"], data["peak_in_use"]) == (3, 3, 0, 2)
+    assert data["connections_opened"] == 2
+    assert data["checkout_wait_seconds"]["count"] == 3
+    assert data["hold_seconds"]["count"] == 3
+
+    # dispose() recreates the pool; it keeps reporting into the same metrics
+    engine.dispose()
+    with engine.connect():
+        pass
+    assert metrics.checkouts == 4
+
+
+def test_autotuner_grows_overflow_under_waits_and_shrinks_back():
+    engine, metrics = _engine("test_autotune")
+    tuner = PoolAutotuner(metrics, target_wait=0.1, step=1, ceiling=3, interval=60)
+    pool = metrics.pool
+
+    with engine.connect(), engine.connect():
+        metrics.checkout_wait.observe(2.0)
+        assert tuner.adjust() == 2
+        assert pool._max_overflow == 2
+        # No new observations: nothing to decide on
+        assert tuner.adjust() is None
+
+    metrics.checkout_wait.observe(0.001)
+    assert tuner.adjust() == 1
+    metrics.checkout_wait.observe(0.001)
+    assert tuner.adjust() is None  # never below the configured max_overflow
+
+
+async def test_autotuner_resizes_a_real_async_queue_pool():
+    engine = create_async_engine(
+        "sqlite+aiosqlite://", poolclass=InstrumentedAsyncAdaptedQueuePool,
+        pool_size=1, max_overflow=0, pool_timeout=0.2,
+    )
+    metrics = instrument_engine("test_autotune_async", engine)
+    assert supports_live_resize(metrics.pool)
+    tuner = PoolAutotuner(metrics, target_wait=0.1, step=1, ceiling=2, interval=60)
+
+    async with engine.connect():
+        # At max_overflow=0 a second checkout times out
+        with pytest.raises(PoolTimeoutError):
+            async with engine.connect():
+                pass
+        assert tuner.adjust() == 1
+        # The live pool honours the new limit without being recreated
+        async with engine.connect() as second:
+            assert (await second.execute(text("SELECT 1"))).scalar() == 1
+            assert metrics.pool.overflow() == 1
+    await engine.dispose()
+
+
+def test_autotuner_rejects_pools_it_cannot_resize():
+    engine = create_engine("sqlite://", poolclass=InstrumentedNullPool)
+    metrics = instrument_engine("test_autotune_null", engine)
+
+    assert not supports_live_resize(metrics.pool)
+    with pytest.raises(ValueError):
+        PoolAutotuner(metrics)
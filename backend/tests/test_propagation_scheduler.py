@@ -0,0 +1,30 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.models.domain import Domain
+from app.services.propagation_scheduler import backoff_seconds, schedule_next_check
+
+
+def test_backoff_doubles_until_capped():
+    no_jitter = lambda: 0.5  # midpoint of the jitter range
+    delays = [backoff_seconds(n, no_jitter) for n in range(1, 10)]
+
+    assert delays[:4] == [15.0, 30.0, 60.0, 120.0]
+    assert delays[-1] == 1800.0
+    assert backoff_seconds(0, no_jitter) == 15.0
+
+
+def test_backoff_jitter_stays_in_range():
+    assert backoff_seconds(3, lambda: 0.0) == pytest.approx(48.0)
+    assert backoff_seconds(3, lambda: 1.0) == pytest.approx(72.0)
+
+
+def test_schedule_next_check_counts_attempts():
+    domain = Domain(name="example.com", ns_check_attempts=2)
+    now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+    schedule_next_check(domain, now)
+
+    assert domain.ns_check_attempts == 3
+    assert timedelta(seconds=48) <= domain.ns_next_check_at - now <= timedelta(seconds=72)
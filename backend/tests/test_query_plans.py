@@ -0,0 +1,113 @@
+"""
+Query-plan regression tests for the hot batch/tenant/status access paths.
+
+This is a SQLite proxy for the Postgres plans: it runs SQLite's EXPLAIN QUERY
+PLAN against the test schema, which is built from the models and so carries
+the same index names and columns as migrations 028/030. The partial indexes
+are declared with matching sqlite_where predicates, so the queries below only
+match them when they carry the same predicate Postgres needs. It does not
+cover Postgres cost decisions or the CONCURRENTLY builds.
+
+The tables are empty, so sqlite_stat1 is seeded with the production shape
+(large tables, few rows still pending) to keep SQLite from picking between
+equally cheap indexes by creation order. Each query must then be served by
+exactly the named index, not just any index.
+"""
+
+import pytest
+from sqlalchemy import text
+
+HOT_QUERIES = {
+    "domains by batch + status": (
+        "SELECT count(*) FROM domains WHERE batch_id = :b AND status = 'zone_created'",
+        "ix_domains_batch_id_status",
+    ),
+    "domains due for an NS check": (
+        "SELECT id FROM domains WHERE batch_id = :b AND ns_propagated_at IS NULL "
+        "AND cloudflare_zone_id IS NOT NULL AND ns_next_check_at <= :now",
+        "ix_domains_batch_ns_pending",
+    ),
+    "domains of a tenant": (
+        "SELECT id FROM domains WHERE tenant_id = :t",
+        "ix_domains_tenant_id",
+    ),
+    "tenants by batch + status": (
+        "SELECT id FROM tenants WHERE batch_id = :b AND status = 'imported'",
+        "ix_tenants_batch_id_status",
+    ),
+    "tenants by batch + step6 flag": (
+        "SELECT count(*) FROM tenants WHERE batch_id = :b AND step6_complete = 1",
+        "ix_tenants_batch_id_step6_complete",
+    ),
+    "tenants of a domain": (
+        "SELECT id FROM tenants WHERE domain_id = :d",
+        "ix_tenants_domain_id",
+    ),
+    "mailboxes by batch + status": (
+        "SELECT count(*) FROM mailboxes WHERE batch_id = :b AND status = 'ready'",
+        "ix_mailboxes_batch_id_status",
+    ),
+    "mailboxes of a tenant, by email": (
+        "SELECT id FROM mailboxes WHERE tenant_id = :t ORDER BY email LIMIT 50",
+        "ix_mailboxes_tenant_id_email",
+    ),
+    "mailboxes of a batch, by email": (
+        "SELECT id FROM mailboxes WHERE batch_id = :b ORDER BY email LIMIT 50",
+        "ix_mailboxes_batch_id_email",
+    ),
+    "pending uploads of a batch": (
+        "SELECT id FROM mailboxes WHERE batch_id = :b AND setup_complete "
+        "AND NOT uploaded_to_sequencer ORDER BY email LIMIT 50",
+        "ix_mailboxes_pending_upload",
+    ),
+    "pending uploads, next keyset page": (
+        "SELECT id FROM mailboxes WHERE setup_complete AND NOT uploaded_to_sequencer "
+        "AND (email, id) > (:e, :i) ORDER BY email, id LIMIT 50",
+        "ix_mailboxes_pending_upload_email_id",
+    ),
+    "instantly uploads pending": (
+        "SELECT id FROM mailboxes WHERE batch_id = :b AND NOT instantly_uploaded",
+        "ix_mailboxes_instantly_pending",
+    ),
+    "smartlead uploads pending": (
+        "SELECT id FROM mailboxes WHERE batch_id = :b AND NOT smartlead_uploaded",
+        "ix_mailboxes_smartlead_pending",
+    ),
+    "activity log of a batch": (
+        "SELECT id FROM pipeline_logs WHERE batch_id = :b ORDER BY created_at DESC LIMIT 50",
+        "ix_pipeline_logs_batch_id_created_at",
+    ),
+}
+
+
+PLAN_TABLES = ("domains", "tenants", "mailboxes", "pipeline_logs")
+
+
+async def _seed_index_stats(conn) -> None:
+    """Full indexes cover 100k rows, partial (pending-work) indexes 500."""
+    await conn.execute(text("ANALYZE"))
+    for table in PLAN_TABLES:
+        for index in (await conn.execute(text(f"PRAGMA index_list({table})"))).all():
+            name, partial = index[1], index[4]
+            columns = (await conn.execute(text(f"PRAGMA index_info({name})"))).all()
+            rows = 500 if partial else 100_000
+            stat = " ".join([str(rows)] + [str(rows // 100)] * len(columns))
+            await conn.execute(
+                text("INSERT INTO sqlite_stat1 (tbl, idx, stat) VALUES (:t, :i, :s)"),
+                {"t": table, "i": name, "s": stat},
+            )
+    await conn.execute(text("ANALYZE sqlite_schema"))  # reload the stats
+
+
+@pytest.mark.parametrize("name", list(HOT_QUERIES))
+async def test_hot_query_uses_its_index(test_engine, name):
+    sql, expected_index = HOT_QUERIES[name]
+    params = {"b": "batch", "t": "tenant", "d": "domain", "e": "a@x.com", "i": "id", "now": "2026-01-01"}
+
+    async with test_engine.connect() as conn:
+        await _seed_index_stats(conn)
+        plan = (await conn.execute(text("EXPLAIN QUERY PLAN " + sql), params)).all()
+    details = " | ".join(row[-1] for row in plan)
+
+    assert f"INDEX {expected_index} (" in details, f"{name}: {details}"
+    assert not any(f"SCAN {table}" in details for table in PLAN_TABLES)
@@ -0,0 +1,110 @@
+from sqlalchemy import event, select
+
+from app.models.batch import SetupBatch
+from app.models.domain import Domain, DomainStatus
+from app.models.tenant import Tenant, TenantStatus
+from app.services import tenant_import
+from app.services.tenant_import import TenantImportService
+
+
+def _csv(names):
+    lines = ["Company Name,Tenant ID,Onmicrosoft Domain"]
+    lines += [f"{n},{n}-tid,{n}.onmicrosoft.com" for n in names]
+    return "\n".join(lines)
+
+
+def _credentials(names):
+    return "\n".join(f"admin@{n}.onmicrosoft.com\tPass-{n}" for n in names)
+
+
+def _tenant(name, batch, **fields):
+    return Tenant(
+        microsoft_tenant_id=f"{name}-tid", name=name, onmicrosoft_domain=f"{name}.onmicrosoft.com",
+        provider="test", admin_email=f"admin@{name}.onmicrosoft.com", admin_password="old",
+        batch_id=batch.id, status=TenantStatus.IMPORTED, **fields,
+    )
+
+
+def _count_statements(session, prefix):
+    seen = []
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(prefix):
+            seen.append(statement)
+
+    event.listen(session.bind.sync_engine, "before_cursor_execute", before_execute)
+    return seen
+
+
+async def _batch_with_domains(session, name, count):
+    batch = SetupBatch(name=name)
+    session.add(batch)
+    await session.flush()
+    session.add_all([
+        Domain(name=f"{name}{i}.com", tld="com", batch_id=batch.id, status=DomainStatus.PURCHASED,
+               cloudflare_zone_status="pending")
+        for i in range(count)
+    ])
+    await session.commit()
+    return batch
+
+
+async def test_existing_tenants_are_loaded_in_chunks(test_session, monkeypatch):
+    monkeypatch.setattr(tenant_import, "IMPORT_CHUNK_SIZE", 2)
+    batch = SetupBatch(name="old")
+    test_session.add(batch)
+    await test_session.flush()
+    names = [f"t{i}" for i in range(5)]
+    test_session.add_all([_tenant(n, batch) for n in names])
+    await test_session.commit()
+
+    service = TenantImportService()
+    merged, _, _ = service.merge_data(
+        service.parse_tenant_csv(_csv(names)), service.parse_credentials_txt(_credentials(names))
+    )
+    selects = _count_statements(test_session, "SELECT")
+    by_tid, by_domain = await service._load_existing_tenants(test_session, merged)
+
+    assert len(selects) == 3
+    assert sorted(by_tid) == [f"{n}-tid" for n in names]
+    assert sorted(by_domain) == [f"{n}.onmicrosoft.com" for n in names]
+
+
+async def test_new_tenants_are_inserted_in_chunks(test_session, monkeypatch):
+    monkeypatch.setattr(tenant_import, "IMPORT_CHUNK_SIZE", 2)
+    batch = await _batch_with_domains(test_session, "new", 3)
+    names = ["n0", "n1", "n2"]
+
+    inserts = _count_statements(test_session, "INSERT INTO TENANTS")
+    result = await TenantImportService().import_tenants(
+        test_session, batch.id, _csv(names), _credentials(names), provider="test"
+    )
+
+    assert result["imported"] == 3
+    assert len(inserts) == 2
+    tenants = (await test_session.execute(
+        select(Tenant).where(Tenant.batch_id == batch.id).order_by(Tenant.name)
+    )).scalars().all()
+    assert [(t.name, t.admin_password) for t in tenants] == [(n, f"Pass-{n}") for n in names]
+
+
+async def test_reassigned_tenant_releases_its_old_domain(test_session):
+    old_batch = await _batch_with_domains(test_session, "prev", 1)
+    domain = (await test_session.execute(select(Domain).where(Domain.batch_id == old_batch.id))).scalar_one()
+    tenant = _tenant("moved", old_batch, domain_id=domain.id, custom_domain=domain.name, step6_complete=True)
+    test_session.add(tenant)
+    await test_session.flush()
+    domain.tenant_id = tenant.id
+    await test_session.commit()
+
+    batch = await _batch_with_domains(test_session, "next", 1)
+    result = await TenantImportService().import_tenants(
+        test_session, batch.id, _csv(["moved"]), _credentials(["moved"])
+    )
+
+    assert result["reassigned"] == 1
+    await test_session.refresh(domain)
+    await test_session.refresh(tenant)
+    assert domain.tenant_id is None
+    assert tenant.batch_id == batch.id and tenant.domain_id is None
+    assert tenant.step6_complete is False and tenant.admin_password == "Pass-moved"
@@ -0,0 +1,48 @@
+from app.api.routes.upload import list_mailboxes_for_upload
+from app.models.batch import SetupBatch
+from app.models.mailbox import Mailbox, MailboxStatus, WarmupStage
+from app.models.tenant import Tenant, TenantStatus
+
+
+async def _list(db, **params):
+    defaults = dict(page=1, per_page=10, cursor=None, batch_id=None, tenant_id=None,
+                    upload_status=None, search=None, sequencer_name=None)
+    return await list_mailboxes_for_upload(**{**defaults, **params}, db=db)
+
+
+async def test_cursor_pages_cover_every_row_once_with_joined_names(test_session):
+    batch = SetupBatch(name="Batch A")
+    test_session.add(batch)
+    await test_session.flush()
+    tenant = Tenant(
+        microsoft_tenant_id="tid", name="Tenant A", onmicrosoft_domain="a.onmicrosoft.com", provider="test",
+        admin_email="admin@a.onmicrosoft.com", admin_password="x", status=TenantStatus.IMPORTED,
+    )
+    test_session.add(tenant)
+    await test_session.flush()
+    test_session.add_all([
+        Mailbox(email=f"user{i:02d}@a.com", display_name=f"User {i}", password="pw", tenant_id=tenant.id,
+                batch_id=batch.id if i % 2 else None, status=MailboxStatus.READY,
+                warmup_stage=list(WarmupStage)[0], setup_complete=i < 23, uploaded_to_sequencer=i < 3)
+        for i in range(25)
+    ])
+    await test_session.commit()
+
+    seen, cursor = [], None
+    while True:
+        result = await _list(test_session, cursor=cursor)
+        seen += [item.email for item in result.items]
+        cursor = result.next_cursor
+        if cursor is None:
+            break
+
+    # Default view: ready and not uploaded = user03..user22
+    assert seen == [f"user{i:02d}@a.com" for i in range(3, 23)]
+    assert (result.total, result.filter_ready, result.filter_uploaded, result.filter_pending) == (20, 23, 3, 20)
+    item = result.items[0]
+    assert item.tenant_name == "Tenant A"
+    assert item.batch_name == ("Batch A" if int(item.email[4:6]) % 2 else None)
+
+    by_offset = await _list(test_session, page=2)
+    assert [item.email for item in by_offset.items] == seen[10:20]
+    assert by_offset.next_cursor is None
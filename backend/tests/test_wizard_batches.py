@@ -131,6 +131,29 @@ async def test_batch_status(client: AsyncClient):
     assert data["mailboxes_total"] == 0
 
 
+@pytest.mark.asyncio
+async def test_batch_status_polling_does_not_warn(client: AsyncClient):
+    """The aggregate counters join their per-table subqueries instead of a bare cartesian product."""
+    import warnings
+
+    from sqlalchemy.exc import SAWarning
+
+    create_resp = await client.post("/api/v1/wizard/batches", json={"name": "Polling Test"})
+    batch_id = create_resp.json()["id"]
+    await client.post(
+        f"/api/v1/wizard/batches/{batch_id}/step1/import-domains",
+        files={"file": ("domains.csv", b"domain_name\npolling-test.com", "text/csv")},
+        data={"redirect_url": "https://test.com"}
+    )
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", SAWarning)
+        response = await client.get(f"/api/v1/wizard/batches/{batch_id}/status")
+
+    assert response.status_code == 200
+    assert (response.json()["domains_total"], response.json()["zones_created"]) == (1, 0)
+
+
 @pytest.mark.asyncio
 async def test_batch_status_not_found(client: AsyncClient):
     """Test getting status of a non-existent batch."""
@@ -411,4 +434,39 @@ async def test_batch_step_progression(client: AsyncClient):
     # Should be at step 2
     status2 = await client.get(f"/api/v1/wizard/batches/{batch_id}/status")
     assert status2.json()["current_step"] == 2
-    assert status2.json()["step_name"] == "Create Zones"
\ No newline at end of file
+    assert status2.json()["step_name"] == "Create Zones"
+
+@pytest.mark.asyncio
+async def test_step5_start_queues_one_job_per_batch(client: AsyncClient, test_session):
+    """Step 5 runs Chrome, so the request only queues a job for a runner to claim."""
+    from sqlalchemy import select
+
+    from app.models.batch import SetupBatch
+    from app.models.domain import Domain, DomainStatus
+    from app.models.job import Job, JobStatus
+    from app.models.tenant import Tenant, TenantStatus
+
+    batch = SetupBatch(name="Step 5 Queue")
+    test_session.add(batch)
+    await test_session.flush()
+    domain = Domain(name="step5-queue.com", tld="com", batch_id=batch.id, status=DomainStatus.TENANT_LINKED,
+                    cloudflare_zone_status="active")
+    test_session.add(domain)
+    await test_session.flush()
+    test_session.add(Tenant(
+        microsoft_tenant_id="step5-id", name="step5", onmicrosoft_domain="step5.onmicrosoft.com",
+        provider="test", admin_email="admin@step5.onmicrosoft.com", admin_password="x",
+        batch_id=batch.id, domain_id=domain.id, status=TenantStatus.FIRST_LOGIN_COMPLETE,
+        first_login_completed=True,
+    ))
+    await test_session.commit()
+
+    for _ in range(2):
+        response = await client.post(f"/api/v1/wizard/batches/{batch.id}/step5/start-automation")
+        assert response.json()["success"] is True
+
+    jobs = (await test_session.execute(select(Job).where(Job.kind == "step5_batch"))).scalars().all()
+    assert len(jobs) == 1
+    assert jobs[0].key == str(batch.id) and jobs[0].status == JobStatus.QUEUED.value
+    assert jobs[0].payload["batch_id"] == str(batch.id)
+    assert jobs[0].payload["state"]["total"] == 1
@@ -1,6 +1,6 @@
 "use client";
 
-import React, { useState, useEffect, useCallback } from "react";
+import React, { useState, useEffect, useCallback, useRef } from "react";
 
 const API_BASE = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
 
@@ -54,6 +54,7 @@ interface MailboxListResponse {
   total: number;
   page: number;
   per_page: number;
+  next_cursor: string | null;
   filter_ready: number;
   filter_uploaded: number;
   filter_pending: number;
@@ -118,6 +119,8 @@ export default function UploadManagerPage() {
   const [searchQuery, setSearchQuery] = useState<string>("");
   const [page, setPage] = useState(1);
   const perPage = 50;
+  // Keyset cursor that starts each page reached via "Next" (page -> cursor)
+  const pageCursors = useRef<Record<number, string>>({});
 
   // Selection
   const [selectedIds, setSelectedIds] = useState<Set<string>>(new Set());
@@ -153,13 +156,16 @@ export default function UploadManagerPage() {
       const params = new URLSearchParams();
       params.set("page", String(page));
       params.set("per_page", String(perPage));
+      const cursor = pageCursors.current[page];
+      if (cursor) params.set("cursor", cursor);
       if (uploadStatus) params.set("upload_status", uploadStatus);
       if (batchFilter) params.set("batch_id", batchFilter);
       if (searchQuery) params.set("search", searchQuery);
 
       const res = await fetch(`${API_BASE}/api/v1/upload/mailboxes?${params}`);
       if (res.ok) {
-        const data = await res.json();
+        const data: MailboxListResponse = await res.json();
+        if (data.next_cursor) pageCursors.current[page + 1] = data.next_cursor;
         setMailboxes(data);
       }
     } catch (e) {
@@ -185,6 +191,7 @@ export default function UploadManagerPage() {
 
   // Reset page when filters change
   useEffect(() => {
+    pageCursors.current = {};
     setPage(1);
     setSelectedIds(new Set());
     setSelectAll(false);
@@ -6,6 +6,13 @@ echo " Cold Email Platform - Starting Up"
 echo "=========================================="
 echo ""
 
+# PROCESS_TYPE=worker: run queued automation jobs (app/worker.py) instead of the API.
+# The API service applies migrations; set JOB_RUNNER_ENABLED=false there so it only enqueues.
+if [ "${PROCESS_TYPE:-web}" = "worker" ]; then
+    echo "Starting automation worker"
+    exec python -m app.worker
+fi
+
 run_migrations() {
     echo "[MIGRATIONS] Attempting database migrations..."
 